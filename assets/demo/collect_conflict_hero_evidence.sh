@@ -116,6 +116,10 @@ copy_proof_asset() {
 }
 
 copy_if_exists "$TERMINALS_DIR/activity.jsonl" "$EVIDENCE_DIR/activity.jsonl"
+if [ -d "$TERMINALS_DIR/activity" ]; then
+  mkdir -p "$EVIDENCE_DIR/activity"
+  cp "$TERMINALS_DIR"/activity/*.jsonl "$EVIDENCE_DIR/activity/" 2>/dev/null || true
+fi
 copy_if_exists "$TERMINALS_DIR/conflicts.jsonl" "$EVIDENCE_DIR/conflicts.jsonl"
 
 copy_if_exists "$RECORDING_DIR/worker-a-prompt.txt" "$EVIDENCE_DIR/recording/worker-a-prompt.txt"
@@ -211,7 +215,7 @@ cat > "$EVIDENCE_DIR/README.md" <<EOF
 - Worker B session: ${WORKER_B_ID:-not-provided}
 
 Included bundle contents:
-- activity.jsonl
+- activity.jsonl and activity/ (per-session shards)
 - conflicts.jsonl
 - session JSON receipts
 - inbox JSONL receipts for provided session IDs
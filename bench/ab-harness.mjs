@@ -392,6 +392,40 @@ function collectJsonlDelta(pathValue, beforeSize = 0) {
   };
 }
 
+function listJsonlFiles(dirValue) {
+  try {
+    return readdirSync(dirValue)
+      .filter((name) => name.endsWith('.jsonl'))
+      .map((name) => join(dirValue, name));
+  } catch {
+    return [];
+  }
+}
+
+// Heartbeat activity lives in per-session shards plus the legacy log.
+function activityJsonlPaths(telemetry) {
+  return [...listJsonlFiles(telemetry.activity_dir), telemetry.activity_jsonl];
+}
+
+function snapshotJsonlSizes(paths) {
+  const sizes = new Map();
+  for (const p of paths) {
+    sizes.set(p, existsSync(p) ? statSync(p).size : 0);
+  }
+  return sizes;
+}
+
+function collectJsonlDeltas(paths, beforeSizes) {
+  const merged = { sizeAfter: 0, linesAdded: 0, docs: [] };
+  for (const p of paths) {
+    const delta = collectJsonlDelta(p, beforeSizes.get(p) || 0);
+    merged.sizeAfter += delta.sizeAfter;
+    merged.linesAdded += delta.linesAdded;
+    merged.docs.push(...delta.docs);
+  }
+  return merged;
+}
+
 function parseUsageFromTranscriptDoc(doc) {
   const usage = doc?.message?.usage;
   if (!usage || typeof usage !== 'object') return null;
@@ -1481,9 +1515,13 @@ function buildRunManifest(args) {
   const runDir = resolve(outRoot, runId);
 
   const telemetry = config.telemetry || {};
+  const activityJsonl = expandPath(telemetry.activity_jsonl || '~/.claude/terminals/activity.jsonl', configDir);
   const telemetryResolved = {
     agent_metrics_jsonl: expandPath(telemetry.agent_metrics_jsonl || '~/.claude/hooks/session-state/agent-metrics.jsonl', configDir),
-    activity_jsonl: expandPath(telemetry.activity_jsonl || '~/.claude/terminals/activity.jsonl', configDir),
+    activity_jsonl: activityJsonl,
+    activity_dir: telemetry.activity_dir
+      ? expandPath(telemetry.activity_dir, configDir)
+      : join(dirname(activityJsonl), 'activity'),
     conflicts_jsonl: expandPath(telemetry.conflicts_jsonl || '~/.claude/terminals/conflicts.jsonl', configDir),
     results_dir: expandPath(telemetry.results_dir || '~/.claude/terminals/results', configDir),
     transcript_roots: Array.isArray(telemetry.transcript_roots)
@@ -1708,9 +1746,7 @@ async function executeTrial(manifest, trialNumber, pathEntry, rng) {
   const agentMetricsBeforeSize = existsSync(telemetry.agent_metrics_jsonl)
     ? statSync(telemetry.agent_metrics_jsonl).size
     : 0;
-  const activityBeforeSize = existsSync(telemetry.activity_jsonl)
-    ? statSync(telemetry.activity_jsonl).size
-    : 0;
+  const activityBeforeSizes = snapshotJsonlSizes(activityJsonlPaths(telemetry));
   const conflictsBeforeSize = existsSync(telemetry.conflicts_jsonl)
     ? statSync(telemetry.conflicts_jsonl).size
     : 0;
@@ -1746,7 +1782,7 @@ async function executeTrial(manifest, trialNumber, pathEntry, rng) {
   };
 
   const agentMetricsDelta = collectJsonlDelta(telemetry.agent_metrics_jsonl, agentMetricsBeforeSize);
-  const activityDelta = collectJsonlDelta(telemetry.activity_jsonl, activityBeforeSize);
+  const activityDelta = collectJsonlDeltas(activityJsonlPaths(telemetry), activityBeforeSizes);
   const conflictsDelta = collectJsonlDelta(telemetry.conflicts_jsonl, conflictsBeforeSize);
   const agentMetricsIsolation = isolateAttributedDocs(
     agentMetricsDelta.docs,
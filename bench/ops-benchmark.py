@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Python Ops Layer Benchmark
+
+Generates synthetic ~/.claude trees (audit log, agent metrics, self-heal log,
+hook-metrics histograms and project transcripts) at several record counts and
+times the Python analytics against each:
+
+  1. ops_today          claude-token-guard ops today --refresh --json
+  2. ops_trends_30d     claude-token-guard ops trends --window 30 --json
+  3. ops_session_recap  claude-token-guard ops session-recap --latest --json
+  4. token_guard_report token-guard.py --report --json
+  5. hook_health        hook_health.py
+
+Every run is a fresh subprocess with HOME pointed at the synthetic tree (the
+ops modules resolve their paths from HOME at import), so samples are the
+wall time an operator sees. The ops snapshot/trends caches are removed
+before each run, so every sample is a cold build.
+
+Output: JSON shaped like bench/coord-benchmark.mjs (per-scenario label /
+avg_ms / p50_ms / p95_ms / p99_ms / sample_size, keyed by dataset size),
+plus the generated dataset sizes. --write-latest merges it into
+bench/latest-results.json under "ops_benchmark"; tests/ops-perf-gate.py
+gates on it.
+
+Usage: python3 bench/ops-benchmark.py [--scales 10k,100k,1m] [--runs 3]
+                                      [--keep DIR] [--write-latest]
+Env:   BENCH_OPS_SCALES (default "10k,100k,1m"), BENCH_OPS_RUNS (default 3)
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS_DIR = os.path.join(REPO_ROOT, "hooks")
+CLI = os.path.join(HOOKS_DIR, "claude_token_guard", "cli.py")
+LATEST_RESULTS = os.path.join(REPO_ROOT, "bench", "latest-results.json")
+sys.path.insert(0, HOOKS_DIR)
+
+from guard_contracts import (  # noqa: E402
+    build_audit_entry,
+    build_metrics_lifecycle_entry,
+    build_metrics_usage_entry,
+)
+from hook_utils import HISTOGRAM_SUB_BUCKETS, latency_bucket  # noqa: E402
+
+# Share of the total record count per source.
+MIX = {"audit": 0.60, "metrics": 0.25, "transcript_rows": 0.10, "self_heal": 0.05}
+WINDOW_DAYS = 30
+TRANSCRIPT_ROWS_PER_FILE = 500
+SESSION_RECORDS = 200  # audit records per synthetic session
+HOOKS = ("token-guard", "read-efficiency-guard", "result-compressor", "self-heal")
+
+SCENARIOS = {
+    "ops_today": [CLI, "ops", "today", "--refresh", "--json"],
+    "ops_trends_30d": [CLI, "ops", "trends", "--window", "30", "--json"],
+    "ops_session_recap": [CLI, "ops", "session-recap", "--latest", "--json"],
+    "token_guard_report": [os.path.join(HOOKS_DIR, "token-guard.py"), "--report", "--json"],
+    "hook_health": [os.path.join(HOOKS_DIR, "hook_health.py")],
+}
+
+
+# ── helpers ─────────────────────────────────────────────────────────────────
+
+
+def parse_scale(text):
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    mult = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    return {
+        "label": label,
+        "avg_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(samples[int(len(samples) * 0.5)], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95)], 4),
+        "p99_ms": round(samples[int(len(samples) * 0.99)], 4),
+        "sample_size": len(samples),
+    }
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _timestamps(n, now):
+    """n ascending timestamps spread over the last WINDOW_DAYS days."""
+    start = now - timedelta(days=WINDOW_DAYS)
+    step = (WINDOW_DAYS * 86400) / max(1, n)
+    return (_iso(start + timedelta(seconds=i * step)) for i in range(n))
+
+
+# ── synthetic data ──────────────────────────────────────────────────────────
+
+
+def generate_tree(root, records, seed=7):
+    """Write a synthetic ~/.claude tree under root. Returns dataset counts."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    state = os.path.join(root, ".claude", "hooks", "session-state")
+    projects = os.path.join(root, ".claude", "projects")
+    os.makedirs(state, exist_ok=True)
+    os.makedirs(projects, exist_ok=True)
+    os.makedirs(os.path.join(root, ".claude", "cost"), exist_ok=True)
+
+    counts = {k: int(records * share) for k, share in MIX.items()}
+
+    # Real builders produce one template per record kind; the bulk rows only
+    # vary ts / session / ids, which keeps 1M-record trees quick to write.
+    templates = {
+        event: build_audit_entry(
+            event_type=event,
+            subagent_type=sub,
+            description="synthetic benchmark decision",
+            session_id="bench-template",
+            reason=reason,
+            latency_ms=3,
+        )
+        for event, sub, reason in (
+            ("allow", "general-purpose", ""),
+            ("block", "Explore", "one_per_session limit"),
+            ("warn", "Plan", "necessity_check"),
+        )
+    }
+    events = ["allow"] * 7 + ["block"] * 2 + ["warn"]
+    with open(os.path.join(state, "audit.jsonl"), "w") as f:
+        for i, ts in enumerate(_timestamps(counts["audit"], now)):
+            entry = dict(templates[events[rng.randrange(len(events))]])
+            session = f"s{i // SESSION_RECORDS:07d}"
+            entry.update(
+                ts=ts,
+                session_key=session,
+                session=session,
+                decision_id=f"d{i:011d}",
+            )
+            f.write(json.dumps(entry) + "\n")
+
+    usage_tpl = build_metrics_usage_entry(
+        agent_type="general-purpose",
+        agent_id="agent-template",
+        session_id="bench-template",
+        totals={"input_tokens": 40000, "output_tokens": 6000, "api_calls": 12},
+        cost_usd=0.21,
+    )
+    life_tpl = {
+        ev: build_metrics_lifecycle_entry(
+            event=ev,
+            agent_type="general-purpose",
+            agent_id="agent-template",
+            session_id="bench-template",
+        )
+        for ev in ("start", "stop")
+    }
+    with open(os.path.join(state, "agent-metrics.jsonl"), "w") as f:
+        for i, ts in enumerate(_timestamps(counts["metrics"], now)):
+            kind = ("start", "stop", "usage")[i % 3]
+            entry = dict(usage_tpl if kind == "usage" else life_tpl[kind])
+            session = f"s{(i * 60 // 25) // SESSION_RECORDS:07d}"
+            entry.update(ts=ts, session_key=session, session=session)
+            entry["agent_id"] = f"agent-{i // 3:08d}"
+            if kind == "usage":
+                entry["input_tokens"] = rng.randrange(5000, 90000)
+                entry["output_tokens"] = rng.randrange(500, 12000)
+                entry["total_tokens"] = entry["input_tokens"] + entry["output_tokens"]
+            f.write(json.dumps(entry) + "\n")
+
+    with open(os.path.join(state, "self-heal.jsonl"), "w") as f:
+        for ts in _timestamps(counts["self_heal"], now):
+            f.write(
+                json.dumps(
+                    {
+                        "ts": ts[:-1],
+                        "checks": 42,
+                        "repairs": rng.randrange(3) // 2,
+                        "status": "healthy",
+                        "elapsed_ms": round(rng.uniform(5, 60), 1),
+                        "budget_ms": 150,
+                        "phases": {"state": 4.2, "integrity": 1.1},
+                    }
+                )
+                + "\n"
+            )
+
+    rows = counts["transcript_rows"]
+    files = 0
+    ts_iter = _timestamps(rows, now)
+    for start in range(0, rows, TRANSCRIPT_ROWS_PER_FILE):
+        proj = os.path.join(projects, f"-bench-project-{files % 8}")
+        os.makedirs(proj, exist_ok=True)
+        with open(os.path.join(proj, f"{uuid.UUID(int=files)}.jsonl"), "w") as f:
+            for _ in range(min(TRANSCRIPT_ROWS_PER_FILE, rows - start)):
+                f.write(
+                    json.dumps(
+                        {
+                            "type": "assistant",
+                            "timestamp": next(ts_iter),
+                            "message": {
+                                "role": "assistant",
+                                "usage": {
+                                    "input_tokens": rng.randrange(10, 4000),
+                                    "output_tokens": rng.randrange(10, 2000),
+                                    "cache_read_input_tokens": rng.randrange(0, 60000),
+                                },
+                            },
+                        }
+                    )
+                    + "\n"
+                )
+        files += 1
+
+    # Hook-metrics histograms: fixed size (14 retained days), scaled counts.
+    metrics_dir = os.path.join(state, "hook-metrics")
+    os.makedirs(metrics_dir, exist_ok=True)
+    per_day = max(1, records // (14 * len(HOOKS)))
+    for hook in HOOKS:
+        days = {}
+        for d in range(14):
+            day = (now - timedelta(days=d)).strftime("%Y-%m-%d")
+            hist = {}
+            for ms in (2, 5, 12, 40, 180):
+                key = str(latency_bucket(ms))
+                hist[key] = hist.get(key, 0) + per_day // 5
+            days[day] = {
+                "outcomes": {"success": per_day, "fail_open": per_day // 50},
+                "latency": hist,
+                "max_ms": 180.0,
+            }
+        with open(os.path.join(metrics_dir, f"{hook}.json"), "w") as f:
+            json.dump(
+                {
+                    "schema_version": 1,
+                    "hook": hook,
+                    "days": days,
+                    "sub_buckets": HISTOGRAM_SUB_BUCKETS,
+                },
+                f,
+            )
+
+    size = 0
+    for dirpath, _, names in os.walk(os.path.join(root, ".claude")):
+        size += sum(os.path.getsize(os.path.join(dirpath, n)) for n in names)
+    counts["transcript_files"] = files
+    counts["bytes"] = size
+    return counts
+
+
+# ── measurement ─────────────────────────────────────────────────────────────
+
+
+def _clear_ops_caches(root):
+    cost = os.path.join(root, ".claude", "cost")
+    for name in os.listdir(cost):
+        if name.startswith("ops-"):
+            os.unlink(os.path.join(cost, name))
+
+
+def time_scenario(root, argv, runs):
+    env = os.environ.copy()
+    env["HOME"] = root
+    env["PYTHONPATH"] = HOOKS_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    for key in ("TOKEN_GUARD_STATE_DIR", "TOKEN_GUARD_CONFIG_PATH"):
+        env.pop(key, None)
+    samples = []
+    for _ in range(runs):
+        _clear_ops_caches(root)
+        t0 = time.perf_counter()
+        cp = subprocess.run(
+            [sys.executable, *argv],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=900,
+        )
+        samples.append((time.perf_counter() - t0) * 1000)
+        if cp.returncode != 0:
+            raise RuntimeError(
+                f"{' '.join(argv)} exited {cp.returncode}: {cp.stderr.strip()[-400:]}"
+            )
+    return samples
+
+
+def run(scales, runs, keep=None):
+    result = {
+        "scenarios": {name: {} for name in SCENARIOS},
+        "dataset": {},
+        "runs": runs,
+        "scales": {},
+    }
+    for text in scales:
+        records = parse_scale(text)
+        label = f"size_{text.strip().lower()}"
+        root = keep or tempfile.mkdtemp(prefix="ops-bench-")
+        try:
+            if keep:
+                shutil.rmtree(os.path.join(root, ".claude"), ignore_errors=True)
+            t0 = time.perf_counter()
+            result["dataset"][label] = generate_tree(root, records)
+            result["dataset"][label]["generate_ms"] = round(
+                (time.perf_counter() - t0) * 1000, 1
+            )
+            result["scales"][label] = records
+            for name, argv in SCENARIOS.items():
+                samples = time_scenario(root, argv, runs)
+                result["scenarios"][name][label] = summarize(f"{name}_{label}", samples)
+        finally:
+            if not keep:
+                shutil.rmtree(root, ignore_errors=True)
+    result["generated_at"] = datetime.now(timezone.utc).isoformat().replace(
+        "+00:00", "Z"
+    )
+    return result
+
+
+def write_latest(bench, path=LATEST_RESULTS):
+    """Merge the ops benchmark into latest-results.json (same top-level shape)."""
+    try:
+        with open(path) as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        doc = {}
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = doc.get("commit", "")
+    doc.update(
+        generated_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        commit=commit,
+        platform=platform.platform(),
+        python=platform.python_version(),
+    )
+    doc["ops_benchmark"] = bench
+    with open(path, "w") as f:
+        f.write(json.dumps(doc, indent=2) + "\n")
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="ops-benchmark.py")
+    ap.add_argument(
+        "--scales", default=os.environ.get("BENCH_OPS_SCALES", "10k,100k,1m")
+    )
+    ap.add_argument(
+        "--runs", type=int, default=int(os.environ.get("BENCH_OPS_RUNS", "3"))
+    )
+    ap.add_argument("--keep", help="generate into DIR and leave it in place")
+    ap.add_argument("--write-latest", action="store_true")
+    args = ap.parse_args()
+
+    scales = [s for s in args.scales.split(",") if s.strip()]
+    bench = run(scales, max(1, args.runs), keep=args.keep)
+    if args.write_latest:
+        write_latest(bench)
+    print(json.dumps(bench, indent=2))
+
+
+if __name__ == "__main__":
+    main()
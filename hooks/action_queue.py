@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""Mandatory-actions queue with a pending index.
+
+auto-review-dispatch.py and build-chain-dispatcher.py enqueue actions that
+check-inbox.sh re-delivers on every tool call of the session that triggered
+them until they are completed.
+
+Layout (session-state/):
+    mandatory-actions.jsonl          append-only log: action records, then
+                                     {"op": "update", "id", "fields", "ts"}
+                                     records for status / chain_id changes
+    mandatory-actions.pending.json   index of pending actions:
+                                     {"pending": {id: {"offset", "created",
+                                                       "session", "patch"}},
+                                      "done": <completed since compaction>}
+    mandatory-actions.pending.d/     one empty marker per session (sid8) with
+                                     pending actions; "_all" for actions
+                                     enqueued without a session
+
+Actions record the session_id of the hook call that enqueued them and are
+delivered only to that session (unscoped actions go to every session). The
+index and markers exist only while something is pending, so "nothing pending
+for this session" is two stats. Readers seek straight to pending records by
+byte offset.
+When the last pending action completes the log is truncated; otherwise
+completed entries are dropped by compact(), which self-heal runs at session
+start. Every write holds the log's .lock.
+
+CLI (used by check-inbox.sh and for manual completion):
+    action_queue.py pending [--json] [--session SESSION_ID]
+    action_queue.py done <action_id> [...]
+    action_queue.py compact
+"""
+
+import calendar
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_utils import load_json_state, lock, save_json_state, unlock  # noqa: E402
+
+QUEUE_DIR = os.environ.get(
+    "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
+)
+QUEUE_FILE = os.path.join(QUEUE_DIR, "mandatory-actions.jsonl")
+
+DONE_STATUSES = frozenset({"done", "completed", "cancelled", "failed"})
+PENDING_TTL_SECONDS = 24 * 3600  # undelivered-for-a-day actions expire
+DONE_HINT = "python3 ~/.claude/hooks/action_queue.py done"
+ALL_SESSIONS = "_all"
+_SESSION_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def index_path(queue_file: str = QUEUE_FILE) -> str:
+    """Pending-index path for a queue log (foo.jsonl → foo.pending.json)."""
+    base = queue_file[:-6] if queue_file.endswith(".jsonl") else queue_file
+    return base + ".pending.json"
+
+
+def markers_dir(queue_file: str = QUEUE_FILE) -> str:
+    """Per-session pending markers (foo.jsonl → foo.pending.d/)."""
+    return index_path(queue_file)[: -len(".json")] + ".d"
+
+
+def session_tag(session_id: str) -> str:
+    """Marker name for a session: the sid8 check-inbox.sh uses, or ALL_SESSIONS."""
+    session_id = str(session_id or "")
+    return session_id[:8] if _SESSION_RE.match(session_id) else ALL_SESSIONS
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _epoch(ts: str) -> float:
+    try:
+        return float(calendar.timegm(time.strptime(ts, "%Y-%m-%dT%H:%M:%SZ")))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _expired(entry: Dict, now: float) -> bool:
+    return now - float(entry.get("created", now)) > PENDING_TTL_SECONDS
+
+
+def _load_index(queue_file: str) -> Dict:
+    index = load_json_state(index_path(queue_file))
+    if not isinstance(index.get("pending"), dict):
+        index = {"schema_version": 1, "pending": {}, "done": 0}
+    return index
+
+
+def _sync_markers(queue_file: str, index: Dict) -> None:
+    """Make the marker directory match the sessions with pending actions."""
+    directory = markers_dir(queue_file)
+    wanted = {
+        str(e.get("session") or ALL_SESSIONS) for e in index["pending"].values()
+    }
+    try:
+        present = set(os.listdir(directory))
+    except FileNotFoundError:
+        present = set()
+    if wanted and not present:
+        os.makedirs(directory, exist_ok=True)
+    for tag in wanted - present:
+        open(os.path.join(directory, tag), "w").close()
+    for tag in present - wanted:
+        try:
+            os.unlink(os.path.join(directory, tag))
+        except OSError:
+            pass
+
+
+def _save_index(queue_file: str, index: Dict) -> None:
+    """Persist the index and markers; once nothing is pending, drop both and
+    empty the log.
+
+    With no pending actions every logged record is finished, so truncating
+    the log is a complete (O(1)) compaction.
+    """
+    path = index_path(queue_file)
+    _sync_markers(queue_file, index)
+    if index["pending"]:
+        save_json_state(path, index)
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    if index.get("done"):
+        open(queue_file, "w").close()
+
+
+def _append(queue_file: str, record: Dict) -> int:
+    """Append one record to the log; returns its byte offset."""
+    with open(queue_file, "ab") as f:
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write((json.dumps(record) + "\n").encode("utf-8"))
+    return offset
+
+
+class _Locked:
+    """Hold the queue's .lock for a read-modify-write of log + index."""
+
+    def __init__(self, queue_file: str):
+        self.path = queue_file + ".lock"
+
+    def __enter__(self):
+        self.f = open(self.path, "w")
+        lock(self.f)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            unlock(self.f)
+        finally:
+            self.f.close()
+
+
+def enqueue(
+    action_type: str,
+    instruction: str,
+    context: str = "",
+    chain_id: str = "",
+    queue_file: Optional[str] = None,
+    action_id: str = "",
+    session_id: str = "",
+) -> Dict:
+    """Append a pending action and index it. Returns the action record.
+
+    action_id is generated unless the caller already recorded one elsewhere
+    (chain_store assigns next-step ids when it advances a chain). session_id
+    is the hook payload's: only that session is asked to act on it.
+    """
+    queue_file = queue_file or QUEUE_FILE
+    os.makedirs(os.path.dirname(queue_file) or ".", exist_ok=True)
+    action = {
+        "id": action_id
+        or f"{action_type}-{int(time.time())}-{uuid.uuid4().hex[:6]}",
+        "type": action_type,
+        "instruction": instruction,
+        "context": context,
+        "created_at": _now(),
+        "status": "pending",
+    }
+    if chain_id:
+        action["chain_id"] = chain_id
+    if _SESSION_RE.match(str(session_id or "")):
+        action["session_id"] = session_id
+    with _Locked(queue_file):
+        offset = _append(queue_file, action)
+        index = _load_index(queue_file)
+        index["pending"][action["id"]] = {
+            "offset": offset,
+            "created": int(time.time()),
+            "session": session_tag(session_id),
+            "patch": {},
+        }
+        _save_index(queue_file, index)
+    return action
+
+
+def update_action(action_id: str, queue_file: Optional[str] = None, **fields) -> bool:
+    """Record a field change (status, chain_id, ...) as an append-only update.
+
+    A status in DONE_STATUSES removes the action from the pending index.
+    Returns False if the action is not pending.
+    """
+    queue_file = queue_file or QUEUE_FILE
+    if not os.path.isfile(queue_file):
+        return False
+    with _Locked(queue_file):
+        index = _load_index(queue_file)
+        entry = index["pending"].get(action_id)
+        if entry is None:
+            return False
+        _append(
+            queue_file,
+            {"op": "update", "id": action_id, "fields": fields, "ts": _now()},
+        )
+        if fields.get("status") in DONE_STATUSES:
+            del index["pending"][action_id]
+            index["done"] = int(index.get("done", 0)) + 1
+        else:
+            entry.setdefault("patch", {}).update(fields)
+        _save_index(queue_file, index)
+    return True
+
+
+def complete_action(action_id: str, queue_file: Optional[str] = None) -> bool:
+    return update_action(action_id, queue_file, status="done", completed_at=_now())
+
+
+def complete_pending(
+    action_types, queue_file: Optional[str] = None, session_id: Optional[str] = None
+) -> int:
+    """Complete every pending action of the given types (for one session, if
+    given). Returns the count."""
+    done = 0
+    for action in pending_actions(queue_file, session_id):
+        if action.get("type") in action_types and complete_action(
+            action["id"], queue_file
+        ):
+            done += 1
+    return done
+
+
+def pending_actions(
+    queue_file: Optional[str] = None, session_id: Optional[str] = None
+) -> List[Dict]:
+    """Pending actions in enqueue order, read by offset (no full scan).
+
+    With a session_id, only that session's actions and unscoped ones.
+    """
+    queue_file = queue_file or QUEUE_FILE
+    path = index_path(queue_file)
+    if not os.path.isfile(path):
+        return []
+    pending = load_json_state(path).get("pending")
+    if not isinstance(pending, dict) or not pending:
+        return []
+    tags = {session_tag(session_id), ALL_SESSIONS} if session_id else None
+    expired = False
+    out = []
+    now = time.time()
+    try:
+        with open(queue_file, "rb") as f:
+            for action_id, entry in sorted(
+                pending.items(), key=lambda kv: kv[1].get("offset", 0)
+            ):
+                if _expired(entry, now):
+                    expired = True
+                    continue
+                tag = entry.get("session") or ALL_SESSIONS
+                if tags is not None and tag not in tags:
+                    continue
+                f.seek(int(entry.get("offset", 0)))
+                try:
+                    action = json.loads(f.readline())
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(action, dict) or action.get("id") != action_id:
+                    continue  # stale index (log replaced underneath)
+                action.update(entry.get("patch") or {})
+                out.append(action)
+    except OSError:
+        return []
+    if expired:
+        compact(queue_file)  # drop them so their markers stop costing a pass
+    return out
+
+
+def compact(queue_file: Optional[str] = None, force: bool = False) -> int:
+    """Rewrite the log with only pending actions (updates folded in).
+
+    Pending actions older than PENDING_TTL_SECONDS are expired. Also
+    rebuilds the index from the log, so it recovers from a missing or stale
+    index (e.g. a queue written before the index existed). No-op unless
+    something completed or expired since the last compaction, or force=True.
+    Returns the number of records dropped.
+    """
+    queue_file = queue_file or QUEUE_FILE
+    try:
+        if os.path.getsize(queue_file) == 0:
+            return 0
+    except OSError:
+        # Log gone (e.g. TTL cleanup): an index left behind points at nothing.
+        try:
+            os.unlink(index_path(queue_file))
+        except OSError:
+            pass
+        _sync_markers(queue_file, {"pending": {}})
+        return 0
+    now = time.time()
+    with _Locked(queue_file):
+        index = _load_index(queue_file)
+        indexed = os.path.isfile(index_path(queue_file))
+        stale = any(_expired(e, now) for e in index["pending"].values())
+        if indexed and not index.get("done") and not stale and not force:
+            return 0
+        actions: Dict[str, Dict] = {}
+        records = 0
+        with open(queue_file, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(rec, dict):
+                    continue
+                records += 1
+                if rec.get("op") == "update":
+                    target = actions.get(rec.get("id"))
+                    if target is not None and isinstance(rec.get("fields"), dict):
+                        target.update(rec["fields"])
+                elif rec.get("id"):
+                    actions[rec["id"]] = rec
+        keep = [
+            a
+            for a in actions.values()
+            if a.get("status") not in DONE_STATUSES
+            and now - _epoch(a.get("created_at", "")) <= PENDING_TTL_SECONDS
+        ]
+        tmp = queue_file + ".compact.tmp"
+        new_index = {"schema_version": 1, "pending": {}, "done": 0}
+        with open(tmp, "wb") as out:
+            for action in keep:
+                entry = {
+                    "offset": out.tell(),
+                    "created": int(_epoch(action.get("created_at", ""))),
+                    "session": session_tag(action.get("session_id", "")),
+                    "patch": {},
+                }
+                new_index["pending"][action["id"]] = entry
+                out.write((json.dumps(action) + "\n").encode("utf-8"))
+        os.replace(tmp, queue_file)
+        _save_index(queue_file, new_index)
+    return records - len(keep)
+
+
+def render_pending(actions: List[Dict]) -> str:
+    """Text block check-inbox.sh prints before each tool call."""
+    lines = ["--- MANDATORY ACTIONS PENDING ---"]
+    for action in actions:
+        lines.append(f"[{action['id']}]")
+        lines.append(str(action.get("instruction", "")))
+        lines.append(f"When complete, run: {DONE_HINT} {action['id']}")
+    lines.append("--- END MANDATORY ACTIONS ---")
+    return "\n".join(lines)
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__.strip().split("CLI", 1)[-1], file=sys.stderr)
+        return 1
+    cmd, args = argv[0], argv[1:]
+    if cmd == "pending":
+        session_id = None
+        if "--session" in args and args.index("--session") + 1 < len(args):
+            session_id = args[args.index("--session") + 1]
+        actions = pending_actions(session_id=session_id)
+        if "--json" in args:
+            print(json.dumps(actions, indent=2))
+        elif actions:
+            print(render_pending(actions))
+        return 0
+    if cmd == "done":
+        missing = [a for a in args if not complete_action(a)]
+        for action_id in missing:
+            print(f"not pending: {action_id}", file=sys.stderr)
+        return 1 if missing else 0
+    if cmd == "compact":
+        print(f"dropped {compact(force=True)} record(s)")
+        return 0
+    print(f"unknown command: {cmd}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
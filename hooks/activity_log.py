@@ -0,0 +1,233 @@
+"""
+Per-session sharded activity log for ~/.claude/terminals.
+
+The heartbeat used to append every tool call from every session to one
+activity.jsonl under one global lock. Now each session appends to its own
+shard, so concurrent sessions never contend:
+
+    terminals/activity/{sid8}.jsonl        current shard (one JSON line per event)
+    terminals/activity/{sid8}.jsonl.1      previous shard (after rotation)
+    terminals/activity/{sid8}.jsonl.lock   per-shard append lock
+    terminals/activity/index.json          compact index
+
+A shard is rotated to `.1` once it would exceed SHARD_MAX_BYTES, replacing
+the previous `.1`, so each session is bounded to 2 x SHARD_MAX_BYTES. The
+index is written from the heartbeat's rate-limited path and on rotation, not
+per event:
+
+    {"schema_version": 1,
+     "sessions": {sid8: {"last_ts", "bytes", "rotations"}}}
+
+Readers that want recent activity use read_recent(), which reads only the
+tails of the relevant shards (by session, or modified since a cutoff). The
+legacy terminals/activity.jsonl is still read, for records written before
+sharding and for low-frequency writers (teammate-lifecycle.sh).
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_utils import (  # noqa: E402
+    load_json_state,
+    lock,
+    read_tail_lines,
+    save_json_state,
+    unlock,
+)
+
+SHARD_MAX_BYTES = 256 * 1024
+RETAIN_SECONDS = 7 * 86400
+INDEX_NAME = "index.json"
+LEGACY_NAME = "activity.jsonl"
+
+
+def activity_dir(terminals: str) -> str:
+    return os.path.join(terminals, "activity")
+
+
+def shard_path(terminals: str, sid8: str) -> str:
+    return os.path.join(activity_dir(terminals), f"{sid8}.jsonl")
+
+
+def append_activity(terminals: str, sid8: str, record: Dict) -> Optional[int]:
+    """Append one record to the session's shard, rotating at SHARD_MAX_BYTES.
+
+    Returns the shard's size after the append (None on error). Only this
+    session's shard lock is taken.
+    """
+    path = shard_path(terminals, sid8)
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                rotated = False
+                if size and size + len(line) > SHARD_MAX_BYTES:
+                    os.replace(path, path + ".1")
+                    rotated = True
+                with open(path, "ab") as f:
+                    f.write(line)
+                    size = f.tell()
+            finally:
+                unlock(lf)
+    except OSError:
+        return None
+    if rotated:
+        update_index(terminals, sid8, record.get("ts", ""), size, rotated=True)
+    return size
+
+
+def update_index(
+    terminals: str,
+    sid8: str,
+    last_ts: str,
+    size: Optional[int] = None,
+    rotated: bool = False,
+) -> None:
+    """Record a shard's last event time (and size) in the compact index."""
+    index_file = os.path.join(activity_dir(terminals), INDEX_NAME)
+    if size is None:
+        try:
+            size = os.path.getsize(shard_path(terminals, sid8))
+        except OSError:
+            size = 0
+    try:
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        with open(index_file + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                index = load_json_state(index_file)
+                sessions = index.get("sessions")
+                if not isinstance(sessions, dict):
+                    sessions = {}
+                entry = sessions.get(sid8)
+                entry = entry if isinstance(entry, dict) else {"rotations": 0}
+                entry["last_ts"] = last_ts
+                entry["bytes"] = size
+                if rotated:
+                    entry["rotations"] = int(entry.get("rotations", 0)) + 1
+                sessions[sid8] = entry
+                save_json_state(index_file, {"schema_version": 1, "sessions": sessions})
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def read_index(terminals: str) -> Dict[str, Dict]:
+    sessions = load_json_state(os.path.join(activity_dir(terminals), INDEX_NAME)).get(
+        "sessions"
+    )
+    return sessions if isinstance(sessions, dict) else {}
+
+
+def prune_shards(terminals: str, now: Optional[float] = None) -> int:
+    """Delete shards not written for RETAIN_SECONDS; returns shards removed."""
+    now = time.time() if now is None else now
+    directory = activity_dir(terminals)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    removed = []
+    for name in names:
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) <= RETAIN_SECONDS:
+                continue
+            for suffix in ("", ".1", ".lock"):
+                try:
+                    os.unlink(path + suffix)
+                except FileNotFoundError:
+                    pass
+        except OSError:
+            continue
+        removed.append(name[: -len(".jsonl")])
+    if removed:
+        index_file = os.path.join(directory, INDEX_NAME)
+        try:
+            with open(index_file + ".lock", "w") as lf:
+                lock(lf)
+                try:
+                    index = load_json_state(index_file)
+                    sessions = index.get("sessions")
+                    if isinstance(sessions, dict):
+                        for sid8 in removed:
+                            sessions.pop(sid8, None)
+                        save_json_state(index_file, index)
+                finally:
+                    unlock(lf)
+        except OSError:
+            pass
+    return len(removed)
+
+
+def _parse_lines(lines: Iterable[str]) -> List[Dict]:
+    out = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict):
+            out.append(entry)
+    return out
+
+
+def read_recent(
+    terminals: str,
+    limit: int = 200,
+    sessions: Optional[Iterable[str]] = None,
+    since_epoch: Optional[float] = None,
+) -> List[Dict]:
+    """The newest `limit` activity records, oldest first.
+
+    Reads the tail of each relevant shard plus the legacy log. `sessions`
+    restricts to those sid8 shards; `since_epoch` skips shards not modified
+    since then.
+    """
+    directory = activity_dir(terminals)
+    wanted = set(sessions) if sessions is not None else None
+    paths = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith(".jsonl"):
+            continue
+        if wanted is not None and name[: -len(".jsonl")] not in wanted:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if since_epoch is not None and mtime < since_epoch:
+            continue
+        paths.append(path)
+    paths.append(os.path.join(terminals, LEGACY_NAME))
+
+    records: List[Dict] = []
+    for path in paths:
+        entries = _parse_lines(read_tail_lines(path, limit))
+        if path.endswith(LEGACY_NAME) and wanted is not None:
+            entries = [e for e in entries if str(e.get("session", "")) in wanted]
+        records.extend(entries)
+    records.sort(key=lambda e: str(e.get("ts", "")))
+    return records[-limit:]
@@ -13,9 +13,10 @@ import os
 from datetime import datetime, timezone
 from typing import Any, Dict, Tuple
 
+from agent_lifecycle import lookup_start
 from guard_contracts import build_metrics_usage_entry
 from guard_normalize import normalize_subagent_type, normalize_text
-from hook_utils import locked_append, read_jsonl_fault_tolerant
+from hook_utils import locked_append
 
 METRICS_DIR = os.path.expanduser("~/.claude/hooks/session-state")
 METRICS_FILE = os.path.join(METRICS_DIR, "agent-metrics.jsonl")
@@ -26,8 +27,14 @@ COST_PER_1K_OUTPUT = 0.015  # $15/M output
 COST_PER_1K_CACHE_READ = 0.0003  # $0.30/M cache read (90% discount)
 
 
-def parse_transcript(transcript_path: str) -> Tuple[dict, Dict[str, Any]]:
-    """Parse a subagent transcript JSONL and sum token usage."""
+def parse_transcript(
+    transcript_path: str, observer: Any = None
+) -> Tuple[dict, Dict[str, Any]]:
+    """Parse a subagent transcript JSONL and sum token usage.
+
+    If given, `observer.feed(entry)` sees every parsed entry in the same pass
+    (used for token-estimate calibration).
+    """
     totals = {
         "input_tokens": 0,
         "output_tokens": 0,
@@ -57,6 +64,9 @@ def parse_transcript(transcript_path: str) -> Tuple[dict, Dict[str, Any]]:
                     quality["usage_records_skipped"] += 1
                     continue
 
+                if observer is not None and isinstance(entry, dict):
+                    observer.feed(entry)
+
                 msg = entry.get("message", {})
                 if not isinstance(msg, dict):
                     quality["usage_records_skipped"] += 1
@@ -97,41 +107,30 @@ def calculate_cost(totals: dict) -> float:
 
 
 def correlate_decision(agent_id: str) -> Tuple[str, bool]:
-    """Best-effort correlation using lifecycle start records in agent-metrics.jsonl."""
-    if not os.path.isfile(METRICS_FILE) or not agent_id:
+    """Best-effort correlation using the lifecycle start record for agent_id."""
+    if not agent_id:
         return "", False
     try:
-        entries = read_jsonl_fault_tolerant(METRICS_FILE)
+        start = lookup_start(agent_id, metrics_file=METRICS_FILE)
     except Exception:
         return "", False
-    for entry in reversed(entries):
-        if str(entry.get("agent_id", "")) != str(agent_id):
-            continue
-        if entry.get("event") != "start":
-            continue
-        decision_id = normalize_text(entry.get("decision_id", ""), max_len=32)
-        if decision_id:
-            return decision_id, True
-        return "", False
+    decision_id = normalize_text((start or {}).get("decision_id", ""), max_len=32)
+    if decision_id:
+        return decision_id, True
     return "", False
 
 
 def lookup_agent_type_from_start(agent_id: str) -> str:
     """Recover agent_type from lifecycle start record when SubagentStop payload is empty."""
-    if not os.path.isfile(METRICS_FILE) or not agent_id:
+    if not agent_id:
         return ""
     try:
-        entries = read_jsonl_fault_tolerant(METRICS_FILE)
+        start = lookup_start(agent_id, metrics_file=METRICS_FILE)
     except Exception:
         return ""
-    for entry in reversed(entries):
-        if str(entry.get("agent_id", "")) != str(agent_id):
-            continue
-        if entry.get("event") != "start":
-            continue
-        at = normalize_subagent_type(entry.get("agent_type", ""))
-        if at and at != "unknown":
-            return at
+    at = normalize_subagent_type((start or {}).get("agent_type", ""))
+    if at and at != "unknown":
+        return at
     return ""
 
 
@@ -157,7 +156,13 @@ def main():
         agent_type = lookup_agent_type_from_start(agent_id) or "unknown"
 
     # Parse real token usage from transcript
-    totals, quality = parse_transcript(transcript_path)
+    try:
+        from token_calibration import CalibrationObserver
+
+        observer = CalibrationObserver()
+    except Exception:
+        observer = None
+    totals, quality = parse_transcript(transcript_path, observer=observer)
     cost = calculate_cost(totals)
     decision_id, correlated = correlate_decision(agent_id)
 
@@ -181,6 +186,15 @@ def main():
 
     locked_append(METRICS_FILE, json.dumps(metric) + "\n")
 
+    # Learn per-content-class chars-per-token and per-agent usage (non-fatal)
+    if observer is not None:
+        try:
+            from token_calibration import update_calibration
+
+            update_calibration(observer.close(), agent_type, totals)
+        except Exception:
+            pass
+
     # Auto-truncate
     try:
         with open(METRICS_FILE, "r") as f:
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Agent lifecycle metrics — SubagentStart/SubagentStop handler.
+
+agent-lifecycle.sh execs this module. One process parses the payload,
+normalizes the ids via guard_normalize/guard_contracts, and appends a
+lifecycle record to agent-metrics.jsonl:
+
+  SubagentStart: consumes the newest unconsumed pending_spawns entry of the
+      same agent type from token-guard's session state
+      (hook_utils.consume_pending_spawn) and stamps its decision_id on the
+      start record.
+  SubagentStop:  looks up the start record to fill in decision_id and
+      duration_seconds (duration_known=false when there is no start).
+
+Start records are indexed in session-state/agent-lifecycle-index.json:
+
+    {"schema_version": 1,
+     "starts": {agent_id: {"ts", "epoch", "agent_type", "decision_id",
+                           "session_key"}}}
+
+so SubagentStop (here and in agent-metrics.py) is a dict lookup instead of a
+scan of agent-metrics.jsonl. The index keeps the newest INDEX_MAX_ENTRIES
+agents; lookup_start() falls back to the log tail for agents it does not
+hold (e.g. started before the index existed).
+"""
+
+import calendar
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from guard_contracts import build_metrics_lifecycle_entry  # noqa: E402
+from guard_normalize import (  # noqa: E402
+    normalize_session_key,
+    normalize_subagent_type,
+    normalize_text,
+)
+from hook_utils import (  # noqa: E402
+    consume_pending_spawn,
+    load_json_state,
+    lock,
+    locked_append,
+    read_tail_lines,
+    save_json_state,
+    unlock,
+)
+
+METRICS_DIR = os.path.expanduser("~/.claude/hooks/session-state")
+METRICS_FILE = os.path.join(METRICS_DIR, "agent-metrics.jsonl")
+INDEX_FILE = os.path.join(METRICS_DIR, "agent-lifecycle-index.json")
+GUARD_STATE_DIR = os.environ.get("TOKEN_GUARD_STATE_DIR", METRICS_DIR)
+
+INDEX_MAX_ENTRIES = 1000
+METRICS_MAX_LINES = 500
+METRICS_KEEP_LINES = 400
+# agent-metrics.jsonl has at most METRICS_MAX_LINES lines, so the fallback
+# scan of its tail covers the whole log.
+_FALLBACK_SCAN_LINES = METRICS_MAX_LINES
+# Lifecycle/usage records are all longer than this; smaller logs skip the count.
+_MIN_RECORD_BYTES = 150
+
+
+def _epoch(ts) -> Optional[float]:
+    try:
+        return float(calendar.timegm(time.strptime(str(ts), "%Y-%m-%dT%H:%M:%SZ")))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def consume_pending_decision(
+    session_id, agent_type: str, agent_id: str, state_dir: Optional[str] = None
+) -> str:
+    """decision_id of token-guard's newest matching pending spawn ("" if none)."""
+    state_file = os.path.join(
+        state_dir or GUARD_STATE_DIR, f"{normalize_session_key(session_id)}.json"
+    )
+    spawn = consume_pending_spawn(state_file, agent_type, agent_id)
+    return normalize_text((spawn or {}).get("decision_id", ""), 32)
+
+
+def index_start(entry: Dict, index_file: Optional[str] = None) -> None:
+    """Record a start entry in the agent_id index (newest wins)."""
+    index_file = index_file or INDEX_FILE
+    try:
+        with open(index_file + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                index = load_json_state(index_file)
+                starts = index.get("starts")
+                if not isinstance(starts, dict):
+                    starts = {}
+                agent_id = entry["agent_id"]
+                starts.pop(agent_id, None)
+                starts[agent_id] = {
+                    "ts": entry["ts"],
+                    "epoch": _epoch(entry["ts"]),
+                    "agent_type": entry["agent_type"],
+                    "decision_id": entry.get("decision_id", ""),
+                    "session_key": entry.get("session_key", ""),
+                }
+                while len(starts) > INDEX_MAX_ENTRIES:
+                    starts.pop(next(iter(starts)))
+                save_json_state(index_file, {"schema_version": 1, "starts": starts})
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def lookup_start(
+    agent_id, index_file: Optional[str] = None, metrics_file: Optional[str] = None
+) -> Optional[Dict]:
+    """Newest start record for agent_id, or None.
+
+    O(1) via the index; falls back to scanning the metrics log tail.
+    """
+    agent_id = str(agent_id or "")
+    if not agent_id:
+        return None
+    starts = load_json_state(index_file or INDEX_FILE).get("starts")
+    if isinstance(starts, dict) and isinstance(starts.get(agent_id), dict):
+        return starts[agent_id]
+    for line in reversed(read_tail_lines(metrics_file or METRICS_FILE, _FALLBACK_SCAN_LINES)):
+        if agent_id not in line or '"start"' not in line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if str(entry.get("agent_id", "")) == agent_id and entry.get("event") == "start":
+            entry.setdefault("epoch", _epoch(entry.get("ts")))
+            return entry
+    return None
+
+
+def _truncate_metrics(metrics_file: str) -> None:
+    """Keep the newest METRICS_KEEP_LINES once the log passes METRICS_MAX_LINES.
+
+    Rewrites under the lock locked_append() takes, via tmp + rename, so a
+    concurrent append is never lost and a crash leaves the old log intact.
+    """
+    try:
+        if os.path.getsize(metrics_file) <= METRICS_MAX_LINES * _MIN_RECORD_BYTES:
+            return
+        with open(metrics_file + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                with open(metrics_file, "r") as f:
+                    lines = f.readlines()
+                if len(lines) <= METRICS_MAX_LINES:
+                    return
+                tmp = f"{metrics_file}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp, "w") as f:
+                        f.writelines(lines[-METRICS_KEEP_LINES:])
+                    os.replace(tmp, metrics_file)
+                except OSError:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def handle(payload: Dict) -> Optional[Dict]:
+    """Process one lifecycle event; returns the record written (or None)."""
+    event = payload.get("hook_event_name", "")
+    if event not in ("SubagentStart", "SubagentStop"):
+        return None
+    agent_type = normalize_subagent_type(payload.get("agent_type") or "unknown")
+    agent_id = normalize_text(payload.get("agent_id") or "unknown", max_len=64) or "unknown"
+    session_id = payload.get("session_id") or "unknown"
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+    except OSError:
+        pass  # every write below is non-fatal
+
+    if event == "SubagentStart":
+        decision_id = consume_pending_decision(session_id, agent_type, agent_id)
+        entry = build_metrics_lifecycle_entry(
+            event="start",
+            agent_type=agent_type,
+            agent_id=agent_id,
+            session_id=session_id,
+            decision_id=decision_id,
+        )
+        locked_append(METRICS_FILE, json.dumps(entry, separators=(",", ":")) + "\n")
+        index_start(entry)
+    else:
+        start = lookup_start(agent_id) or {}
+        start_epoch = start.get("epoch") if start else None
+        known = isinstance(start_epoch, (int, float))
+        entry = build_metrics_lifecycle_entry(
+            event="stop",
+            agent_type=agent_type,
+            agent_id=agent_id,
+            session_id=session_id,
+            decision_id=start.get("decision_id", ""),
+            duration_seconds=int(time.time() - start_epoch) if known else "unknown",
+            duration_known=known,
+        )
+        locked_append(METRICS_FILE, json.dumps(entry, separators=(",", ":")) + "\n")
+
+    _truncate_metrics(METRICS_FILE)
+    return entry
+
+
+def main() -> None:
+    try:
+        payload = json.loads(sys.stdin.read() or "{}")
+    except ValueError:
+        sys.exit(0)
+    if isinstance(payload, dict):
+        handle(payload)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Rolling compressed archive for audit.jsonl.
+
+When self-heal rotates audit.jsonl, the rotated file becomes one gzip
+"generation" under session-state/audit-archive/. The first line of every
+generation is a small JSON header recording its time range, record count and
+per-event / per-rule / per-day counts, so long-window questions can be
+answered from headers alone. Only generations that partially overlap a
+requested window are stream-decompressed.
+
+Layout:
+    audit-archive/audit-20261018T120000Z-000.jsonl.gz
+        {"archive_header": 1, "from_ts": ..., "to_ts": ..., "records": ...,
+         "events": {...}, "rules": {...}, "days": {...}}
+        <original audit lines, unchanged>
+
+Only the newest ARCHIVE_GENERATIONS generations are kept.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STATE_DIR = os.environ.get(
+    "TOKEN_GUARD_STATE_DIR",
+    os.path.expanduser("~/.claude/hooks/session-state"),
+)
+ARCHIVE_DIR = os.path.join(STATE_DIR, "audit-archive")
+AUDIT_LOG = os.path.join(STATE_DIR, "audit.jsonl")
+
+ARCHIVE_GENERATIONS = 8
+HEADER_VERSION = 1
+_PREFIX = "audit-"
+_SUFFIX = ".jsonl.gz"
+LIVE_CURSOR_NAME = "audit-daycounts.json"
+
+
+def _entry_ts(entry: Dict) -> str:
+    """Normalized 'YYYY-MM-DDTHH:MM:SS' timestamp (sortable), or ''."""
+    ts = entry.get("ts") or entry.get("timestamp") or ""
+    return ts[:19] if isinstance(ts, str) else ""
+
+
+def _entry_rule(entry: Dict) -> str:
+    """Rule identifier for v2 records, falling back to legacy fields."""
+    return str(
+        entry.get("rule_id")
+        or entry.get("reason")
+        or entry.get("decision")
+        or "unknown"
+    )
+
+
+def _entry_event(entry: Dict) -> str:
+    return str(entry.get("event") or entry.get("decision") or "unknown")
+
+
+def build_header(path: str) -> Dict:
+    """Scan an audit file once and summarize it into an archive header."""
+    events: Counter = Counter()
+    rules: Counter = Counter()
+    days: Dict[str, Counter] = defaultdict(Counter)
+    records = malformed = 0
+    from_ts = to_ts = ""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                malformed += 1
+                continue
+            if not isinstance(entry, dict):
+                malformed += 1
+                continue
+            records += 1
+            event = _entry_event(entry)
+            events[event] += 1
+            rules[_entry_rule(entry)] += 1
+            ts = _entry_ts(entry)
+            if ts:
+                from_ts = ts if not from_ts or ts < from_ts else from_ts
+                to_ts = ts if ts > to_ts else to_ts
+                days[ts[:10]][event] += 1
+    return {
+        "archive_header": HEADER_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "from_ts": from_ts,
+        "to_ts": to_ts,
+        "records": records,
+        "malformed": malformed,
+        "events": dict(events),
+        "rules": dict(rules),
+        "days": {d: dict(c) for d, c in sorted(days.items())},
+    }
+
+
+def archive_file(
+    src_path: str,
+    archive_dir: str = ARCHIVE_DIR,
+    keep: int = ARCHIVE_GENERATIONS,
+) -> Optional[str]:
+    """Compress src_path into a new header-prefixed generation and prune old ones.
+
+    The source file is left in place; callers delete it once this returns a
+    path. Returns None on failure (nothing is written).
+    """
+    try:
+        os.makedirs(archive_dir, exist_ok=True)
+        header = build_header(src_path)
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        seq = 0
+        while True:
+            dest = os.path.join(archive_dir, f"{_PREFIX}{stamp}-{seq:03d}{_SUFFIX}")
+            if not os.path.exists(dest):
+                break
+            seq += 1
+        tmp = dest + ".tmp"
+        try:
+            with open(src_path, "rb") as src, gzip.open(tmp, "wb") as out:
+                out.write((json.dumps(header, separators=(",", ":")) + "\n").encode())
+                shutil.copyfileobj(src, out)
+            os.replace(tmp, dest)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return None
+    except OSError:
+        return None
+    prune(archive_dir, keep)
+    return dest
+
+
+def _generation_paths(archive_dir: str) -> List[str]:
+    """Generation files, oldest first (names sort chronologically)."""
+    try:
+        names = os.listdir(archive_dir)
+    except OSError:
+        return []
+    return [
+        os.path.join(archive_dir, n)
+        for n in sorted(names)
+        if n.startswith(_PREFIX) and n.endswith(_SUFFIX)
+    ]
+
+
+def prune(archive_dir: str = ARCHIVE_DIR, keep: int = ARCHIVE_GENERATIONS) -> int:
+    """Delete the oldest generations beyond `keep`. Returns the number removed."""
+    paths = _generation_paths(archive_dir)
+    removed = 0
+    for path in paths[: max(0, len(paths) - keep)]:
+        try:
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def read_header(path: str) -> Optional[Dict]:
+    """Read a generation's header (decompresses only the first line)."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            header = json.loads(f.readline())
+        if isinstance(header, dict) and header.get("archive_header"):
+            return header
+    except (OSError, EOFError, ValueError):
+        pass
+    return None
+
+
+def list_generations(archive_dir: str = ARCHIVE_DIR) -> List[Tuple[str, Dict]]:
+    """(path, header) for every readable generation, oldest first."""
+    out = []
+    for path in _generation_paths(archive_dir):
+        header = read_header(path)
+        if header is not None:
+            out.append((path, header))
+    return out
+
+
+def _overlap(header: Dict, since: str, until: str) -> str:
+    """Classify a generation against [since, until]: 'none', 'full' or 'partial'."""
+    lo, hi = header.get("from_ts", ""), header.get("to_ts", "")
+    if not lo or not hi:
+        return "partial"
+    if (since and hi < since) or (until and lo > until):
+        return "none"
+    if (not since or lo >= since) and (not until or hi <= until):
+        return "full"
+    return "partial"
+
+
+def _iter_generation(path: str, since: str, until: str) -> Iterator[Dict]:
+    """Stream one generation's entries within [since, until]."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            f.readline()  # header
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                ts = _entry_ts(entry)
+                if since and ts < since:
+                    continue
+                if until and ts > until:
+                    continue
+                yield entry
+    except (OSError, EOFError):
+        return
+
+
+def iter_entries(
+    since: str = "",
+    until: str = "",
+    archive_dir: str = ARCHIVE_DIR,
+) -> Iterator[Dict]:
+    """Stream archived audit entries within [since, until], oldest first.
+
+    Bounds are 'YYYY-MM-DDTHH:MM:SS' strings compared lexicographically (a
+    bare date as `since` means the start of that day); empty means unbounded. Generations outside the window are
+    skipped using their headers, without decompression.
+    """
+    for path, header in list_generations(archive_dir):
+        if _overlap(header, since, until) != "none":
+            yield from _iter_generation(path, since, until)
+
+
+def summarize(
+    since: str = "",
+    until: str = "",
+    archive_dir: str = ARCHIVE_DIR,
+) -> Dict:
+    """Aggregate counts over archived generations within [since, until].
+
+    Fully-covered generations contribute their header counts directly; only
+    partially-overlapping ones are stream-decompressed.
+    """
+    events: Counter = Counter()
+    rules: Counter = Counter()
+    days: Dict[str, Counter] = defaultdict(Counter)
+    records = 0
+    used = 0
+    from_ts = to_ts = ""
+    for path, header in list_generations(archive_dir):
+        overlap = _overlap(header, since, until)
+        if overlap == "none":
+            continue
+        used += 1
+        if overlap == "full":
+            records += int(header.get("records", 0))
+            events.update(header.get("events") or {})
+            rules.update(header.get("rules") or {})
+            for day, counts in (header.get("days") or {}).items():
+                days[day].update(counts)
+            lo, hi = header.get("from_ts", ""), header.get("to_ts", "")
+        else:
+            lo = hi = ""
+            for entry in _iter_generation(path, since, until):
+                records += 1
+                event = _entry_event(entry)
+                events[event] += 1
+                rules[_entry_rule(entry)] += 1
+                ts = _entry_ts(entry)
+                if ts:
+                    days[ts[:10]][event] += 1
+                    lo = ts if not lo or ts < lo else lo
+                    hi = ts if ts > hi else hi
+        if lo and (not from_ts or lo < from_ts):
+            from_ts = lo
+        if hi and hi > to_ts:
+            to_ts = hi
+    return {
+        "generations": used,
+        "records": records,
+        "from_ts": from_ts,
+        "to_ts": to_ts,
+        "events": dict(events),
+        "rules": dict(rules),
+        "days": {d: dict(c) for d, c in sorted(days.items())},
+    }
+
+
+def _live_day_counts(audit_path: str, cursor_path: str) -> Dict[str, Dict[str, int]]:
+    """Per-day event counts of the live audit.jsonl, read incrementally.
+
+    The cursor file keeps the counts so far plus the byte offset, inode and
+    first bytes of the file they cover; each call only parses lines appended
+    since. A different inode or head, or a shorter file (rotation), restarts
+    the count from the beginning.
+    """
+    try:
+        st = os.stat(audit_path)
+        with open(audit_path, "rb") as f:
+            head = f.read(64).decode("utf-8", "replace")
+    except OSError:
+        return {}
+    cursor = {}
+    try:
+        with open(cursor_path, "r", encoding="utf-8") as f:
+            cursor = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if not (
+        isinstance(cursor, dict)
+        and cursor.get("ino") == st.st_ino
+        and isinstance(cursor.get("head"), str)
+        and head.startswith(cursor["head"])
+        and isinstance(cursor.get("offset"), int)
+        and 0 <= cursor["offset"] <= st.st_size
+        and isinstance(cursor.get("days"), dict)
+    ):
+        cursor = {"ino": st.st_ino, "head": "", "offset": 0, "days": {}}
+    if cursor["offset"] == st.st_size:
+        return cursor["days"]
+    days = defaultdict(Counter, {d: Counter(c) for d, c in cursor["days"].items()})
+    offset = cursor["offset"]
+    try:
+        with open(audit_path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                offset += len(raw)
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                ts = _entry_ts(entry)
+                if ts:
+                    days[ts[:10]][_entry_event(entry)] += 1
+    except OSError:
+        return {d: dict(c) for d, c in days.items()}
+    cursor = {
+        "ino": st.st_ino,
+        "head": head,
+        "offset": offset,
+        "days": {d: dict(c) for d, c in days.items()},
+    }
+    tmp = f"{cursor_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cursor, f)
+        os.replace(tmp, cursor_path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+    return cursor["days"]
+
+
+def daily_event_counts(
+    since: str = "",
+    audit_path: str = AUDIT_LOG,
+    archive_dir: str = ARCHIVE_DIR,
+) -> Dict[str, Dict[str, int]]:
+    """Per-day event counts across the archive plus the live audit.jsonl.
+
+    Archived days come from headers wherever possible; the live file is
+    counted incrementally via a cursor file next to it (audit-daycounts.json),
+    so repeated calls only read what was appended since the last one.
+    """
+    days: Dict[str, Counter] = defaultdict(Counter)
+    for day, counts in summarize(since, archive_dir=archive_dir)["days"].items():
+        days[day].update(counts)
+    cursor_path = os.path.join(os.path.dirname(audit_path), LIVE_CURSOR_NAME)
+    for day, counts in _live_day_counts(audit_path, cursor_path).items():
+        if not since or day >= since[:10]:
+            days[day].update(counts)
+    return {d: dict(c) for d, c in sorted(days.items())}
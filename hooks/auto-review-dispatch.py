@@ -17,34 +17,37 @@ import os
 import re
 import sys
 import time
-import uuid
 
-QUEUE_DIR = os.path.expanduser("~/.claude/hooks/session-state")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import action_queue  # noqa: E402
+
+QUEUE_DIR = os.environ.get(
+    "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
+)
 QUEUE_FILE = os.path.join(QUEUE_DIR, "mandatory-actions.jsonl")
 
 
-def _enqueue_action(action_type: str, instruction: str, context: str = "") -> str:
+def _enqueue_action(
+    action_type: str, instruction: str, context: str = "", session_id: str = ""
+) -> str:
     """Write a mandatory action to the persistent queue. Returns action_id.
 
-    check-inbox.sh reads this queue on EVERY tool call and injects the
-    action into Claude's context until a completion marker is written.
-    This is the mechanical equivalent of Agent Teams' SendMessage.
+    check-inbox.sh re-delivers pending actions on EVERY tool call of this
+    session until they are completed (`action_queue.py done <id>`, or automatically once the
+    review agent finishes). This is the mechanical equivalent of Agent
+    Teams' SendMessage.
     """
-    os.makedirs(QUEUE_DIR, exist_ok=True)
-    action_id = f"{action_type}-{int(time.time())}-{uuid.uuid4().hex[:6]}"
-    action = {
-        "id": action_id,
-        "type": action_type,
-        "instruction": instruction,
-        "context": context,
-        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "status": "pending",
-    }
-    with open(QUEUE_FILE, "a") as f:
-        f.write(json.dumps(action) + "\n")
+    action = action_queue.enqueue(
+        action_type,
+        instruction,
+        context,
+        queue_file=QUEUE_FILE,
+        session_id=session_id,
+    )
     # Also print for immediate delivery (belt and suspenders)
     print(instruction)
-    return action_id
+    return action["id"]
 
 
 def main():
@@ -57,6 +60,7 @@ def main():
         sys.exit(0)
 
     command = data.get("tool_input", {}).get("command", "").strip()
+    session_id = str(data.get("session_id", ""))
     tool_output = str(data.get("tool_output", ""))
 
     # Normalize for matching (handle multi-line commands — check first line)
@@ -80,6 +84,7 @@ def main():
             "3. Report any blockers found before continuing\n"
             "This is a MECHANICAL dispatch — this message will repeat until acted on.",
             context=command,
+            session_id=session_id,
         )
         # Write review-pending flag for review-gate.py enforcement
         flag_path = os.path.join(QUEUE_DIR, "review-pending")
@@ -114,6 +119,7 @@ def main():
             "Run the /review command on this PR immediately.\n"
             "This is a MECHANICAL dispatch — this message will repeat until acted on.",
             context=command,
+            session_id=session_id,
         )
         sys.exit(0)
 
@@ -18,10 +18,15 @@ Detection logic:
 import json
 import os
 import sys
-import time
-import uuid
 
-QUEUE_DIR = os.path.expanduser("~/.claude/hooks/session-state")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import action_queue  # noqa: E402
+import chain_store  # noqa: E402
+
+QUEUE_DIR = os.environ.get(
+    "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
+)
 QUEUE_FILE = os.path.join(QUEUE_DIR, "mandatory-actions.jsonl")
 CHAINS_DIR = os.path.join(QUEUE_DIR, "chains")
 
@@ -64,42 +69,55 @@ SKIP_KEYWORDS = frozenset(
 )
 
 
-def _enqueue_action(action_type: str, instruction: str, context: str = "") -> str:
+def _enqueue_action(
+    action_type: str,
+    instruction: str,
+    context: str = "",
+    chain_id: str = "",
+    session_id: str = "",
+) -> str:
     """Write a mandatory action to the persistent queue. Returns action_id."""
-    os.makedirs(QUEUE_DIR, exist_ok=True)
-    action_id = f"{action_type}-{int(time.time())}-{uuid.uuid4().hex[:6]}"
-    action = {
-        "id": action_id,
-        "type": action_type,
-        "instruction": instruction,
-        "context": context,
-        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "status": "pending",
-    }
-    with open(QUEUE_FILE, "a") as f:
-        f.write(json.dumps(action) + "\n")
+    action = action_queue.enqueue(
+        action_type,
+        instruction,
+        context,
+        chain_id=chain_id,
+        queue_file=QUEUE_FILE,
+        session_id=session_id,
+    )
     # Also print for immediate delivery
     print(instruction)
-    return action_id
+    return action["id"]
+
 
+def _advance_chain(agent_text: str, session_id: str = "") -> None:
+    """Advance the active chain waiting on this agent, if any.
 
-def _patch_last_action_chain_id(chain_id: str):
-    """Add chain_id to the last action in the queue file."""
-    if not os.path.isfile(QUEUE_FILE):
+    The transition is a compare-and-set on the step we matched, so a
+    duplicate SubagentStop for the same agent cannot skip a step.
+    """
+    found = chain_store.find_active_step(agent_text, CHAINS_DIR)
+    if found is None:
         return
-    lines = []
-    with open(QUEUE_FILE) as f:
-        lines = f.readlines()
-    if not lines:
+    chain_id, step = found
+    result = chain_store.advance(chain_id, expected_step=step, chains_dir=CHAINS_DIR)
+    if result is None:
         return
-    try:
-        last = json.loads(lines[-1])
-        last["chain_id"] = chain_id
-        lines[-1] = json.dumps(last) + "\n"
-        with open(QUEUE_FILE, "w") as f:
-            f.writelines(lines)
-    except (json.JSONDecodeError, IndexError):
-        pass
+    chain, next_action = result
+    done_id = chain["steps"][step].get("action_id")
+    if done_id:
+        action_queue.complete_action(done_id, QUEUE_FILE)
+    if next_action is not None:
+        action_queue.enqueue(
+            next_action["type"],
+            next_action["instruction"],
+            context=chain.get("trigger_agent", ""),
+            chain_id=chain_id,
+            queue_file=QUEUE_FILE,
+            action_id=next_action["id"],
+            session_id=session_id,
+        )
+        print(next_action["instruction"])
 
 
 def main():
@@ -112,13 +130,20 @@ def main():
     agent_desc = str(data.get("description", "")).lower()
     agent_type = str(data.get("subagent_type", "")).lower()
     agent_text = f"{agent_name} {agent_desc}".strip()
+    session_id = str(data.get("session_id", ""))
 
     # Empty/unnamed agents → skip (don't assume build)
     if not agent_text.strip():
         sys.exit(0)
 
-    # Explicit skip: post-chain agents (avoid infinite loops)
+    # Explicit skip: post-chain agents (avoid infinite loops). A chain step
+    # agent finishing advances its chain instead.
     if any(kw in agent_text for kw in SKIP_KEYWORDS):
+        if "fp-checker" in agent_text:
+            action_queue.complete_pending(
+                {"fp-checker-after-review"}, QUEUE_FILE, session_id
+            )
+        _advance_chain(agent_text, session_id)
         sys.exit(0)
 
     # ── REVIEW chain: quick-reviewer/reviewer → fp-checker ───────────────────
@@ -131,6 +156,10 @@ def main():
             os.unlink(review_flag)
         except FileNotFoundError:
             pass
+        # ...and so are the queued review actions that asked for it
+        action_queue.complete_pending(
+            {"review-after-commit", "review-after-pr"}, QUEUE_FILE, session_id
+        )
 
         _enqueue_action(
             "fp-checker-after-review",
@@ -143,6 +172,7 @@ def main():
             "Do NOT show the raw review output. Show only fp-checker's filtered results.\n"
             "This is a MECHANICAL dispatch — this message will repeat until acted on.",
             context=agent_text,
+            session_id=session_id,
         )
         sys.exit(0)
 
@@ -151,25 +181,9 @@ def main():
     is_build_agent_type = agent_type in BUILD_AGENTS
 
     if is_build_agent_type:
-        # Create persistent chain state file
-        chain_id = f"chain-{uuid.uuid4().hex[:8]}"
-        os.makedirs(CHAINS_DIR, exist_ok=True)
-        chain_state = {
-            "chain_id": chain_id,
-            "type": "build",
-            "steps": [
-                {"name": "code-simplifier", "status": "pending"},
-                {"name": "verify-app", "status": "pending"},
-            ],
-            "current_step": 0,
-            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "trigger_agent": agent_text,
-        }
-        chain_path = os.path.join(CHAINS_DIR, f"{chain_id}.json")
-        with open(chain_path, "w") as f:
-            json.dump(chain_state, f, indent=2)
-
-        # Enqueue only the FIRST step (chain-advance.py handles subsequent steps)
+        # Enqueue only the FIRST step (_advance_chain handles subsequent
+        # steps), then register the chain with that action_id in one write.
+        chain_id = chain_store.new_chain_id()
         action_id = _enqueue_action(
             "chain-step",
             "BUILD CHAIN TRIGGERED: implementation agent completed.\n"
@@ -178,14 +192,17 @@ def main():
             "the chain will automatically advance to `verify-app`.\n"
             "Do NOT skip. Do NOT ask the user. Just run it.",
             context=agent_text,
+            chain_id=chain_id,
+            session_id=session_id,
+        )
+        chain_store.create_chain(
+            "build",
+            ["code-simplifier", "verify-app"],
+            trigger_agent=agent_text,
+            chain_id=chain_id,
+            first_action_id=action_id,
+            chains_dir=CHAINS_DIR,
         )
-        # Patch the last enqueued action with chain_id
-        _patch_last_action_chain_id(chain_id)
-
-        # Write action_id back into chain state for correlation
-        chain_state["steps"][0]["action_id"] = action_id
-        with open(chain_path, "w") as f:
-            json.dump(chain_state, f, indent=2)
 
 
 if __name__ == "__main__":
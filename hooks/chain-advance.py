@@ -1,73 +1,62 @@
 #!/usr/bin/env python3
-"""Chain Advance Helper — advances a chain state file to the next step.
+"""Chain Advance Helper — advances a chain to its next step.
 
-Called by check-inbox.sh when a done/ marker is found for a chain-linked action.
-Reads chain state JSON, marks current step done, advances pointer, and prints
-the next step's action as JSON to stdout (for appending to mandatory queue).
+build-chain-dispatcher.py advances chains automatically when a step's agent
+finishes; this is the manual / scripted entry point. Marks the current step
+done, advances the pointer (a locked compare-and-set in chain_store), and
+prints the next step's action as JSON to stdout (for appending to the
+mandatory queue).
 
-Usage: python3 chain-advance.py /path/to/chain-{id}.json
+Usage: python3 chain-advance.py <chain-id | /path/to/chain-{id}.json>
+                                [--expect-step N]
+
+Exit codes: 0 advanced, 1 missing/unreadable chain, 2 not advanced (chain
+already complete, or not on the expected step).
 """
 
 import json
+import os
 import sys
-import time
-import uuid
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def main():
-    if len(sys.argv) < 2:
-        sys.exit(1)
+import chain_store  # noqa: E402
 
-    chain_path = sys.argv[1]
 
-    try:
-        with open(chain_path) as f:
-            chain = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError, OSError):
+def main():
+    args = sys.argv[1:]
+    if not args:
         sys.exit(1)
 
-    steps = chain.get("steps", [])
-    cur = chain.get("current_step", 0)
-
-    # Mark current step done with completion timestamp
-    if cur < len(steps):
-        steps[cur]["status"] = "done"
-        steps[cur]["completed_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-
-    # Advance pointer
-    chain["current_step"] = cur + 1
+    expected_step = None
+    if "--expect-step" in args:
+        i = args.index("--expect-step")
+        try:
+            expected_step = int(args[i + 1])
+        except (IndexError, ValueError):
+            sys.exit(1)
+        del args[i : i + 2]
+    if not args:
+        sys.exit(1)
 
-    # If there's a next step, generate its action and record action_id
-    if cur + 1 < len(steps):
-        ns = steps[cur + 1]
-        chain_id = chain.get("chain_id", "")
-        chain_type = chain.get("type", "build")
-        step_num = cur + 2
-        total = len(steps)
-        action_id = f"{ns['name']}-{int(time.time())}-{uuid.uuid4().hex[:6]}"
-        # Store action_id in the chain state for correlation
-        ns["action_id"] = action_id
-        action = {
-            "id": action_id,
-            "type": "chain-step",
-            "chain_id": chain_id,
-            "instruction": (
-                f"CHAIN STEP {step_num}/{total}: Spawn `{ns['name']}` agent now.\n"
-                f"This is part of the {chain_type} chain. Previous step completed successfully.\n"
-                f"Run this agent immediately — do not ask the user."
-            ),
-            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "status": "pending",
-        }
-        print(json.dumps(action))
+    ref = args[0]
+    if ref.endswith(".json") or os.sep in ref:
+        chains_dir = os.path.dirname(os.path.abspath(ref))
+        chain_id = os.path.basename(ref)
+        if chain_id.endswith(".json"):
+            chain_id = chain_id[: -len(".json")]
+    else:
+        chains_dir, chain_id = chain_store.CHAINS_DIR, ref
 
-    # Check if chain is fully complete
-    if cur + 1 >= len(steps):
-        chain["completed_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    if chain_store.load_chain(chain_id, chains_dir) is None:
+        sys.exit(1)
 
-    # Write updated state (after action_id is set on next step)
-    with open(chain_path, "w") as f:
-        json.dump(chain, f, indent=2)
+    result = chain_store.advance(chain_id, expected_step, chains_dir)
+    if result is None:
+        sys.exit(2)
+    _, next_action = result
+    if next_action is not None:
+        print(json.dumps(next_action))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Chain registry with locked compare-and-set step transitions.
+
+build-chain-dispatcher.py creates chains and advances them when a step's
+agent finishes; chain-advance.py is the manual / scripted entry point.
+
+Layout (session-state/chains/):
+    chain-<id>.json             one file per active (or just-completed) chain
+    index.json                  {"active": {chain_id: {"type", "current_step",
+                                             "step", "created_at"}},
+                                 "completed": [chain_id, ...]}
+    archive/chains-YYYY-MM.jsonl  completed chains, one JSON line each
+
+Every mutation holds chains/.lock. Step transitions are compare-and-set on
+current_step, so two hooks racing to advance the same step cannot both win.
+Completed chains leave the active index at once and are moved to the archive
+by the next create_chain() (or archive_completed()), so the hot directory and
+the index stay proportional to the number of active chains.
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_utils import load_json_state, lock, save_json_state, unlock  # noqa: E402
+
+CHAINS_DIR = os.path.join(
+    os.environ.get(
+        "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
+    ),
+    "chains",
+)
+INDEX_NAME = "index.json"
+ARCHIVE_SUBDIR = "archive"
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def new_chain_id() -> str:
+    return f"chain-{uuid.uuid4().hex[:8]}"
+
+
+def chain_path(chain_id: str, chains_dir: str = CHAINS_DIR) -> str:
+    return os.path.join(chains_dir, f"{chain_id}.json")
+
+
+@contextmanager
+def _locked(chains_dir: str):
+    os.makedirs(chains_dir, exist_ok=True)
+    with open(os.path.join(chains_dir, ".lock"), "w") as lf:
+        lock(lf)
+        try:
+            yield
+        finally:
+            unlock(lf)
+
+
+def _load_index(chains_dir: str) -> Dict:
+    path = os.path.join(chains_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return _scan_index(chains_dir)
+    index = load_json_state(path)
+    if not isinstance(index.get("active"), dict):
+        index = {"schema_version": 1, "active": {}, "completed": []}
+    index.setdefault("completed", [])
+    return index
+
+
+def _scan_index(chains_dir: str) -> Dict:
+    """Build the index from chain files (one-time, for pre-index chains dirs)."""
+    index = {"schema_version": 1, "active": {}, "completed": []}
+    try:
+        names = sorted(os.listdir(chains_dir))
+    except OSError:
+        return index
+    for name in names:
+        if not (name.startswith("chain-") and name.endswith(".json")):
+            continue
+        chain = load_json_state(os.path.join(chains_dir, name))
+        chain_id = chain.get("chain_id")
+        if not chain_id or not isinstance(chain.get("steps"), list):
+            continue
+        done = chain.get("completed_at") or chain.get("current_step", 0) >= len(
+            chain["steps"]
+        )
+        if done:
+            index["completed"].append(chain_id)
+        else:
+            index["active"][chain_id] = _index_entry(chain)
+    return index
+
+
+def _save_index(chains_dir: str, index: Dict) -> None:
+    save_json_state(os.path.join(chains_dir, INDEX_NAME), index)
+
+
+def _index_entry(chain: Dict) -> Dict:
+    steps = chain.get("steps", [])
+    cur = chain.get("current_step", 0)
+    return {
+        "type": chain.get("type", ""),
+        "current_step": cur,
+        "step": steps[cur].get("name", "") if cur < len(steps) else "",
+        "created_at": chain.get("created_at", ""),
+    }
+
+
+def create_chain(
+    chain_type: str,
+    step_names: List[str],
+    trigger_agent: str = "",
+    chain_id: str = "",
+    first_action_id: str = "",
+    chains_dir: str = CHAINS_DIR,
+) -> Dict:
+    """Register a new chain (one write). Returns the chain record.
+
+    Callers that enqueue the first step's action pass its id here, so the
+    chain file is never rewritten just to record it.
+    """
+    chain = {
+        "chain_id": chain_id or new_chain_id(),
+        "type": chain_type,
+        "steps": [{"name": name, "status": "pending"} for name in step_names],
+        "current_step": 0,
+        "created_at": _now(),
+        "trigger_agent": trigger_agent,
+    }
+    if first_action_id and chain["steps"]:
+        chain["steps"][0]["action_id"] = first_action_id
+    with _locked(chains_dir):
+        _archive_completed(chains_dir)
+        save_json_state(chain_path(chain["chain_id"], chains_dir), chain)
+        index = _load_index(chains_dir)
+        index["active"][chain["chain_id"]] = _index_entry(chain)
+        _save_index(chains_dir, index)
+    return chain
+
+
+def load_chain(chain_id: str, chains_dir: str = CHAINS_DIR) -> Optional[Dict]:
+    chain = load_json_state(chain_path(chain_id, chains_dir))
+    return chain if chain.get("steps") is not None else None
+
+
+def active_chains(chains_dir: str = CHAINS_DIR) -> Dict[str, Dict]:
+    """Active chains from the index (no directory scan)."""
+    return _load_index(chains_dir)["active"]
+
+
+def find_active_step(
+    agent_text: str, chains_dir: str = CHAINS_DIR
+) -> Optional[Tuple[str, int]]:
+    """(chain_id, step) of the oldest active chain waiting on this agent."""
+    # created_at has 1s resolution; index (insertion) order breaks ties.
+    matches = [
+        (entry.get("created_at", ""), pos, chain_id, entry.get("current_step", 0))
+        for pos, (chain_id, entry) in enumerate(active_chains(chains_dir).items())
+        if entry.get("step") and entry["step"] in agent_text
+    ]
+    if not matches:
+        return None
+    _, _, chain_id, step = min(matches)
+    return chain_id, step
+
+
+def _next_action(chain: Dict, step: int) -> Dict:
+    ns = chain["steps"][step]
+    action = {
+        "id": f"{ns['name']}-{int(time.time())}-{uuid.uuid4().hex[:6]}",
+        "type": "chain-step",
+        "chain_id": chain.get("chain_id", ""),
+        "instruction": (
+            f"CHAIN STEP {step + 1}/{len(chain['steps'])}: "
+            f"Spawn `{ns['name']}` agent now.\n"
+            f"This is part of the {chain.get('type', 'build')} chain. "
+            f"Previous step completed successfully.\n"
+            f"Run this agent immediately — do not ask the user."
+        ),
+        "created_at": _now(),
+        "status": "pending",
+    }
+    ns["action_id"] = action["id"]
+    return action
+
+
+def advance(
+    chain_id: str,
+    expected_step: Optional[int] = None,
+    chains_dir: str = CHAINS_DIR,
+) -> Optional[Tuple[Dict, Optional[Dict]]]:
+    """Mark the current step done and move to the next one.
+
+    Compare-and-set: with expected_step given, nothing changes unless the
+    chain is still on that step. Returns (chain, next_action) — next_action
+    is None once the chain completes — or None if the chain is missing,
+    unreadable, already complete or the CAS failed.
+    """
+    with _locked(chains_dir):
+        path = chain_path(chain_id, chains_dir)
+        try:
+            with open(path) as f:
+                chain = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(chain, dict):
+            return None
+        steps = chain.get("steps", [])
+        cur = chain.get("current_step", 0)
+        if not isinstance(cur, int) or cur >= len(steps) or chain.get("completed_at"):
+            return None
+        if expected_step is not None and cur != expected_step:
+            return None
+        steps[cur]["status"] = "done"
+        steps[cur]["completed_at"] = _now()
+        chain["current_step"] = cur + 1
+        next_action = _next_action(chain, cur + 1) if cur + 1 < len(steps) else None
+        if next_action is None:
+            chain["completed_at"] = _now()
+        save_json_state(path, chain)
+
+        index = _load_index(chains_dir)
+        if next_action is None:
+            index["active"].pop(chain_id, None)
+            if chain_id not in index["completed"]:
+                index["completed"].append(chain_id)
+        else:
+            index["active"][chain_id] = _index_entry(chain)
+        _save_index(chains_dir, index)
+    return chain, next_action
+
+
+def _archive_completed(chains_dir: str) -> int:
+    """Move completed chains to the monthly archive. Caller holds the lock."""
+    index = _load_index(chains_dir)
+    if not index["completed"]:
+        return 0
+    archive_dir = os.path.join(chains_dir, ARCHIVE_SUBDIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    archive = os.path.join(
+        archive_dir, time.strftime("chains-%Y-%m.jsonl", time.gmtime())
+    )
+    moved = 0
+    with open(archive, "a") as out:
+        for chain_id in index["completed"]:
+            path = chain_path(chain_id, chains_dir)
+            chain = load_json_state(path)
+            if chain:
+                out.write(json.dumps(chain, separators=(",", ":")) + "\n")
+                moved += 1
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    index["completed"] = []
+    _save_index(chains_dir, index)
+    return moved
+
+
+def archive_completed(chains_dir: str = CHAINS_DIR) -> int:
+    """Archive completed chains now. Returns the number moved."""
+    if not os.path.isdir(chains_dir):
+        return 0
+    with _locked(chains_dir):
+        return _archive_completed(chains_dir)
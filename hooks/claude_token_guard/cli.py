@@ -64,6 +64,11 @@ HOOK_FILES = [
     "token-guard.py",
     "read-efficiency-guard.py",
     "hook_utils.py",
+    "config_snapshot.py",
+    "audit_archive.py",
+    "token_calibration.py",
+    "action_queue.py",
+    "chain_store.py",
     "self-heal.py",
     "health-check.sh",
     "token-guard-config.json",
@@ -76,6 +81,7 @@ HOOK_FILES = [
     "ops_recap.py",
     "ops_aggregator.py",
     "agent-lifecycle.sh",
+    "agent_lifecycle.py",
     "agent-metrics.py",
 ]
 
@@ -945,13 +951,7 @@ def cmd_drift():
         sys.exit(1)
 
 
-def cmd_benchmark():
-    """Run latency benchmarks against hook scripts."""
-    import statistics
-    import tempfile
-    import time as _time
-
-    # Load benchmark inputs
+def _load_benchmark_inputs():
     fixtures_path = os.path.join(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
         "tests",
@@ -960,53 +960,328 @@ def cmd_benchmark():
     )
     if os.path.isfile(fixtures_path):
         with open(fixtures_path, "r") as f:
-            benchmarks = json.load(f)
-    else:
-        # Fallback: simple passthrough test
-        benchmarks = [
-            {
-                "name": "passthrough",
-                "description": "Non-Task tool call (passthrough)",
-                "input": {
-                    "tool_name": "Grep",
-                    "tool_input": {"pattern": "x"},
-                    "session_id": "bench",
-                },
-                "expected_exit": 0,
-            }
-        ]
+            return json.load(f)
+    # Fallback: simple passthrough test
+    return [
+        {
+            "name": "passthrough",
+            "description": "Non-Task tool call (passthrough)",
+            "input": {
+                "tool_name": "Grep",
+                "tool_input": {"pattern": "x"},
+                "session_id": "bench-session",
+            },
+            "expected_exit": 0,
+        }
+    ]
 
-    tg_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "token-guard.py",
+
+def _benchmark_script(bench):
+    """Hook script a benchmark input is routed to."""
+    name = (
+        "read-efficiency-guard.py"
+        if bench["input"].get("tool_name", "") == "Read"
+        else "token-guard.py"
     )
-    reg_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "read-efficiency-guard.py",
+    return os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), name
+    )
+
+
+def _write_benchmark_config(config_path):
+    with open(config_path, "w") as cf:
+        json.dump(
+            {
+                "max_agents": 50,
+                "global_cooldown_seconds": 0,
+                "parallel_window_seconds": 0,
+                "max_per_subagent_type": 50,
+                "audit_log": False,
+            },
+            cf,
+        )
+
+
+def _latency_summary(values):
+    """min/p50/p95/p99/max (ms) of a list of latencies."""
+    import statistics
+
+    values = sorted(values)
+    return {
+        "min": round(values[0], 4),
+        "p50": round(statistics.median(values), 4),
+        "p95": round(values[int(len(values) * 0.95)], 4),
+        "p99": round(values[int(len(values) * 0.99)], 4),
+        "max": round(values[-1], 4),
+    }
+
+
+# Module-level helpers a guard calls for config/state/audit I/O. The
+# in-process benchmark wraps whichever of these a guard module defines and
+# books their time as state I/O; everything else in main() is decision time.
+_BENCH_STATE_IO_FUNCS = (
+    "load_config",
+    "cleanup_stale_state",
+    "load_json_state",
+    "save_json_state",
+    "lock",
+    "unlock",
+    "audit",
+    "record_hook_outcome",
+    "read_thresholds",
+    "get_explore_dirs",
+)
+
+_IMPORT_PROBE = (
+    "import importlib.util, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "sys.path.insert(0, sys.argv[2])\n"
+    "spec = importlib.util.spec_from_file_location('bench_guard', sys.argv[1])\n"
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+    "print((time.perf_counter() - t0) * 1000)\n"
+)
+
+
+def _median_subprocess_ms(cmd, env, runs=5, report_stdout=False):
+    """Median wall ms of `cmd` (or of the ms it prints, with report_stdout)."""
+    import statistics
+    import time as _time
+
+    samples = []
+    for _ in range(runs):
+        t0 = _time.perf_counter()
+        cp = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=30)
+        wall = (_time.perf_counter() - t0) * 1000
+        if report_stdout:
+            try:
+                wall = float(cp.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                continue
+        samples.append(wall)
+    return round(statistics.median(samples), 3) if samples else None
+
+
+def _run_in_process_benchmark(benchmarks, iterations):
+    """Import each guard once and time main() in-process.
+
+    Returns a JSON-ready dict. Interpreter startup and module import are
+    measured once per guard in fresh subprocesses (what every real hook
+    invocation pays); per-iteration time is split into state I/O (the
+    _BENCH_STATE_IO_FUNCS helpers) and decision (the rest of main()).
+    """
+    import importlib.util
+    import io
+    import tempfile
+    import time as _time
+
+    hooks_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {
+        "mode": "in-process",
+        "iterations": iterations,
+        "python": sys.version.split()[0],
+        "startup_ms": None,
+        "benchmarks": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_dir = os.path.join(tmp_dir, "session-state")
+        os.makedirs(state_dir)
+        config_path = os.path.join(tmp_dir, "config.json")
+        _write_benchmark_config(config_path)
+
+        saved_env = {
+            k: os.environ.get(k)
+            for k in ("TOKEN_GUARD_STATE_DIR", "TOKEN_GUARD_CONFIG_PATH")
+        }
+        os.environ["TOKEN_GUARD_STATE_DIR"] = state_dir
+        os.environ["TOKEN_GUARD_CONFIG_PATH"] = config_path
+        env = os.environ.copy()
+        saved_stdio = (sys.stdin, sys.stdout, sys.stderr)
+        try:
+            results["startup_ms"] = _median_subprocess_ms(
+                [sys.executable, "-c", "pass"], env
+            )
+            modules = {}
+            for bench in benchmarks:
+                script = _benchmark_script(bench)
+                if not os.path.isfile(script):
+                    results["benchmarks"].append(
+                        {"name": bench["name"], "skipped": "script not found"}
+                    )
+                    continue
+                if script not in modules:
+                    spec = importlib.util.spec_from_file_location(
+                        "bench_" + os.path.basename(script)[:-3].replace("-", "_"),
+                        script,
+                    )
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    modules[script] = {
+                        "module": module,
+                        "import_ms": _median_subprocess_ms(
+                            [sys.executable, "-c", _IMPORT_PROBE, script, hooks_dir],
+                            env,
+                            report_stdout=True,
+                        ),
+                    }
+                module = modules[script]["module"]
+
+                io_clock = {"depth": 0, "ms": 0.0}
+                originals = {}
+
+                def _timed(fn):
+                    def wrapper(*args, **kwargs):
+                        if io_clock["depth"]:
+                            return fn(*args, **kwargs)
+                        io_clock["depth"] += 1
+                        t0 = _time.perf_counter()
+                        try:
+                            return fn(*args, **kwargs)
+                        finally:
+                            io_clock["ms"] += (_time.perf_counter() - t0) * 1000
+                            io_clock["depth"] -= 1
+
+                    return wrapper
+
+                for fname in _BENCH_STATE_IO_FUNCS:
+                    fn = getattr(module, fname, None)
+                    if callable(fn):
+                        originals[fname] = fn
+                        setattr(module, fname, _timed(fn))
+
+                def _call(payload):
+                    sys.stdin = io.StringIO(payload)
+                    sys.stdout = sys.stderr = io.StringIO()
+                    code = 0
+                    try:
+                        module.main()
+                    except SystemExit as exc:
+                        code = exc.code if isinstance(exc.code, int) else 1
+                    finally:
+                        sys.stdin, sys.stdout, sys.stderr = saved_stdio
+                    return code
+
+                payload = json.dumps(bench["input"])
+                seed = json.dumps(bench["pre_seed"]) if "pre_seed" in bench else None
+                totals, io_times, decisions, exit_codes = [], [], [], {}
+                try:
+                    for _ in range(iterations):
+                        # Fresh state each iteration (untimed), like the
+                        # subprocess mode's per-run temp dir.
+                        for fname in os.listdir(state_dir):
+                            try:
+                                os.unlink(os.path.join(state_dir, fname))
+                            except OSError:
+                                pass
+                        if seed is not None:
+                            _call(seed)
+                        io_clock["ms"] = 0.0
+                        t0 = _time.perf_counter()
+                        code = _call(payload)
+                        total = (_time.perf_counter() - t0) * 1000
+                        totals.append(total)
+                        io_times.append(io_clock["ms"])
+                        decisions.append(max(0.0, total - io_clock["ms"]))
+                        exit_codes[str(code)] = exit_codes.get(str(code), 0) + 1
+                finally:
+                    for fname, fn in originals.items():
+                        setattr(module, fname, fn)
+
+                total_p50 = _latency_summary(totals)["p50"]
+                entry = {
+                    "name": bench["name"],
+                    "script": os.path.basename(script),
+                    "import_ms": modules[script]["import_ms"],
+                    "state_io_ms": _latency_summary(io_times),
+                    "decision_ms": _latency_summary(decisions),
+                    "total_ms": _latency_summary(totals),
+                    "exit_codes": exit_codes,
+                }
+                if results["startup_ms"] is not None and entry["import_ms"] is not None:
+                    # What one real hook invocation costs at the median.
+                    entry["estimated_hook_ms"] = round(
+                        results["startup_ms"] + entry["import_ms"] + total_p50, 3
+                    )
+                if "expected_exit" in bench:
+                    entry["expected_exit"] = bench["expected_exit"]
+                results["benchmarks"].append(entry)
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved_stdio
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+    return results
+
+
+def cmd_benchmark():
+    """Run latency benchmarks against hook scripts."""
+    import tempfile
+    import time as _time
+
+    ap = argparse.ArgumentParser(prog="claude-token-guard benchmark")
+    ap.add_argument(
+        "--in-process",
+        action="store_true",
+        help="import the guards once and time decisions in-process",
     )
+    ap.add_argument("--iterations", type=int, default=None)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(sys.argv[2:])
+
+    benchmarks = _load_benchmark_inputs()
+
+    if args.in_process:
+        iterations = max(1, args.iterations or 2000)
+        results = _run_in_process_benchmark(benchmarks, iterations)
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        print(f"\n{'=' * 50}")
+        print("  CLAUDE TOKEN GUARD BENCHMARK (in-process)")
+        print(f"{'=' * 50}")
+        print(f"Iterations per input: {iterations}")
+        print(f"Interpreter startup:  {results['startup_ms']}ms (median)")
+        print()
+        for entry in results["benchmarks"]:
+            if "skipped" in entry:
+                print(f"  SKIP  {entry['name']} — {entry['skipped']}")
+                continue
+            d, io_ms = entry["decision_ms"], entry["state_io_ms"]
+            print(f"  {entry['name']} ({entry['script']}, import {entry['import_ms']}ms):")
+            print(
+                f"    decision  p50={d['p50']:.3f}ms  p95={d['p95']:.3f}ms  "
+                f"p99={d['p99']:.3f}ms  max={d['max']:.3f}ms"
+            )
+            print(
+                f"    state I/O p50={io_ms['p50']:.3f}ms  p95={io_ms['p95']:.3f}ms  "
+                f"p99={io_ms['p99']:.3f}ms"
+            )
+            if "estimated_hook_ms" in entry:
+                print(f"    est. per hook call: {entry['estimated_hook_ms']:.1f}ms")
+        print(f"{'=' * 50}\n")
+        return
 
-    iterations = 20  # Enough for stable percentiles without being slow
+    iterations = max(1, args.iterations or 20)  # Enough for stable percentiles without being slow
     all_latencies = []
+    results = {"mode": "subprocess", "iterations": iterations, "benchmarks": []}
+    say = (lambda *a, **k: None) if args.json else print
 
-    print(f"\n{'=' * 50}")
-    print("  CLAUDE TOKEN GUARD BENCHMARK")
-    print(f"{'=' * 50}")
-    print(f"Iterations per input: {iterations}")
-    print()
+    say(f"\n{'=' * 50}")
+    say("  CLAUDE TOKEN GUARD BENCHMARK")
+    say(f"{'=' * 50}")
+    say(f"Iterations per input: {iterations}")
+    say()
 
     for bench in benchmarks:
         name = bench["name"]
         payload = json.dumps(bench["input"])
-        tool_name = bench["input"].get("tool_name", "")
-
-        # Pick the right script
-        if tool_name == "Read":
-            script = reg_path
-        else:
-            script = tg_path
+        script = _benchmark_script(bench)
 
         if not os.path.isfile(script):
-            print(f"  SKIP  {name} — script not found: {script}")
+            say(f"  SKIP  {name} — script not found: {script}")
+            results["benchmarks"].append({"name": name, "skipped": "script not found"})
             continue
 
         latencies = []
@@ -1015,23 +1290,14 @@ def cmd_benchmark():
                 state_dir = os.path.join(tmp_dir, "session-state")
                 os.makedirs(state_dir)
                 config_path = os.path.join(tmp_dir, "config.json")
-                with open(config_path, "w") as cf:
-                    json.dump(
-                        {
-                            "max_agents": 50,
-                            "global_cooldown_seconds": 0,
-                            "parallel_window_seconds": 0,
-                            "max_per_subagent_type": 50,
-                            "audit_log": False,
-                        },
-                        cf,
-                    )
+                _write_benchmark_config(config_path)
+
+                env = os.environ.copy()
+                env["TOKEN_GUARD_STATE_DIR"] = state_dir
+                env["TOKEN_GUARD_CONFIG_PATH"] = config_path
 
                 # Pre-seed if needed
                 if "pre_seed" in bench:
-                    env = os.environ.copy()
-                    env["TOKEN_GUARD_STATE_DIR"] = state_dir
-                    env["TOKEN_GUARD_CONFIG_PATH"] = config_path
                     subprocess.run(
                         ["python3", script],
                         input=json.dumps(bench["pre_seed"]),
@@ -1041,10 +1307,6 @@ def cmd_benchmark():
                         timeout=10,
                     )
 
-                env = os.environ.copy()
-                env["TOKEN_GUARD_STATE_DIR"] = state_dir
-                env["TOKEN_GUARD_CONFIG_PATH"] = config_path
-
                 t0 = _time.monotonic()
                 subprocess.run(
                     ["python3", script],
@@ -1057,16 +1319,17 @@ def cmd_benchmark():
                 elapsed_ms = (_time.monotonic() - t0) * 1000
                 latencies.append(elapsed_ms)
 
-        latencies.sort()
         all_latencies.extend(latencies)
-        p50 = statistics.median(latencies)
-        p95 = latencies[int(len(latencies) * 0.95)]
-        p99 = latencies[int(len(latencies) * 0.99)]
+        summary = _latency_summary(latencies)
+        results["benchmarks"].append(
+            {"name": name, "script": os.path.basename(script), "wall_ms": summary}
+        )
 
-        print(f"  {name}:")
-        print(
-            f"    min={latencies[0]:.0f}ms  p50={p50:.0f}ms  p95={p95:.0f}ms  "
-            f"p99={p99:.0f}ms  max={latencies[-1]:.0f}ms"
+        say(f"  {name}:")
+        say(
+            f"    min={summary['min']:.0f}ms  p50={summary['p50']:.0f}ms  "
+            f"p95={summary['p95']:.0f}ms  p99={summary['p99']:.0f}ms  "
+            f"max={summary['max']:.0f}ms"
         )
 
     # Overall summary
@@ -1075,9 +1338,13 @@ def cmd_benchmark():
         overall_p95 = all_latencies[int(len(all_latencies) * 0.95)]
         budget = 500  # ms — subprocess overhead budget
         status = "PASS" if overall_p95 <= budget else "OVER BUDGET"
-        print(f"\n  Overall p95: {overall_p95:.0f}ms (budget: {budget}ms) — {status}")
+        results["overall_p95_ms"] = round(overall_p95, 3)
+        results["budget_ms"] = budget
+        say(f"\n  Overall p95: {overall_p95:.0f}ms (budget: {budget}ms) — {status}")
 
-    print(f"{'=' * 50}\n")
+    say(f"{'=' * 50}\n")
+    if args.json:
+        print(json.dumps(results, indent=2))
 
 
 def cmd_version():
@@ -1107,7 +1374,9 @@ def main():
         print("  status     Check installed vs package version")
         print("  verify     Post-install verification (checksums + smoke tests)")
         print("  drift      Compare installed files against manifest")
-        print("  benchmark  Run latency benchmarks against hook scripts")
+        print(
+            "  benchmark  Run latency benchmarks against hook scripts (--in-process, --json)"
+        )
         print("  report     Show token usage analytics")
         print("  health     Run self-heal diagnostics")
         print("  version    Show version")
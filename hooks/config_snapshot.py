@@ -0,0 +1,166 @@
+"""
+Shared parsed-config snapshot for hooks.
+
+Every hook process re-read and re-parsed the same small JSON files
+(token-guard-config.json, settings*.json, cost/config.json, budgets.json).
+load() serves them from one snapshot file shared by all hook processes:
+
+    session-state/config-snapshot.bin
+    MAGIC + marshal((python major.minor,
+                     {abs_path: ((mtime_ns, size, ino) | None, parsed),
+                      "abs_path\\0name": ((stat key, tag), (sha256, derived))}))
+
+A lookup costs one stat() of the source plus reading the snapshot (once per
+process); the source is only opened and parsed when its stat key changed,
+and the snapshot is then rewritten atomically (tmp + rename; concurrent
+rebuilders write equivalent data, so last-writer-wins is fine). Missing or
+unparsable sources are cached as None until they change.
+
+load_derived() caches a value computed from a source (token-guard keeps its
+validated config there) in the same snapshot, so there is one config cache
+for all hooks.
+
+marshal is used instead of JSON so the common case does no JSON parsing; it
+is versioned by the interpreter's major.minor and rebuilt on mismatch.
+Returned objects are shared within the process: treat them as read-only.
+"""
+
+import json
+import marshal
+import os
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SNAPSHOT_PATH = os.environ.get(
+    "CLAUDE_CONFIG_SNAPSHOT",
+    os.path.join(
+        os.environ.get(
+            "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
+        ),
+        "config-snapshot.bin",
+    ),
+)
+MAGIC = b"CCS1"
+_PY = tuple(sys.version_info[:2])
+
+_entries: Optional[Dict[str, Tuple[Any, Any]]] = None
+
+
+def _stat_key(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read_snapshot(snapshot: str) -> Dict[str, Tuple[Any, Any]]:
+    try:
+        with open(snapshot, "rb") as f:
+            raw = f.read()
+        if raw[: len(MAGIC)] != MAGIC:
+            return {}
+        py, entries = marshal.loads(raw[len(MAGIC) :])
+        if tuple(py) == _PY and isinstance(entries, dict):
+            return entries
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return {}
+
+
+def _write_snapshot(snapshot: str, entries: Dict[str, Tuple[Any, Any]]) -> None:
+    tmp = f"{snapshot}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + marshal.dumps((_PY, entries)))
+        os.replace(tmp, snapshot)
+    except (OSError, ValueError):
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _parse(path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _entries_for(snapshot: str) -> Dict[str, Tuple[Any, Any]]:
+    global _entries
+    if snapshot != SNAPSHOT_PATH:
+        return _read_snapshot(snapshot)
+    if _entries is None:
+        _entries = _read_snapshot(snapshot)
+    return _entries
+
+
+def load(path: str, default: Any = None, snapshot: Optional[str] = None) -> Any:
+    """Parsed JSON of `path` (or `default` if missing/invalid), via the snapshot."""
+    path = os.path.abspath(os.path.expanduser(str(path)))
+    snapshot = snapshot or SNAPSHOT_PATH
+    key = _stat_key(path)
+    entries = _entries_for(snapshot)
+    cached = entries.get(path)
+    if cached is not None and cached[0] == key:
+        data = cached[1]
+    else:
+        data = _parse(path) if key is not None else None
+        entries[path] = (key, data)
+        _write_snapshot(snapshot, entries)
+    return default if data is None else data
+
+
+def load_derived(
+    path: str,
+    name: str,
+    tag: Any,
+    derive: Callable[[Any], Any],
+    snapshot: Optional[str] = None,
+) -> Any:
+    """derive(parsed JSON of `path`, or None), cached in the snapshot.
+
+    Stored under "<path>\\0<name>", keyed by the source's stat key, `tag` (pass
+    something that changes with derive()'s code) and the sha256 of the
+    source: a stat miss with unchanged content (e.g. after `touch`) reuses
+    the cached value without parsing. The value must be marshal-serializable.
+    """
+    path = os.path.abspath(os.path.expanduser(str(path)))
+    snapshot = snapshot or SNAPSHOT_PATH
+    slot = f"{path}\0{name}"
+    key = (_stat_key(path), tag)
+    entries = _entries_for(snapshot)
+    cached = entries.get(slot)
+    if cached is not None and cached[0] == key:
+        return cached[1][1]
+    raw = b""
+    if key[0] is not None:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            pass
+    import hashlib  # deferred: only needed when the stat key missed
+
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached[0][1] == tag and cached[1][0] == digest:
+        value = cached[1][1]
+    else:
+        try:
+            parsed = json.loads(raw) if raw else None
+        except ValueError:
+            parsed = None
+        value = derive(parsed)
+    entries[slot] = (key, (digest, value))
+    _write_snapshot(snapshot, entries)
+    return value
+
+
+def invalidate() -> None:
+    """Drop the in-process copy (the next load() re-reads the snapshot)."""
+    global _entries
+    _entries = None
@@ -28,8 +28,23 @@ FILE_PATH=$(echo "$INPUT" | jq -r '.tool_input.file_path // ""')
 [ -z "$FILE_PATH" ] && exit 0
 
 TERMINALS_DIR=~/.claude/terminals
+CONFLICT_INDEX="$TERMINALS_DIR/conflict-index.json"
 
-# Check all other active sessions' files_touched arrays
+# Fast path: one lookup in the path -> sessions index the heartbeat
+# maintains (conflict_index.py) instead of opening every session file.
+if [ -f "$CONFLICT_INDEX" ]; then
+  OTHER_SID=$(jq -r --arg fp "$FILE_PATH" --arg sid "$SID8" \
+    '(.paths[$fp] // []) | map(select(. != $sid)) | .[0] // ""' "$CONFLICT_INDEX" 2>/dev/null)
+  if [[ "$OTHER_SID" =~ ^[A-Za-z0-9_-]{1,64}$ ]]; then
+    sf="$TERMINALS_DIR/session-${OTHER_SID}.json"
+    OTHER_PROJECT=$(jq -r '.project // "unknown"' "$sf" 2>/dev/null || echo "unknown")
+    OTHER_TASK=$(jq -r '.current_task // "unknown task"' "$sf" 2>/dev/null || echo "unknown task")
+    echo "WARNING: Session $OTHER_SID ($OTHER_PROJECT) has also touched $(basename "$FILE_PATH") — task: \"$OTHER_TASK\". Coordinate before editing." >&2
+  fi
+  exit 0
+fi
+
+# No index yet: check all other active sessions' files_touched arrays
 for sf in "$TERMINALS_DIR"/session-*.json; do
   [ -f "$sf" ] || continue
   OTHER_SID=$(jq -r '.session // ""' "$sf" 2>/dev/null)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Inverted file-conflict index for ~/.claude/terminals.
+
+conflict-guard.sh used to open every session file and scan its
+files_touched for the path being edited, so each check was O(sessions) jq
+runs and a full report was pairwise. This index maps each touched path to
+the open sessions that touched it:
+
+    terminals/conflict-index.json
+    {"schema_version": 1,
+     "paths":    {path: [sid8, ...]},
+     "sessions": {sid8: [path, ...]}}
+
+"sessions" keeps each session's last indexed files_touched, so an update only
+adds and removes the paths that changed. session_registry.record() calls
+update_session() when a session's files_touched digest changes or when it
+closes (closed sessions are removed). A conflict check is one lookup
+(sessions_for) and a full report is linear in the number of touched paths
+(conflicts).
+
+CLI:
+    conflict_index.py check PATH [SID8]   sessions other than SID8 that touched PATH
+    conflict_index.py report              every path touched by 2+ sessions
+    conflict_index.py rebuild             recreate from session-*.json
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_utils import load_json_state, lock, save_json_state, unlock  # noqa: E402
+
+INDEX_NAME = "conflict-index.json"
+
+
+def index_path(terminals: str) -> str:
+    return os.path.join(terminals, INDEX_NAME)
+
+
+def _load(path: str):
+    index = load_json_state(path)
+    paths = index.get("paths") if isinstance(index, dict) else None
+    sessions = index.get("sessions") if isinstance(index, dict) else None
+    return (
+        paths if isinstance(paths, dict) else {},
+        sessions if isinstance(sessions, dict) else {},
+    )
+
+
+def _apply(paths: Dict, sessions: Dict, sid8: str, files: List[str]) -> None:
+    old = set(sessions.get(sid8) or [])
+    new = set(files)
+    for path in old - new:
+        holders = [s for s in paths.get(path, []) if s != sid8]
+        if holders:
+            paths[path] = holders
+        else:
+            paths.pop(path, None)
+    for path in new - old:
+        holders = paths.setdefault(path, [])
+        if sid8 not in holders:
+            holders.append(sid8)
+    if files:
+        sessions[sid8] = files
+    else:
+        sessions.pop(sid8, None)
+
+
+def _write(terminals: str, mutate) -> None:
+    path = index_path(terminals)
+    try:
+        os.makedirs(terminals, exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                paths, sessions = _load(path)
+                mutate(paths, sessions)
+                save_json_state(
+                    path, {"schema_version": 1, "paths": paths, "sessions": sessions}
+                )
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def _clean_files(files: Optional[Iterable]) -> List[str]:
+    seen = []
+    for f in files or []:
+        if isinstance(f, str) and f and f not in seen:
+            seen.append(f)
+    return seen
+
+
+def update_session(terminals: str, sid8: str, files: Optional[Iterable]) -> None:
+    """Replace sid8's indexed paths with `files` (None/empty removes it)."""
+    cleaned = _clean_files(files)
+    _write(terminals, lambda paths, sessions: _apply(paths, sessions, sid8, cleaned))
+
+
+def sessions_for(
+    terminals: str, path: str, exclude: Optional[str] = None
+) -> List[str]:
+    """Open sessions (other than `exclude`) that touched `path`."""
+    paths, _ = _load(index_path(terminals))
+    return [s for s in paths.get(path, []) if s != exclude]
+
+
+def conflicts(terminals: str) -> Dict[str, List[str]]:
+    """Every path touched by two or more open sessions."""
+    paths, _ = _load(index_path(terminals))
+    return {p: holders for p, holders in paths.items() if len(holders) > 1}
+
+
+def rebuild(terminals: str) -> int:
+    """Recreate the index from the open session files; returns sessions indexed."""
+    found = {}
+    try:
+        names = sorted(os.listdir(terminals))
+    except OSError:
+        names = []
+    for name in names:
+        if not (name.startswith("session-") and name.endswith(".json")):
+            continue
+        session = load_json_state(os.path.join(terminals, name))
+        if not isinstance(session, dict) or session.get("status") == "closed":
+            continue
+        sid8 = str(session.get("session") or name[len("session-") : -len(".json")])
+        files = _clean_files(session.get("files_touched"))
+        if files:
+            found[sid8] = files
+
+    def replace(paths, sessions):
+        paths.clear()
+        sessions.clear()
+        for sid8, files in found.items():
+            _apply(paths, sessions, sid8, files)
+
+    _write(terminals, replace)
+    return len(found)
+
+
+def main(argv) -> int:
+    terminals = os.path.expanduser("~/.claude/terminals")
+    cmd = argv[1] if len(argv) > 1 else ""
+    if cmd == "check" and len(argv) > 2:
+        exclude = argv[3] if len(argv) > 3 else None
+        print(json.dumps(sessions_for(terminals, argv[2], exclude)))
+        return 0
+    if cmd == "report":
+        print(json.dumps(conflicts(terminals), indent=2, sort_keys=True))
+        return 0
+    if cmd == "rebuild":
+        print(json.dumps({"sessions": rebuild(terminals)}))
+        return 0
+    print(__doc__.split("CLI:\n", 1)[1].rstrip(), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -6,7 +6,6 @@ all hooks persist safe, stable identifiers while remaining backward compatible.
 
 from __future__ import annotations
 
-import hashlib
 import os
 import re
 from typing import Any
@@ -50,6 +49,8 @@ def normalize_session_key(raw_session_id: Any, max_len: int = 12) -> str:
         joined = joined.replace("..", "")
         joined = joined.strip("-")
     if not joined:
+        import hashlib  # deferred: rare fallback, keeps hook cold start lean
+
         digest = hashlib.sha256(raw.encode("utf-8", "ignore")).hexdigest()[:10]
         joined = f"sid-{digest}"
 
@@ -81,4 +82,6 @@ def normalize_file_path(path: Any) -> str:
 
 
 def short_hash(value: str, length: int = 12) -> str:
+    import hashlib
+
     return hashlib.sha256((value or "").encode("utf-8", "ignore")).hexdigest()[:length]
@@ -791,13 +791,24 @@ echo ""
 echo "Session Files:"
 ACTIVE=$(find ~/.claude/terminals -maxdepth 1 -type f -name 'session-*.json' 2>/dev/null | wc -l | tr -d ' ')
 echo "  INFO  $ACTIVE session file(s) on disk"
+SESSION_INDEX=~/.claude/terminals/sessions-index.json
+if [ -f "$SESSION_INDEX" ]; then
+  OPEN=$(jq -r '[.sessions[]? | select(.status != "closed")] | length' "$SESSION_INDEX" 2>/dev/null || echo "?")
+  ARCHIVED=$(jq -r '[.sessions[]? | select(.archived == true)] | length' "$SESSION_INDEX" 2>/dev/null || echo "?")
+  echo "  INFO  registry: $OPEN open, $ARCHIVED archived"
+fi
 
 echo ""
 echo "Activity Log:"
-if [ -f ~/.claude/terminals/activity.jsonl ]; then
+ACTIVITY_INDEX=~/.claude/terminals/activity/index.json
+SHARDS=$(find ~/.claude/terminals/activity -maxdepth 1 -type f -name '*.jsonl' 2>/dev/null | wc -l | tr -d ' ')
+if [ "$SHARDS" -gt 0 ]; then
+  LAST=$(jq -r '[.sessions[]?.last_ts // empty] | max // "unknown"' "$ACTIVITY_INDEX" 2>/dev/null || echo "unknown")
+  echo "  INFO  $SHARDS session shard(s), last indexed: ${LAST:-unknown}"
+elif [ -f ~/.claude/terminals/activity.jsonl ]; then
   LINES=$(wc -l < ~/.claude/terminals/activity.jsonl | tr -d ' ')
   LAST=$(tail -1 ~/.claude/terminals/activity.jsonl 2>/dev/null | jq -r '.ts // "unknown"' 2>/dev/null)
-  echo "  INFO  $LINES entries, last: $LAST"
+  echo "  INFO  $LINES entries (legacy log), last: $LAST"
 else
   echo "  WARN  no activity log yet"
   WARN=$((WARN + 1))
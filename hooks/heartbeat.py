@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+PostToolUse heartbeat engine (terminal-heartbeat.sh runs this when python3
+is available).
+
+The shell heartbeat started jq about seven times per tool call (field
+extraction, the activity line, the session rewrite, the turn-count read) plus
+date/basename/mktemp. heartbeat() does the same work in one interpreter:
+
+  - parses the payload once;
+  - appends one compact line to the session's activity shard (every call;
+    see activity_log.py) and refreshes the shard index on full beats;
+  - rate-limited to one full beat per COOLDOWN_SECONDS per session: applies
+    the session-{sid8}.json update (last_*, tool_counts, turn_count,
+    files_touched ring, current_files, recent_ops ring, plan_file) in a
+    single read-modify-write, or creates the file from the payload;
+  - enforces CLAUDE_WORKER_MAX_TURNS for spawned workers;
+  - records the session in the registry index (session_registry.py);
+  - at most once per STALE_CHECK_SECONDS, marks other sessions idle for more
+    than STALE_AFTER_SECONDS as stale, notifies the lead of interactive
+    workers, prunes expired activity shards and archives closed sessions.
+
+heartbeat() takes the parsed payload and returns the max-turns message (or
+None), so a resident hook process can call it without spawning anything.
+Lock files live in /tmp under the same names as the shell version, so the
+two engines share the cooldown (the lock file's mtime) during a rollout.
+They only exclude each other where the shell has flock(1): without it (stock
+macOS) portable.sh locks a mkdir "<lock>.d" directory instead, and a shell
+and a Python beat for the same session can overlap. The worst case is one
+extra full beat, which the session update tolerates.
+"""
+
+import fnmatch
+import json
+import os
+import re
+import signal
+import sys
+import tempfile
+import time
+from typing import Dict, Mapping, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import activity_log  # noqa: E402
+import session_registry  # noqa: E402
+from hook_utils import save_json_state, try_lock, unlock  # noqa: E402
+
+SCHEMA_VERSION = 2
+COOLDOWN_SECONDS = 5
+STALE_CHECK_SECONDS = 60
+STALE_AFTER_SECONDS = 30
+FILES_TOUCHED_MAX = 30
+RECENT_OPS_MAX = 10
+# Git Bash mounts /tmp on the user's temp dir; native Windows Python has no /tmp.
+LOCK_DIR = tempfile.gettempdir() if sys.platform == "win32" else "/tmp"
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+_SAFE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+_TRACK_CURRENT_TOOLS = ("Read", "Edit", "Write")
+_PLAN_GLOB = "*/.claude/plans/*.md"
+
+
+def _now_iso(now: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+
+
+def _parse_iso_epoch(ts) -> float:
+    """ISO 8601 timestamp to epoch seconds; 0 (very old) when unparseable."""
+    if not isinstance(ts, str) or not ts:
+        return 0
+    import calendar  # stale checks only; cooldown beats never parse times
+
+    try:
+        return calendar.timegm(time.strptime(ts, "%Y-%m-%dT%H:%M:%SZ"))
+    except ValueError:
+        pass
+    from datetime import datetime
+
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0
+
+
+def _basename(path: str) -> str:
+    """basename(1) semantics: trailing slashes are ignored, "/" stays "/"."""
+    stripped = path.rstrip("/")
+    if not stripped:
+        return "/" if path else ""
+    return os.path.basename(stripped)
+
+
+def _safe_name(value) -> str:
+    """value if it is usable as a file-name component, else ""."""
+    value = str(value or "")
+    if _SAFE_NAME_RE.match(value) and ".." not in value:
+        return value
+    return ""
+
+
+def _str_field(obj, key: str, default: str) -> str:
+    """jq `.key // default`: missing, null and false fall back to default."""
+    value = obj.get(key) if isinstance(obj, dict) else None
+    if value is None or value is False:
+        return default
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _append_jsonl(path: str, record: Dict) -> None:
+    """Append one record; inbox appends also bump <session>.gen.
+
+    check-inbox.sh skips its full pass while the .gen file is not newer than
+    the session's last pass, so every inbox writer bumps it.
+    """
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except OSError:
+        return
+    if os.path.basename(os.path.dirname(path)) == "inbox" and path.endswith(".jsonl"):
+        try:
+            with open(path[: -len(".jsonl")] + ".gen", "w") as f:
+                f.write(f"{int(time.time() * 1000)}\n")
+        except OSError:
+            pass
+
+
+def _try_lock(path: str):
+    """Open path for append and take a non-blocking exclusive lock.
+
+    Returns the open file (release it with _release) or None when another
+    process holds the lock. Append mode keeps the file's mtime meaningful
+    for the cooldown checks.
+    """
+    try:
+        f = open(path, "a")
+    except OSError:
+        return None
+    if not try_lock(f):
+        f.close()
+        return None
+    return f
+
+
+def _release(f) -> None:
+    """Unlock and close a file returned by _try_lock."""
+    try:
+        unlock(f)
+    except OSError:
+        pass
+    f.close()
+
+
+def _lock_age(path: str, now: float) -> float:
+    try:
+        return now - os.path.getmtime(path)
+    except OSError:
+        return now
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def detect_tty() -> str:
+    """Best-effort controlling TTY of the Claude process ("" if none)."""
+    for fd in (0, 1, 2):
+        try:
+            return os.ttyname(fd)
+        except OSError:
+            continue
+    import subprocess  # only reached without a TTY on stdio
+
+    try:
+        out = subprocess.run(
+            ["ps", "-o", "tty=", "-p", str(os.getppid())],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    if out and out not in ("?", "??"):
+        return "/dev/" + out
+    return ""
+
+
+def git_branch(cwd: str) -> str:
+    """Current branch of the repo containing cwd, read from .git/HEAD.
+
+    Mirrors `git branch --show-current`: "" when HEAD is detached, "none"
+    outside a repository.
+    """
+    path = os.path.abspath(cwd) if cwd and cwd != "unknown" else ""
+    if not path or not os.path.isdir(path):
+        return "none"
+    while True:
+        dot_git = os.path.join(path, ".git")
+        git_dir = None
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+        elif os.path.isfile(dot_git):
+            try:
+                with open(dot_git, "r") as f:
+                    line = f.readline().strip()
+            except OSError:
+                line = ""
+            if line.startswith("gitdir:"):
+                git_dir = os.path.join(path, line[len("gitdir:") :].strip())
+        if git_dir:
+            try:
+                with open(os.path.join(git_dir, "HEAD"), "r") as f:
+                    head = f.readline().strip()
+            except OSError:
+                return "none"
+            if head.startswith("ref: refs/heads/"):
+                return head[len("ref: refs/heads/") :]
+            return ""
+        parent = os.path.dirname(path)
+        if parent == path:
+            return "none"
+        path = parent
+
+
+def _update_session(
+    session: Dict, ctx: Dict, tty: str, worker_name: str, worker_task: str
+) -> None:
+    now_iso, tool = ctx["now_iso"], ctx["tool"]
+    file_path, file_base = ctx["file_path"], ctx["file_base"]
+    session["last_active"] = now_iso
+    session["last_tool"] = tool
+    session["last_file"] = file_base
+    session["claude_session_id"] = ctx["raw_session_id"]
+    session["schema_version"] = SCHEMA_VERSION
+    if tty:
+        session["tty"] = tty
+    if worker_name:
+        session["worker_name"] = worker_name
+    if worker_task:
+        session["current_task"] = worker_task
+    counts = session.get("tool_counts")
+    counts = counts if isinstance(counts, dict) else {}
+    prev = counts.get(tool)
+    counts[tool] = (prev if isinstance(prev, (int, float)) else 0) + 1
+    session["tool_counts"] = counts
+    turns = session.get("turn_count")
+    session["turn_count"] = (turns if isinstance(turns, (int, float)) else 0) + 1
+    if tool in ("Write", "Edit"):
+        touched = session.get("files_touched")
+        touched = [p for p in (touched if isinstance(touched, list) else []) if p != file_path]
+        session["files_touched"] = (touched + [file_path])[-FILES_TOUCHED_MAX:]
+    if ctx["track_current"]:
+        session["current_files"] = [file_path]
+    ops = session.get("recent_ops")
+    ops = ops if isinstance(ops, list) else []
+    ops.append({"t": now_iso, "tool": tool, "file": file_base})
+    session["recent_ops"] = ops[-RECENT_OPS_MAX:]
+
+
+def _new_session(ctx: Dict, tty: str, worker_name: str, worker_task: str) -> Dict:
+    now_iso, tool = ctx["now_iso"], ctx["tool"]
+    session = {
+        "session": ctx["sid8"],
+        "claude_session_id": ctx["raw_session_id"],
+        "status": "active",
+        "project": ctx["project"],
+        "branch": git_branch(ctx["cwd"]),
+        "cwd": ctx["cwd"],
+        "started": now_iso,
+        "last_active": now_iso,
+        "last_tool": tool,
+        "last_file": ctx["file_base"],
+        "source": "heartbeat-fallback",
+        "schema_version": SCHEMA_VERSION,
+        "tool_counts": {tool: 1},
+        "turn_count": 1,
+        "files_touched": [],
+        "recent_ops": [{"t": now_iso, "tool": tool, "file": ctx["file_base"]}],
+    }
+    if ctx["track_current"]:
+        session["current_files"] = [ctx["file_path"]]
+    if tty:
+        session["tty"] = tty
+    if worker_name:
+        session["worker_name"] = worker_name
+    if worker_task:
+        session["current_task"] = worker_task
+    return session
+
+
+def _enforce_max_turns(
+    terminals: str, sid8: str, turns, max_turns: int, task_id: str, now_iso: str
+) -> Optional[str]:
+    if not isinstance(turns, (int, float)) or turns < max_turns:
+        return None
+    inbox = os.path.join(terminals, "inbox")
+    message = (
+        f"[MAX_TURNS_REACHED] Task {task_id} hit limit of {max_turns} turns. "
+        "Terminating."
+    )
+    _append_jsonl(
+        os.path.join(inbox, f"{sid8}.jsonl"),
+        {"ts": now_iso, "from": "coordinator", "priority": "urgent", "content": message},
+    )
+    results = os.path.join(terminals, "results")
+    meta = _read_json(os.path.join(results, f"{task_id}.meta.json"))
+    if not isinstance(meta, dict):
+        return message
+    lead = _safe_name(meta.get("notify_session_id"))
+    if lead:
+        _append_jsonl(
+            os.path.join(inbox, f"{lead}.jsonl"),
+            {
+                "ts": now_iso,
+                "from": "coordinator",
+                "priority": "urgent",
+                "content": f"[MAX_TURNS_REACHED] Worker {task_id} hit {max_turns} turns. Auto-terminated.",
+            },
+        )
+    try:
+        with open(os.path.join(results, f"{task_id}.pid"), "r") as f:
+            pid_text = f.read().strip()
+    except OSError:
+        pid_text = ""
+    if pid_text.isdigit():
+        try:
+            os.kill(int(pid_text), signal.SIGTERM)
+        except OSError:
+            pass
+    return message
+
+
+def mark_stale_sessions(terminals: str, own_session_file: str, now: float) -> int:
+    """Mark other active sessions idle > STALE_AFTER_SECONDS as stale.
+
+    Leads of interactive workers get one "[WORKER IDLE]" inbox message per
+    (task, session). Returns the number of sessions marked.
+    """
+    try:
+        names = sorted(os.listdir(terminals))
+    except OSError:
+        return 0
+    results = os.path.join(terminals, "results")
+    metas = None
+    marked = 0
+    for name in names:
+        if not (name.startswith("session-") and name.endswith(".json")):
+            continue
+        path = os.path.join(terminals, name)
+        if path == own_session_file:
+            continue
+        data = _read_json(path)
+        if not isinstance(data, dict) or data.get("status", "unknown") != "active":
+            continue
+        if now - _parse_iso_epoch(data.get("last_active")) <= STALE_AFTER_SECONDS:
+            continue
+        data["status"] = "stale"
+        save_json_state(path, data)
+        session_registry.record(terminals, data)
+        marked += 1
+
+        task = data.get("current_task")
+        if not task:
+            continue
+        if metas is None:
+            metas = _load_metas(results)
+        sf_sid = str(data.get("session") or "")
+        for meta_name, meta in metas:
+            if meta.get("task_id") != task:
+                continue
+            lead = _safe_name(meta.get("notify_session_id"))
+            if not lead or (meta.get("mode") or "pipe") != "interactive":
+                continue
+            reported = os.path.join(
+                results, f"{meta_name[: -len('.meta.json')]}.{sf_sid}.idle-notified"
+            )
+            if os.path.exists(reported):
+                continue
+            _append_jsonl(
+                os.path.join(terminals, "inbox", f"{lead}.jsonl"),
+                {
+                    "ts": _now_iso(time.time()),
+                    "from": "coordinator",
+                    "priority": "normal",
+                    "content": f"[WORKER IDLE] Session {sf_sid} — inactive for >30s, marked stale.",
+                },
+            )
+            try:
+                open(reported, "a").close()
+            except OSError:
+                pass
+    return marked
+
+
+def _load_metas(results: str):
+    try:
+        names = sorted(os.listdir(results))
+    except OSError:
+        return []
+    metas = []
+    for name in names:
+        if name.endswith(".meta.json"):
+            meta = _read_json(os.path.join(results, name))
+            if isinstance(meta, dict) and meta.get("task_id"):
+                metas.append((name, meta))
+    return metas
+
+
+def heartbeat(
+    payload: Dict,
+    home: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+    now: Optional[float] = None,
+    lock_dir: str = LOCK_DIR,
+) -> Optional[str]:
+    """Run one PostToolUse heartbeat.
+
+    Returns the max-turns message the hook should print, or None. Raises
+    ValueError when the payload's session_id is invalid.
+    """
+    env = os.environ if environ is None else environ
+    home = home or os.path.expanduser("~")
+    now = time.time() if now is None else now
+    payload = payload if isinstance(payload, dict) else {}
+
+    raw_session_id = _str_field(payload, "session_id", "")
+    if not _SESSION_ID_RE.match(raw_session_id):
+        raise ValueError("Invalid session_id in terminal-heartbeat payload.")
+    tool = _str_field(payload, "tool_name", "unknown")
+    tool_input = payload.get("tool_input")
+    if tool == "Bash":
+        command = _str_field(tool_input, "command", "unknown")
+        file_path = command.split("\n", 1)[0][:80]
+    else:
+        file_path = _str_field(tool_input, "file_path", "unknown")
+    cwd = _str_field(payload, "cwd", "unknown")
+    sid8 = raw_session_id[:8]
+    ctx = {
+        "raw_session_id": raw_session_id,
+        "sid8": sid8,
+        "tool": tool,
+        "file_path": file_path,
+        "file_base": _basename(file_path),
+        "cwd": cwd,
+        "project": _basename(cwd),
+        "now_iso": _now_iso(now),
+        "track_current": tool in _TRACK_CURRENT_TOOLS and file_path != "unknown",
+    }
+
+    terminals = os.path.join(home, ".claude", "terminals")
+    os.makedirs(os.path.join(terminals, "inbox"), exist_ok=True)
+
+    # Activity log gets every event; only the session update is rate-limited.
+    activity_log.append_activity(
+        terminals,
+        sid8,
+        {
+            "ts": ctx["now_iso"],
+            "session": sid8,
+            "tool": tool,
+            "file": ctx["file_base"],
+            "path": file_path,
+            "project": ctx["project"],
+        },
+    )
+
+    beat_lock_path = os.path.join(lock_dir, f"claude-heartbeat-{sid8}.lock")
+    preexisted = os.path.exists(beat_lock_path)
+    beat_lock = _try_lock(beat_lock_path)
+    if beat_lock is None:
+        return None
+    try:
+        age = _lock_age(beat_lock_path, now)
+        if preexisted and 0 <= age < COOLDOWN_SECONDS:
+            return None
+        _touch(beat_lock_path)
+        message = _full_beat(terminals, ctx, env, now)
+        activity_log.update_index(terminals, sid8, ctx["now_iso"])
+    finally:
+        _release(beat_lock)
+
+    stale_lock_path = os.path.join(lock_dir, "claude-stale-check.lock")
+    preexisted = os.path.exists(stale_lock_path)
+    stale_lock = _try_lock(stale_lock_path)
+    if stale_lock is not None:
+        try:
+            age = _lock_age(stale_lock_path, now)
+            due = not preexisted or age > STALE_CHECK_SECONDS or age < 0
+            if due:
+                _touch(stale_lock_path)
+        finally:
+            _release(stale_lock)
+        if due:
+            mark_stale_sessions(
+                terminals, os.path.join(terminals, f"session-{sid8}.json"), now
+            )
+            activity_log.prune_shards(terminals, now)
+            session_registry.archive_closed(terminals, now)
+    return message
+
+
+def _full_beat(terminals: str, ctx: Dict, env: Mapping[str, str], now: float) -> Optional[str]:
+    session_file = os.path.join(terminals, f"session-{ctx['sid8']}.json")
+    worker_name = env.get("CLAUDE_WORKER_NAME", "")
+    worker_task = env.get("CLAUDE_WORKER_TASK_ID", "")
+    message = None
+
+    existed = os.path.exists(session_file)
+    if existed:
+        session = _read_json(session_file)
+        if not isinstance(session, dict):
+            return None  # corrupt: leave it for session-register / self-heal
+        tty = session.get("tty") or detect_tty()
+        _update_session(session, ctx, tty, worker_name, worker_task)
+    else:
+        session = _new_session(ctx, detect_tty(), worker_name, worker_task)
+
+    if fnmatch.fnmatchcase(ctx["file_path"], _PLAN_GLOB):
+        session["plan_file"] = ctx["file_path"]
+    if not save_json_state(session_file, session):
+        return None
+    session_registry.record(terminals, session)
+
+    max_turns = env.get("CLAUDE_WORKER_MAX_TURNS", "")
+    task_id = _safe_name(worker_task)
+    if existed and max_turns.isdigit() and task_id:
+        message = _enforce_max_turns(
+            terminals,
+            ctx["sid8"],
+            session.get("turn_count"),
+            int(max_turns),
+            task_id,
+            ctx["now_iso"],
+        )
+    return message
+
+
+def main() -> None:
+    try:
+        payload = json.loads(sys.stdin.read() or "{}")
+    except ValueError:
+        payload = {}
+    try:
+        message = heartbeat(payload)
+    except ValueError as exc:
+        print(f"BLOCKED: {exc}", file=sys.stderr)
+        sys.exit(2)
+    if message:
+        print(message)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ Usage in any hook:
     from hook_audit import log_decision
     log_decision("model-router", "Task", "block", "prompt exceeds 15 lines", latency_ms=12)
 
+HookTimer additionally records the outcome and latency in the hook's
+histogram file (hook_utils.record_hook_outcome) for hook_health.py.
+
 Schema per entry:
     ts           — ISO timestamp
     hook         — hook name (e.g. "model-router", "credential-guard")
@@ -28,7 +31,7 @@ from typing import Optional
 # Import shared locking from hook_utils (self-contained fallback if unavailable)
 try:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from hook_utils import locked_append
+    from hook_utils import locked_append, record_hook_outcome
 except (ImportError, SyntaxError):
 
     def locked_append(path: str, line: str) -> bool:
@@ -39,6 +42,13 @@ except (ImportError, SyntaxError):
         except OSError:
             return False
 
+    def record_hook_outcome(hook, outcome, latency_ms=None, state_dir=None) -> bool:
+        return False
+
+
+# HookTimer decision → hook_health outcome counter
+_DECISION_OUTCOMES = {"block": "fail_closed", "error": "error"}
+
 
 AUDIT_PATH = os.path.join(
     os.environ.get(
@@ -122,4 +132,13 @@ class HookTimer:
             session_id=self.session_id,
             extra=self.extra,
         )
+        try:
+            record_hook_outcome(
+                self.hook,
+                _DECISION_OUTCOMES.get(self.decision, "success"),
+                latency_ms=elapsed,
+                state_dir=os.path.dirname(AUDIT_PATH),
+            )
+        except Exception:
+            pass
         return False  # don't suppress exceptions
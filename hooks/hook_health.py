@@ -2,23 +2,38 @@
 """
 Hook Health Analyzer — aggregates per-hook metrics for the SLO dashboard.
 
-Reads two data sources:
-  1. hook-counters.json — success/fail_open/fail_closed/error counts per hook
-  2. audit.jsonl — per-decision records with latency_ms and timestamps
+Reads three data sources:
+  1. hook-metrics/{hook}.json — per-day outcome counters + log-bucketed latency
+     histograms written by hook_utils.record_hook_outcome()
+  2. hook-counters.json — legacy success/fail_open/fail_closed/error counts
+  3. audit.jsonl — per-decision records (tail only) for decision breakdowns,
+     and latency for hooks that do not yet record histograms
+
+Percentiles come from histograms in O(buckets) — no per-sample sorting.
 
 Outputs a health summary suitable for session-slo-check.py or CLI display.
 
 Usage:
     python3 hook_health.py              # JSON summary
     python3 hook_health.py --human      # human-readable table
+    python3 hook_health.py --window 7   # only the last 7 days of histograms
 """
 
 import json
 import os
 import sys
-import statistics
-from collections import defaultdict
-from typing import Dict, List
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hook_utils import (  # noqa: E402
+    HOOK_OUTCOMES,
+    histogram_percentile,
+    hook_metrics_dir,
+    latency_bucket,
+    read_tail_lines,
+)
 
 STATE_DIR = os.environ.get(
     "TOKEN_GUARD_STATE_DIR",
@@ -26,6 +41,7 @@ STATE_DIR = os.environ.get(
 )
 COUNTERS_FILE = os.path.join(STATE_DIR, "hook-counters.json")
 AUDIT_FILE = os.path.join(STATE_DIR, "audit.jsonl")
+METRICS_DIR = hook_metrics_dir(STATE_DIR)
 
 # Thresholds for health grading
 ERROR_RATE_WARN = 0.05  # 5% errors = warning
@@ -43,33 +59,93 @@ def load_counters() -> Dict:
         return {}
 
 
-def load_recent_audit(max_lines: int = 500) -> List[Dict]:
-    """Load the most recent audit entries (tail of file)."""
-    entries = []
+def load_histograms(window_days: Optional[int] = None) -> Dict[str, Dict]:
+    """Merge each hook's retained per-day metrics over the last window_days.
+
+    Returns {hook: {"outcomes": Counter, "buckets": {idx: count}, "max_ms": float}}.
+    """
+    cutoff = ""
+    if window_days:
+        cutoff = time.strftime(
+            "%Y-%m-%d", time.gmtime(time.time() - (window_days - 1) * 86400)
+        )
+    out: Dict[str, Dict] = {}
     try:
-        with open(AUDIT_FILE) as f:
-            lines = f.readlines()
-        for line in lines[-max_lines:]:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entries.append(json.loads(line))
-            except json.JSONDecodeError:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        return out
+    for fname in sorted(names):
+        if not fname.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, fname)) as f:
+                doc = json.load(f)
+        except (json.JSONDecodeError, OSError, ValueError):
+            continue
+        if not isinstance(doc, dict) or not isinstance(doc.get("days"), dict):
+            continue
+        outcomes: Counter = Counter()
+        buckets: Counter = Counter()
+        max_ms = 0.0
+        for day, rec in doc["days"].items():
+            if (cutoff and day < cutoff) or not isinstance(rec, dict):
                 continue
-    except (FileNotFoundError, OSError):
-        pass
+            outcomes.update(rec.get("outcomes") or {})
+            for idx, n in (rec.get("latency") or {}).items():
+                buckets[int(idx)] += int(n)
+            max_ms = max(max_ms, float(rec.get("max_ms", 0) or 0))
+        out[doc.get("hook") or fname[:-5]] = {
+            "outcomes": outcomes,
+            "buckets": dict(buckets),
+            "max_ms": max_ms,
+        }
+    return out
+
+
+def load_recent_audit(max_lines: int = 500) -> List[Dict]:
+    """Load the most recent audit entries (tail of file, read from EOF)."""
+    entries = []
+    for line in read_tail_lines(AUDIT_FILE, max_lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
     return entries
 
 
-def compute_health() -> Dict:
+def latency_stats(buckets: Dict[int, int], max_ms: float) -> Dict:
+    """p50/p95/p99 from a latency histogram, clamped to the observed max."""
+    samples = sum(buckets.values())
+    if samples <= 0:
+        return {}
+
+    def _pct(q: float) -> float:
+        val = histogram_percentile(buckets, q) or 0.0
+        return round(min(val, max_ms) if max_ms else val, 1)
+
+    return {
+        "p50_ms": _pct(0.50),
+        "p95_ms": _pct(0.95),
+        "p99_ms": _pct(0.99),
+        "max_ms": round(max_ms, 1),
+        "samples": samples,
+    }
+
+
+def compute_health(window_days: Optional[int] = None) -> Dict:
     """Compute per-hook health metrics."""
     counters = load_counters()
+    histograms = load_histograms(window_days)
     audit = load_recent_audit()
 
-    # Aggregate latencies from audit trail
-    latencies: Dict[str, List[float]] = defaultdict(list)
+    # Decision breakdown from the audit tail; latency from the audit tail is
+    # only used (bucketed, not sorted) for hooks without a recorded histogram.
     decisions: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    audit_buckets: Dict[str, Counter] = defaultdict(Counter)
+    audit_max: Dict[str, float] = defaultdict(float)
 
     for entry in audit:
         hook = entry.get("hook", "unknown")
@@ -77,39 +153,30 @@ def compute_health() -> Dict:
         lat = entry.get("latency_ms")
         decisions[hook][decision] += 1
         if lat is not None and isinstance(lat, (int, float)):
-            latencies[hook].append(lat)
+            audit_buckets[hook][latency_bucket(lat)] += 1
+            audit_max[hook] = max(audit_max[hook], float(lat))
 
     # Build per-hook health report
     hooks = {}
-    all_hook_names = set(counters.keys()) | set(decisions.keys())
+    all_hook_names = set(counters.keys()) | set(decisions.keys()) | set(histograms)
 
     for name in sorted(all_hook_names):
-        counter = counters.get(name, {})
-        total_counter = sum(
-            counter.get(k, 0) for k in ("success", "fail_open", "fail_closed", "error")
+        counter = Counter(
+            {k: v for k, v in counters.get(name, {}).items() if k in HOOK_OUTCOMES}
         )
+        hist = histograms.get(name)
+        if hist:
+            counter.update(hist["outcomes"])
+        total_counter = sum(counter.get(k, 0) for k in HOOK_OUTCOMES)
         errors_counter = counter.get("error", 0) + counter.get("fail_open", 0)
         blocks_counter = counter.get("fail_closed", 0)
 
         dec = decisions.get(name, {})
 
-        lats = latencies.get(name, [])
-        lat_stats = {}
-        if lats:
-            lats_sorted = sorted(lats)
-            lat_stats = {
-                "p50_ms": round(statistics.median(lats_sorted), 1),
-                "p95_ms": round(
-                    (
-                        lats_sorted[int(len(lats_sorted) * 0.95)]
-                        if len(lats_sorted) >= 2
-                        else lats_sorted[-1]
-                    ),
-                    1,
-                ),
-                "max_ms": round(max(lats_sorted), 1),
-                "samples": len(lats_sorted),
-            }
+        if hist and hist["buckets"]:
+            lat_stats = latency_stats(hist["buckets"], hist["max_ms"])
+        else:
+            lat_stats = latency_stats(audit_buckets.get(name, {}), audit_max[name])
 
         # Grade
         error_rate = (errors_counter / total_counter) if total_counter > 0 else 0
@@ -144,6 +211,7 @@ def compute_health() -> Dict:
     return {
         "overall": overall,
         "hook_count": len(hooks),
+        "window_days": window_days,
         "hooks": hooks,
     }
 
@@ -153,16 +221,17 @@ def format_human(health: Dict) -> str:
     lines = [
         f"Hook Health: {health['overall']} ({health['hook_count']} hooks)",
         "",
-        f"{'Hook':<28} {'Grade':<6} {'Total':>7} {'Errs':>5} {'Blks':>5} {'p50':>7} {'p95':>7}",
-        "-" * 75,
+        f"{'Hook':<28} {'Grade':<6} {'Total':>7} {'Errs':>5} {'Blks':>5} {'p50':>7} {'p95':>7} {'p99':>7}",
+        "-" * 83,
     ]
     for name, h in health["hooks"].items():
         lat = h.get("latency", {})
         p50 = f"{lat.get('p50_ms', '-'):>5}ms" if lat else "    -  "
         p95 = f"{lat.get('p95_ms', '-'):>5}ms" if lat else "    -  "
+        p99 = f"{lat.get('p99_ms', '-'):>5}ms" if lat else "    -  "
         lines.append(
             f"{name:<28} {h['grade']:<6} {h['total_invocations']:>7} "
-            f"{h['errors']:>5} {h['blocks']:>5} {p50} {p95}"
+            f"{h['errors']:>5} {h['blocks']:>5} {p50} {p95} {p99}"
         )
 
     # Flag issues
@@ -186,7 +255,14 @@ def format_human(health: Dict) -> str:
 
 
 def main():
-    health = compute_health()
+    window_days = None
+    if "--window" in sys.argv:
+        idx = sys.argv.index("--window")
+        try:
+            window_days = max(1, int(sys.argv[idx + 1]))
+        except (IndexError, ValueError):
+            window_days = None
+    health = compute_health(window_days)
 
     if "--human" in sys.argv:
         print(format_human(health))
@@ -9,9 +9,11 @@ automatically to all hooks that import it.
 """
 
 import json
+import math
 import os
+import re
 import sys
-import tempfile
+import time
 from typing import Callable, Dict, IO, List, Optional
 
 # Portable file locking — fcntl on Unix, msvcrt on Windows
@@ -25,6 +27,16 @@ if sys.platform == "win32":
     def unlock(f: IO) -> None:
         """Release the lock on the file."""
         msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def try_lock(f: IO) -> bool:
+        """Take an exclusive lock without waiting; False if already held."""
+        f.seek(0)  # lock the same byte whatever the open mode
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
 else:
     import fcntl
 
@@ -36,6 +48,14 @@ else:
         """Release the lock on the file."""
         fcntl.flock(f, fcntl.LOCK_UN)
 
+    def try_lock(f: IO) -> bool:
+        """Take an exclusive lock without waiting; False if already held."""
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
 
 def load_json_state(
     path: str, default_factory: Optional[Callable[[], Dict]] = None
@@ -68,6 +88,8 @@ def save_json_state(path: str, state: Dict) -> bool:
 
     Returns True on success, False on failure (non-fatal).
     """
+    import tempfile  # deferred: early-exit hook paths never write state
+
     dir_name = os.path.dirname(path)
     try:
         fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
@@ -128,6 +150,413 @@ def read_jsonl_fault_tolerant(path: str) -> List[Dict]:
     return entries
 
 
+def read_tail_lines(path: str, n: int, block_size: int = 8192) -> List[str]:
+    """Return the last n lines of a file by seeking backward from EOF.
+
+    Cost is bounded by the size of the tail, not the file. Returns [] on any
+    error.
+    """
+    if n <= 0:
+        return []
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b""
+            while pos > 0 and data.count(b"\n") <= n:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    except OSError:
+        return []
+    return data.decode("utf-8", errors="replace").splitlines()[-n:]
+
+
+# ─── Hook instrumentation: outcome counters + latency histograms ─────────────
+#
+# Each hook has one file, session-state/hook-metrics/{hook}.json, holding
+# per-UTC-day outcome counters and an HDR-style log-bucketed latency
+# histogram. Bucket i covers latencies up to 2**(i / HISTOGRAM_SUB_BUCKETS) ms,
+# i.e. ~9% relative precision with 8 sub-buckets per power of two. Readers
+# merge any retained window of days in O(days x buckets).
+
+HOOK_OUTCOMES = ("success", "fail_open", "fail_closed", "error")
+HISTOGRAM_SUB_BUCKETS = 8
+HISTOGRAM_MAX_BUCKET = 160  # 2**20 ms ≈ 17 minutes
+HOOK_METRICS_RETAIN_DAYS = 14
+_HOOK_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def hook_metrics_dir(state_dir: Optional[str] = None) -> str:
+    """Directory holding per-hook metrics files."""
+    state_dir = state_dir or os.environ.get(
+        "TOKEN_GUARD_STATE_DIR",
+        os.path.expanduser("~/.claude/hooks/session-state"),
+    )
+    return os.path.join(state_dir, "hook-metrics")
+
+
+def latency_bucket(latency_ms: float) -> int:
+    """Histogram bucket index for a latency (sub-millisecond → bucket 0)."""
+    if latency_ms <= 1:
+        return 0
+    idx = math.ceil(math.log2(latency_ms) * HISTOGRAM_SUB_BUCKETS)
+    return min(idx, HISTOGRAM_MAX_BUCKET)
+
+
+def bucket_upper_ms(idx: int) -> float:
+    """Upper bound (inclusive) of a histogram bucket, in milliseconds."""
+    return 2 ** (idx / HISTOGRAM_SUB_BUCKETS)
+
+
+def histogram_percentile(buckets: Dict[int, int], q: float) -> Optional[float]:
+    """Percentile (0 < q <= 1) from a {bucket: count} histogram, or None.
+
+    Returns the upper bound of the bucket holding the q-th sample, so the
+    estimate never under-reports by more than one bucket width.
+    """
+    total = sum(buckets.values())
+    if total <= 0:
+        return None
+    rank = max(1, math.ceil(total * q))
+    seen = 0
+    for idx in sorted(buckets):
+        seen += buckets[idx]
+        if seen >= rank:
+            return bucket_upper_ms(idx)
+    return bucket_upper_ms(max(buckets))
+
+
+def record_hook_outcome(
+    hook: str,
+    outcome: str,
+    latency_ms: Optional[float] = None,
+    state_dir: Optional[str] = None,
+) -> bool:
+    """Record one hook invocation outcome (and latency) in its metrics file.
+
+    Read-modify-write under the file's .lock, persisted with an atomic
+    replace, so concurrent hook processes never lose or tear updates.
+    Non-fatal — returns False on any error.
+    """
+    if outcome not in HOOK_OUTCOMES:
+        outcome = "error"
+    name = _HOOK_NAME_RE.sub("_", str(hook))[:64] or "unknown"
+    metrics_dir = hook_metrics_dir(state_dir)
+    path = os.path.join(metrics_dir, f"{name}.json")
+    day = time.strftime("%Y-%m-%d", time.gmtime())
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                doc = load_json_state(path)
+                if not isinstance(doc.get("days"), dict):
+                    doc = {"schema_version": 1, "hook": name, "days": {}}
+                doc["sub_buckets"] = HISTOGRAM_SUB_BUCKETS
+                days = doc["days"]
+                today = days.setdefault(day, {"outcomes": {}, "latency": {}})
+                outcomes = today.setdefault("outcomes", {})
+                outcomes[outcome] = int(outcomes.get(outcome, 0)) + 1
+                if latency_ms is not None and latency_ms >= 0:
+                    hist = today.setdefault("latency", {})
+                    key = str(latency_bucket(latency_ms))
+                    hist[key] = int(hist.get(key, 0)) + 1
+                    today["max_ms"] = round(
+                        max(float(today.get("max_ms", 0)), latency_ms), 1
+                    )
+                for old in sorted(days)[:-HOOK_METRICS_RETAIN_DAYS]:
+                    del days[old]
+                return save_json_state(path, doc)
+            finally:
+                unlock(lf)
+    except OSError:
+        return False
+
+
+# ── Context-growth ledger ─────────────────────────────────────────────────────
+# One small JSON file per session ({session_key}-context.json) holding running
+# totals of tool-result characters and estimated tokens, per tool and overall,
+# plus an exponentially decayed "recent" token window. Each update is O(1) in
+# the session's history; readers take a lock-free snapshot (writes are atomic
+# replaces) so any hook can consult context pressure cheaply. Pressure counts
+# only tokens since the last compaction (mark_context_compacted, PreCompact).
+
+CONTEXT_CHARS_PER_TOKEN = 4
+CONTEXT_LARGE_RESULT_CHARS = 5000
+CONTEXT_WINDOW_HALF_LIFE_S = 600  # recent-window tokens halve every 10 minutes
+CONTEXT_PRESSURE_TOKENS = 200000  # estimate since last compaction treated as "full"
+
+
+def context_ledger_path(session_id: str, state_dir: Optional[str] = None) -> str:
+    """Path of the context ledger for a session (session id is normalized)."""
+    from guard_normalize import normalize_session_key
+
+    state_dir = state_dir or os.environ.get(
+        "TOKEN_GUARD_STATE_DIR",
+        os.path.expanduser("~/.claude/hooks/session-state"),
+    )
+    return os.path.join(state_dir, f"{normalize_session_key(session_id)}-context.json")
+
+
+def _decay(value: float, elapsed_s: float) -> float:
+    if elapsed_s <= 0:
+        return value
+    return value * 0.5 ** (elapsed_s / CONTEXT_WINDOW_HALF_LIFE_S)
+
+
+def _default_context_ledger() -> Dict:
+    return {
+        "schema_version": 1,
+        "total_chars": 0,
+        "total_tokens": 0,
+        "total_results": 0,
+        "large_results": 0,
+        "tools": {},
+        "window_tokens": 0.0,
+        "compacted_tokens": 0,
+        "compactions": 0,
+        "updated_at": 0.0,
+    }
+
+
+def track_context_growth(
+    session_id: str,
+    tool_name: str,
+    result_size: int,
+    large_threshold: int = CONTEXT_LARGE_RESULT_CHARS,
+    state_dir: Optional[str] = None,
+    tokens: Optional[int] = None,
+) -> Dict:
+    """Add one tool result to the session's context ledger and return it.
+
+    `tokens` is the caller's estimate for this result (e.g. calibrated per
+    content class); defaults to size / CONTEXT_CHARS_PER_TOKEN.
+
+    Read-modify-write under the ledger's .lock. Returns the updated ledger;
+    on I/O failure returns a ledger reflecting this result alone, so callers
+    can always proceed (non-fatal).
+    """
+    path = context_ledger_path(session_id, state_dir)
+    size = max(0, int(result_size))
+    if tokens is None:
+        tokens = -(-size // CONTEXT_CHARS_PER_TOKEN)
+    tokens = max(0, int(tokens))
+    large = 1 if size > large_threshold else 0
+    now = time.time()
+
+    def _apply(ledger: Dict) -> Dict:
+        if not isinstance(ledger.get("tools"), dict):
+            ledger = _default_context_ledger()
+        ledger["total_chars"] = int(ledger.get("total_chars", 0)) + size
+        ledger["total_tokens"] = int(ledger.get("total_tokens", 0)) + tokens
+        ledger["total_results"] = int(ledger.get("total_results", 0)) + 1
+        ledger["large_results"] = int(ledger.get("large_results", 0)) + large
+        tool = ledger["tools"].setdefault(
+            str(tool_name)[:64] or "unknown",
+            {"chars": 0, "tokens": 0, "results": 0, "large": 0},
+        )
+        tool["chars"] = int(tool.get("chars", 0)) + size
+        tool["tokens"] = int(tool.get("tokens", 0)) + tokens
+        tool["results"] = int(tool.get("results", 0)) + 1
+        tool["large"] = int(tool.get("large", 0)) + large
+        elapsed = now - float(ledger.get("updated_at", 0) or now)
+        window = _decay(float(ledger.get("window_tokens", 0)), elapsed)
+        ledger["window_tokens"] = round(window + tokens, 1)
+        ledger["updated_at"] = round(now, 3)
+        return ledger
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                ledger = _apply(load_json_state(path, _default_context_ledger))
+                save_json_state(path, ledger)
+                return ledger
+            finally:
+                unlock(lf)
+    except OSError:
+        return _apply(_default_context_ledger())
+
+
+def mark_context_compacted(session_id: str, state_dir: Optional[str] = None) -> None:
+    """Record a context compaction (PreCompact hook).
+
+    Totals are kept for reporting; pressure restarts from the current total
+    ("compacted_tokens") and the recent window is cleared. Non-fatal.
+    """
+    path = context_ledger_path(session_id, state_dir)
+    try:
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                ledger = load_json_state(path, _default_context_ledger)
+                if not isinstance(ledger.get("tools"), dict):
+                    return
+                ledger["compacted_tokens"] = int(ledger.get("total_tokens", 0))
+                ledger["compactions"] = int(ledger.get("compactions", 0)) + 1
+                ledger["window_tokens"] = 0.0
+                ledger["updated_at"] = round(time.time(), 3)
+                save_json_state(path, ledger)
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def read_context_ledger(session_id: str, state_dir: Optional[str] = None) -> Dict:
+    """Lock-free snapshot of a session's ledger, window decayed to now.
+
+    Adds "pressure": estimated tokens since the last compaction as a fraction
+    of CONTEXT_PRESSURE_TOKENS. Missing or unreadable ledgers read as empty.
+    """
+    ledger = load_json_state(
+        context_ledger_path(session_id, state_dir), _default_context_ledger
+    )
+    if not isinstance(ledger, dict) or not isinstance(ledger.get("tools"), dict):
+        ledger = _default_context_ledger()
+    updated = float(ledger.get("updated_at", 0) or 0)
+    if updated:
+        ledger["window_tokens"] = round(
+            _decay(float(ledger.get("window_tokens", 0)), time.time() - updated), 1
+        )
+    since_compaction = int(ledger.get("total_tokens", 0)) - int(
+        ledger.get("compacted_tokens", 0) or 0
+    )
+    ledger["pressure"] = max(0, since_compaction) / CONTEXT_PRESSURE_TOKENS
+    return ledger
+
+
+# ─── Pending spawn correlation: token-guard → agent lifecycle ───────────────
+#
+# token-guard records every allowed Task spawn in state["pending_spawns"]; the
+# SubagentStart handler consumes the newest unconsumed spawn of the same type
+# to stamp its decision_id on the lifecycle record. Both sides go through the
+# helpers below, which keep state["pending_index"]:
+#
+#     {"n": len(pending_spawns), "by_type": {type: [position, ...]}}
+#
+# (positions of unconsumed spawns, oldest first). Consumption pops the newest
+# position for the type instead of scanning. An index whose "n" disagrees
+# with the list (state written by an older hook) is rebuilt on use.
+
+PENDING_SPAWNS_MAX = 25
+
+
+def rebuild_pending_index(state: Dict) -> Dict:
+    """Recompute state["pending_index"] from state["pending_spawns"]."""
+    spawns = state.get("pending_spawns")
+    if not isinstance(spawns, list):
+        spawns = state["pending_spawns"] = []
+    by_type: Dict[str, List[int]] = {}
+    for pos, spawn in enumerate(spawns):
+        if isinstance(spawn, dict) and not spawn.get("consumed"):
+            by_type.setdefault(str(spawn.get("type", "")), []).append(pos)
+    index = {"n": len(spawns), "by_type": by_type}
+    state["pending_index"] = index
+    return index
+
+
+def _pending_index(state: Dict) -> Dict:
+    index = state.get("pending_index")
+    spawns = state.get("pending_spawns")
+    if (
+        isinstance(index, dict)
+        and isinstance(spawns, list)
+        and index.get("n") == len(spawns)
+        and isinstance(index.get("by_type"), dict)
+    ):
+        return index
+    return rebuild_pending_index(state)
+
+
+def add_pending_spawn(state: Dict, spawn: Dict) -> None:
+    """Append a spawn to state["pending_spawns"] and index it by type."""
+    index = _pending_index(state)
+    state["pending_spawns"].append(spawn)
+    index["n"] += 1
+    if not spawn.get("consumed"):
+        index["by_type"].setdefault(str(spawn.get("type", "")), []).append(
+            index["n"] - 1
+        )
+
+
+def prune_pending_spawns(
+    state: Dict, now: float, max_age_s: float, keep: int = PENDING_SPAWNS_MAX
+) -> None:
+    """Drop spawns older than max_age_s, keep the newest `keep`, reindex."""
+    spawns = state.get("pending_spawns")
+    state["pending_spawns"] = [
+        p
+        for p in (spawns if isinstance(spawns, list) else [])
+        if isinstance(p, dict) and now - p.get("timestamp", 0) < max_age_s
+    ][-keep:]
+    rebuild_pending_index(state)
+
+
+def take_pending_spawn(state: Dict, agent_type: str, agent_id: str = "") -> Optional[Dict]:
+    """Mark the newest unconsumed spawn of agent_type consumed; return it.
+
+    Operates on an already-loaded state; see consume_pending_spawn() for the
+    locked file round-trip.
+    """
+    index = _pending_index(state)
+    spawns = state["pending_spawns"]
+    agent_type = str(agent_type)
+    for _ in range(2):
+        positions = index["by_type"].get(agent_type)
+        if not positions:
+            return None
+        pos = positions.pop()
+        spawn = spawns[pos] if 0 <= pos < len(spawns) else None
+        if (
+            isinstance(spawn, dict)
+            and not spawn.get("consumed")
+            and str(spawn.get("type", "")) == agent_type
+        ):
+            if not positions:
+                del index["by_type"][agent_type]
+            spawn["consumed"] = True
+            spawn["agent_id"] = agent_id
+            spawn["consumed_ts"] = time.time()
+            return spawn
+        # Stale position: the list was edited without the index.
+        index = rebuild_pending_index(state)
+    return None
+
+
+def consume_pending_spawn(
+    state_file: str, agent_type: str, agent_id: str = ""
+) -> Optional[Dict]:
+    """Consume the newest pending spawn of agent_type from a session state file.
+
+    Holds token-guard's `{state_file}.lock` for the read-modify-write and
+    saves atomically, so it cannot lose a spawn recorded concurrently.
+    Returns a copy of the consumed spawn, or None (no match, missing state,
+    or lock error).
+    """
+    if not os.path.isfile(state_file):
+        return None
+    try:
+        with open(state_file + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                state = load_json_state(state_file)
+                if not isinstance(state, dict):
+                    return None
+                spawn = take_pending_spawn(state, agent_type, agent_id)
+                if spawn is None:
+                    return None
+                save_json_state(state_file, state)
+                return dict(spawn)
+            finally:
+                unlock(lf)
+    except OSError:
+        return None
+
+
 # Single source of truth for default config — used by token-guard.py and self-heal.py.
 # Both import from here to prevent config drift.
 DEFAULT_CONFIG = {
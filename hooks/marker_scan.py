@@ -0,0 +1,265 @@
+"""
+Bounded TODO/FIXME marker scanning for the agent-team quality gates.
+
+teammate-idle.py checks every file a teammate changed for unresolved
+markers. Reading each file whole and collecting every regex match blocks the
+idle transition on large change sets, so scan_files():
+
+  - streams each file in CHUNK_BYTES binary chunks (no full read, no decode);
+  - stops counting a file at max_count marker lines (max_count=1 is a
+    presence check);
+  - skips files larger than max_bytes and files with a NUL byte in their
+    first chunk (binary);
+  - scans across a small thread pool under one overall time budget, and
+    returns whatever finished when the budget runs out.
+
+A "marker" is counted per line, matching the gate's original
+`(TODO|FIXME|HACK|XXX).*` semantics. The result is a plain dict:
+
+    {"counts":    {path: n, ...},        # scanned files with n >= 1 markers
+     "truncated": [path, ...],           # counts capped at max_count
+     "skipped":   {path: reason, ...},   # "missing" | "binary" | "too-large"
+     "unscanned": [path, ...],           # not finished within the budget
+     "scanned":   N,
+     "cache_hits": H, "cache_misses": M,
+     "elapsed_ms": ms}
+
+With a cache_path (see scan_cache_path()), results are cached per session
+keyed by (path, size, mtime_ns): teammates go idle many times on the same
+file set, so repeated teammate-idle.py gates only rescan files that changed.
+The cache file:
+
+    {"schema_version": 1,
+     "files": {abs_path: {"size", "mtime_ns", "count", "status", "seen"}}}
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_utils import load_json_state, lock, save_json_state, unlock  # noqa: E402
+
+CHUNK_BYTES = 64 * 1024
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_BUDGET_SECONDS = 2.0
+DEFAULT_WORKERS = 8
+CACHE_MAX_ENTRIES = 5000
+
+# Same per-line semantics as re.findall(r"(TODO|FIXME|HACK|XXX).*"): `.*`
+# consumes the rest of the line, so each match is one marker line.
+_MARKER_LINE = re.compile(rb"(?:TODO|FIXME|HACK|XXX)[^\n]*")
+
+
+def count_markers(
+    path: str,
+    max_count: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    deadline: Optional[float] = None,
+) -> Tuple[Optional[int], str]:
+    """Count marker lines in one file.
+
+    Returns (count, status) where status is "ok", "truncated" (stopped at
+    max_count), "missing", "binary", "too-large" or "timeout" (count is the
+    partial tally, or None when nothing could be read).
+    """
+    try:
+        if os.path.getsize(path) > max_bytes:
+            return None, "too-large"
+        f = open(path, "rb")
+    except OSError:
+        return None, "missing"
+
+    count = 0
+    carry = b""
+    first = True
+    with f:
+        while True:
+            if deadline is not None and time.monotonic() > deadline:
+                return count, "timeout"
+            chunk = f.read(CHUNK_BYTES)
+            if first:
+                if b"\0" in chunk:
+                    return None, "binary"
+                first = False
+            if not chunk:
+                data, carry = carry, b""
+            else:
+                # Only scan complete lines; the tail waits for the next chunk.
+                cut = chunk.rfind(b"\n")
+                if cut < 0:
+                    carry += chunk
+                    continue
+                data, carry = carry + chunk[: cut + 1], chunk[cut + 1 :]
+            for _ in _MARKER_LINE.finditer(data):
+                count += 1
+                if max_count is not None and count >= max_count:
+                    return count, "truncated"
+            if not chunk:
+                return count, "ok"
+
+
+def scan_cache_path(session_id: str, state_dir: Optional[str] = None) -> str:
+    """Per-session scan cache path (session id is normalized)."""
+    from guard_normalize import normalize_session_key
+
+    state_dir = state_dir or os.environ.get(
+        "TOKEN_GUARD_STATE_DIR",
+        os.path.expanduser("~/.claude/hooks/session-state"),
+    )
+    return os.path.join(
+        state_dir, f"{normalize_session_key(session_id)}-marker-scan.json"
+    )
+
+
+def _cache_hit(entry: Dict, st: os.stat_result, max_count: Optional[int]):
+    """Cached (count, status) if the entry is valid for this stat and cap."""
+    if (
+        not isinstance(entry, dict)
+        or entry.get("size") != st.st_size
+        or entry.get("mtime_ns") != st.st_mtime_ns
+    ):
+        return None
+    status = entry.get("status")
+    count = entry.get("count")
+    if status == "binary":
+        return None, status
+    if not isinstance(count, int):
+        return None
+    if status == "ok":
+        if max_count is not None and count >= max_count:
+            return max_count, "truncated"
+        return count, status
+    # A capped count only answers requests with the same or a lower cap.
+    if status == "truncated" and max_count is not None and count >= max_count:
+        return max_count, "truncated"
+    return None
+
+
+def _save_cache(cache_path: str, updates: Dict) -> None:
+    """Merge fresh entries into the cache under its lock (hooks may race)."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                cache = load_json_state(cache_path)
+                files = cache.get("files")
+                if not isinstance(files, dict):
+                    files = {}
+                files.update(updates)
+                if len(files) > CACHE_MAX_ENTRIES:
+                    keep = sorted(
+                        files.items(), key=lambda kv: kv[1].get("seen", 0)
+                    )[-CACHE_MAX_ENTRIES:]
+                    files = dict(keep)
+                save_json_state(cache_path, {"schema_version": 1, "files": files})
+            finally:
+                unlock(lf)
+    except OSError:
+        pass
+
+
+def scan_files(
+    paths: Iterable[str],
+    max_count: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+    workers: int = DEFAULT_WORKERS,
+    cache_path: Optional[str] = None,
+) -> Dict:
+    """Scan files concurrently under an overall time budget (see module doc)."""
+    start = time.monotonic()
+    deadline = start + budget_seconds
+    unique = list(dict.fromkeys(p for p in paths if isinstance(p, str) and p))
+    result = {
+        "counts": {},
+        "truncated": [],
+        "skipped": {},
+        "unscanned": [],
+        "scanned": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "elapsed_ms": 0,
+    }
+    if not unique:
+        return result
+
+    cached = {}
+    if cache_path:
+        files = load_json_state(cache_path).get("files")
+        cached = files if isinstance(files, dict) else {}
+
+    # Resolve every path first (stat only): cache hits and cheap skips never
+    # reach the pool. outcomes holds (count, status) in input order.
+    outcomes: Dict[str, Tuple[Optional[int], str]] = {}
+    stats: Dict[str, os.stat_result] = {}
+    misses = []
+    for path in unique:
+        try:
+            st = os.stat(path)
+        except OSError:
+            outcomes[path] = (None, "missing")
+            continue
+        if st.st_size > max_bytes:
+            outcomes[path] = (None, "too-large")
+            continue
+        hit = _cache_hit(cached.get(os.path.abspath(path)), st, max_count)
+        if hit is not None:
+            outcomes[path] = hit
+            result["cache_hits"] += 1
+            continue
+        outcomes[path] = (None, "pending")
+        stats[path] = st
+        misses.append(path)
+    result["cache_misses"] = len(misses)
+
+    if misses:
+        pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(misses))))
+        futures = {
+            pool.submit(count_markers, p, max_count, max_bytes, deadline): p
+            for p in misses
+        }
+        wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        for fut, path in futures.items():
+            # Queued scans that never started are cancelled; running ones see
+            # the deadline between chunks and return their partial tally.
+            if fut.cancel() or not fut.done():
+                outcomes[path] = (None, "timeout")
+            else:
+                outcomes[path] = fut.result()
+        pool.shutdown(wait=False)
+
+    updates = {}
+    now = int(time.time())
+    for path, (count, status) in outcomes.items():
+        if status == "timeout":
+            result["unscanned"].append(path)
+            if count:
+                result["counts"][path] = count
+            continue
+        if status in ("missing", "binary", "too-large"):
+            result["skipped"][path] = status
+        else:
+            result["scanned"] += 1
+            if count:
+                result["counts"][path] = count
+            if status == "truncated":
+                result["truncated"].append(path)
+        st = stats.get(path)
+        if st is not None and status in ("ok", "truncated", "binary"):
+            updates[os.path.abspath(path)] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "count": count,
+                "status": status,
+                "seen": now,
+            }
+    if cache_path and updates:
+        _save_cache(cache_path, updates)
+    result["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+    return result
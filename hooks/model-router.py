@@ -3,6 +3,13 @@ import json
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import config_snapshot  # noqa: E402
+except ImportError:  # partial install: read_json() reads the file directly
+    config_snapshot = None
+
 ALLOWED_MODELS = {"sonnet", "haiku"}
 
 
@@ -18,6 +25,8 @@ def normalize_model(value):
 
 
 def read_json(path):
+    if config_snapshot is not None:
+        return config_snapshot.load(path)
     try:
         with open(path, "r", encoding="utf-8") as fh:
             return json.load(fh)
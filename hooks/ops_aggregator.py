@@ -6,12 +6,10 @@ from __future__ import annotations
 import argparse
 import json
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
 from guard_contracts import entry_reason, entry_session_key, entry_type
-from ops_alerts import alert_status, evaluate_alerts
 from ops_sources import (
     COST_DIR,
     STATE_DIR,
@@ -25,7 +23,6 @@ from ops_sources import (
     utc_now_iso,
     write_json,
 )
-from ops_trends import build_trends
 
 AUDIT_LOG = STATE_DIR / "audit.jsonl"
 METRICS_LOG = STATE_DIR / "agent-metrics.jsonl"
@@ -137,6 +134,13 @@ def _build_snapshot(
                 if age <= ttl:
                     return cached
 
+    # Only a cache miss needs the alert/trend builders and the thread pool;
+    # `--statusline` within the TTL returns above without importing them.
+    from concurrent.futures import ThreadPoolExecutor
+
+    from ops_alerts import alert_status, evaluate_alerts
+    from ops_trends import build_trends
+
     since, until = local_day_window()
     logs = _read_logs(since, until)
     audit = logs["audit"]
@@ -11,6 +11,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+import config_snapshot
+
 HOME = Path.home()
 CLAUDE_DIR = HOME / ".claude"
 HOOKS_DIR = CLAUDE_DIR / "hooks"
@@ -207,15 +209,14 @@ def cost_text(argv: List[str], timeout: int = 30) -> Tuple[int, str]:
 
 
 def load_cost_config() -> Dict[str, Any]:
-    path = COST_DIR / "config.json"
-    cfg = read_json(path, {}) or {}
+    cfg = dict(config_snapshot.load(COST_DIR / "config.json", {}) or {})
     for k, v in DEFAULT_COST_CONFIG.items():
         cfg.setdefault(k, v)
     return cfg
 
 
 def load_budgets() -> Dict[str, Any]:
-    return read_json(COST_DIR / "budgets.json", {}) or {}
+    return config_snapshot.load(COST_DIR / "budgets.json", {}) or {}
 
 
 def source_freshness(paths: List[Path]) -> Dict[str, Dict[str, Any]]:
@@ -9,7 +9,7 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List
 
-from ops_sources import CLAUDE_DIR, COST_DIR, utc_now_iso, read_json
+from ops_sources import CLAUDE_DIR, COST_DIR, STATE_DIR, utc_now_iso, read_json
 
 PROJECTS_DIR = CLAUDE_DIR / "projects"
 
@@ -157,6 +157,35 @@ def collect_daily_series(window_days: int = 30) -> List[Dict[str, Any]]:
     return series
 
 
+def collect_guard_series(window_days: int = 30) -> List[Dict[str, Any]]:
+    """Daily token-guard allow/block counts from the audit log and its archive."""
+    end = datetime.now(timezone.utc).date()
+    start = end - timedelta(days=max(0, window_days - 1))
+    try:
+        from audit_archive import daily_event_counts
+    except ImportError:  # partial install: report zero guard activity
+        days = {}
+    else:
+        days = daily_event_counts(
+            since=start.isoformat(),
+            audit_path=str(STATE_DIR / "audit.jsonl"),
+            archive_dir=str(STATE_DIR / "audit-archive"),
+        )
+    series: List[Dict[str, Any]] = []
+    for i in range(window_days):
+        d = (start + timedelta(days=i)).isoformat()
+        counts = days.get(d, {})
+        series.append(
+            {
+                "date": d,
+                "allow": int(counts.get("allow", 0)),
+                "block": int(counts.get("block", 0)),
+                "warn": int(counts.get("warn", 0)),
+            }
+        )
+    return series
+
+
 def _legacy_summary_fields(series: List[Dict[str, Any]]) -> Dict[str, Any]:
     def summarize_window(n: int) -> Dict[str, Any]:
         tail = series[-n:]
@@ -213,6 +242,7 @@ def build_trends(window_days: int = 7, include_legacy: bool = True) -> Dict[str,
         today_cost = series[-1]["cost_usd"]
         prior = series[-8]["cost_usd"]
         wow = round(today_cost - prior, 4)
+    guard = collect_guard_series(window_days)
     budgets = read_json(COST_DIR / "budgets.json", {}) or {}
     out: Dict[str, Any] = {
         "schema_version": 1,
@@ -228,7 +258,10 @@ def build_trends(window_days: int = 7, include_legacy: bool = True) -> Dict[str,
             "moving_average_7d_cost_usd": view[-1].get("rolling_7d_avg_cost_usd")
             if view
             else 0,
+            "guard_allowed": sum(x["allow"] for x in guard),
+            "guard_blocked": sum(x["block"] for x in guard),
         },
+        "guard_series": guard,
         "budget_thresholds": (budgets.get("thresholds") or {}),
     }
     if include_legacy:
@@ -254,6 +287,8 @@ def render_text(doc: Dict[str, Any]) -> str:
         f"Generated: {doc.get('generated_at')}",
         f"Total: ${doc.get('summary', {}).get('total_cost_usd', 0):.2f}",
         f"DoD delta: {doc.get('summary', {}).get('day_over_day_delta_usd')}",
+        f"Guard decisions: {doc.get('summary', {}).get('guard_allowed', 0)} allowed, "
+        f"{doc.get('summary', {}).get('guard_blocked', 0)} blocked",
         "",
         render_ascii_graph(doc.get("series") or []),
     ]
@@ -30,6 +30,14 @@ jq -c -n \
   '{ts:$ts, session:$session, trigger:$trigger}' \
   >> "$COMPACT_LOG"
 
+# Restart context pressure in the session's context ledger (hook_utils.py):
+# read-efficiency-guard tightens its thresholds on tokens since compaction.
+HOOK_DIR="$(cd "$(dirname "$0")" && pwd)"
+if [ "$SESSION_ID" != "unknown" ] && command -v python3 >/dev/null 2>&1 && [ -f "$HOOK_DIR/hook_utils.py" ]; then
+  python3 -c 'import sys; sys.path.insert(0, sys.argv[1]); from hook_utils import mark_context_compacted; mark_context_compacted(sys.argv[2])' \
+    "$HOOK_DIR" "$SESSION_ID" >/dev/null 2>&1 || true
+fi
+
 # Auto-truncate compaction log
 if [ -f "$COMPACT_LOG" ]; then
   LINES=$(wc -l < "$COMPACT_LOG" 2>/dev/null | tr -d ' ')
@@ -16,8 +16,12 @@ Checks:
   2. Sequential reads: WARN at 4, BLOCK at 15 reads within 120s window
   3. Post-Explore duplicates: Advisory warning (non-blocking)
 
+Under high context pressure (per the session's context ledger, written by
+result-compressor.py) checks 1 and 2 use tighter thresholds.
+
 State:  ~/.claude/hooks/session-state/{session_id}-reads.json
 Cross-reads: ~/.claude/hooks/session-state/{session_id}.json (from token-guard.py)
+             ~/.claude/hooks/session-state/{session_id}-context.json (context ledger)
 
 Cross-platform: Works on macOS, Linux, and Windows (portable file locking).
 """
@@ -26,7 +30,7 @@ import json
 import os
 import sys
 import time
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from guard_normalize import (
     is_invalid_session_key,
@@ -36,7 +40,13 @@ from guard_normalize import (
 )
 
 # Shared infrastructure — locking, state, atomic writes
-from hook_utils import lock, unlock, load_json_state, save_json_state
+from hook_utils import (
+    lock,
+    unlock,
+    load_json_state,
+    save_json_state,
+    read_context_ledger,
+)
 
 STATE_DIR = os.environ.get(
     "TOKEN_GUARD_STATE_DIR", os.path.expanduser("~/.claude/hooks/session-state")
@@ -52,6 +62,15 @@ SEQUENTIAL_WINDOW = (
 )
 READ_TTL = 300  # Prune read records older than 5 minutes
 
+# Tightened thresholds when the session's context ledger shows high pressure:
+# tokens since the last compaction past HIGH_PRESSURE_RATIO of the context
+# budget, or a burst of recent (decayed-window) result tokens.
+HIGH_PRESSURE_RATIO = 0.75
+HIGH_PRESSURE_WINDOW_TOKENS = 50000
+PRESSURE_SEQUENTIAL_THRESHOLD = 3
+PRESSURE_ESCALATION_THRESHOLD = 10
+PRESSURE_DUPLICATE_FILE_LIMIT = 2
+
 def default_read_state() -> Dict:
     """Return the default empty state for read tracking."""
     return {
@@ -62,6 +81,23 @@ def default_read_state() -> Dict:
     }
 
 
+def read_thresholds(session_key: str) -> Tuple[int, int, int, bool]:
+    """(sequential, escalation, duplicate, high_pressure) for this session."""
+    ledger = read_context_ledger(session_key, STATE_DIR)
+    high = (
+        ledger.get("pressure", 0) >= HIGH_PRESSURE_RATIO
+        or ledger.get("window_tokens", 0) >= HIGH_PRESSURE_WINDOW_TOKENS
+    )
+    if high:
+        return (
+            PRESSURE_SEQUENTIAL_THRESHOLD,
+            PRESSURE_ESCALATION_THRESHOLD,
+            PRESSURE_DUPLICATE_FILE_LIMIT,
+            True,
+        )
+    return SEQUENTIAL_THRESHOLD, ESCALATION_THRESHOLD, DUPLICATE_FILE_LIMIT, False
+
+
 def main():
     try:
         os.makedirs(STATE_DIR, exist_ok=True)
@@ -91,6 +127,11 @@ def main():
     normalized_file_path = normalize_file_path(file_path)
     session_key = normalize_session_key(session_id)
 
+    sequential_limit, escalation_limit, duplicate_limit, high_pressure = (
+        read_thresholds(session_key)
+    )
+    pressure_note = " Context pressure is high." if high_pressure else ""
+
     state_file = os.path.join(STATE_DIR, f"{session_key}-reads.json")
     lock_file = state_file + ".lock"
 
@@ -112,6 +153,7 @@ def main():
             ]
 
             # CHECK 1: Duplicate file — BLOCK at 3+ total reads of same path
+            # (2+ under high context pressure)
             path_count = (
                 sum(
                     1
@@ -121,7 +163,7 @@ def main():
                 )
                 + 1
             )  # +1 for this attempt
-            if path_count >= DUPLICATE_FILE_LIMIT:
+            if path_count >= duplicate_limit:
                 state["reads"].append(
                     {
                         "path": file_path,
@@ -134,7 +176,7 @@ def main():
                 save_json_state(state_file, state)
                 print(
                     f"BLOCKED: '{os.path.basename(file_path)}' read {path_count} times already. "
-                    f"Trust your first read. Use Grep for specific lines.",
+                    f"Trust your first read. Use Grep for specific lines.{pressure_note}",
                     file=sys.stderr,
                 )
                 sys.exit(2)  # REAL block — read never happens
@@ -145,7 +187,7 @@ def main():
             ]
             recent_count = len(recent) + 1  # +1 for this attempt
 
-            if recent_count >= ESCALATION_THRESHOLD:
+            if recent_count >= escalation_limit:
                 # UNCONDITIONAL block — no time-based suppression for blocks
                 # (Time suppression is only for warnings, never for enforcement)
                 state["reads"].append(
@@ -160,18 +202,18 @@ def main():
                 save_json_state(state_file, state)
                 print(
                     f"BLOCKED: {recent_count} sequential reads in {SEQUENTIAL_WINDOW}s. "
-                    f"Batch into parallel groups of 3-4 per turn.",
+                    f"Batch into parallel groups of 3-4 per turn.{pressure_note}",
                     file=sys.stderr,
                 )
                 sys.exit(2)  # REAL block
-            elif recent_count >= SEQUENTIAL_THRESHOLD:
+            elif recent_count >= sequential_limit:
                 # Warning uses time suppression to avoid spam (one warning per window)
                 last_warn = state.get("last_sequential_warn", 0)
                 if now - last_warn > SEQUENTIAL_WINDOW:
                     warn(
                         f"TOKEN EFFICIENCY: {recent_count} sequential reads in {SEQUENTIAL_WINDOW}s. "
                         f"Batch independent reads into parallel groups of 3-4 per turn. "
-                        f"Escalation to BLOCK at {ESCALATION_THRESHOLD}. "
+                        f"Escalation to BLOCK at {escalation_limit}.{pressure_note} "
                         f"(Parallelism Checkpoint rule)"
                     )
                     state["last_sequential_warn"] = now
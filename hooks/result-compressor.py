@@ -6,7 +6,9 @@ Part of the Token Management System (Innovation #5: Tool Result Compression).
 How it works:
   Fires after Bash, Grep, Read tool results.
   If result > 5000 chars, logs a context-bloat warning to stderr.
-  Tracks cumulative context growth per session.
+  Tracks cumulative context growth per session in the context ledger
+  (session-state/{session_key}-context.json, see hook_utils) and warns once
+  the tokens since the last compaction pass CONTEXT_PRESSURE_TOKENS.
   Advisory only (non-blocking) — prints recommendation to stderr.
 
 Config: ~/.claude/hooks/token-guard-config.json (no dedicated section needed)
@@ -15,16 +17,95 @@ Config: ~/.claude/hooks/token-guard-config.json (no dedicated section needed)
 import json
 import os
 import sys
+import time
 
 # Threshold for "large result" warning (characters)
 LARGE_RESULT_THRESHOLD = 5000
 
-# Estimated tokens-per-char ratio (conservative)
+# Fallback chars-per-token when token_calibration is unavailable
 CHARS_PER_TOKEN = 4
 
 # Tools we monitor for bloat
 MONITORED_TOOLS = {"Bash", "Grep", "Read"}
 
+# Fallback for hook_utils.CONTEXT_PRESSURE_TOKENS when hook_utils is missing
+PRESSURE_TOKENS = 200000
+
+
+def _str_size(text: str) -> int:
+    """JSON-encoded length of a string, minus ensure_ascii expansion.
+
+    str.count runs in C without allocating, so this stays O(len) with no
+    intermediate copies. Non-ASCII characters count once (as the model sees
+    them), not as \\uXXXX escapes.
+    """
+    return (
+        len(text)
+        + 2
+        + text.count('"')
+        + text.count("\\")
+        + text.count("\n")
+        + text.count("\r")
+        + text.count("\t")
+    )
+
+
+def measure_output_size(value) -> int:
+    """Size in characters of a tool_output payload, without serializing it.
+
+    Plain strings are measured directly. Containers are walked iteratively
+    (no recursion limit), summing what json.dumps would emit with default
+    separators, so a multi-MB dict result costs no extra full-size copy.
+    """
+    if isinstance(value, str):
+        return len(value)
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += _str_size(item)
+        elif isinstance(item, dict):
+            n = len(item)
+            size += 2 + max(0, n - 1) * 2 + n * 2  # {} + ", " + ": "
+            for key, child in item.items():
+                if isinstance(key, str):
+                    size += _str_size(key)
+                else:
+                    size += len(str(key)) + 2
+                stack.append(child)
+        elif isinstance(item, (list, tuple)):
+            size += 2 + max(0, len(item) - 1) * 2
+            stack.extend(item)
+        elif item is None or isinstance(item, bool):
+            size += 4 if item is None or item else 5
+        else:
+            size += len(repr(item))
+    return size
+
+
+def _classification_sample(value, max_nodes: int = 256) -> str:
+    """First sizeable string in a payload, for content classification.
+
+    Bounded walk (no copies of the payload); returns "" when the output is
+    all structure, which callers treat as JSON.
+    """
+    if isinstance(value, str):
+        return value
+    stack = [value]
+    seen = 0
+    while stack and seen < max_nodes:
+        item = stack.pop()
+        seen += 1
+        if isinstance(item, str):
+            if len(item) >= 64:
+                return item
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return ""
+
 
 def main():
     # If read-efficiency-guard already warned this session, skip duplicate bloat warning.
@@ -44,42 +125,63 @@ def main():
     if tool_name not in MONITORED_TOOLS:
         sys.exit(0)
 
-    # Get result size from tool_output
     tool_output = input_data.get("tool_output", "")
-    if isinstance(tool_output, dict):
-        tool_output = json.dumps(tool_output)
-    result_size = len(str(tool_output))
+    result_size = measure_output_size(tool_output)
 
     session_id = input_data.get("session_id", "unknown")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-    # Track context growth (import here to avoid import errors if hook_utils missing)
+    # Calibrated estimate for this content class (falls back to chars // 4)
     try:
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from hook_utils import track_context_growth
+        from token_calibration import classify, estimate_tokens
+
+        sample = _classification_sample(tool_output)
+        content_class = classify(sample) if sample else "json"
+        est_tokens = estimate_tokens(result_size, content_class)
+    except ImportError:
+        content_class = ""
+        est_tokens = result_size // CHARS_PER_TOKEN
 
-        state = track_context_growth(session_id, tool_name, result_size)
-        total_chars = state.get("total_chars", 0)
+    # Track context growth (import here to avoid import errors if hook_utils missing)
+    pressure_tokens = PRESSURE_TOKENS
+    try:
+        from hook_utils import CONTEXT_PRESSURE_TOKENS, track_context_growth
+
+        pressure_tokens = CONTEXT_PRESSURE_TOKENS
+        state = track_context_growth(
+            session_id,
+            tool_name,
+            result_size,
+            large_threshold=LARGE_RESULT_THRESHOLD,
+            tokens=est_tokens,
+        )
+        # Pressure restarts at each compaction (mark_context_compacted)
+        est_total_tokens = max(
+            0,
+            int(state.get("total_tokens", 0))
+            - int(state.get("compacted_tokens", 0) or 0),
+        )
         total_results = state.get("total_results", 0)
         large_count = state.get("large_results", 0)
     except ImportError:
-        total_chars = result_size
+        est_total_tokens = est_tokens
         total_results = 1
         large_count = 1 if result_size > LARGE_RESULT_THRESHOLD else 0
 
     # Advisory for large individual results
     if result_size > LARGE_RESULT_THRESHOLD:
-        est_tokens = result_size // CHARS_PER_TOKEN
+        kind = f" {content_class}" if content_class else ""
         print(
-            f"CONTEXT BLOAT: Large {tool_name} result ({result_size:,} chars, ~{est_tokens:,} tokens). "
+            f"CONTEXT BLOAT: Large {tool_name} result ({result_size:,} chars, ~{est_tokens:,}{kind} tokens). "
             f"Consider using head_limit, limit param, or more specific patterns.",
             file=sys.stderr,
         )
 
     # Advisory for cumulative context growth
-    est_total_tokens = total_chars // CHARS_PER_TOKEN
-    if est_total_tokens > 200000:
+    if est_total_tokens > pressure_tokens:
         print(
-            f"CONTEXT WARNING: Session context ~{est_total_tokens:,} tokens across {total_results} results "
+            f"CONTEXT WARNING: Session context ~{est_total_tokens:,} tokens since the last compaction "
+            f"across {total_results} results "
             f"({large_count} large). Context window pressure is high.",
             file=sys.stderr,
         )
@@ -88,6 +190,7 @@ def main():
 
 
 if __name__ == "__main__":
+    _start = time.monotonic()
     try:
         main()
     except SystemExit as e:
@@ -96,7 +199,9 @@ if __name__ == "__main__":
 
             code = e.code if isinstance(e.code, int) else 0
             record_hook_outcome(
-                "result-compressor", "success" if code == 0 else "error"
+                "result-compressor",
+                "success" if code == 0 else "error",
+                latency_ms=(time.monotonic() - _start) * 1000,
             )
         except Exception:
             pass
@@ -105,7 +210,11 @@ if __name__ == "__main__":
         try:
             from hook_utils import record_hook_outcome
 
-            record_hook_outcome("result-compressor", "fail_open")
+            record_hook_outcome(
+                "result-compressor",
+                "fail_open",
+                latency_ms=(time.monotonic() - _start) * 1000,
+            )
         except Exception:
             pass
         sys.exit(0)
@@ -2,23 +2,38 @@
 """
 Self-Heal — SessionStart hook that validates and repairs the token management system.
 
-Runs on every session start (~50ms for a healthy system). Five phases:
+Runs on every session start (~50ms for a healthy system). Phases:
   1. Structural integrity — all files exist, config valid, state dir writable
   2. Smoke tests — pipe valid JSON through hooks in isolated temp dirs
+     (skipped when hook checksums, Python version and config are unchanged
+     since the last passing run)
   3. State health — find and clean corrupted/orphaned/stale files
   4. Auto-repair — fix permissions, recreate missing dirs, regenerate config
-  5. Report — summary to stdout, warnings to stderr
+  5. Data quality, mode validation, runtime drift — advisory checks
+  6. Report — summary to stdout, warnings to stderr
+
+Phases 1-5 run concurrently where independent, under a total wall-clock
+budget (SELF_HEAL_BUDGET_MS, default 1500ms). Phases that write files start
+first and are never abandoned once started; read-only phases that miss the
+budget are deferred to the next session and scheduled first there. A phase
+deferred DEFER_LIMIT sessions in a row starts ahead of everything else and is
+waited for up to FORCED_BUDGET_MULTIPLE x the budget. Per-phase timings are
+recorded in each self-heal.jsonl entry.
 
 Always exits 0 (never blocks session start). Logs to session-state/self-heal.jsonl.
 """
 
+import functools
 import hashlib
 import json
 import os
+import queue
 import re
+import stat
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 
 # Import shared config (single source of truth — prevents config drift).
@@ -57,6 +72,40 @@ except (ImportError, SyntaxError):
         "always_allowed": ["claude-code-guide", "statusline-setup", "haiku"],
     }
 
+# Config and checksum rewrites go through the shared tmp + rename writer, so
+# a SessionStart killed mid-phase never leaves a truncated file behind.
+try:
+    from hook_utils import save_json_state
+except (ImportError, SyntaxError):
+
+    def save_json_state(path, state):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp_path, path)
+                return True
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return False
+        except OSError:
+            return False
+
+
+# Log sampling uses the shared tail reader. Without it (broken or outdated
+# hook_utils, which structural reports) the advisory sampling is skipped.
+try:
+    from hook_utils import read_tail_lines
+except (ImportError, SyntaxError):
+
+    def read_tail_lines(path, n, block_size=8192):
+        return []
+
+
 HOOKS_DIR = os.environ.get(
     "TOKEN_GUARD_HOOKS_DIR",
     os.path.expanduser("~/.claude/hooks"),
@@ -70,6 +119,8 @@ CONFIG_PATH = os.environ.get(
     os.path.expanduser("~/.claude/hooks/token-guard-config.json"),
 )
 HEAL_LOG = os.path.join(STATE_DIR, "self-heal.jsonl")
+HEAL_STATE_FILE = os.path.join(STATE_DIR, "self-heal-state.json")
+AUDIT_ARCHIVE_DIR = os.path.join(STATE_DIR, "audit-archive")
 
 REQUIRED_HOOKS = {
     "token-guard.py": os.path.join(HOOKS_DIR, "token-guard.py"),
@@ -78,9 +129,36 @@ REQUIRED_HOOKS = {
     "health-check.sh": os.path.join(HOOKS_DIR, "health-check.sh"),
 }
 
-AUDIT_MAX_LINES = 10000
+# Rotate audit.jsonl by size (one stat) instead of counting lines. ~10k
+# records at the typical ~500 bytes per v2 audit entry.
+AUDIT_MAX_BYTES = 5 * 1024 * 1024
+TAIL_SAMPLE_LINES = 20
 STALE_LOCK_SECONDS = 300  # 5 minutes
 
+# Cross-session scheduler/phase state (self-heal-state.json). Loaded by main()
+# before phases run; phases read/update their own keys; main() persists it.
+# Abandoned (over-budget, read-only) phase threads may still be running when
+# main() saves, so every access after load goes through _HEAL_STATE_LOCK.
+_HEAL_STATE = {}
+_HEAL_STATE_LOCK = threading.Lock()
+
+# Session-start latency target: no phase starts after this many ms, and
+# read-only phases still running are abandoned and deferred to the next
+# session. Override with SELF_HEAL_BUDGET_MS.
+DEFAULT_BUDGET_MS = 1500
+MAX_PARALLEL_PHASES = 4
+# Phases that write files or own subprocesses/temp dirs. They are started
+# first and, once started, always waited for: abandoning one mid-write would
+# leave the damage self-heal exists to repair.
+MUTATING_PHASES = frozenset(
+    {"structural", "smoke_tests", "state_health", "auto_repair", "runtime_drift"}
+)
+# A phase deferred this many sessions in a row is started ahead of all others
+# and waited for up to FORCED_BUDGET_MULTIPLE x the budget, so it cannot be
+# starved forever without stretching session start open-endedly.
+DEFER_LIMIT = 3
+FORCED_BUDGET_MULTIPLE = 2
+
 MASTER_AGENTS_DIR = os.path.expanduser("~/.claude/master-agents")
 
 # Mode files referenced by master agents — validated on session start
@@ -162,10 +240,7 @@ def phase_data_quality():
     if os.path.isfile(audit_path):
         checks += 1
         try:
-            with open(audit_path, "r") as f:
-                lines = f.readlines()
-            sample_size = min(20, len(lines))
-            tail = lines[-sample_size:] if sample_size > 0 else []
+            tail = read_tail_lines(audit_path, TAIL_SAMPLE_LINES)
             v2_count = 0
             malformed = 0
             total_parsed = 0
@@ -200,10 +275,7 @@ def phase_data_quality():
     if os.path.isfile(metrics_path):
         checks += 1
         try:
-            with open(metrics_path, "r") as f:
-                lines = f.readlines()
-            sample_size = min(20, len(lines))
-            tail = lines[-sample_size:] if sample_size > 0 else []
+            tail = read_tail_lines(metrics_path, TAIL_SAMPLE_LINES)
             empty_type = 0
             zero_tok = 0
             no_schema = 0
@@ -252,16 +324,66 @@ _DRIFT_TRACKED_FILES = [
     "token-guard.py",
     "read-efficiency-guard.py",
     "hook_utils.py",
+    "config_snapshot.py",
     "guard_contracts.py",
     "guard_normalize.py",
     "guard_events.py",
     "agent-lifecycle.sh",
+    "agent_lifecycle.py",
     "agent-metrics.py",
     "self-heal.py",
 ]
 _CHECKSUMS_FILE = os.path.join(STATE_DIR, "hook-checksums.json")
 
 
+def _file_checksum(fpath):
+    """Short SHA-256 of a file's contents, or None if unreadable."""
+    try:
+        with open(fpath, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _hook_checksums():
+    """Checksums of tracked hook files, computed once per self-heal run.
+
+    Used by phase_runtime_drift.
+    """
+    current = {}
+    for fname in _DRIFT_TRACKED_FILES:
+        fpath = os.path.join(HOOKS_DIR, fname)
+        if not os.path.isfile(fpath):
+            continue
+        digest = _file_checksum(fpath)
+        if digest:
+            current[fname] = digest
+    return current
+
+
+def _smoke_fingerprint():
+    """Fingerprint of everything the smoke tests depend on.
+
+    Every hooks/*.py (the smoke subprocesses import whichever shared modules
+    they need) + health-check.sh + Python version. The user config is not
+    included: the smoke runs use DEFAULT_CONFIG. If this matches the last
+    passing run, the smoke verdict is reused.
+    """
+    parts = {}
+    try:
+        names = sorted(os.listdir(HOOKS_DIR))
+    except OSError:
+        names = []
+    for fname in names:
+        if fname.endswith(".py"):
+            parts[fname] = _file_checksum(os.path.join(HOOKS_DIR, fname))
+    parts["health-check.sh"] = _file_checksum(REQUIRED_HOOKS["health-check.sh"])
+    parts["python"] = sys.version
+    blob = json.dumps(parts, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
 def phase_runtime_drift():
     """Phase 5: Detect changes to hook files between sessions (advisory only)."""
     checks = 0
@@ -269,17 +391,8 @@ def phase_runtime_drift():
     actions = []
 
     # Compute current checksums
-    current = {}
-    for fname in _DRIFT_TRACKED_FILES:
-        fpath = os.path.join(HOOKS_DIR, fname)
-        checks += 1
-        if not os.path.isfile(fpath):
-            continue
-        try:
-            with open(fpath, "rb") as f:
-                current[fname] = hashlib.sha256(f.read()).hexdigest()[:16]
-        except OSError:
-            pass
+    checks += len(_DRIFT_TRACKED_FILES)
+    current = dict(_hook_checksums())
 
     # Compare against stored checksums
     stored = {}
@@ -299,13 +412,163 @@ def phase_runtime_drift():
                 actions.append(f"drift: {fname} was removed")
 
     # Save current checksums for next session
+    save_json_state(_CHECKSUMS_FILE, current)
+
+    return checks, repairs, actions
+
+
+def _load_heal_state():
+    """Load persisted scheduler/phase state from the previous session."""
     try:
-        with open(_CHECKSUMS_FILE, "w") as f:
-            json.dump(current, f, indent=2)
+        with open(HEAL_STATE_FILE, "r") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError, OSError, ValueError):
+        return {}
+
+
+def _save_heal_state(state):
+    """Atomically persist scheduler/phase state (temp file + rename).
+
+    Serialized under _HEAL_STATE_LOCK: abandoned phase threads may still be
+    updating their keys.
+    """
+    with _HEAL_STATE_LOCK:
+        payload = json.dumps(state)
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, HEAL_STATE_FILE)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
     except OSError:
         pass
 
-    return checks, repairs, actions
+
+def _budget_seconds():
+    """Total wall-clock budget for all phases (SELF_HEAL_BUDGET_MS override)."""
+    try:
+        budget_ms = int(os.environ.get("SELF_HEAL_BUDGET_MS", DEFAULT_BUDGET_MS))
+    except ValueError:
+        budget_ms = DEFAULT_BUDGET_MS
+    return max(0, budget_ms) / 1000.0
+
+
+def _phase_plan():
+    """Phase table: (name, function, dependencies).
+
+    Dependencies only order phases that touch the same files:
+      - auto_repair regenerates the config that structural inspects/patches
+      - smoke_tests fingerprints the config, which structural may patch
+      - data_quality samples audit.jsonl, which state_health may rotate
+      - runtime_drift writes hook-checksums.json, which state_health validates
+    Everything else runs concurrently.
+    """
+    return [
+        ("structural", phase_structural, ()),
+        ("smoke_tests", phase_smoke_tests, ("structural",)),
+        ("state_health", phase_state_health, ()),
+        ("auto_repair", phase_auto_repair, ("structural",)),
+        ("mode_validation", phase_mode_validation, ()),
+        ("data_quality", phase_data_quality, ("state_health",)),
+        ("runtime_drift", phase_runtime_drift, ("state_health",)),
+    ]
+
+
+def run_phases(plan, budget_s, priority=(), force=(), wait=()):
+    """Run phases concurrently under a total wall-clock budget.
+
+    Phases whose dependencies have finished are started as soon as a worker
+    slot is free, in this order: phases in ``force`` (and their
+    dependencies), phases in ``wait``, phases deferred by the previous
+    session (``priority``), then the rest. Nothing starts once the budget
+    has run out. At that point:
+      - running ``wait`` phases (those that mutate files) are waited for;
+      - running ``force`` phases are waited for until FORCED_BUDGET_MULTIPLE
+        times the budget;
+      - anything else still running is abandoned in its daemon thread.
+    Abandoned and never-started phases are reported as deferred.
+
+    Returns (results, timings, deferred):
+      results  — {name: (checks, repairs, actions)} for finished phases
+      timings  — {name: {"ms": float, "status": "ok"|"error"|"deferred"}}
+      deferred — list of phase names that did not finish within budget
+    """
+    deps = {name: tuple(d) for name, _, d in plan}
+    funcs = {name: fn for name, fn, _ in plan}
+    required = set()
+    stack = [n for n in force if n in deps]
+    while stack:
+        name = stack.pop()
+        if name not in required:
+            required.add(name)
+            stack.extend(d for d in deps[name] if d in deps)
+    hold = set(wait)
+    rank = {name: i for i, name in enumerate(priority)}
+    pending = sorted(
+        deps,
+        key=lambda n: (
+            0 if n in required else 1 if n in hold else 2,
+            rank.get(n, len(rank)),
+        ),
+    )
+    running = {}
+    finished = set()
+    results = {}
+    timings = {}
+    done_q = queue.Queue()
+
+    def _worker(name):
+        t0 = time.monotonic()
+        try:
+            outcome = ("ok", funcs[name]())
+        except Exception as e:
+            outcome = ("error", (0, 0, [f"phase {name} failed: {type(e).__name__}"]))
+        done_q.put((name, outcome, (time.monotonic() - t0) * 1000))
+
+    started = time.monotonic()
+    deadline = started + budget_s
+    forced_deadline = started + budget_s * FORCED_BUDGET_MULTIPLE
+    while pending or running:
+        now = time.monotonic()
+        if now < deadline:
+            for name in list(pending):
+                if len(running) >= MAX_PARALLEL_PHASES:
+                    break
+                if all(d in finished for d in deps[name]):
+                    pending.remove(name)
+                    running[name] = threading.Thread(
+                        target=_worker, args=(name,), daemon=name not in hold
+                    )
+                    running[name].start()
+            if not running:
+                break  # unsatisfiable dependencies — defer the rest
+            timeout = deadline - now
+        elif hold.intersection(running):
+            timeout = None  # never abandon a phase mid-write
+        elif required.intersection(running) and now < forced_deadline:
+            timeout = forced_deadline - now
+        else:
+            break
+        try:
+            name, (status, result), elapsed_ms = done_q.get(timeout=timeout)
+        except queue.Empty:
+            continue  # deadline reached: re-check what must still be waited for
+        running.pop(name, None)
+        finished.add(name)
+        results[name] = result
+        timings[name] = {"ms": round(elapsed_ms, 1), "status": status}
+
+    deferred = list(running) + pending
+    for name in deferred:
+        timings[name] = {"ms": None, "status": "deferred"}
+    return results, timings, deferred
 
 
 def main():
@@ -315,50 +578,40 @@ def main():
     repairs = 0
     actions = []
 
-    # Phase 1: Structural integrity
-    c, r, a = phase_structural()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 2: Smoke tests
-    c, r, a = phase_smoke_tests()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 3: State health
-    c, r, a = phase_state_health()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 4: Auto-repair (permissions, missing dirs)
-    c, r, a = phase_auto_repair()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 4b: Master agent mode file validation
-    c, r, a = phase_mode_validation()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 4c: v2 data quality validation
-    c, r, a = phase_data_quality()
-    checks += c
-    repairs += r
-    actions.extend(a)
-
-    # Phase 5: Runtime drift detection
-    try:
-        c, r, a = phase_runtime_drift()
-        checks += c
-        repairs += r
-        actions.extend(a)
-    except Exception:
-        pass  # Drift detection must never block session start
+    started = time.monotonic()
+    budget_s = _budget_seconds()
+    heal_state = _HEAL_STATE
+    heal_state.update(_load_heal_state())
+    plan = _phase_plan()
+    streak = heal_state.get("deferred_streak")
+    streak = streak if isinstance(streak, dict) else {}
+    force = [
+        name for name, n in streak.items() if isinstance(n, int) and n >= DEFER_LIMIT
+    ]
+
+    # Phases 1-5 run through the scheduler; report order stays stable.
+    results, timings, deferred = run_phases(
+        plan,
+        budget_s,
+        priority=heal_state.get("deferred") or (),
+        force=force,
+        wait=MUTATING_PHASES,
+    )
+    for name, _, _ in plan:
+        if name in results:
+            c, r, a = results[name]
+            checks += c
+            repairs += r
+            actions.extend(a)
+    if deferred:
+        actions.append(f"deferred to next session: {', '.join(deferred)}")
+
+    with _HEAL_STATE_LOCK:
+        heal_state["deferred"] = deferred
+        heal_state["deferred_streak"] = {
+            name: (streak.get(name) or 0) + 1 for name in deferred
+        }
+    _save_heal_state(heal_state)
 
     # Phase 6: Report
     status = "healthy" if repairs == 0 else "repaired"
@@ -367,7 +620,12 @@ def main():
         "checks": checks,
         "repairs": repairs,
         "status": status,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        "budget_ms": int(budget_s * 1000),
+        "phases": timings,
     }
+    if deferred:
+        log_entry["deferred"] = deferred
     if actions:
         log_entry["actions"] = actions
 
@@ -379,6 +637,8 @@ def main():
         pass
 
     summary = f"Self-heal: {'OK' if repairs == 0 else 'REPAIRED'} ({checks} checks, {repairs} repairs)"
+    if deferred:
+        summary += f" [{len(deferred)} phase(s) deferred]"
     print(summary)
     if repairs > 0:
         print(f"  Repairs: {', '.join(actions)}", file=sys.stderr)
@@ -445,11 +705,7 @@ def phase_structural():
                     actions.append(f"config: added missing {field}={config[field]}")
                     repairs += 1
             if repairs > 0:
-                try:
-                    with open(CONFIG_PATH, "w") as f:
-                        json.dump(config, f, indent=2)
-                except OSError:
-                    pass
+                save_json_state(CONFIG_PATH, config)
     except FileNotFoundError:
         actions.append("config file missing")
         # Will be auto-repaired in phase 4
@@ -477,7 +733,29 @@ def phase_structural():
 
 
 def phase_smoke_tests():
-    """Phase 2: Pipe valid JSON through hooks in isolated temp env."""
+    """Phase 2: Pipe valid JSON through hooks in isolated temp env.
+
+    Skipped when the smoke fingerprint (checksums of every hook module,
+    Python version) matches the last passing run recorded in _HEAL_STATE.
+    """
+    fingerprint = _smoke_fingerprint()
+    with _HEAL_STATE_LOCK:
+        cached = _HEAL_STATE.get("smoke") or {}
+    if cached.get("fingerprint") == fingerprint and cached.get("verdict") == "pass":
+        return 1, 0, []
+
+    checks, repairs, actions = _run_smoke_tests()
+    with _HEAL_STATE_LOCK:
+        _HEAL_STATE["smoke"] = {
+            "fingerprint": fingerprint,
+            "verdict": "pass" if repairs == 0 else "fail",
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    return checks, repairs, actions
+
+
+def _run_smoke_tests():
+    """Run the smoke tests unconditionally. Returns (checks, repairs, actions)."""
     checks = 0
     repairs = 0
     actions = []
@@ -583,7 +861,12 @@ def phase_smoke_tests():
 
 
 def phase_state_health():
-    """Phase 3: Clean corrupted, orphaned, and stale files in state dir."""
+    """Phase 3: Clean corrupted, orphaned, and stale files in state dir.
+
+    JSON state files are only parsed when modified since the last heal
+    (high-water st_mtime_ns kept in _HEAL_STATE), so cost tracks churn
+    rather than the number of sessions ever recorded.
+    """
     checks = 0
     repairs = 0
     actions = []
@@ -592,10 +875,17 @@ def phase_state_health():
         return checks, repairs, actions
 
     now = time.time()
+    with _HEAL_STATE_LOCK:
+        mtime_hwm = _HEAL_STATE.get("state_mtime_hwm_ns", 0)
+    new_hwm = mtime_hwm
 
     for fname in os.listdir(STATE_DIR):
         fpath = os.path.join(STATE_DIR, fname)
-        if not os.path.isfile(fpath):
+        try:
+            st = os.stat(fpath)
+        except OSError:
+            continue
+        if not stat.S_ISREG(st.st_mode):
             continue
 
         # Check state file names match expected session_key pattern
@@ -604,14 +894,24 @@ def phase_state_health():
             base = fname[:-5]  # strip .json
             if base.endswith("-reads"):
                 base = base[:-6]  # strip -reads
+            elif base.endswith("-context"):
+                base = base[:-8]  # strip -context (context ledger)
+            elif base.endswith("-marker-scan"):
+                base = base[:-12]  # strip -marker-scan (quality-gate scan cache)
             if not re.match(r"^[a-zA-Z0-9_-]{1,16}$", base) and base not in (
                 "hook-checksums",
                 "token-guard-config",
+                "token-calibration",
+                "mandatory-actions.pending",
+                "agent-lifecycle-index",
             ):
                 actions.append(f"unusual state filename: {fname}")
 
-        # Check for corrupted JSON state files
+        # Check for corrupted JSON state files (only those changed since last heal)
         if fname.endswith(".json") and fname != "audit.jsonl":
+            if st.st_mtime_ns <= mtime_hwm:
+                continue
+            new_hwm = max(new_hwm, st.st_mtime_ns)
             checks += 1
             try:
                 with open(fpath, "r") as f:
@@ -643,33 +943,85 @@ def phase_state_health():
         elif fname.endswith(".lock"):
             checks += 1
             try:
-                if now - os.stat(fpath).st_mtime > STALE_LOCK_SECONDS:
+                if now - st.st_mtime > STALE_LOCK_SECONDS:
                     os.unlink(fpath)
                     actions.append(f"deleted stale {fname}")
                     repairs += 1
             except OSError:
                 pass
 
-    # Check audit.jsonl size — rotate to .1 backup (same strategy as token-guard)
+    with _HEAL_STATE_LOCK:
+        _HEAL_STATE["state_mtime_hwm_ns"] = new_hwm
+
     audit_path = os.path.join(STATE_DIR, "audit.jsonl")
+
+    # Fold leftovers into the archive: a legacy .1 backup (pre-archive
+    # rotation) or a .rotating file from an interrupted rotation.
+    for suffix in (".1", ".rotating"):
+        leftover = audit_path + suffix
+        if not os.path.isfile(leftover):
+            continue
+        checks += 1
+        try:
+            dest = _archive_audit(leftover)
+            if dest:
+                os.unlink(leftover)
+                actions.append(f"archived audit.jsonl{suffix} to {dest}")
+        except OSError:
+            pass
+
+    # Check audit.jsonl size — rotate into the compressed archive
     if os.path.isfile(audit_path):
         checks += 1
         try:
-            with open(audit_path, "r") as f:
-                line_count = sum(1 for _ in f)
-            if line_count > AUDIT_MAX_LINES:
-                backup = audit_path + ".1"
-                if os.path.exists(backup):
-                    os.unlink(backup)
-                os.rename(audit_path, backup)
-                actions.append(f"rotated audit.jsonl ({line_count} lines) to .1 backup")
+            size = os.stat(audit_path).st_size
+            if size > AUDIT_MAX_BYTES:
+                rotating = audit_path + ".rotating"
+                os.rename(audit_path, rotating)
+                actions.append(_archive_rotated_audit(rotating, size))
                 repairs += 1
         except OSError:
             pass
 
+    # Drop completed / expired mandatory actions and rebuild the pending index
+    queue_path = os.path.join(STATE_DIR, "mandatory-actions.jsonl")
+    if os.path.exists(queue_path) or os.path.exists(
+        os.path.join(STATE_DIR, "mandatory-actions.pending.json")
+    ):
+        checks += 1
+        try:
+            from action_queue import compact
+
+            dropped = compact(queue_path)
+            if dropped:
+                actions.append(f"compacted mandatory-actions ({dropped} records)")
+                repairs += 1
+        except (ImportError, SyntaxError, OSError):
+            pass
+
     return checks, repairs, actions
 
 
+def _archive_audit(path):
+    """Compress a rotated audit file into the archive. Returns the generation name or None."""
+    try:
+        from audit_archive import archive_file
+    except (ImportError, SyntaxError):
+        return None
+    dest = archive_file(path, archive_dir=AUDIT_ARCHIVE_DIR)
+    return os.path.basename(dest) if dest else None
+
+
+def _archive_rotated_audit(rotating, size):
+    """Archive a just-rotated audit file, falling back to the single .1 backup."""
+    dest = _archive_audit(rotating)
+    if dest:
+        os.unlink(rotating)
+        return f"rotated audit.jsonl ({size} bytes) to archive {dest}"
+    os.replace(rotating, os.path.join(STATE_DIR, "audit.jsonl.1"))
+    return f"rotated audit.jsonl ({size} bytes) to .1 backup"
+
+
 def phase_auto_repair():
     """Phase 4: Fix permissions, recreate missing dirs, regenerate config."""
     checks = 0
@@ -713,13 +1065,13 @@ def phase_auto_repair():
     if needs_regen:
         try:
             os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-            with open(CONFIG_PATH, "w") as f:
-                json.dump(DEFAULT_CONFIG, f, indent=2)
-            actions.append("regenerated config from defaults")
-            repairs += 1
         except OSError:
+            pass
+        if save_json_state(CONFIG_PATH, DEFAULT_CONFIG):
+            actions.append("regenerated config from defaults")
+        else:
             actions.append("FAILED to regenerate config")
-            repairs += 1
+        repairs += 1
 
     return checks, repairs, actions
 
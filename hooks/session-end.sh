@@ -23,6 +23,10 @@ if [ -f "$SESSION_FILE" ]; then
   TMP=$(mktemp)
   # Mark closed but preserve files_touched, tool_counts, recent_ops for lead review
   jq '.status = "closed" | .ended = "'"$(date -u +%Y-%m-%dT%H:%M:%SZ)"'"' "$SESSION_FILE" > "$TMP" && mv "$TMP" "$SESSION_FILE"
+  # Registry index (session_registry.py); the heartbeat archives it later.
+  if command -v python3 >/dev/null 2>&1 && [ -f "$HOOK_DIR/session_registry.py" ]; then
+    python3 "$HOOK_DIR/session_registry.py" record "$SESSION_FILE" >/dev/null 2>&1 || true
+  fi
 fi
 
 # Clean per-session guard state files
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Session registry for ~/.claude/terminals.
+
+Every session has a terminals/session-{sid8}.json file, and "which sessions
+are active?" used to mean globbing and parsing all of them, including the
+closed ones that were never moved aside. The registry keeps a compact index
+next to them:
+
+    terminals/sessions-index.json
+    {"schema_version": 1,
+     "sessions": {sid8: {"status", "last_active", "project",
+                         "files_digest", "files_count", "ended"?,
+                         "archived"?}}}
+
+heartbeat.py records a session on each full beat and when it marks one
+stale; session-end.sh records the close (`session_registry.py record FILE`).
+record() also maintains the path -> sessions index in conflict_index.py.
+Closed sessions are moved to terminals/archive/ once they have been closed
+for ARCHIVE_AFTER_SECONDS, so the live directory holds only live sessions,
+and archived files are deleted after RETAIN_SECONDS. active_sessions() reads
+only the index.
+
+files_digest is a short hash of files_touched: readers can tell whether a
+session's working set changed without opening its file.
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import conflict_index  # noqa: E402
+from hook_utils import load_json_state, lock, save_json_state, unlock  # noqa: E402
+
+INDEX_NAME = "sessions-index.json"
+ARCHIVE_NAME = "archive"
+ARCHIVE_AFTER_SECONDS = 3600
+RETAIN_SECONDS = 7 * 86400
+
+
+def index_path(terminals: str) -> str:
+    return os.path.join(terminals, INDEX_NAME)
+
+
+def archive_dir(terminals: str) -> str:
+    return os.path.join(terminals, ARCHIVE_NAME)
+
+
+def _epoch(ts) -> float:
+    import calendar
+
+    try:
+        return float(calendar.timegm(time.strptime(str(ts), "%Y-%m-%dT%H:%M:%SZ")))
+    except (TypeError, ValueError, OverflowError):
+        return 0.0
+
+
+def files_digest(files: Iterable) -> str:
+    import hashlib
+
+    h = hashlib.sha1()
+    for path in files or []:
+        h.update(str(path).encode("utf-8", "replace"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+def summarize(session: Dict) -> Dict:
+    """Index entry for one session file's contents."""
+    files = session.get("files_touched")
+    files = files if isinstance(files, list) else []
+    entry = {
+        "status": str(session.get("status") or "unknown"),
+        "last_active": str(session.get("last_active") or ""),
+        "project": str(session.get("project") or ""),
+        "files_digest": files_digest(files),
+        "files_count": len(files),
+    }
+    if session.get("ended"):
+        entry["ended"] = str(session["ended"])
+    return entry
+
+
+def _update(terminals: str, mutate) -> Optional[Dict]:
+    """Apply mutate(sessions) to the index under its lock; returns sessions."""
+    path = index_path(terminals)
+    try:
+        os.makedirs(terminals, exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                sessions = load_json_state(path).get("sessions")
+                if not isinstance(sessions, dict):
+                    sessions = {}
+                mutate(sessions)
+                save_json_state(path, {"schema_version": 1, "sessions": sessions})
+                return sessions
+            finally:
+                unlock(lf)
+    except OSError:
+        return None
+
+
+def record(terminals: str, session: Dict) -> None:
+    """Upsert one session (the parsed session-{sid8}.json) in the index.
+
+    Keeps conflict_index in step when files_touched or the closed state
+    changed since the last record.
+    """
+    sid8 = str(session.get("session") or "")
+    if not sid8:
+        return
+    entry = summarize(session)
+    previous = {}
+
+    def upsert(sessions):
+        previous.update(sessions.get(sid8) or {})
+        sessions[sid8] = entry
+
+    if _update(terminals, upsert) is None:
+        return
+    closed = entry["status"] == "closed"
+    if (
+        previous.get("files_digest") != entry["files_digest"]
+        or (previous.get("status") == "closed") != closed
+    ):
+        conflict_index.update_session(
+            terminals, sid8, None if closed else session.get("files_touched")
+        )
+
+
+def read_index(terminals: str) -> Dict[str, Dict]:
+    sessions = load_json_state(index_path(terminals)).get("sessions")
+    return sessions if isinstance(sessions, dict) else {}
+
+
+def active_sessions(terminals: str) -> Dict[str, Dict]:
+    """Index entries of sessions that are not closed, keyed by sid8."""
+    return {
+        sid8: entry
+        for sid8, entry in read_index(terminals).items()
+        if isinstance(entry, dict) and entry.get("status") != "closed"
+    }
+
+
+def rebuild(terminals: str) -> Dict[str, Dict]:
+    """Recreate the index from the session files on disk (live and archived)."""
+    found = {}
+    for directory, archived in ((archive_dir(terminals), True), (terminals, False)):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if not (name.startswith("session-") and name.endswith(".json")):
+                continue
+            session = load_json_state(os.path.join(directory, name))
+            if not isinstance(session, dict):
+                continue
+            sid8 = str(session.get("session") or name[len("session-") : -len(".json")])
+            entry = summarize(session)
+            if archived:
+                entry["archived"] = True
+            found[sid8] = entry
+
+    def replace(sessions):
+        sessions.clear()
+        sessions.update(found)
+
+    _update(terminals, replace)
+    conflict_index.rebuild(terminals)
+    return found
+
+
+def archive_closed(terminals: str, now: Optional[float] = None) -> int:
+    """Move sessions closed for ARCHIVE_AFTER_SECONDS into archive/.
+
+    Also drops archived files and index entries older than RETAIN_SECONDS,
+    and entries whose session file was deleted. Builds the index first if it
+    does not exist. Returns the number of sessions archived.
+    """
+    now = time.time() if now is None else now
+    if not os.path.exists(index_path(terminals)):
+        rebuild(terminals)
+    archive = archive_dir(terminals)
+    moved = []
+    expired = []
+    for sid8, entry in read_index(terminals).items():
+        if not isinstance(entry, dict) or "/" in sid8 or sid8.startswith("."):
+            continue
+        name = f"session-{sid8}.json"
+        if entry.get("status") != "closed":
+            # Open sessions whose file is gone (coordinator GC of stale ones).
+            if not os.path.exists(os.path.join(terminals, name)):
+                expired.append(sid8)
+            continue
+        age = now - _epoch(entry.get("ended") or entry.get("last_active"))
+        if entry.get("archived"):
+            if age > RETAIN_SECONDS:
+                try:
+                    os.unlink(os.path.join(archive, name))
+                except OSError:
+                    pass
+                expired.append(sid8)
+            continue
+        if age <= ARCHIVE_AFTER_SECONDS:
+            continue
+        src = os.path.join(terminals, name)
+        if not os.path.exists(src):
+            expired.append(sid8)  # removed by the coordinator's GC
+            continue
+        # Only archive what is still closed on disk (a session can be resumed).
+        current = load_json_state(src)
+        if not isinstance(current, dict) or current.get("status") != "closed":
+            continue
+        try:
+            os.makedirs(archive, exist_ok=True)
+            os.replace(src, os.path.join(archive, name))
+        except OSError:
+            continue
+        moved.append(sid8)
+
+    if moved or expired:
+
+        def apply(sessions):
+            for sid8 in moved:
+                if isinstance(sessions.get(sid8), dict):
+                    sessions[sid8]["archived"] = True
+            for sid8 in expired:
+                sessions.pop(sid8, None)
+
+        _update(terminals, apply)
+        for sid8 in expired:
+            conflict_index.update_session(terminals, sid8, None)
+    return len(moved)
+
+
+def main(argv) -> int:
+    """`session_registry.py record SESSION_FILE` | `rebuild` | `active`."""
+    terminals = os.path.expanduser("~/.claude/terminals")
+    cmd = argv[1] if len(argv) > 1 else ""
+    if cmd == "record" and len(argv) > 2:
+        session = load_json_state(argv[2])
+        if isinstance(session, dict) and session:
+            record(os.path.dirname(os.path.abspath(argv[2])), session)
+        return 0
+    if cmd == "rebuild":
+        print(json.dumps({"sessions": len(rebuild(terminals))}))
+        return 0
+    if cmd == "active":
+        print(json.dumps(active_sessions(terminals), indent=2, sort_keys=True))
+        return 0
+    print(main.__doc__, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
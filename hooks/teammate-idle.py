@@ -15,7 +15,13 @@ Wire in settings.json under hooks.TeammateIdle.
 import json
 import sys
 import os
-import re
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import marker_scan  # noqa: E402
+
+# Marker counts above this are reported as "N+" (the scan stops counting).
+MARKER_REPORT_CAP = 20
 
 
 def main():
@@ -43,14 +49,21 @@ def main():
     issues = []
 
     # ── Check 1: TODO/FIXME left in changed files ──
-    for fpath in files_changed:
-        try:
-            text = open(fpath).read()
-            todos = re.findall(r"(TODO|FIXME|HACK|XXX).*", text)
-            if todos:
-                issues.append(f"File {fpath} has {len(todos)} unresolved TODO/FIXME comment(s). Address them or document why they're intentional.")
-        except Exception:
-            pass
+    # Streamed, parallel and time-boxed; binary/huge files are skipped and an
+    # exhausted budget yields partial results rather than blocking the idle.
+    # Results are cached per session, so repeated idles on the same file set
+    # only rescan files that changed.
+    scan = marker_scan.scan_files(
+        files_changed if isinstance(files_changed, list) else [],
+        max_count=MARKER_REPORT_CAP,
+        cache_path=marker_scan.scan_cache_path(
+            payload.get("session_id") or teammate_id
+        ),
+    )
+    truncated = set(scan["truncated"])
+    for fpath, n in scan["counts"].items():
+        shown = f"{n}+" if fpath in truncated else str(n)
+        issues.append(f"File {fpath} has {shown} unresolved TODO/FIXME comment(s). Address them or document why they're intentional.")
 
     # ── Check 2: Evidence of verification in output ──
     output_lower = output.lower()
@@ -88,12 +101,20 @@ def main():
     with open(log_path, "a") as f:
         import datetime
         ts = datetime.datetime.now().isoformat()
+        if scan["unscanned"]:
+            f.write(
+                f"[{ts}] SCAN   teammate={teammate_id} partial: "
+                f"{len(scan['unscanned'])} file(s) not scanned within budget "
+                f"({scan['elapsed_ms']}ms)\n"
+            )
+        looked_up = scan["cache_hits"] + scan["cache_misses"]
+        cache_note = f" scan_cache={scan['cache_hits']}/{looked_up}" if looked_up else ""
         if issues:
-            f.write(f"[{ts}] HELD   teammate={teammate_id} task='{task_name}' issues={len(issues)}\n")
+            f.write(f"[{ts}] HELD   teammate={teammate_id} task='{task_name}' issues={len(issues)}{cache_note}\n")
             for issue in issues:
                 f.write(f"  - {issue}\n")
         else:
-            f.write(f"[{ts}] PASSED teammate={teammate_id} task='{task_name}'\n")
+            f.write(f"[{ts}] PASSED teammate={teammate_id} task='{task_name}'{cache_note}\n")
 
     if issues:
         feedback = "Quality gate failed — address the following before going idle:\n"
@@ -1,5 +1,5 @@
 #!/bin/bash
-# Universal Terminal Heartbeat v2.2 — rate-limited, self-healing, versioned, injection-safe
+# Universal Terminal Heartbeat v2.3 — rate-limited, self-healing, versioned, injection-safe
 # Triggered by PostToolUse on Edit|Write|Bash|Read
 # Tracks: activity log, session liveness, files touched, tool counts, recent ops
 #
@@ -10,8 +10,17 @@
 # All date/stat calls use portable.sh for cross-platform compatibility.
 umask 077
 
-# Load portable utilities
 HOOK_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+# Fast path: heartbeat.py does the whole beat in one interpreter instead of
+# ~7 jq/date/basename/mktemp processes. Set CLAUDE_HEARTBEAT_ENGINE=shell to
+# force the jq implementation below (also used when python3 is missing).
+if [ "${CLAUDE_HEARTBEAT_ENGINE:-python}" != "shell" ] && [ -f "$HOOK_DIR/heartbeat.py" ] \
+  && command -v python3 >/dev/null 2>&1; then
+  exec python3 "$HOOK_DIR/heartbeat.py"
+fi
+
+# Load portable utilities
 # shellcheck source=lib/portable.sh
 # shellcheck disable=SC1091
 source "$HOOK_DIR/lib/portable.sh"
@@ -46,8 +55,10 @@ MAX_TURNS_MESSAGE=""
 # ─── ACTIVITY LOG (always fires before cooldown — intentional by design) ───
 # The rate-limit check is AFTER this block. Activity log gets every event;
 # the full session-file update is rate-limited to 1/5s. This is correct behavior.
-ACTIVITY_FILE=~/.claude/terminals/activity.jsonl
-JSON_LINE=$(jq -n --arg ts "$NOW" --arg session "$SID8" --arg tool "$TOOL_NAME" \
+# Per-session shard (see activity_log.py) — sessions never share this lock.
+mkdir -p ~/.claude/terminals/activity
+ACTIVITY_FILE=~/.claude/terminals/activity/${SID8}.jsonl
+JSON_LINE=$(jq -cn --arg ts "$NOW" --arg session "$SID8" --arg tool "$TOOL_NAME" \
       --arg file "$FILE_BASE" --arg path "$FILE_PATH" --arg project "$PROJECT" \
       '{ts:$ts,session:$session,tool:$tool,file:$file,path:$path,project:$project}')
 portable_flock_append "${ACTIVITY_FILE}.lock" "echo '$JSON_LINE' >> '$ACTIVITY_FILE'"
@@ -127,6 +138,7 @@ if [ -f "$SESSION_FILE" ]; then
       jq -n --arg ts "$NOW" --arg content "$MAX_TURNS_MESSAGE" \
         '{ts:$ts,from:"coordinator",priority:"urgent",content:$content}' \
         >> "${INBOX_DIR}/${SID8}.jsonl" 2>/dev/null
+      touch "${INBOX_DIR}/${SID8}.gen" 2>/dev/null
       META_FILE=~/.claude/terminals/results/${WORKER_TASK_ID}.meta.json
       if [ -f "$META_FILE" ]; then
         LEAD_SID=$(jq -r '.notify_session_id // empty' "$META_FILE" 2>/dev/null || true)
@@ -134,6 +146,7 @@ if [ -f "$SESSION_FILE" ]; then
           jq -n --arg ts "$NOW" --arg task "$WORKER_TASK_ID" --argjson max "$WORKER_MAX_TURNS" \
             '{ts:$ts,from:"coordinator",priority:"urgent",content:("[MAX_TURNS_REACHED] Worker " + $task + " hit " + ($max|tostring) + " turns. Auto-terminated.")}' \
             >> "${INBOX_DIR}/${LEAD_SID}.jsonl" 2>/dev/null
+          touch "${INBOX_DIR}/${LEAD_SID}.gen" 2>/dev/null
         fi
         PID_FILE=~/.claude/terminals/results/${WORKER_TASK_ID}.pid
         if [ -f "$PID_FILE" ]; then
@@ -258,6 +271,7 @@ if $DO_STALE; then
         jq -n --arg ts "$(date -u +%Y-%m-%dT%H:%M:%SZ)" --arg sid "$SF_SID" \
           '{ts:$ts,from:"coordinator",priority:"normal",content:("[WORKER IDLE] Session " + $sid + " — inactive for >30s, marked stale.")}' \
           >> "${INBOX_DIR}/${LEAD_SID}.jsonl" 2>/dev/null
+        touch "${INBOX_DIR}/${LEAD_SID}.gen" 2>/dev/null
         touch "$IDLE_REPORTED"
       done
     fi
@@ -27,6 +27,7 @@ Special handling:
   - Model cost advisory: Non-blocking warning when opus requested
 
 Config: ~/.claude/hooks/token-guard-config.json
+        (validated copy cached in session-state/config-snapshot.bin)
 State:  ~/.claude/hooks/session-state/{session_id}.json
 Audit:  ~/.claude/hooks/session-state/audit.jsonl
 
@@ -38,11 +39,9 @@ Usage:
   python3 token-guard.py --usage   # Print shareable usage summary
 """
 
-import difflib
 import json
 import os
 import re
-import subprocess
 import sys
 import time
 from typing import Any, Dict, List, Optional, Tuple
@@ -62,6 +61,11 @@ from guard_normalize import (
     normalize_text,
 )
 
+try:
+    import config_snapshot
+except ImportError:  # partial install: load_config() reads the file directly
+    config_snapshot = None
+
 # Shared infrastructure — locking, state, audit, config
 from hook_utils import (
     DEFAULT_CONFIG,
@@ -70,6 +74,9 @@ from hook_utils import (
     load_json_state,
     save_json_state,
     read_jsonl_fault_tolerant,
+    record_hook_outcome,
+    add_pending_spawn,
+    prune_pending_spawns,
 )
 
 STATE_DIR = os.environ.get(
@@ -79,8 +86,17 @@ CONFIG_PATH = os.environ.get(
     "TOKEN_GUARD_CONFIG_PATH",
     os.path.expanduser("~/.claude/hooks/token-guard-config.json"),
 )
+# The validated config is cached in the shared config snapshot (see
+# load_config); bump the version when the cached config's shape changes.
+CONFIG_SNAPSHOT_PATH = os.environ.get(
+    "CLAUDE_CONFIG_SNAPSHOT", os.path.join(STATE_DIR, "config-snapshot.bin")
+)
+_CONFIG_CACHE_VERSION = 2
 AUDIT_LOG = os.path.join(STATE_DIR, "audit.jsonl")
 
+# Audit event → hook_health outcome for timed decisions (blocks are fail_closed)
+_AUDIT_EVENT_OUTCOMES = {"block": "fail_closed", "fault": "fail_open"}
+
 BLOCKED_ATTEMPTS_TTL = 300  # Prune blocked attempts older than 5 minutes
 SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
 
@@ -428,16 +444,46 @@ def _safe_int(val: Any, default: int) -> int:
         return default
 
 
+def _config_code_tag() -> Tuple:
+    """Version of the validation code, part of the cached config's key.
+
+    Validation logic and DEFAULT_CONFIG live in token-guard.py and
+    hook_utils.py, so their mtimes invalidate the cache on upgrade.
+    """
+    code = []
+    for path in (__file__, getattr(sys.modules.get("hook_utils"), "__file__", "")):
+        try:
+            code.append(os.stat(path).st_mtime_ns)
+        except (OSError, TypeError):
+            code.append(0)
+    return (_CONFIG_CACHE_VERSION, tuple(code))
+
+
 def load_config() -> Dict:
-    """Load config from JSON file, falling back to defaults on any error."""
+    """Validated config, cached in the shared config snapshot.
+
+    config_snapshot.load_derived() keeps the output of validate_config()
+    keyed by the config file's stat and sha256: a stat match skips reading
+    the config at all; a content match (e.g. after `touch`) skips parsing
+    and validation. Without config_snapshot (partial install) the file is
+    read and validated directly.
+    """
+    if config_snapshot is None:
+        return validate_config(load_json_state(CONFIG_PATH))
+    return config_snapshot.load_derived(
+        CONFIG_PATH,
+        "token-guard",
+        _config_code_tag(),
+        validate_config,
+        snapshot=CONFIG_SNAPSHOT_PATH,
+    )
+
+
+def validate_config(loaded: Any) -> Dict:
+    """DEFAULT_CONFIG overlaid with `loaded` (parsed JSON), every key normalized."""
     config = DEFAULT_CONFIG.copy()
-    try:
-        with open(CONFIG_PATH, "r") as f:
-            loaded = json.load(f)
-            if isinstance(loaded, dict):
-                config.update({k: v for k, v in loaded.items() if v is not None})
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
+    if isinstance(loaded, dict):
+        config.update({k: v for k, v in loaded.items() if v is not None})
 
     config["max_agents"] = _safe_int(
         config.get("max_agents"), DEFAULT_CONFIG["max_agents"]
@@ -481,10 +527,10 @@ def load_config() -> Dict:
         if failure_mode in {"fail_open", "fail_closed"}
         else DEFAULT_CONFIG["failure_mode"]
     )
-    config["one_per_session"] = set(
+    config["one_per_session"] = frozenset(
         config.get("one_per_session", DEFAULT_CONFIG["one_per_session"])
     )
-    config["always_allowed"] = set(
+    config["always_allowed"] = frozenset(
         config.get("always_allowed", DEFAULT_CONFIG["always_allowed"])
     )
     shadow_default_mode = normalize_text(
@@ -527,6 +573,8 @@ def load_config() -> Dict:
             if mode in {"enforce", "shadow", "off"}:
                 shadow_rules[rule_key] = mode
     config["shadow_rules"] = shadow_rules
+    # rule_id -> mode, already validated: rule_mode() is a dict lookup.
+    config["rule_modes"] = dict(shadow_rules)
     config["session_recap_default_window_minutes"] = _safe_int(
         config.get("session_recap_default_window_minutes"),
         DEFAULT_CONFIG.get("session_recap_default_window_minutes", 180),
@@ -535,6 +583,9 @@ def load_config() -> Dict:
 
 
 def rule_mode(config: Dict, rule_id: str) -> str:
+    modes = config.get("rule_modes")
+    if modes is not None:
+        return modes.get(rule_id) or config["shadow_default_mode"]
     mode = (config.get("shadow_rules") or {}).get(rule_id) or config.get(
         "shadow_default_mode", "enforce"
     )
@@ -547,8 +598,13 @@ def cleanup_stale_state(ttl_hours: int) -> None:
     cutoff = time.time() - (ttl_hours * 3600)
     try:
         for fname in os.listdir(STATE_DIR):
-            if fname == "audit.jsonl" or fname == "audit.jsonl.1":
-                continue  # Never auto-delete audit logs
+            if fname in (
+                "audit.jsonl",
+                "audit.jsonl.1",
+                "audit.jsonl.rotating",
+                "token-calibration.json",
+            ):
+                continue  # Never auto-delete audit logs or learned calibration
             fpath = os.path.join(STATE_DIR, fname)
             try:
                 if os.path.isfile(fpath) and os.stat(fpath).st_mtime < cutoff:
@@ -597,6 +653,13 @@ def audit(
         shadow_diff=shadow_diff,
     )
     append_jsonl(AUDIT_LOG, entry)
+    if latency_ms is not None:
+        record_hook_outcome(
+            "token-guard",
+            _AUDIT_EVENT_OUTCOMES.get(event_type, "success"),
+            latency_ms,
+            state_dir=STATE_DIR,
+        )
     return str(entry.get("decision_id", ""))
 
 
@@ -620,6 +683,8 @@ def check_necessity(description: str, prompt_text: str) -> Tuple[bool, str, str]
     # Slow path: word-level fuzzy matching against canonical bank
     # Word-level comparison is more robust than character-level because specific
     # identifiers (handleAuth, myFile.py) don't dilute the structural similarity.
+    import difflib  # deferred: only Task spawns that miss every regex get here
+
     input_words = combined[:200].split()
     best_score = 0
     best_match = None
@@ -639,7 +704,12 @@ def check_type_switching(
     state: Dict, description: str, subagent_type: str
 ) -> Tuple[bool, str]:
     """Detect if new spawn resembles a previously blocked spawn with different type."""
-    for attempt in state.get("blocked_attempts", []):
+    attempts = state.get("blocked_attempts", [])
+    if not attempts:
+        return False, ""
+    import difflib
+
+    for attempt in attempts:
         similarity = difflib.SequenceMatcher(
             None, description.lower(), attempt["description"].lower()
         ).ratio()
@@ -662,10 +732,8 @@ def default_state() -> Dict:
     }
 
 
-def main():
-    start_time = time.time()
-    config = load_config()
-
+def _prepare_state_dir(config: Dict) -> None:
+    """Create STATE_DIR, exiting per failure_mode if that is impossible."""
     try:
         os.makedirs(STATE_DIR, exist_ok=True)
     except OSError:
@@ -675,21 +743,20 @@ def main():
             )
             sys.exit(2)
         sys.exit(0)  # Can't create state dir — fail-open
-    max_agents = config["max_agents"]
-    parallel_window_seconds = config["parallel_window_seconds"]
-    global_cooldown = config["global_cooldown_seconds"]
-    max_per_subagent_type = config["max_per_subagent_type"]
-    one_per_session = config["one_per_session"]
-    always_allowed = config["always_allowed"]
-    audit_enabled = config["audit_log"]
 
-    # Self-clean stale state files on every invocation
-    cleanup_stale_state(config["state_ttl_hours"])
 
+def main():
+    start_time = time.time()
+
+    # Cheap filters first. Most calls routed here are not Task spawns, and
+    # those exit before any filesystem access: no config, no state dir, no
+    # stale-state scan. Only the Task path below touches disk.
     try:
         input_data = json.load(sys.stdin)
     except (json.JSONDecodeError, EOFError, ValueError):
-        if config.get("fault_audit") and audit_enabled:
+        config = load_config()
+        if config.get("fault_audit") and config["audit_log"]:
+            _prepare_state_dir(config)
             audit(
                 "fault",
                 "unknown",
@@ -711,12 +778,22 @@ def main():
     if not SESSION_ID_RE.match(str(session_id)):
         print("BLOCKED: Invalid session_id in token-guard payload.", file=sys.stderr)
         sys.exit(2)
-    session_key = normalize_session_key(session_id)
 
     # Only gate Task tool calls
     if tool_name != "Task":
         sys.exit(0)
 
+    # From here on the config is needed (one stat + sidecar read when cached).
+    config = load_config()
+    max_agents = config["max_agents"]
+    parallel_window_seconds = config["parallel_window_seconds"]
+    global_cooldown = config["global_cooldown_seconds"]
+    max_per_subagent_type = config["max_per_subagent_type"]
+    one_per_session = config["one_per_session"]
+    always_allowed = config["always_allowed"]
+    audit_enabled = config["audit_log"]
+    session_key = normalize_session_key(session_id)
+
     max_field_len = max(64, config.get("max_string_field_length", 512))
     subagent_type = normalize_subagent_type(
         tool_input.get("subagent_type", ""), max_len=min(80, max_field_len)
@@ -732,9 +809,14 @@ def main():
     # RESUME DETECTION — continuing existing work, not new spawn
     if tool_input.get("resume"):
         if audit_enabled:
+            _prepare_state_dir(config)
             audit("resume", subagent_type or "resumed", description, session_id)
         sys.exit(0)  # Always allow resumes
 
+    _prepare_state_dir(config)
+    # Self-clean stale state files (only on calls that use the state dir)
+    cleanup_stale_state(config["state_ttl_hours"])
+
     state_file = os.path.join(STATE_DIR, f"{session_key}.json")
 
     # File-locked state access (prevents race conditions from parallel tool calls)
@@ -773,12 +855,11 @@ def main():
                 if now - a.get("timestamp", 0) < BLOCKED_ATTEMPTS_TTL
             ]
             # Prune/compact pending spawns (correlation scaffold)
-            state["pending_spawns"] = [
-                p
-                for p in state.get("pending_spawns", [])
-                if now - p.get("timestamp", 0)
-                < max(config.get("metrics_correlation_window_seconds", 15) * 20, 300)
-            ][-25:]
+            prune_pending_spawns(
+                state,
+                now,
+                max(config.get("metrics_correlation_window_seconds", 15) * 20, 300),
+            )
 
             # TEAM DETECTION — team spawns bypass rules but count toward session cap
             if tool_input.get("team_name"):
@@ -811,7 +892,8 @@ def main():
                         "decision_id": decision_id,
                     }
                 )
-                state["pending_spawns"].append(
+                add_pending_spawn(
+                    state,
                     {
                         "decision_id": decision_id,
                         "type": subagent_type,
@@ -819,7 +901,7 @@ def main():
                         "description": description[:120],
                         "team": True,
                         "consumed": False,
-                    }
+                    },
                 )
                 save_json_state(state_file, state)
                 if audit_enabled:
@@ -1087,14 +1169,15 @@ def main():
 
             state["agent_count"] += 1
             state["agents"].append(agent_record)
-            state["pending_spawns"].append(
+            add_pending_spawn(
+                state,
                 {
                     "decision_id": decision_id,
                     "type": subagent_type,
                     "timestamp": now,
                     "description": description[:120],
                     "consumed": False,
-                }
+                },
             )
             save_json_state(state_file, state)
 
@@ -1234,6 +1317,49 @@ def extract_target_dirs(prompt: str) -> List[str]:
     return dirs
 
 
+SONNET_COST_PER_1K_INPUT = 0.003  # $3/M input tokens
+SONNET_COST_PER_1K_OUTPUT = 0.015  # $15/M output tokens
+
+
+def estimate_agent_tokens(entries: List[Dict]) -> Tuple[int, int, bool]:
+    """Estimated (input, output) tokens for the agents in audit entries.
+
+    Uses mean real usage per agent type from token-calibration.json (learned
+    by agent-metrics.py). Returns calibrated=False while no agent usage has
+    been learned yet (35k/15k heuristic).
+    """
+    try:
+        from token_calibration import (
+            DEFAULT_AGENT_TOKENS,
+            agent_token_estimate,
+            load_calibration,
+        )
+
+        calibration = load_calibration(
+            os.path.join(STATE_DIR, "token-calibration.json")
+        )
+    except ImportError:
+        DEFAULT_AGENT_TOKENS = (35000, 15000)
+        calibration = None
+
+    total_in = total_out = 0
+    for e in entries:
+        if calibration is None:
+            est = DEFAULT_AGENT_TOKENS
+        else:
+            est = agent_token_estimate(entry_type(e), calibration)
+        total_in += est[0]
+        total_out += est[1]
+    return total_in, total_out, bool(calibration and calibration.get("agents"))
+
+
+def agent_cost_usd(input_tokens: int, output_tokens: int) -> float:
+    return (
+        input_tokens * SONNET_COST_PER_1K_INPUT
+        + output_tokens * SONNET_COST_PER_1K_OUTPUT
+    ) / 1000
+
+
 def report(json_output: bool = False) -> None:
     """Print cross-session analytics from audit log."""
     from collections import Counter
@@ -1278,25 +1404,16 @@ def report(json_output: bool = False) -> None:
         ).most_common(10):
             print(f"  {p}: {c}")
 
-    # Estimated token cost (heuristic: ~50k per agent, split ~70/30 input/output)
-    EST_INPUT_PER_AGENT = 35000  # ~70% is input (system prompt + mode file + context)
-    EST_OUTPUT_PER_AGENT = 15000  # ~30% is output (agent's response + tool calls)
-    SONNET_COST_PER_1K_INPUT = 0.003  # $3/M input tokens
-    SONNET_COST_PER_1K_OUTPUT = 0.015  # $15/M output tokens
-    est_input_cost = len(allows) * EST_INPUT_PER_AGENT * SONNET_COST_PER_1K_INPUT / 1000
-    est_output_cost = (
-        len(allows) * EST_OUTPUT_PER_AGENT * SONNET_COST_PER_1K_OUTPUT / 1000
-    )
-    est_cost = est_input_cost + est_output_cost
-    est_tokens = len(allows) * (EST_INPUT_PER_AGENT + EST_OUTPUT_PER_AGENT)
-    savings_input = len(blocks) * EST_INPUT_PER_AGENT * SONNET_COST_PER_1K_INPUT / 1000
-    savings_output = (
-        len(blocks) * EST_OUTPUT_PER_AGENT * SONNET_COST_PER_1K_OUTPUT / 1000
-    )
-    savings_cost = savings_input + savings_output
-    savings_tokens = len(blocks) * (EST_INPUT_PER_AGENT + EST_OUTPUT_PER_AGENT)
+    # Estimated token cost: mean real input/output per agent type as learned
+    # by agent-metrics.py, or ~50k per agent (70/30 split) until calibrated
+    est_in, est_out, calibrated = estimate_agent_tokens(allows)
+    save_in, save_out, _ = estimate_agent_tokens(blocks)
+    est_cost = agent_cost_usd(est_in, est_out)
+    est_tokens = est_in + est_out
+    savings_cost = agent_cost_usd(save_in, save_out)
+    savings_tokens = save_in + save_out
 
-    print("\nEstimated impact:")
+    print("\nEstimated impact:" + ("" if calibrated else " (uncalibrated)"))
     print(f"  Tokens used by agents: ~{est_tokens:,}")
     print(f"  Tokens SAVED by blocks: ~{savings_tokens:,}")
     print(f"  Est. cost (agents): ~${est_cost:.2f}")
@@ -1396,6 +1513,33 @@ def report(json_output: bool = False) -> None:
             f"  Transcript found rate: {trans_rate} ({transcript_found}/{total_usage})"
         )
 
+    # Long-window history from the compressed audit archive (headers only)
+    try:
+        from audit_archive import summarize as summarize_archive
+    except ImportError:  # partial install: no archive section
+        archive = {"generations": 0}
+    else:
+        archive = summarize_archive(
+            archive_dir=os.path.join(STATE_DIR, "audit-archive")
+        )
+    if archive["generations"]:
+        arch_events = archive["events"]
+        print("\nArchived history:")
+        print(
+            f"  Generations: {archive['generations']} "
+            f"({archive['from_ts'][:10] or '?'} → {archive['to_ts'][:10] or '?'})"
+        )
+        print(f"  Records: {archive['records']:,}")
+        print(
+            f"  Allowed: {arch_events.get('allow', 0)}  "
+            f"Blocked: {arch_events.get('block', 0)}"
+        )
+        top_rules = Counter(archive["rules"]).most_common(5)
+        if top_rules:
+            print("  Top rules:")
+            for r, c in top_rules:
+                print(f"    {r}: {c}")
+
     # System health summary
     config = load_config()
     hook_files_count = 0
@@ -1451,8 +1595,17 @@ def report(json_output: bool = False) -> None:
             "top_block_reasons": dict(
                 Counter(entry_reason(e) or "?" for e in blocks).most_common(5)
             ),
-            "estimated_tokens_used": len(allows) * 50000,
-            "estimated_tokens_saved": len(blocks) * 50000,
+            "estimated_tokens_used": est_tokens,
+            "estimated_tokens_saved": savings_tokens,
+            "token_estimate": "calibrated" if calibrated else "heuristic",
+            "archive": {
+                "generations": archive["generations"],
+                "records": archive["records"],
+                "from_ts": archive["from_ts"],
+                "to_ts": archive["to_ts"],
+                "events": archive["events"],
+                "top_rules": dict(Counter(archive["rules"]).most_common(5)),
+            },
             "system_health": {
                 "config_version": config.get("schema_version", 0),
                 "failure_mode": config.get("failure_mode", "fail_open"),
@@ -1484,11 +1637,10 @@ def usage() -> None:
     timestamps = [e.get("ts", "") for e in entries if e.get("ts")]
     active_since = min(timestamps)[:10] if timestamps else "unknown"
 
-    # Estimated savings
-    EST_TOKENS_PER_AGENT = 50000
-    COST_PER_AGENT = 0.33  # ~$0.33 per agent at Sonnet rates
-    saved_tokens = len(blocks) * EST_TOKENS_PER_AGENT
-    saved_cost = len(blocks) * COST_PER_AGENT
+    # Estimated savings (calibrated per agent type where metrics exist)
+    save_in, save_out, _ = estimate_agent_tokens(blocks)
+    saved_tokens = save_in + save_out
+    saved_cost = agent_cost_usd(save_in, save_out)
 
     # Top block reasons
     reason_counts = Counter(entry_reason(e) or "?" for e in blocks).most_common(3)
@@ -1541,6 +1693,8 @@ if __name__ == "__main__":
             args.append("--json")
         if "--markdown" in sys.argv:
             args.append("--markdown")
+        import subprocess
+
         sys.exit(subprocess.run(args, check=False).returncode)
     else:
         main()
@@ -0,0 +1,308 @@
+"""
+Offline, locally-calibrated token estimation for Claude Code hooks.
+
+Code, JSON, prose and logs tokenize at very different chars-per-token ratios,
+so a single `chars // 4` is off by large factors. This module provides:
+
+  - classify(text): a bounded-sample heuristic (sub-millisecond) that labels
+    content as "code", "json", "prose" or "logs".
+  - estimate_tokens(chars, cls): chars / calibrated ratio for that class.
+  - agent_token_estimate(agent_type): mean real input/output tokens per agent.
+
+Calibration is learned by agent-metrics.py from the usage totals it already
+reads out of subagent transcripts (CalibrationObserver), and stored in
+session-state/token-calibration.json:
+
+    {"schema_version": 1,
+     "classes": {"code": {"chars": N, "tokens": M, "samples": k}, ...},
+     "agents":  {"Explore": {"input": I, "output": O, "runs": n}, "*": {...}},
+     "updated_at": "..."}
+
+Classes without enough observed tokens fall back to DEFAULT_CHARS_PER_TOKEN.
+"""
+
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from hook_utils import load_json_state, lock, save_json_state, unlock
+
+STATE_DIR = os.environ.get(
+    "TOKEN_GUARD_STATE_DIR",
+    os.path.expanduser("~/.claude/hooks/session-state"),
+)
+CALIBRATION_PATH = os.path.join(STATE_DIR, "token-calibration.json")
+
+CONTENT_CLASSES = ("code", "json", "prose", "logs")
+DEFAULT_CHARS_PER_TOKEN = {"code": 3.4, "json": 3.0, "prose": 4.0, "logs": 3.2}
+# Heuristic fallback for agents with no metrics yet (~70/30 input/output).
+DEFAULT_AGENT_TOKENS = (35000, 15000)
+
+CLASSIFY_SAMPLE_CHARS = 4096
+MIN_CALIBRATION_TOKENS = 2000  # per class, before its learned ratio is trusted
+MAX_CLASS_TOKENS = 2_000_000  # halve totals beyond this (exponential forgetting)
+MAX_AGENT_RUNS = 200
+MIN_OBSERVATION_CHARS = 200
+DOMINANT_CLASS_SHARE = 0.8
+_RATIO_BOUNDS = (1.0, 12.0)
+
+_LOG_LINE_RE = re.compile(
+    r"^\s*\[?(?:\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}|\d{2}:\d{2}:\d{2}"
+    r"|(?:TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b)"
+)
+_CODE_SYMBOLS = "{}()[];=<>"
+
+
+def classify(text: str, sample_chars: int = CLASSIFY_SAMPLE_CHARS) -> str:
+    """Classify text as code / json / prose / logs from a bounded sample."""
+    sample = text[:sample_chars]
+    stripped = sample.lstrip()
+    if not stripped:
+        return "prose"
+    if stripped[0] in "{[" and sample.count('":') >= 2:
+        return "json"
+    lines = [ln for ln in sample.splitlines()[:64] if ln.strip()]
+    if lines and sum(1 for ln in lines if _LOG_LINE_RE.match(ln)) * 3 >= len(lines):
+        return "logs"
+    symbols = sum(sample.count(c) for c in _CODE_SYMBOLS)
+    indented = sum(1 for ln in lines if ln.startswith(("  ", "\t")))
+    if symbols > len(sample) * 0.03 or (lines and indented * 2 >= len(lines)):
+        return "code"
+    return "prose"
+
+
+_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+
+def load_calibration(path: str = CALIBRATION_PATH) -> Dict:
+    """Calibration document (cached per process, invalidated on mtime/size)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _CACHE.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    doc = load_json_state(path)
+    if not isinstance(doc, dict):
+        doc = {}
+    _CACHE[path] = (key, doc)
+    return doc
+
+
+def chars_per_token(cls: str, calibration: Optional[Dict] = None) -> float:
+    """Calibrated chars-per-token for a content class (default if uncalibrated)."""
+    default = DEFAULT_CHARS_PER_TOKEN.get(cls, DEFAULT_CHARS_PER_TOKEN["prose"])
+    if calibration is None:
+        calibration = load_calibration()
+    entry = (calibration.get("classes") or {}).get(cls) or {}
+    tokens = entry.get("tokens", 0)
+    chars = entry.get("chars", 0)
+    if not isinstance(tokens, (int, float)) or tokens < MIN_CALIBRATION_TOKENS:
+        return default
+    if not isinstance(chars, (int, float)):
+        return default
+    ratio = chars / tokens
+    lo, hi = _RATIO_BOUNDS
+    return ratio if lo <= ratio <= hi else default
+
+
+def estimate_tokens(
+    chars: int, cls: str = "prose", calibration: Optional[Dict] = None
+) -> int:
+    """Estimated tokens for `chars` characters of content class `cls`."""
+    if chars <= 0:
+        return 0
+    return max(1, round(chars / chars_per_token(cls, calibration)))
+
+
+def estimate_text_tokens(text: str, calibration: Optional[Dict] = None) -> int:
+    """Classify then estimate — convenience for callers holding the text."""
+    return estimate_tokens(len(text), classify(text), calibration)
+
+
+def agent_token_estimate(
+    agent_type: Optional[str] = None, calibration: Optional[Dict] = None
+) -> Tuple[int, int]:
+    """Mean (input, output) tokens per agent run, by type then overall."""
+    if calibration is None:
+        calibration = load_calibration()
+    agents = calibration.get("agents") or {}
+    for key in (agent_type, "*"):
+        entry = agents.get(key) if key else None
+        if isinstance(entry, dict) and entry.get("runs", 0) > 0:
+            runs = entry["runs"]
+            return (
+                round(entry.get("input", 0) / runs),
+                round(entry.get("output", 0) / runs),
+            )
+    return DEFAULT_AGENT_TOKENS
+
+
+# ─── Learning from transcripts ───────────────────────────────────────────────
+
+
+def _content_chars(content) -> Counter:
+    """Characters per content class in a transcript message's content."""
+    out: Counter = Counter()
+    if isinstance(content, str):
+        out[classify(content)] += len(content)
+        return out
+    if not isinstance(content, list):
+        return out
+    for block in content:
+        if not isinstance(block, dict):
+            continue
+        btype = block.get("type")
+        if btype == "tool_result":
+            inner = block.get("content")
+            if isinstance(inner, str):
+                out[classify(inner)] += len(inner)
+            elif isinstance(inner, list):
+                for part in inner:
+                    if isinstance(part, dict) and isinstance(part.get("text"), str):
+                        out[classify(part["text"])] += len(part["text"])
+        elif btype == "text" and isinstance(block.get("text"), str):
+            out[classify(block["text"])] += len(block["text"])
+        elif btype == "thinking" and isinstance(block.get("thinking"), str):
+            out["prose"] += len(block["thinking"])
+        elif btype == "tool_use":
+            out["json"] += len(json.dumps(block.get("input", {})))
+    return out
+
+
+class CalibrationObserver:
+    """Collects (class, chars, tokens) observations from one transcript pass.
+
+    Output side: an assistant response's visible content vs its
+    output_tokens. Input side: user content (mostly tool results) appended
+    between two API calls vs the growth of the prompt (input + cache
+    tokens) minus the previous response. Only observations dominated by a
+    single class are kept.
+    Feed every transcript entry in order, then call close().
+    """
+
+    def __init__(self) -> None:
+        self.observations: List[Tuple[str, int, int]] = []
+        self._msg_id = None
+        self._msg_chars: Counter = Counter()
+        self._msg_usage: Dict = {}
+        self._prev_prompt: Optional[int] = None
+        self._prev_output = 0
+        self._pending: Counter = Counter()
+
+    def _observe(self, chars: Counter, tokens: int) -> None:
+        total = sum(chars.values())
+        if total < MIN_OBSERVATION_CHARS or tokens <= 0:
+            return
+        cls, n = chars.most_common(1)[0]
+        if n < total * DOMINANT_CLASS_SHARE:
+            return
+        lo, hi = _RATIO_BOUNDS
+        if lo <= total / tokens <= hi:
+            self.observations.append((cls, total, int(tokens)))
+
+    def _finish_message(self) -> None:
+        if self._msg_id is None:
+            return
+        usage = self._msg_usage
+        prompt = (
+            int(usage.get("input_tokens", 0) or 0)
+            + int(usage.get("cache_read_input_tokens", 0) or 0)
+            + int(usage.get("cache_creation_input_tokens", 0) or 0)
+        )
+        output = int(usage.get("output_tokens", 0) or 0)
+        if self._prev_prompt is not None and self._pending:
+            grown = prompt - self._prev_prompt - self._prev_output
+            self._observe(self._pending, grown)
+        self._observe(self._msg_chars, output)
+        self._prev_prompt, self._prev_output = prompt, output
+        self._pending = Counter()
+        self._msg_id = None
+        self._msg_chars = Counter()
+
+    def feed(self, entry: Dict) -> None:
+        msg = entry.get("message") if isinstance(entry, dict) else None
+        if not isinstance(msg, dict):
+            return
+        role = msg.get("role") or entry.get("type")
+        if role == "assistant" and isinstance(msg.get("usage"), dict):
+            # Streamed responses repeat one message id across several entries.
+            msg_id = msg.get("id") or id(msg)
+            if msg_id != self._msg_id:
+                self._finish_message()
+                self._msg_id = msg_id
+            self._msg_chars.update(_content_chars(msg.get("content")))
+            self._msg_usage = msg["usage"]
+        elif role == "user":
+            self._finish_message()
+            self._pending.update(_content_chars(msg.get("content")))
+
+    def close(self) -> List[Tuple[str, int, int]]:
+        self._finish_message()
+        return self.observations
+
+
+def update_calibration(
+    observations: List[Tuple[str, int, int]],
+    agent_type: str = "",
+    totals: Optional[Dict] = None,
+    path: str = CALIBRATION_PATH,
+) -> bool:
+    """Fold observations and one agent run's usage into the calibration file.
+
+    Read-modify-write under the file's .lock with an atomic replace.
+    Non-fatal — returns False on any error.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lf:
+            lock(lf)
+            try:
+                doc = load_json_state(path)
+                if not isinstance(doc.get("classes"), dict):
+                    doc = {"schema_version": 1, "classes": {}, "agents": {}}
+                classes = doc["classes"]
+                for cls, chars, tokens in observations:
+                    if cls not in CONTENT_CLASSES:
+                        continue
+                    entry = classes.setdefault(
+                        cls, {"chars": 0, "tokens": 0, "samples": 0}
+                    )
+                    entry["chars"] = int(entry.get("chars", 0)) + int(chars)
+                    entry["tokens"] = int(entry.get("tokens", 0)) + int(tokens)
+                    entry["samples"] = int(entry.get("samples", 0)) + 1
+                    if entry["tokens"] > MAX_CLASS_TOKENS:
+                        entry["chars"] //= 2
+                        entry["tokens"] //= 2
+                if totals and (
+                    totals.get("input_tokens") or totals.get("output_tokens")
+                ):
+                    agents = doc.setdefault("agents", {})
+                    keys = ["*"] + ([agent_type] if agent_type else [])
+                    for key in keys:
+                        entry = agents.setdefault(
+                            key, {"input": 0, "output": 0, "runs": 0}
+                        )
+                        entry["input"] = int(entry.get("input", 0)) + int(
+                            totals.get("input_tokens", 0)
+                        )
+                        entry["output"] = int(entry.get("output", 0)) + int(
+                            totals.get("output_tokens", 0)
+                        )
+                        entry["runs"] = int(entry.get("runs", 0)) + 1
+                        if entry["runs"] > MAX_AGENT_RUNS:
+                            for field in ("input", "output", "runs"):
+                                entry[field] //= 2
+                doc["updated_at"] = time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime()
+                )
+                return save_json_state(path, doc)
+            finally:
+                unlock(lf)
+    except OSError:
+        return False
@@ -20,6 +20,8 @@ jq -cn \
   --arg priority "$PRIORITY" \
   --arg content "$CONTENT" \
   '{ts:$ts,from:$from,priority:$priority,content:$content}' >> "$INBOX_FILE"
+# Bump the inbox generation so check-inbox.sh leaves its fast path
+touch "$INBOX_DIR/${TO}.gen"
 
 # Mark session as having messages
 if [ -f "$SESSION_FILE" ]; then
@@ -10,7 +10,7 @@ import { cfg } from "./constants.js";
 import {
   sanitizeId,
   writeFileSecure,
-  appendJSONLineSecure,
+  appendInboxMessageSecure,
 } from "./security.js";
 import { readJSON, text } from "./helpers.js";
 
@@ -73,7 +73,7 @@ export function handleApprovePlan(args) {
   // Try to deliver via worker's inbox directly
   const workerSid = findWorkerSessionId(taskId);
   if (workerSid) {
-    appendJSONLineSecure(join(INBOX_DIR, `${workerSid}.jsonl`), {
+    appendInboxMessageSecure(join(INBOX_DIR, `${workerSid}.jsonl`), {
       ts: new Date().toISOString(),
       from: "lead",
       priority: "urgent",
@@ -122,7 +122,7 @@ export function handleRejectPlan(args) {
 
   const workerSid = findWorkerSessionId(taskId);
   if (workerSid) {
-    appendJSONLineSecure(join(INBOX_DIR, `${workerSid}.jsonl`), {
+    appendInboxMessageSecure(join(INBOX_DIR, `${workerSid}.jsonl`), {
       ts: new Date().toISOString(),
       from: "lead",
       priority: "urgent",
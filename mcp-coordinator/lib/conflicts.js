@@ -10,7 +10,7 @@ import {
   normalizeFilePath,
   appendJSONLineSecure,
 } from "./security.js";
-import { readJSONL, text } from "./helpers.js";
+import { readActivity, text } from "./helpers.js";
 import { getAllSessions, getSessionStatus } from "./sessions.js";
 
 /**
@@ -20,7 +20,6 @@ import { getAllSessions, getSessionStatus } from "./sessions.js";
  * @returns {object} MCP text response
  */
 export function handleDetectConflicts(args) {
-  const { ACTIVITY_FILE } = cfg();
   const session_id = sanitizeShortSessionId(args.session_id);
   const files = (args.files || []).map((f) => String(f).trim()).filter(Boolean);
   if (!files?.length) return text("No files specified.");
@@ -39,9 +38,9 @@ export function handleDetectConflicts(args) {
   const sessions = allSessions.filter(
     (s) => s.session !== session_id && getSessionStatus(s) !== "closed",
   );
-  const recentActivity = readJSONL(ACTIVITY_FILE).slice(-100);
   const liveWindowMs = 15000;
   const liveCutoff = Date.now() - liveWindowMs;
+  const recentActivity = readActivity({ limit: 100, sinceMs: liveCutoff });
   const liveFilesBySession = new Map();
   for (const entry of recentActivity) {
     if (!["Read", "Edit", "Write"].includes(entry.tool)) continue;
@@ -34,6 +34,8 @@ export function cfg() {
     INBOX_DIR: join(terminalsDir, "inbox"),
     RESULTS_DIR: join(terminalsDir, "results"),
     ACTIVITY_FILE: join(terminalsDir, "activity.jsonl"),
+    ACTIVITY_DIR: join(terminalsDir, "activity"),
+    SESSION_ARCHIVE_DIR: join(terminalsDir, "archive"),
     QUEUE_FILE: join(terminalsDir, "queue.jsonl"),
     SESSION_CACHE_DIR: join(claudeDir, "session-cache"),
     SETTINGS_FILE: join(claudeDir, "settings.local.json"),
@@ -3,8 +3,16 @@
  * @module helpers
  */
 
-import { readFileSync, existsSync } from "fs";
-import { basename } from "path";
+import {
+  readFileSync,
+  existsSync,
+  readdirSync,
+  statSync,
+  openSync,
+  readSync,
+  closeSync,
+} from "fs";
+import { basename, join } from "path";
 import { cfg } from "./constants.js";
 
 /**
@@ -104,6 +112,71 @@ export function readJSONL(path) {
   }
 }
 
+/**
+ * Read the last `maxLines` records of a JSONL file, reading at most
+ * `maxBytes` from the end of the file.
+ * @param {string} path - File path
+ * @param {number} maxLines - Maximum records to return
+ * @param {number} [maxBytes] - Maximum bytes to read from EOF
+ * @returns {object[]} Parsed items, oldest first
+ */
+export function readJSONLTail(path, maxLines, maxBytes = 512 * 1024) {
+  let fd;
+  try {
+    if (!existsSync(path)) return [];
+    fd = openSync(path, "r");
+    const { size } = statSync(path);
+    const length = Math.min(size, maxBytes);
+    const buf = Buffer.alloc(length);
+    readSync(fd, buf, 0, length, size - length);
+    let lines = buf.toString("utf-8").split("\n");
+    if (length < size) lines = lines.slice(1); // drop the partial first line
+    return lines
+      .filter(Boolean)
+      .slice(-maxLines)
+      .map((line) => {
+        try {
+          return JSON.parse(line);
+        } catch {
+          return null;
+        }
+      })
+      .filter(Boolean);
+  } catch {
+    return [];
+  } finally {
+    if (fd !== undefined) closeSync(fd);
+  }
+}
+
+/**
+ * Read recent activity records: per-session shards written by the
+ * heartbeat (`terminals/activity/{sid8}.jsonl`) merged with the legacy
+ * `terminals/activity.jsonl`, sorted by `ts`.
+ * @param {object} [opts]
+ * @param {number} [opts.limit=200] - Newest records to return
+ * @param {number} [opts.sinceMs] - Skip shards not modified since this epoch ms
+ * @returns {object[]} Records, oldest first
+ */
+export function readActivity({ limit = 200, sinceMs = 0 } = {}) {
+  const { ACTIVITY_DIR, ACTIVITY_FILE } = cfg();
+  const paths = [];
+  try {
+    for (const name of readdirSync(ACTIVITY_DIR)) {
+      if (!name.endsWith(".jsonl")) continue;
+      const p = join(ACTIVITY_DIR, name);
+      if (sinceMs && statSync(p).mtimeMs < sinceMs) continue;
+      paths.push(p);
+    }
+  } catch {
+    // no shard directory yet
+  }
+  paths.push(ACTIVITY_FILE);
+  const records = paths.flatMap((p) => readJSONLTail(p, limit));
+  records.sort((a, b) => String(a.ts || "").localeCompare(String(b.ts || "")));
+  return records.slice(-limit);
+}
+
 /**
  * Format an MCP text response.
  * @param {string} content - Response text
@@ -18,7 +18,7 @@ import { cfg } from "./constants.js";
 import {
   sanitizeShortSessionId,
   writeFileSecure,
-  appendJSONLineSecure,
+  appendInboxMessageSecure,
   assertMessageBudget,
   enforceMessageRateLimit,
 } from "./security.js";
@@ -522,7 +522,7 @@ export function handleSendMessage(args) {
     content,
   };
   if (summary) msg.summary = summary;
-  appendJSONLineSecure(inboxFile, msg);
+  appendInboxMessageSecure(inboxFile, msg);
 
   // Mark session as having messages
   const sessionFile = join(TERMINALS_DIR, `session-${to}.json`);
@@ -655,7 +655,7 @@ export function handleBroadcast(args) {
     const inboxFile = join(INBOX_DIR, `${sid}.jsonl`);
     try {
       enforceMessageRateLimit(sid);
-      appendJSONLineSecure(inboxFile, msg);
+      appendInboxMessageSecure(inboxFile, msg);
       sent++;
       // Tmux push delivery to each pane (Gap 1)
       if (isInsideTmux()) {
@@ -747,7 +747,7 @@ export function handleSendDirective(args) {
     );
   }
   enforceMessageRateLimit(to);
-  appendJSONLineSecure(inboxFile, {
+  appendInboxMessageSecure(inboxFile, {
     ts: new Date().toISOString(),
     from,
     priority,
@@ -884,7 +884,7 @@ export function handleSendProtocol(args) {
     );
   }
   enforceMessageRateLimit(to);
-  appendJSONLineSecure(inboxFile, {
+  appendInboxMessageSecure(inboxFile, {
     ts: new Date().toISOString(),
     from,
     priority: "urgent",
@@ -584,7 +584,7 @@ export function buildInteractiveWorkerScript(opts) {
   // and surfaced by check-inbox.sh on the next tool call.
   if (leadSessionId) {
     completionCmds.push(
-      `printf '{"ts":"%s","from":"coordinator","priority":"normal","content":"[COMPLETED] ${workerDisplay}"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true`,
+      `printf '{"ts":"%s","from":"coordinator","priority":"normal","content":"[COMPLETED] ${workerDisplay}"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true; touch "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.gen" 2>/dev/null || true`,
     );
   }
 
@@ -626,7 +626,7 @@ export function buildInteractiveWorkerScript(opts) {
       `[ ! -f "$SF" ] && continue`,
       `AGE=$(( $(date +%s) - $(stat -f %m "$SF" 2>/dev/null || stat -c %Y "$SF" 2>/dev/null || echo $(date +%s)) ))`,
       `if [ "$AGE" -gt 30 ] && [ "$IDLE_SENT" = false ]`,
-      `then printf '{"ts":"%s","from":"idle-detector","priority":"normal","content":"[IDLE] ${workerDisplay} — no activity for '\''\${AGE}'\''s"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true`,
+      `then printf '{"ts":"%s","from":"idle-detector","priority":"normal","content":"[IDLE] ${workerDisplay} — no activity for '\''\${AGE}'\''s"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true; touch "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.gen" 2>/dev/null || true`,
       `IDLE_SENT=true`,
       `elif [ "$AGE" -le 30 ]`,
       `then IDLE_SENT=false`,
@@ -729,7 +729,7 @@ export function buildResumeWorkerScript(opts) {
   // terminal, causing Claude to treat it as a user message. Inbox-only delivery below.
   if (leadSessionId) {
     trapParts.push(
-      `printf '{"ts":"%s","from":"coordinator","priority":"normal","content":"[COMPLETED] ${workerName} (resumed)"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true`,
+      `printf '{"ts":"%s","from":"coordinator","priority":"normal","content":"[COMPLETED] ${workerName} (resumed)"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true; touch "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.gen" 2>/dev/null || true`,
     );
   }
   trapParts.push(autoClaimShellCommand());
@@ -750,7 +750,7 @@ export function buildResumeWorkerScript(opts) {
       `[ ! -f "$SF" ] && continue`,
       `AGE=$(( $(date +%s) - $(stat -f %m "$SF" 2>/dev/null || stat -c %Y "$SF" 2>/dev/null || echo $(date +%s)) ))`,
       `if [ "$AGE" -gt 30 ] && [ "$IDLE_SENT" = false ]`,
-      `then printf '{"ts":"%s","from":"idle-detector","priority":"normal","content":"[IDLE] ${workerName} (resumed) — no activity for '\''\${AGE}'\''s"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true`,
+      `then printf '{"ts":"%s","from":"idle-detector","priority":"normal","content":"[IDLE] ${workerName} (resumed) — no activity for '\''\${AGE}'\''s"}\\n' "$(date -u +%Y-%m-%dT%H:%M:%SZ)" >> "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.jsonl" 2>/dev/null || true; touch "$HOME/.claude/terminals/inbox/$CLAUDE_LEAD_SESSION_ID.gen" 2>/dev/null || true`,
       `IDLE_SENT=true`,
       `elif [ "$AGE" -le 30 ]`,
       `then IDLE_SENT=false`,
@@ -12,7 +12,7 @@ import {
   assertMessageBudget,
   enforceMessageRateLimit,
   writeFileSecure,
-  appendJSONLineSecure,
+  appendInboxMessageSecure,
 } from "../security.js";
 import { readJSON, text } from "../helpers.js";
 import { getTerminalApp, isSafeTTYPath } from "./common.js";
@@ -156,7 +156,7 @@ export function handleWakeSession(args) {
   // Non-macOS fallback
   if (PLATFORM !== "darwin") {
     const inboxFile = join(INBOX_DIR, `${session_id}.jsonl`);
-    appendJSONLineSecure(inboxFile, {
+    appendInboxMessageSecure(inboxFile, {
       ts: new Date().toISOString(),
       from: "lead",
       priority: "urgent",
@@ -263,7 +263,7 @@ return found`.trim();
 
     // Fallback to inbox
     const inboxFile = join(INBOX_DIR, `${session_id}.jsonl`);
-    appendJSONLineSecure(inboxFile, {
+    appendInboxMessageSecure(inboxFile, {
       ts: new Date().toISOString(),
       from: "lead",
       priority: "urgent",
@@ -274,7 +274,7 @@ return found`.trim();
     );
   } catch (err) {
     const inboxFile = join(INBOX_DIR, `${session_id}.jsonl`);
-    appendJSONLineSecure(inboxFile, {
+    appendInboxMessageSecure(inboxFile, {
       ts: new Date().toISOString(),
       from: "lead",
       priority: "urgent",
@@ -115,6 +115,32 @@ export function appendJSONLineSecure(pathValue, value) {
   }
 }
 
+/**
+ * Append a message to a session inbox and bump the inbox generation.
+ * check-inbox.sh skips its full pass while `<session>.gen` is not newer than
+ * the session's last pass, so inbox writers go through this helper.
+ * @param {string} inboxFile - Path to `<INBOX_DIR>/<session>.jsonl`
+ * @param {*} value - Message record to serialize
+ */
+export function appendInboxMessageSecure(inboxFile, value) {
+  appendJSONLineSecure(inboxFile, value);
+  bumpInboxGeneration(inboxFile);
+}
+
+/**
+ * Bump the generation file next to a session inbox (`<session>.gen`).
+ * Only its mtime is significant; the content is the bump time for debugging.
+ * @param {string} inboxFile - Path to `<INBOX_DIR>/<session>.jsonl`
+ */
+export function bumpInboxGeneration(inboxFile) {
+  const genFile = inboxFile.replace(/\.jsonl$/, "") + ".gen";
+  try {
+    writeFileSync(genFile, `${Date.now()}\n`, { mode: 0o600 });
+  } catch (e) {
+    process.stderr.write(`[lead-coord:io] inbox generation: ${e?.message || e}\n`);
+  }
+}
+
 /**
  * Enforce Windows ACL: strip inherited/broad ACEs, grant only current user.
  * @param {string} pathValue - Path to harden
@@ -180,7 +180,12 @@ function buildHealthPayload(args = {}) {
     generated_at: new Date().toISOString(),
     policy: {
       transcript_reads_on_boot: "forbidden",
-      boot_sources: ["session-*.json", "activity.jsonl", "git status"],
+      boot_sources: [
+        "session-*.json",
+        "activity/*.jsonl",
+        "activity.jsonl",
+        "git status",
+      ],
     },
     raw: {
       total_sessions: rawFiltered.length,
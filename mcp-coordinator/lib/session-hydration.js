@@ -7,10 +7,8 @@
  * @module session-hydration
  */
 
-import { existsSync } from "fs";
 import { basename } from "path";
-import { cfg } from "./constants.js";
-import { readJSONL } from "./helpers.js";
+import { readActivity } from "./helpers.js";
 import { writeFileSecure } from "./security.js";
 
 const SESSION_SCHEMA_MIN = 2;
@@ -92,15 +90,14 @@ function ensureBaseline(session) {
 }
 
 /**
- * Build replay index from `activity.jsonl`, keyed by short session id.
+ * Build replay index from the activity shards and legacy `activity.jsonl`,
+ * keyed by short session id.
  * @returns {Map<string, object>}
  */
 export function buildActivityReplayIndex() {
-  const { ACTIVITY_FILE } = cfg();
   const index = new Map();
-  if (!existsSync(ACTIVITY_FILE)) return index;
 
-  for (const entry of readJSONL(ACTIVITY_FILE)) {
+  for (const entry of readActivity({ limit: Number.MAX_SAFE_INTEGER })) {
     const sid = String(entry?.session || "").slice(0, 8);
     if (!sid) continue;
 
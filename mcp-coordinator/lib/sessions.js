@@ -46,22 +46,34 @@ function buildSessionColorMap() {
   return map;
 }
 
-/**
- * Get all sessions from disk.
- * @returns {object[]} Session objects
- */
-export function getAllSessions() {
-  const { TERMINALS_DIR } = cfg();
+function readSessionDir(dir) {
   try {
-    return readdirSync(TERMINALS_DIR)
+    return readdirSync(dir)
       .filter((f) => f.startsWith("session-") && f.endsWith(".json"))
-      .map((f) => readJSON(join(TERMINALS_DIR, f)))
+      .map((f) => readJSON(join(dir, f)))
       .filter(Boolean);
   } catch {
     return [];
   }
 }
 
+/**
+ * Get all sessions from disk.
+ * Closed sessions are moved to SESSION_ARCHIVE_DIR by the heartbeat's
+ * registry sweep (hooks/session_registry.py); pass includeArchived to read them too.
+ * @param {{ includeArchived?: boolean }} [opts]
+ * @returns {object[]} Session objects
+ */
+export function getAllSessions({ includeArchived = false } = {}) {
+  const { TERMINALS_DIR, SESSION_ARCHIVE_DIR } = cfg();
+  const sessions = readSessionDir(TERMINALS_DIR);
+  if (!includeArchived) return sessions;
+  const live = new Set(sessions.map((s) => s.session));
+  return sessions.concat(
+    readSessionDir(SESSION_ARCHIVE_DIR).filter((s) => !live.has(s.session)),
+  );
+}
+
 /**
  * Determine the effective status of a session.
  * @param {object} session - Session data
@@ -84,8 +96,8 @@ export function getSessionStatus(session) {
  * @returns {object} MCP text response
  */
 export function handleListSessions(args = {}) {
-  const sessions = getAllSessions();
   const includeClosed = args?.include_closed ?? false;
+  const sessions = getAllSessions({ includeArchived: includeClosed });
   const projectFilter = args?.project;
 
   let filtered = sessions;
@@ -10,7 +10,7 @@ import { cfg } from "./constants.js";
 import {
   sanitizeId,
   sanitizeShortSessionId,
-  appendJSONLineSecure,
+  appendInboxMessageSecure,
   writeFileSecure,
 } from "./security.js";
 import { readJSON, text } from "./helpers.js";
@@ -75,7 +75,7 @@ export function handleShutdownRequest(args) {
   const requestId = `shutdown-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
 
   // Write shutdown request to worker's inbox
-  appendJSONLineSecure(join(INBOX_DIR, `${targetSid}.jsonl`), {
+  appendInboxMessageSecure(join(INBOX_DIR, `${targetSid}.jsonl`), {
     ts: new Date().toISOString(),
     from: "lead",
     priority: "urgent",
@@ -165,7 +165,7 @@ export function handleShutdownResponse(args) {
       const metaFile = join(RESULTS_DIR, `${tracking.task_id}.meta.json`);
       const meta = readJSON(metaFile);
       if (meta?.notify_session_id) {
-        appendJSONLineSecure(
+        appendInboxMessageSecure(
           join(INBOX_DIR, `${meta.notify_session_id}.jsonl`),
           {
             ts: new Date().toISOString(),
@@ -191,7 +191,7 @@ export function handleShutdownResponse(args) {
       const metaFile = join(RESULTS_DIR, `${tracking.task_id}.meta.json`);
       const meta = readJSON(metaFile);
       if (meta?.notify_session_id) {
-        appendJSONLineSecure(
+        appendInboxMessageSecure(
           join(INBOX_DIR, `${meta.notify_session_id}.jsonl`),
           {
             ts: new Date().toISOString(),
@@ -17,7 +17,7 @@ import {
   sanitizeId,
   sanitizeName,
   writeFileSecure,
-  appendJSONLineSecure,
+  appendInboxMessageSecure,
   ensureSecureDirectory,
   acquireExclusiveFileLock,
 } from "./security.js";
@@ -255,7 +255,7 @@ function autoUnblockDependents(completedTaskId, dir) {
       if (t.assignee) {
         const sid = resolveWorkerName(t.assignee);
         if (sid) {
-          appendJSONLineSecure(join(INBOX_DIR, `${sid}.jsonl`), msg);
+          appendInboxMessageSecure(join(INBOX_DIR, `${sid}.jsonl`), msg);
         }
       }
       // Also broadcast to any lead sessions so they can auto-dispatch
@@ -265,7 +265,7 @@ function autoUnblockDependents(completedTaskId, dir) {
         );
         for (const f of files) {
           try {
-            appendJSONLineSecure(join(INBOX_DIR, f), msg);
+            appendInboxMessageSecure(join(INBOX_DIR, f), msg);
           } catch (e) {
             process.stderr.write(`[lead-coord:io] inbox broadcast: ${e?.message || e}\n`);
           }
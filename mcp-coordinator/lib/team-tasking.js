@@ -6,7 +6,7 @@
 import { existsSync, readdirSync } from "fs";
 import { join } from "path";
 import { cfg } from "./constants.js";
-import { readJSON, readJSONL, text } from "./helpers.js";
+import { readActivity, readJSON, text } from "./helpers.js";
 import {
   sanitizeId,
   sanitizeName,
@@ -239,7 +239,7 @@ export function buildTeamOperationalSnapshot(teamNameRaw) {
   const { team } = mapped;
   const allTasks = getTeamTasks(teamName);
   const workers = activeWorkerMetas().filter((w) => w.team_name === teamName);
-  const activity = readJSONL(cfg().ACTIVITY_FILE).slice(-200);
+  const activity = readActivity({ limit: 200 });
   const memberByTaskId = new Map(
     (team.members || [])
       .filter((m) => m.task_id)
@@ -230,3 +230,40 @@ test('detect_conflicts rejects empty files array', async () => {
     restore();
   }
 });
+
+test('detect_conflicts reads live activity from per-session shards', async () => {
+  const { home, terminals } = setupHome();
+  const now = new Date().toISOString();
+  writeFileSync(join(terminals, 'session-abcd1234.json'), JSON.stringify({
+    session: 'abcd1234', status: 'active', project: 'demo', cwd: '/tmp/project',
+    last_active: now,
+  }));
+  writeFileSync(join(terminals, 'session-efgh5678.json'), JSON.stringify({
+    session: 'efgh5678', status: 'active', project: 'demo', cwd: '/tmp/project',
+    last_active: now,
+    files_touched: ['/tmp/project/src/shared.ts'],
+  }));
+  writeFileSync(join(terminals, 'activity.jsonl'), '');
+  mkdirSync(join(terminals, 'activity'), { recursive: true });
+  writeFileSync(join(terminals, 'activity', 'efgh5678.jsonl'), `${JSON.stringify({
+    ts: now,
+    session: 'efgh5678',
+    tool: 'Write',
+    file: 'auth.integration.test.ts',
+    path: '/tmp/project/tests/auth.integration.test.ts',
+    project: 'demo',
+  })}\n`);
+
+  const { api, restore } = await loadForTest(home);
+  try {
+    api.ensureDirsOnce();
+    const result = api.handleToolCall('coord_detect_conflicts', {
+      session_id: 'abcd1234',
+      files: ['/tmp/project/src/shared.ts'],
+    });
+    const text = result?.content?.[0]?.text || '';
+    assert.match(text, /No conflicts detected/);
+  } finally {
+    restore();
+  }
+});
@@ -786,3 +786,17 @@ test('handleGetSession renders full session details', async () => {
     restore();
   }
 });
+
+test('appendInboxMessageSecure appends and bumps the inbox generation', async () => {
+  const { terminals } = setupHome();
+  const { appendInboxMessageSecure } = await import('../lib/security.js');
+  const inboxFile = join(terminals, 'inbox', 'abcd1234.jsonl');
+  appendInboxMessageSecure(inboxFile, { content: 'hi' });
+  assert.equal(JSON.parse(readFileSync(inboxFile, 'utf-8')).content, 'hi');
+  const genFile = join(terminals, 'inbox', 'abcd1234.gen');
+  assert.ok(existsSync(genFile));
+  const before = statSync(genFile).mtimeMs;
+  await new Promise((r) => setTimeout(r, 20));
+  appendInboxMessageSecure(inboxFile, { content: 'again' });
+  assert.ok(statSync(genFile).mtimeMs > before);
+});
@@ -92,6 +92,28 @@ test('list_sessions excludes closed by default', async () => {
   }
 });
 
+test('list_sessions include_closed reads archived sessions', async () => {
+  const { home, terminals } = setupHome();
+  const archive = join(terminals, 'archive');
+  mkdirSync(archive, { recursive: true });
+  writeFileSync(join(archive, 'session-arch1234.json'), JSON.stringify({
+    session: 'arch1234', status: 'closed', project: 'old', cwd: '/tmp',
+    last_active: new Date().toISOString(),
+  }));
+
+  const { api, restore } = await loadForTest(home);
+  try {
+    api.ensureDirsOnce();
+    const noResult = api.handleToolCall('coord_list_sessions', {});
+    assert.match(noResult?.content?.[0]?.text || '', /No active sessions/);
+
+    const withClosed = api.handleToolCall('coord_list_sessions', { include_closed: true });
+    assert.match(withClosed?.content?.[0]?.text || '', /arch1234/);
+  } finally {
+    restore();
+  }
+});
+
 test('get_session returns detailed session info', async () => {
   const { home, terminals, inbox } = setupHome();
   writeFileSync(join(terminals, 'session-abcd1234.json'), JSON.stringify({
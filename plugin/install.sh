@@ -44,6 +44,7 @@ echo "  Installing hooks..."
 cp "$PLUGIN_DIR/hooks/token-guard.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/read-efficiency-guard.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/hook_utils.py" "$CLAUDE_DIR/hooks/"
+cp "$PLUGIN_DIR/hooks/config_snapshot.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/guard_normalize.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/guard_contracts.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/guard_events.py" "$CLAUDE_DIR/hooks/"
@@ -55,6 +56,7 @@ cp "$PLUGIN_DIR/hooks/ops_aggregator.py" "$CLAUDE_DIR/hooks/" 2>/dev/null || tru
 cp "$PLUGIN_DIR/hooks/self-heal.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/agent-metrics.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/agent-lifecycle.sh" "$CLAUDE_DIR/hooks/"
+cp "$PLUGIN_DIR/hooks/agent_lifecycle.py" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/pre-compact-save.sh" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/session-register.sh" "$CLAUDE_DIR/hooks/"
 cp "$PLUGIN_DIR/hooks/health-check.sh" "$CLAUDE_DIR/hooks/"
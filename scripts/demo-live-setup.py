@@ -22,6 +22,10 @@ import subprocess
 import sys
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks"))
+
+import session_registry  # noqa: E402
+
 TERMINALS = os.path.expanduser("~/.claude/terminals")
 BACKUP = "/tmp/claude-demo-session-backup"
 PID_FILE = "/tmp/claude-demo-refresher.pid"
@@ -42,14 +46,25 @@ for f in existing:
 print(f"✓  Backed up {len(existing)} session files → {BACKUP}")
 
 # ── 2. Mark all existing sessions as closed ───────────────────────────────────
+# Only sessions the registry lists as open need rewriting; closed ones stay put.
+if os.path.exists(session_registry.index_path(TERMINALS)):
+    open_sids = set(session_registry.active_sessions(TERMINALS))
+else:
+    open_sids = set(session_registry.rebuild(TERMINALS))
 closed_count = 0
 for f in existing:
+    sid8 = os.path.basename(f)[len("session-") : -len(".json")]
+    if sid8 not in open_sids:
+        continue
     try:
         with open(f) as fh:
             d = json.load(fh)
+        if d.get("status") == "closed":
+            continue
         d["status"] = "closed"
         with open(f, "w") as fh:
             json.dump(d, fh, indent=2)
+        session_registry.record(TERMINALS, d)
         closed_count += 1
     except Exception:
         pass
@@ -146,6 +161,10 @@ refresher_code = f"""
 import json, time
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks"))
+
+import session_registry  # noqa: E402
+
 files = {json.dumps(demo_paths)}
 
 def now():
@@ -8,6 +8,11 @@ import os
 import glob
 import shutil
 import signal
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks"))
+
+import session_registry  # noqa: E402
 
 TERMINALS = os.path.expanduser("~/.claude/terminals")
 BACKUP = "/tmp/claude-demo-session-backup"
@@ -43,6 +48,7 @@ for f in glob.glob(f"{BACKUP}/session-*.json"):
     shutil.copy2(f, dest)
     restored += 1
 print(f"✓  Restored {restored} session files from backup")
+session_registry.rebuild(TERMINALS)
 
 print()
 print("✅  Teardown complete — real sessions restored")
@@ -16,6 +16,7 @@ export function sidecarPaths() {
     resultsDir: join(terminalsDir, "results"),
     inboxDir: join(terminalsDir, "inbox"),
     activityFile: join(terminalsDir, "activity.jsonl"),
+    activityDir: join(terminalsDir, "activity"),
     root,
     runtimeDir: join(root, "runtime"),
     nativeRuntimeDir: join(root, "runtime", "native"),
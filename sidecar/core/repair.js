@@ -183,7 +183,13 @@ export function scanForCorruption(paths) {
   }
 
   // Check JSONL files
-  const jsonlFiles = [paths.logFile, paths.activityFile];
+  const jsonlFiles = [
+    paths.logFile,
+    paths.activityFile,
+    ...listDir(paths.activityDir)
+      .filter((f) => f.endsWith(".jsonl"))
+      .map((f) => join(paths.activityDir, f)),
+  ];
   for (const f of jsonlFiles) {
     if (!existsSync(f)) continue;
     checked++;
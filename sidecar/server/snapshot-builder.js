@@ -22,6 +22,25 @@ function listTeamNames(paths) {
   }
 }
 
+// The heartbeat appends to per-session shards (activity/{sid8}.jsonl); older
+// installs still write the single activity.jsonl. Read both, newest last.
+function readHookActivity(paths, limit = 200) {
+  const files = [];
+  try {
+    for (const name of readdirSync(paths.activityDir)) {
+      if (name.endsWith(".jsonl")) files.push(join(paths.activityDir, name));
+    }
+  } catch {
+    // no shard directory yet
+  }
+  files.push(paths.activityFile);
+  const records = files.flatMap((f) => readJSONL(f).slice(-limit));
+  records.sort((a, b) =>
+    String(a.ts || a.t || "").localeCompare(String(b.ts || b.t || "")),
+  );
+  return records.slice(-limit);
+}
+
 function matchIdentity(identityRecords, member, teamName) {
   const teamScoped = identityRecords.filter(
     (r) => !r.team_name || r.team_name === teamName,
@@ -129,9 +148,10 @@ export function buildSidecarSnapshot() {
     }
   }
 
-  const activity = readJSONL(paths.activityFile)
-    .slice(-200)
-    .map((e) => ({ ...e, source: "hooks" }));
+  const activity = readHookActivity(paths).map((e) => ({
+    ...e,
+    source: "hooks",
+  }));
   timeline.push(...activity);
   timeline.sort((a, b) =>
     String(a.ts || a.t || "").localeCompare(String(b.ts || b.t || "")),
@@ -48,3 +48,27 @@ test('snapshot builder emits normalized teams/teammates/tasks', async () => {
     else process.env.HOME = prevHome;
   }
 });
+
+test('snapshot builder reads hook activity from per-session shards', async () => {
+  const prevHome = process.env.HOME;
+  const home = setupHome();
+  const shards = join(home, '.claude', 'terminals', 'activity');
+  mkdirSync(shards, { recursive: true });
+  writeFileSync(join(shards, 'abcd1234.jsonl'), [
+    JSON.stringify({ ts: '2026-01-01T00:00:02Z', session: 'abcd1234', tool: 'Edit', file: 'a.ts' }),
+    JSON.stringify({ ts: '2026-01-01T00:00:04Z', session: 'abcd1234', tool: 'Read', file: 'b.ts' }),
+  ].join('\n') + '\n');
+  writeFileSync(join(shards, 'ef567890.jsonl'),
+    JSON.stringify({ ts: '2026-01-01T00:00:03Z', session: 'ef567890', tool: 'Bash', file: 'npm test' }) + '\n');
+  process.env.HOME = home;
+  try {
+    const mod = await import(`../server/snapshot-builder.js?t=${Date.now()}-${Math.random()}`);
+    const snap = mod.buildSidecarSnapshot();
+    const hooks = snap.timeline.filter((e) => e.source === 'hooks');
+    assert.deepEqual(hooks.map((e) => e.tool), ['Edit', 'Bash', 'Read']);
+    assert.deepEqual(hooks.map((e) => e.session), ['abcd1234', 'ef567890', 'abcd1234']);
+  } finally {
+    if (prevHome === undefined) delete process.env.HOME;
+    else process.env.HOME = prevHome;
+  }
+});
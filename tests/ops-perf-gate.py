@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Regression gate for the Python ops layer (bench/ops-benchmark.py).
+
+Runs the ops benchmark and fails (exit 1) when a scenario's p95 exceeds its
+absolute ceiling, or regresses past OPS_PERF_MAX_REGRESSION x the p95 of the
+same scenario/size in the baseline snapshot (bench/latest-results.json
+"ops_benchmark", when present).
+
+Env:
+  OPS_PERF_SCALES          dataset sizes to run (default "10k,100k")
+  OPS_PERF_RUNS            runs per scenario (default 3)
+  OPS_PERF_MAX_P95_MS      ceiling for ops scenarios, ms per 10k records
+                           (default 1500; scaled linearly, floor 1500)
+  OPS_PERF_MAX_HEALTH_MS   ceiling for hook_health at any size (default 500)
+  OPS_PERF_MAX_REGRESSION  allowed p95 ratio vs baseline (default 1.5)
+  OPS_PERF_SLACK_MS        absolute slack added to the baseline bound (default 100)
+  OPS_PERF_BASELINE        baseline JSON path, or "none" to skip comparison
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(REPO_ROOT, "bench", "ops-benchmark.py")
+
+SCALES = os.environ.get("OPS_PERF_SCALES", "10k,100k")
+RUNS = max(1, int(os.environ.get("OPS_PERF_RUNS", "3")))
+MAX_P95_MS_PER_10K = float(os.environ.get("OPS_PERF_MAX_P95_MS", "1500"))
+MAX_HEALTH_MS = float(os.environ.get("OPS_PERF_MAX_HEALTH_MS", "500"))
+MAX_REGRESSION = float(os.environ.get("OPS_PERF_MAX_REGRESSION", "1.5"))
+SLACK_MS = float(os.environ.get("OPS_PERF_SLACK_MS", "100"))
+BASELINE = os.environ.get(
+    "OPS_PERF_BASELINE", os.path.join(REPO_ROOT, "bench", "latest-results.json")
+)
+
+
+def ceiling_ms(scenario, records):
+    if scenario == "hook_health":
+        return MAX_HEALTH_MS
+    return max(MAX_P95_MS_PER_10K, MAX_P95_MS_PER_10K * records / 10000)
+
+
+def load_baseline(path):
+    if not path or path == "none":
+        return {}
+    try:
+        with open(path) as f:
+            return (json.load(f).get("ops_benchmark") or {}).get("scenarios") or {}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def evaluate(bench, baseline):
+    """List of failure strings for a benchmark result."""
+    failures = []
+    for scenario, sizes in bench.get("scenarios", {}).items():
+        for size, stats in sizes.items():
+            p95 = float(stats["p95_ms"])
+            records = bench.get("scales", {}).get(size, 10000)
+            limit = ceiling_ms(scenario, records)
+            if p95 > limit:
+                failures.append(f"{scenario}.{size}.p95_ms {p95:.1f} > {limit:.0f}")
+            base = (baseline.get(scenario) or {}).get(size)
+            if base and base.get("p95_ms"):
+                bound = float(base["p95_ms"]) * MAX_REGRESSION + SLACK_MS
+                if p95 > bound:
+                    failures.append(
+                        f"{scenario}.{size}.p95_ms {p95:.1f} > {bound:.1f} "
+                        f"(baseline {float(base['p95_ms']):.1f} x {MAX_REGRESSION})"
+                    )
+    return failures
+
+
+def main():
+    raw = subprocess.check_output(
+        [sys.executable, BENCH, "--scales", SCALES, "--runs", str(RUNS)], text=True
+    )
+    bench = json.loads(raw)
+    failures = evaluate(bench, load_baseline(BASELINE))
+    for scenario, sizes in bench["scenarios"].items():
+        for size, stats in sizes.items():
+            print(f"  {scenario:<20} {size:<10} p95={stats['p95_ms']:.1f}ms")
+    if failures:
+        print("Ops performance gate failed:", file=sys.stderr)
+        for f in failures:
+            print(f"- {f}", file=sys.stderr)
+        sys.exit(1)
+    print("Ops performance gate passed.")
+
+
+if __name__ == "__main__":
+    main()
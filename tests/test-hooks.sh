@@ -123,7 +123,7 @@ TOUCHED=$(jq -r '.files_touched | length' "$TEST_HOME/.claude/terminals/session-
 assert_eq "adds to files_touched for Edit" "1" "$TOUCHED"
 CURRENT=$(jq -r '.current_files[0] // empty' "$TEST_HOME/.claude/terminals/session-hb123456.json" 2>/dev/null)
 assert_eq "tracks current_files for Edit" "/tmp/src/app.ts" "$CURRENT"
-assert_file_exists "appends to activity.jsonl" "$TEST_HOME/.claude/terminals/activity.jsonl"
+assert_file_exists "appends to the session activity shard" "$TEST_HOME/.claude/terminals/activity/hb123456.jsonl"
 restore_home "$TEST_HOME"
 
 # Test: heartbeat fallback creates session file
@@ -162,6 +162,10 @@ STATUS=$(jq -r '.status' "$TEST_HOME/.claude/terminals/session-end12345.json" 2>
 assert_eq "marks session closed" "closed" "$STATUS"
 ENDED=$(jq -r '.ended' "$TEST_HOME/.claude/terminals/session-end12345.json" 2>/dev/null)
 assert_match "sets ended timestamp" "^20[0-9]{2}-" "$ENDED"
+if command -v python3 >/dev/null 2>&1; then
+  INDEXED=$(jq -r '.sessions.end12345.status' "$TEST_HOME/.claude/terminals/sessions-index.json" 2>/dev/null)
+  assert_eq "records close in session registry" "closed" "$INDEXED"
+fi
 assert_file_not_exists "cleans guard state" "$TEST_HOME/.claude/hooks/session-state/end12345.json"
 assert_file_not_exists "cleans reads state" "$TEST_HOME/.claude/hooks/session-state/end12345-reads.json"
 restore_home "$TEST_HOME"
@@ -186,6 +190,39 @@ OUTPUT=$(echo '{"session_id":"empty123abcdefg","tool_name":"Read","tool_input":{
 assert_eq "no output for empty inbox" "" "$OUTPUT"
 restore_home "$TEST_HOME"
 
+# Test: fast path skips the full pass until the inbox generation is bumped
+TEST_HOME=$(new_home)
+FAST_PAYLOAD='{"session_id":"fast1234abcdefg","tool_name":"Read","tool_input":{}}'
+echo "$FAST_PAYLOAD" | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" >/dev/null 2>&1 || true
+assert_file_exists "full pass stamps seen marker" "$TEST_HOME/.claude/terminals/inbox/.fast1234.seen"
+echo '{"ts":"t","from":"lead","content":"Unbumped message"}' > "$TEST_HOME/.claude/terminals/inbox/fast1234.jsonl"
+OUTPUT=$(echo "$FAST_PAYLOAD" | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_eq "fast path exits without a generation bump" "" "$OUTPUT"
+sleep 0.05
+touch "$TEST_HOME/.claude/terminals/inbox/fast1234.gen"
+OUTPUT=$(echo "$FAST_PAYLOAD" | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_match "generation bump forces full pass" "Unbumped message" "$OUTPUT"
+restore_home "$TEST_HOME"
+
+# Test: pending mandatory actions are re-delivered until completed
+TEST_HOME=$(new_home)
+ACTION_ID=$(HOME="$TEST_HOME" python3 -c "import sys; sys.path.insert(0, '$HOOK_DIR'); import action_queue; print(action_queue.enqueue('review-after-commit', 'Run the reviewer now')['id'])")
+OUTPUT=$(echo '{"session_id":"actn1234abcdefg","tool_name":"Read","tool_input":{}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_match "delivers pending mandatory action" "Run the reviewer now" "$OUTPUT"
+HOME="$TEST_HOME" python3 "$HOOK_DIR/action_queue.py" done "$ACTION_ID"
+OUTPUT=$(echo '{"session_id":"actn1234abcdefg","tool_name":"Read","tool_input":{}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_eq "completed action is not re-delivered" "" "$OUTPUT"
+restore_home "$TEST_HOME"
+
+# Test: a session's mandatory actions are not delivered to other sessions
+TEST_HOME=$(new_home)
+HOME="$TEST_HOME" python3 -c "import sys; sys.path.insert(0, '$HOOK_DIR'); import action_queue; action_queue.enqueue('review-after-commit', 'Review your commit', session_id='ownr1234abcdefg')" >/dev/null
+OUTPUT=$(echo '{"session_id":"othr1234abcdefg","tool_name":"Read","tool_input":{}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_eq "other session is not nagged" "" "$OUTPUT"
+OUTPUT=$(echo '{"session_id":"ownr1234abcdefg","tool_name":"Read","tool_input":{}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>/dev/null || true)
+assert_match "owning session gets its action" "Review your commit" "$OUTPUT"
+restore_home "$TEST_HOME"
+
 # Test: invalid session_id blocked
 TEST_HOME=$(new_home)
 RESULT=$(echo '{"session_id":"bad!"}' | HOME="$TEST_HOME" bash "$HOOK_DIR/check-inbox.sh" 2>&1 || true)
@@ -267,6 +304,18 @@ else
 fi
 restore_home "$TEST_HOME"
 
+# Test: indexed lookup (conflict-index.json present, no file scan)
+TEST_HOME=$(new_home)
+jq -n '{"session":"me123456","status":"active","cwd":"/tmp"}' > "$TEST_HOME/.claude/terminals/session-me123456.json"
+jq -n '{"session":"idx12345","status":"active","cwd":"/tmp","project":"indexed","current_task":"migration"}' > "$TEST_HOME/.claude/terminals/session-idx12345.json"
+jq -n '{"schema_version":1,"paths":{"/tmp/src/app.ts":["me123456","idx12345"]},"sessions":{}}' > "$TEST_HOME/.claude/terminals/conflict-index.json"
+
+RESULT=$(echo '{"session_id":"me123456abcdef","tool_name":"Edit","tool_input":{"file_path":"/tmp/src/app.ts"}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/conflict-guard.sh" 2>&1 || true)
+assert_match "warns from conflict index" "idx12345 \(indexed\)" "$RESULT"
+RESULT=$(echo '{"session_id":"me123456abcdef","tool_name":"Edit","tool_input":{"file_path":"/tmp/src/other.ts"}}' | HOME="$TEST_HOME" bash "$HOOK_DIR/conflict-guard.sh" 2>&1 || true)
+assert_eq "no warning for unindexed path" "" "$RESULT"
+restore_home "$TEST_HOME"
+
 # ─── portable.sh tests ───
 echo ""
 echo "=== portable.sh ==="
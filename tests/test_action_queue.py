@@ -0,0 +1,198 @@
+"""Tests for action_queue.py — indexed mandatory-actions queue."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import action_queue as aq  # noqa: E402
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return str(tmp_path / "state" / "mandatory-actions.jsonl")
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestEnqueue:
+    def test_appends_action_and_indexes_offset(self, queue):
+        a = aq.enqueue("review-after-commit", "first", "ctx", queue_file=queue)
+        b = aq.enqueue("chain-step", "second", chain_id="chain-1", queue_file=queue)
+        assert [r["id"] for r in _lines(queue)] == [a["id"], b["id"]]
+        index = json.loads(open(aq.index_path(queue)).read())
+        assert index["pending"][a["id"]]["offset"] == 0
+        with open(queue, "rb") as f:
+            f.seek(index["pending"][b["id"]]["offset"])
+            assert json.loads(f.readline())["chain_id"] == "chain-1"
+
+    def test_index_path(self):
+        assert aq.index_path("/x/q.jsonl") == "/x/q.pending.json"
+
+
+class TestPending:
+    def test_no_index_means_nothing_pending(self, queue):
+        assert aq.pending_actions(queue) == []
+
+    def test_pending_in_enqueue_order_with_patches(self, queue):
+        a = aq.enqueue("t", "first", queue_file=queue)
+        b = aq.enqueue("t", "second", queue_file=queue)
+        assert aq.update_action(b["id"], queue, chain_id="chain-9")
+        pending = aq.pending_actions(queue)
+        assert [p["id"] for p in pending] == [a["id"], b["id"]]
+        assert pending[1]["chain_id"] == "chain-9"
+        # The update is appended, never rewritten in place.
+        assert _lines(queue)[-1]["op"] == "update"
+
+    def test_stale_offsets_are_skipped(self, queue):
+        aq.enqueue("t", "first", queue_file=queue)
+        open(queue, "w").close()
+        assert aq.pending_actions(queue) == []
+
+    def test_render_includes_completion_hint(self, queue):
+        a = aq.enqueue("t", "Spawn the reviewer", queue_file=queue)
+        text = aq.render_pending(aq.pending_actions(queue))
+        assert "MANDATORY ACTIONS PENDING" in text
+        assert "Spawn the reviewer" in text
+        assert f"done {a['id']}" in text
+
+
+class TestSessionScope:
+    def test_actions_are_delivered_to_their_session(self, queue):
+        mine = aq.enqueue("t", "mine", queue_file=queue, session_id="sessaaaa1111")
+        aq.enqueue("t", "theirs", queue_file=queue, session_id="sessbbbb2222")
+        shared = aq.enqueue("t", "everyone", queue_file=queue)
+        ids = [a["id"] for a in aq.pending_actions(queue, "sessaaaa1111")]
+        assert ids == [mine["id"], shared["id"]]
+        assert mine["session_id"] == "sessaaaa1111"
+        assert len(aq.pending_actions(queue)) == 3
+
+    def test_markers_track_sessions_with_pending_actions(self, queue):
+        markers = aq.markers_dir(queue)
+        a = aq.enqueue("t", "a", queue_file=queue, session_id="sessaaaa1111")
+        b = aq.enqueue("t", "b", queue_file=queue, session_id="bad id!")
+        assert sorted(os.listdir(markers)) == [aq.ALL_SESSIONS, "sessaaaa"]
+        aq.complete_action(b["id"], queue)
+        assert os.listdir(markers) == ["sessaaaa"]
+        aq.complete_action(a["id"], queue)
+        assert os.listdir(markers) == []
+
+    def test_complete_pending_is_session_scoped(self, queue):
+        aq.enqueue("r", "a", queue_file=queue, session_id="sessaaaa1111")
+        other = aq.enqueue("r", "b", queue_file=queue, session_id="sessbbbb2222")
+        assert aq.complete_pending({"r"}, queue, "sessaaaa1111") == 1
+        assert [a["id"] for a in aq.pending_actions(queue)] == [other["id"]]
+
+    def test_compact_keeps_session(self, queue):
+        done = aq.enqueue("t", "a", queue_file=queue)
+        keep = aq.enqueue("t", "b", queue_file=queue, session_id="sessaaaa1111")
+        aq.complete_action(done["id"], queue)
+        aq.compact(queue)
+        index = json.loads(open(aq.index_path(queue)).read())
+        assert index["pending"][keep["id"]]["session"] == "sessaaaa"
+        assert os.listdir(aq.markers_dir(queue)) == ["sessaaaa"]
+
+    def test_queue_dir_honors_state_dir_env(self, tmp_path):
+        code = "import action_queue; print(action_queue.QUEUE_FILE)"
+        env = dict(os.environ, TOKEN_GUARD_STATE_DIR=str(tmp_path), PYTHONPATH=HOOKS_DIR)
+        out = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True
+        ).stdout.strip()
+        assert out == str(tmp_path / "mandatory-actions.jsonl")
+
+
+class TestCompletion:
+    def test_completing_last_action_empties_log_and_index(self, queue):
+        a = aq.enqueue("t", "only", queue_file=queue)
+        assert aq.complete_action(a["id"], queue)
+        assert not os.path.exists(aq.index_path(queue))
+        assert os.path.getsize(queue) == 0
+        assert aq.complete_action(a["id"], queue) is False
+
+    def test_complete_pending_by_type(self, queue):
+        aq.enqueue("review-after-commit", "r", queue_file=queue)
+        keep = aq.enqueue("chain-step", "c", queue_file=queue)
+        assert aq.complete_pending({"review-after-commit"}, queue) == 1
+        assert [p["id"] for p in aq.pending_actions(queue)] == [keep["id"]]
+
+    def test_cli_done(self, tmp_path):
+        home = tmp_path / "home"
+        state_dir = home / ".claude" / "hooks" / "session-state"
+        queue = str(state_dir / "mandatory-actions.jsonl")
+        a = aq.enqueue("t", "x", queue_file=queue)
+        env = dict(os.environ, HOME=str(home))
+        script = os.path.join(HOOKS_DIR, "action_queue.py")
+        proc = subprocess.run(
+            [sys.executable, script, "pending"], env=env, capture_output=True, text=True
+        )
+        assert a["id"] in proc.stdout
+        proc = subprocess.run([sys.executable, script, "done", a["id"]], env=env)
+        assert proc.returncode == 0
+        proc = subprocess.run(
+            [sys.executable, script, "pending"], env=env, capture_output=True, text=True
+        )
+        assert proc.stdout == ""
+
+
+class TestCompact:
+    def test_noop_when_nothing_completed(self, queue):
+        aq.enqueue("t", "x", queue_file=queue)
+        assert aq.compact(queue) == 0
+
+    def test_drops_completed_and_folds_updates(self, queue):
+        a = aq.enqueue("t", "a", queue_file=queue)
+        b = aq.enqueue("t", "b", queue_file=queue)
+        aq.update_action(b["id"], queue, chain_id="chain-2")
+        aq.complete_action(a["id"], queue)
+        assert aq.compact(queue) == 3
+        records = _lines(queue)
+        assert [r["id"] for r in records] == [b["id"]]
+        assert records[0]["chain_id"] == "chain-2"
+        assert aq.pending_actions(queue)[0]["id"] == b["id"]
+
+    def test_rebuilds_index_for_legacy_log(self, queue):
+        os.makedirs(os.path.dirname(queue))
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with open(queue, "w") as f:
+            for i, status in enumerate(("pending", "done", "pending")):
+                record = {
+                    "id": f"old-{i}",
+                    "type": "t",
+                    "instruction": str(i),
+                    "created_at": now,
+                    "status": status,
+                }
+                f.write(json.dumps(record) + "\n")
+        assert aq.compact(queue) == 1
+        assert [p["id"] for p in aq.pending_actions(queue)] == ["old-0", "old-2"]
+
+    def test_expires_old_pending_actions(self, queue):
+        a = aq.enqueue("t", "x", queue_file=queue)
+        index = json.loads(open(aq.index_path(queue)).read())
+        index["pending"][a["id"]]["created"] -= aq.PENDING_TTL_SECONDS + 60
+        with open(aq.index_path(queue), "w") as f:
+            json.dump(index, f)
+        records = _lines(queue)
+        records[0]["created_at"] = "2020-01-01T00:00:00Z"
+        with open(queue, "w") as f:
+            f.write(json.dumps(records[0]) + "\n")
+        # Reading past an expired action compacts it away (markers included).
+        assert aq.pending_actions(queue) == []
+        assert not os.path.exists(aq.index_path(queue))
+        assert os.listdir(aq.markers_dir(queue)) == []
+        assert aq.compact(queue) == 0
+
+    def test_orphaned_index_removed(self, queue):
+        aq.enqueue("t", "x", queue_file=queue)
+        os.unlink(queue)
+        aq.compact(queue)
+        assert not os.path.exists(aq.index_path(queue))
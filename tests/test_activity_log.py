@@ -0,0 +1,66 @@
+"""Tests for hooks/activity_log.py (per-session activity shards)."""
+
+import json
+import os
+import sys
+import time
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import activity_log  # noqa: E402
+
+
+def _rec(session, ts, tool="Edit"):
+    return {"ts": ts, "session": session, "tool": tool, "file": "a", "path": "/a"}
+
+
+def test_appends_go_to_per_session_shards(tmp_path):
+    t = str(tmp_path)
+    activity_log.append_activity(t, "aaaa1111", _rec("aaaa1111", "2026-01-01T00:00:01Z"))
+    activity_log.append_activity(t, "bbbb2222", _rec("bbbb2222", "2026-01-01T00:00:02Z"))
+    shard = tmp_path / "activity" / "aaaa1111.jsonl"
+    assert [json.loads(l)["session"] for l in shard.read_text().splitlines()] == ["aaaa1111"]
+    assert (tmp_path / "activity" / "bbbb2222.jsonl").exists()
+
+
+def test_rotates_at_size_cap_and_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(activity_log, "SHARD_MAX_BYTES", 400)
+    t = str(tmp_path)
+    for i in range(12):
+        activity_log.append_activity(
+            t, "aaaa1111", _rec("aaaa1111", f"2026-01-01T00:00:{i:02d}Z")
+        )
+    shard = tmp_path / "activity" / "aaaa1111.jsonl"
+    assert shard.stat().st_size <= 400
+    assert (tmp_path / "activity" / "aaaa1111.jsonl.1").stat().st_size <= 400
+    entry = activity_log.read_index(t)["aaaa1111"]
+    assert entry["rotations"] >= 2
+    assert entry["bytes"] <= 400
+
+
+def test_read_recent_merges_shards_and_legacy_in_ts_order(tmp_path):
+    t = str(tmp_path)
+    (tmp_path / "activity.jsonl").write_text(
+        json.dumps(_rec("cccc3333", "2026-01-01T00:00:00Z")) + "\n"
+    )
+    activity_log.append_activity(t, "aaaa1111", _rec("aaaa1111", "2026-01-01T00:00:03Z"))
+    activity_log.append_activity(t, "bbbb2222", _rec("bbbb2222", "2026-01-01T00:00:02Z"))
+    recent = activity_log.read_recent(t, limit=2)
+    assert [r["session"] for r in recent] == ["bbbb2222", "aaaa1111"]
+    only_a = activity_log.read_recent(t, sessions=["aaaa1111"])
+    assert [r["session"] for r in only_a] == ["aaaa1111"]
+
+
+def test_prune_removes_expired_shards_and_index_entries(tmp_path):
+    t = str(tmp_path)
+    activity_log.append_activity(t, "old00001", _rec("old00001", "2020-01-01T00:00:00Z"))
+    activity_log.update_index(t, "old00001", "2020-01-01T00:00:00Z")
+    activity_log.append_activity(t, "new00001", _rec("new00001", "2026-01-01T00:00:00Z"))
+    old = tmp_path / "activity" / "old00001.jsonl"
+    past = time.time() - activity_log.RETAIN_SECONDS - 60
+    os.utime(old, (past, past))
+    assert activity_log.prune_shards(t) == 1
+    assert not old.exists()
+    assert "old00001" not in activity_log.read_index(t)
+    assert (tmp_path / "activity" / "new00001.jsonl").exists()
@@ -0,0 +1,183 @@
+"""Tests for agent-lifecycle.sh / hooks/agent_lifecycle.py."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+from guard_normalize import normalize_session_key  # noqa: E402
+
+SESSION_ID = "3f1c2a9b-7d4e-4c1a-9e2b-0a1b2c3d4e5f"
+
+
+@pytest.fixture
+def env(tmp_path):
+    state_dir = tmp_path / ".claude" / "hooks" / "session-state"
+    state_dir.mkdir(parents=True)
+    e = dict(os.environ, HOME=str(tmp_path), TOKEN_GUARD_STATE_DIR=str(state_dir))
+    return e, state_dir
+
+
+def _run(script, payload, env):
+    cmd = ["bash", script] if script.endswith(".sh") else [sys.executable, script]
+    return subprocess.run(
+        cmd,
+        input=json.dumps(payload),
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=15,
+    )
+
+
+def _lifecycle(payload, env):
+    return _run(os.path.join(HOOKS_DIR, "agent-lifecycle.sh"), payload, env)
+
+
+def _records(state_dir):
+    path = state_dir / "agent-metrics.jsonl"
+    return [json.loads(l) for l in path.read_text().splitlines() if l.strip()]
+
+
+def _event(name, agent_id="agent-1", agent_type="Explore"):
+    return {
+        "hook_event_name": name,
+        "agent_type": agent_type,
+        "agent_id": agent_id,
+        "session_id": SESSION_ID,
+    }
+
+
+def test_start_consumes_pending_spawn_and_indexes(env):
+    e, state_dir = env
+    state_file = state_dir / f"{normalize_session_key(SESSION_ID)}.json"
+    state_file.write_text(
+        json.dumps(
+            {
+                "pending_spawns": [
+                    {"decision_id": "dec-old", "type": "Explore", "consumed": False},
+                    {"decision_id": "dec-new", "type": "Explore", "consumed": False},
+                    {"decision_id": "dec-plan", "type": "Plan", "consumed": False},
+                ]
+            }
+        )
+    )
+    assert _lifecycle(_event("SubagentStart"), e).returncode == 0
+
+    start = _records(state_dir)[-1]
+    assert start["event"] == "start"
+    assert start["decision_id"] == "dec-new"
+    assert start["session_key"] == normalize_session_key(SESSION_ID)
+    spawns = json.loads(state_file.read_text())["pending_spawns"]
+    assert [s.get("consumed") for s in spawns] == [False, True, False]
+    assert spawns[1]["agent_id"] == "agent-1"
+    index = json.loads((state_dir / "agent-lifecycle-index.json").read_text())
+    assert index["starts"]["agent-1"]["decision_id"] == "dec-new"
+
+
+def test_stop_uses_indexed_start_for_duration(env):
+    e, state_dir = env
+    (state_dir / "agent-lifecycle-index.json").write_text(
+        json.dumps(
+            {
+                "schema_version": 1,
+                "starts": {
+                    "agent-1": {
+                        "ts": "2020-01-01T00:00:00Z",
+                        "epoch": 1577836800,
+                        "agent_type": "Explore",
+                        "decision_id": "dec-9",
+                    }
+                },
+            }
+        )
+    )
+    _lifecycle(_event("SubagentStop"), e)
+    stop = _records(state_dir)[-1]
+    assert stop["event"] == "stop"
+    assert stop["duration_known"] is True
+    assert stop["duration_seconds"] > 100000000
+    assert stop["decision_id"] == "dec-9"
+
+
+def test_stop_without_start_is_unknown(env):
+    e, state_dir = env
+    _lifecycle(_event("SubagentStop", agent_id="never-started"), e)
+    stop = _records(state_dir)[-1]
+    assert stop["duration_known"] is False
+    assert stop["duration_seconds"] == "unknown"
+
+
+def test_stop_falls_back_to_log_when_index_missing(env):
+    e, state_dir = env
+    legacy = {
+        "schema_version": 2,
+        "record_type": "lifecycle",
+        "ts": "2020-01-01T00:00:00Z",
+        "event": "start",
+        "agent_type": "Explore",
+        "agent_id": "legacy-1",
+        "decision_id": "dec-legacy",
+    }
+    (state_dir / "agent-metrics.jsonl").write_text(json.dumps(legacy) + "\n")
+    _lifecycle(_event("SubagentStop", agent_id="legacy-1"), e)
+    stop = _records(state_dir)[-1]
+    assert stop["duration_known"] is True
+    assert stop["decision_id"] == "dec-legacy"
+
+
+def test_agent_metrics_correlates_through_index(env):
+    e, state_dir = env
+    _lifecycle(_event("SubagentStart", agent_type="Plan"), e)
+    index_file = state_dir / "agent-lifecycle-index.json"
+    index = json.loads(index_file.read_text())
+    index["starts"]["agent-1"]["decision_id"] = "dec-idx"
+    index_file.write_text(json.dumps(index))
+    stop = _event("SubagentStop", agent_type="")
+    stop["agent_transcript_path"] = ""
+    assert _run(os.path.join(HOOKS_DIR, "agent-metrics.py"), stop, e).returncode == 0
+    usage = _records(state_dir)[-1]
+    assert usage["record_type"] == "usage"
+    assert usage["decision_id"] == "dec-idx"
+    assert usage["agent_type"] == "Plan"
+
+
+def test_truncation_waits_for_append_lock_and_is_atomic(tmp_path):
+    import threading
+
+    import agent_lifecycle
+    from hook_utils import lock, unlock
+
+    metrics = tmp_path / "agent-metrics.jsonl"
+    record = json.dumps({"event": "start", "pad": "x" * 200})
+    metrics.write_text("".join(f"{record[:-1]},\"n\":{i}}}\n" for i in range(600)))
+    with open(str(metrics) + ".lock", "w") as lf:
+        lock(lf)
+        worker = threading.Thread(
+            target=agent_lifecycle._truncate_metrics, args=(str(metrics),)
+        )
+        worker.start()
+        worker.join(0.3)
+        assert worker.is_alive()  # blocked behind the appender's lock
+        assert len(metrics.read_text().splitlines()) == 600
+        unlock(lf)
+    worker.join(5)
+    lines = metrics.read_text().splitlines()
+    assert len(lines) == agent_lifecycle.METRICS_KEEP_LINES
+    assert json.loads(lines[-1])["n"] == 599
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_unwritable_state_dir_does_not_traceback(tmp_path):
+    home = tmp_path / "home"
+    home.write_text("not a directory")
+    e = dict(os.environ, HOME=str(home))
+    e.pop("TOKEN_GUARD_STATE_DIR", None)
+    proc = _run(os.path.join(HOOKS_DIR, "agent_lifecycle.py"), _event("SubagentStart"), e)
+    assert proc.returncode == 0
+    assert "Traceback" not in proc.stderr
@@ -0,0 +1,167 @@
+"""Tests for audit_archive.py — compressed, header-indexed audit generations."""
+
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import audit_archive  # noqa: E402
+
+
+def _write_audit(path, entries):
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+
+
+def _entry(ts, event="allow", rule_id="none"):
+    return {"ts": ts, "event": event, "rule_id": rule_id, "schema_version": 2}
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "audit-archive")
+
+
+class TestArchiveFile:
+    def test_header_records_range_and_counts(self, tmp_path, archive_dir):
+        src = tmp_path / "audit.jsonl"
+        _write_audit(
+            src,
+            [
+                _entry("2026-10-01T10:00:00"),
+                _entry("2026-10-02T10:00:00", "block", "session_cap"),
+                _entry("2026-10-02T11:00:00", "block", "session_cap"),
+            ],
+        )
+        with src.open("a") as f:
+            f.write("{corrupt\n")
+        dest = audit_archive.archive_file(str(src), archive_dir=archive_dir)
+        assert dest and dest.endswith(".jsonl.gz")
+        header = audit_archive.read_header(dest)
+        assert header["from_ts"] == "2026-10-01T10:00:00"
+        assert header["to_ts"] == "2026-10-02T11:00:00"
+        assert header["records"] == 3
+        assert header["malformed"] == 1
+        assert header["events"] == {"allow": 1, "block": 2}
+        assert header["rules"]["session_cap"] == 2
+        assert header["days"]["2026-10-02"] == {"block": 2}
+
+    def test_original_lines_preserved_after_header(self, tmp_path, archive_dir):
+        src = tmp_path / "audit.jsonl"
+        _write_audit(src, [_entry("2026-10-01T10:00:00")])
+        dest = audit_archive.archive_file(str(src), archive_dir=archive_dir)
+        with gzip.open(dest, "rt") as f:
+            lines = f.read().splitlines()
+        assert json.loads(lines[0])["archive_header"] == 1
+        assert lines[1:] == src.read_text().splitlines()
+
+    def test_prunes_to_keep_generations(self, tmp_path, archive_dir):
+        src = tmp_path / "audit.jsonl"
+        _write_audit(src, [_entry("2026-10-01T10:00:00")])
+        for _ in range(4):
+            audit_archive.archive_file(str(src), archive_dir=archive_dir, keep=2)
+        assert len(audit_archive.list_generations(archive_dir)) == 2
+
+    def test_missing_source_returns_none(self, tmp_path, archive_dir):
+        assert audit_archive.archive_file(str(tmp_path / "nope"), archive_dir) is None
+
+
+class TestQuery:
+    @pytest.fixture
+    def two_generations(self, tmp_path, archive_dir):
+        src = tmp_path / "audit.jsonl"
+        _write_audit(
+            src,
+            [_entry("2026-09-01T00:00:00"), _entry("2026-09-02T00:00:00", "block")],
+        )
+        audit_archive.archive_file(str(src), archive_dir=archive_dir)
+        _write_audit(
+            src,
+            [_entry("2026-10-01T00:00:00"), _entry("2026-10-05T00:00:00", "block")],
+        )
+        audit_archive.archive_file(str(src), archive_dir=archive_dir)
+        return archive_dir
+
+    def test_summarize_all_uses_headers(self, two_generations):
+        doc = audit_archive.summarize(archive_dir=two_generations)
+        assert doc["generations"] == 2
+        assert doc["records"] == 4
+        assert doc["events"] == {"allow": 2, "block": 2}
+        assert doc["from_ts"] == "2026-09-01T00:00:00"
+
+    def test_summarize_window_skips_and_streams(self, two_generations):
+        doc = audit_archive.summarize(since="2026-10-02", archive_dir=two_generations)
+        assert doc["generations"] == 1
+        assert doc["records"] == 1
+        assert doc["events"] == {"block": 1}
+
+    def test_iter_entries_filters_by_window(self, two_generations):
+        entries = list(
+            audit_archive.iter_entries(
+                since="2026-09-02", until="2026-10-02", archive_dir=two_generations
+            )
+        )
+        assert [e["ts"] for e in entries] == [
+            "2026-09-02T00:00:00",
+            "2026-10-01T00:00:00",
+        ]
+
+    def test_daily_counts_merge_live_file(self, tmp_path, two_generations):
+        live = tmp_path / "live.jsonl"
+        _write_audit(live, [_entry("2026-10-05T09:00:00")])
+        days = audit_archive.daily_event_counts(
+            since="2026-10-01", audit_path=str(live), archive_dir=two_generations
+        )
+        assert days["2026-10-05"] == {"block": 1, "allow": 1}
+        assert "2026-09-01" not in days
+
+    def test_live_counts_read_only_appended_lines(self, tmp_path, archive_dir):
+        live = tmp_path / "audit.jsonl"
+        _write_audit(live, [_entry("2026-10-05T09:00:00")])
+        first = audit_archive.daily_event_counts(
+            audit_path=str(live), archive_dir=archive_dir
+        )
+        assert first == {"2026-10-05": {"allow": 1}}
+        cursor = json.loads((tmp_path / audit_archive.LIVE_CURSOR_NAME).read_text())
+        assert cursor["offset"] == live.stat().st_size
+        with live.open("a") as f:
+            f.write(json.dumps(_entry("2026-10-05T10:00:00", "block")) + "\n")
+            f.write('{"ts": "2026-10-06T00:00:00", "event": "al')  # partial write
+        days = audit_archive.daily_event_counts(
+            audit_path=str(live), archive_dir=archive_dir
+        )
+        assert days == {"2026-10-05": {"allow": 1, "block": 1}}
+
+    def test_live_counts_restart_after_rotation(self, tmp_path, archive_dir):
+        live = tmp_path / "audit.jsonl"
+        _write_audit(live, [_entry("2026-10-05T09:00:00")] * 3)
+        audit_archive.daily_event_counts(audit_path=str(live), archive_dir=archive_dir)
+        live.unlink()
+        _write_audit(live, [_entry("2026-10-06T09:00:00", "block")])
+        days = audit_archive.daily_event_counts(
+            audit_path=str(live), archive_dir=archive_dir
+        )
+        assert days == {"2026-10-06": {"block": 1}}
+
+    def test_live_counts_restart_when_head_changes(self, tmp_path, archive_dir):
+        live = tmp_path / "audit.jsonl"
+        _write_audit(live, [_entry("2026-10-05T09:00:00")])
+        audit_archive.daily_event_counts(audit_path=str(live), archive_dir=archive_dir)
+        # Rewritten in place (same inode) and longer than the old offset.
+        with live.open("r+") as f:
+            f.truncate(0)
+            line = json.dumps(_entry("2026-10-07T09:00:00", "warn")) + "\n"
+            f.write(line * 2)
+        days = audit_archive.daily_event_counts(
+            audit_path=str(live), archive_dir=archive_dir
+        )
+        assert days == {"2026-10-07": {"warn": 2}}
+
+    def test_empty_archive(self, archive_dir):
+        doc = audit_archive.summarize(archive_dir=archive_dir)
+        assert doc["generations"] == 0
+        assert doc["records"] == 0
@@ -265,6 +265,37 @@ class TestBuildChainDispatcher:
             or "FP-CHECKER" in action["instruction"]
         )
 
+    def test_review_agent_completes_pending_review_actions(self, isolated_env):
+        """The finished review satisfies the queued review-after-commit action."""
+        env, queue_file, state_dir = isolated_env
+        commit = {
+            "tool_name": "Bash",
+            "tool_input": {"command": "git commit -m 'feat: x'"},
+            "tool_output": "[main abc1234] feat: x\n 1 file changed",
+        }
+        run_py("auto-review-dispatch.py", commit, env)
+        assert read_queue(queue_file)[-1]["type"] == "review-after-commit"
+        payload = {
+            "agent_name": "quick-reviewer",
+            "description": "review the latest commit",
+            "subagent_type": "quick-reviewer",
+        }
+        run_py("build-chain-dispatcher.py", payload, env)
+        index = json.loads((state_dir / "mandatory-actions.pending.json").read_text())
+        (pending_id,) = index["pending"]
+        assert pending_id.startswith("fp-checker-after-review-")
+
+    def test_fp_checker_completes_its_action_for_that_session(self, isolated_env):
+        """fp-checker finishing clears fp-checker-after-review for its session only."""
+        env, _, state_dir = isolated_env
+        review = {"agent_name": "quick-reviewer", "subagent_type": "quick-reviewer"}
+        for sid in ("sessaaaa1111", "sessbbbb2222"):
+            run_py("build-chain-dispatcher.py", dict(review, session_id=sid), env)
+        checker = {"agent_name": "fp-checker", "session_id": "sessaaaa1111"}
+        run_py("build-chain-dispatcher.py", checker, env)
+        index = json.loads((state_dir / "mandatory-actions.pending.json").read_text())
+        assert [e["session"] for e in index["pending"].values()] == ["sessbbbb"]
+
     def test_review_agent_clears_review_pending_flag(self, isolated_env):
         """When a review agent completes, the review-pending flag should be removed."""
         env, queue_file, state_dir = isolated_env
@@ -338,8 +369,39 @@ class TestBuildChainDispatcher:
         actions = read_queue(queue_file)
         assert actions
         action = actions[-1]
-        # The action should have the chain_id patched in
+        # chain_id is written with the action itself (no rewrite of the queue)
         assert action.get("chain_id") == chain_id
+        assert len(actions) == 1
+
+    def test_step_agent_advances_chain_once(self, isolated_env):
+        """code-simplifier finishing advances the chain; a duplicate stop is ignored."""
+        env, queue_file, state_dir = isolated_env
+        build = {"agent_name": "vibe-coder", "subagent_type": "vibe-coder"}
+        run_py("build-chain-dispatcher.py", build, env)
+        step = {"agent_name": "code-simplifier", "subagent_type": "code-simplifier"}
+        code, stdout, _ = run_py("build-chain-dispatcher.py", step, env)
+        assert code == 0
+        assert "CHAIN STEP 2/2" in stdout
+        run_py("build-chain-dispatcher.py", step, env)
+
+        index = json.loads((state_dir / "mandatory-actions.pending.json").read_text())
+        (pending_id,) = index["pending"]
+        assert pending_id.startswith("verify-app-")
+        (entry,) = json.loads(
+            (state_dir / "chains" / "index.json").read_text()
+        )["active"].values()
+        assert entry["current_step"] == 1
+
+        verify = {"agent_name": "verify-app", "subagent_type": "verify-app"}
+        run_py("build-chain-dispatcher.py", verify, env)
+        chains_index = json.loads((state_dir / "chains" / "index.json").read_text())
+        assert chains_index["active"] == {}
+        assert not (state_dir / "mandatory-actions.pending.json").exists() or (
+            json.loads((state_dir / "mandatory-actions.pending.json").read_text())[
+                "pending"
+            ]
+            == {}
+        )
 
     def test_unknown_non_build_agent_skips(self, isolated_env):
         """An agent not in BUILD_AGENTS and not a reviewer → silently skip."""
@@ -384,6 +446,33 @@ class TestChainAdvance:
         chain_path.write_text(json.dumps(chain, indent=2))
         return chain_path
 
+    def test_chain_id_resolves_under_token_guard_state_dir(self, tmp_path):
+        """A bare chain id finds chains the dispatcher built under $TOKEN_GUARD_STATE_DIR."""
+        state_dir = tmp_path / "custom-state"
+        env = os.environ.copy()
+        env["HOME"] = str(tmp_path / "home")
+        env["TOKEN_GUARD_STATE_DIR"] = str(state_dir)
+        payload = {
+            "agent_name": "general-purpose",
+            "description": "implement the new feature",
+            "subagent_type": "general-purpose",
+        }
+        code, _, _ = run_py("build-chain-dispatcher.py", payload, env)
+        assert code == 0
+        chain_files = list((state_dir / "chains").glob("chain-*.json"))
+        assert len(chain_files) == 1
+        chain_id = chain_files[0].stem
+        result = subprocess.run(
+            [sys.executable, os.path.join(HOOKS_DIR, "chain-advance.py"), chain_id],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=5,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "verify-app" in json.loads(result.stdout)["instruction"]
+        assert json.loads(chain_files[0].read_text())["current_step"] == 1
+
     def test_no_args_exits_1(self):
         """Running with no arguments should exit 1."""
         script = os.path.join(HOOKS_DIR, "chain-advance.py")
@@ -545,3 +634,19 @@ class TestChainAdvance:
         assert result.stdout.strip() == ""
         chain = json.loads(chain_path.read_text())
         assert "completed_at" in chain
+
+    def test_expect_step_mismatch_exits_2(self, tmp_path):
+        """--expect-step is a compare-and-set: a stale step leaves the chain alone."""
+        chain_path = self._write_chain(
+            tmp_path, ["code-simplifier", "verify-app"], current_step=1
+        )
+        script = os.path.join(HOOKS_DIR, "chain-advance.py")
+        result = subprocess.run(
+            [sys.executable, script, str(chain_path), "--expect-step", "0"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        assert result.returncode == 2
+        assert result.stdout.strip() == ""
+        assert json.loads(chain_path.read_text())["current_step"] == 1
@@ -0,0 +1,125 @@
+"""Tests for chain_store.py — chain registry with compare-and-set transitions."""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import chain_store as cs  # noqa: E402
+
+
+@pytest.fixture
+def chains_dir(tmp_path):
+    return str(tmp_path / "chains")
+
+
+def _index(chains_dir):
+    with open(os.path.join(chains_dir, cs.INDEX_NAME)) as f:
+        return json.load(f)
+
+
+class TestCreate:
+    def test_single_write_with_first_action_and_index(self, chains_dir):
+        chain = cs.create_chain(
+            "build", ["a", "b"], "vibe-coder", first_action_id="act-1",
+            chains_dir=chains_dir,
+        )
+        on_disk = cs.load_chain(chain["chain_id"], chains_dir)
+        assert on_disk["steps"][0]["action_id"] == "act-1"
+        entry = _index(chains_dir)["active"][chain["chain_id"]]
+        assert entry == {
+            "type": "build",
+            "current_step": 0,
+            "step": "a",
+            "created_at": chain["created_at"],
+        }
+
+
+class TestAdvance:
+    def test_advance_returns_next_action_and_updates_index(self, chains_dir):
+        chain = cs.create_chain("build", ["a", "b"], chains_dir=chains_dir)
+        updated, action = cs.advance(chain["chain_id"], 0, chains_dir)
+        assert updated["current_step"] == 1
+        assert updated["steps"][1]["action_id"] == action["id"]
+        assert action["chain_id"] == chain["chain_id"]
+        assert "CHAIN STEP 2/2" in action["instruction"]
+        assert _index(chains_dir)["active"][chain["chain_id"]]["step"] == "b"
+
+    def test_compare_and_set_rejects_stale_step(self, chains_dir):
+        chain = cs.create_chain("build", ["a", "b"], chains_dir=chains_dir)
+        assert cs.advance(chain["chain_id"], 0, chains_dir) is not None
+        assert cs.advance(chain["chain_id"], 0, chains_dir) is None
+        assert cs.load_chain(chain["chain_id"], chains_dir)["current_step"] == 1
+
+    def test_concurrent_advances_only_one_wins(self, chains_dir):
+        chain = cs.create_chain("build", ["a", "b", "c"], chains_dir=chains_dir)
+        results = []
+
+        def _go():
+            results.append(cs.advance(chain["chain_id"], 0, chains_dir))
+
+        threads = [threading.Thread(target=_go) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sum(r is not None for r in results) == 1
+        assert cs.load_chain(chain["chain_id"], chains_dir)["current_step"] == 1
+
+    def test_missing_chain(self, chains_dir):
+        assert cs.advance("chain-nope", None, chains_dir) is None
+
+
+class TestCompletionAndArchive:
+    def test_completed_chain_leaves_index_then_archived(self, chains_dir):
+        done = cs.create_chain("build", ["a"], chains_dir=chains_dir)
+        chain, action = cs.advance(done["chain_id"], 0, chains_dir)
+        assert action is None and "completed_at" in chain
+        assert _index(chains_dir)["active"] == {}
+        assert cs.advance(done["chain_id"], None, chains_dir) is None
+
+        live = cs.create_chain("build", ["a"], chains_dir=chains_dir)
+        names = sorted(n for n in os.listdir(chains_dir) if n.startswith("chain-"))
+        assert names == [f"{live['chain_id']}.json"]
+        archive_dir = os.path.join(chains_dir, cs.ARCHIVE_SUBDIR)
+        (archive,) = os.listdir(archive_dir)
+        with open(os.path.join(archive_dir, archive)) as f:
+            archived = [json.loads(line) for line in f]
+        assert [c["chain_id"] for c in archived] == [done["chain_id"]]
+        assert _index(chains_dir)["completed"] == []
+
+    def test_archive_completed(self, chains_dir):
+        done = cs.create_chain("build", ["a"], chains_dir=chains_dir)
+        cs.advance(done["chain_id"], 0, chains_dir)
+        assert cs.archive_completed(chains_dir) == 1
+        assert cs.load_chain(done["chain_id"], chains_dir) is None
+
+
+class TestLookup:
+    def test_find_active_step_prefers_oldest(self, chains_dir):
+        first = cs.create_chain("build", ["code-simplifier"], chains_dir=chains_dir)
+        cs.create_chain("build", ["code-simplifier"], chains_dir=chains_dir)
+        found = cs.find_active_step("code-simplifier tidy up", chains_dir)
+        assert found == (first["chain_id"], 0)
+        assert cs.find_active_step("verify-app", chains_dir) is None
+
+    def test_index_rebuilt_from_pre_index_chain_files(self, chains_dir):
+        os.makedirs(chains_dir)
+        for cid, cur in (("chain-old1", 0), ("chain-old2", 2)):
+            with open(os.path.join(chains_dir, f"{cid}.json"), "w") as f:
+                json.dump(
+                    {
+                        "chain_id": cid,
+                        "type": "build",
+                        "steps": [{"name": "a"}, {"name": "b"}],
+                        "current_step": cur,
+                        "created_at": "2026-01-01T00:00:00Z",
+                    },
+                    f,
+                )
+        assert list(cs.active_chains(chains_dir)) == ["chain-old1"]
@@ -0,0 +1,96 @@
+"""Tests for hooks/config_snapshot.py."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import config_snapshot  # noqa: E402
+
+
+def test_snapshot_serves_parsed_config_until_source_changes(tmp_path, monkeypatch):
+    source = tmp_path / "config.json"
+    snapshot = str(tmp_path / "snap.bin")
+    source.write_text(json.dumps({"max_agents": 3}))
+    assert config_snapshot.load(str(source), snapshot=snapshot) == {"max_agents": 3}
+    assert os.path.exists(snapshot)
+
+    def no_parse(path):
+        raise AssertionError("source re-parsed while unchanged")
+
+    monkeypatch.setattr(config_snapshot, "_parse", no_parse)
+    assert config_snapshot.load(str(source), snapshot=snapshot) == {"max_agents": 3}
+    monkeypatch.undo()
+
+    source.write_text(json.dumps({"max_agents": 12}))
+    assert config_snapshot.load(str(source), snapshot=snapshot) == {"max_agents": 12}
+
+
+def test_missing_and_invalid_sources_return_default(tmp_path):
+    snapshot = str(tmp_path / "snap.bin")
+    missing = str(tmp_path / "missing.json")
+    assert config_snapshot.load(missing, {}, snapshot=snapshot) == {}
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert config_snapshot.load(str(bad), "dflt", snapshot=snapshot) == "dflt"
+
+
+def test_corrupt_or_foreign_snapshot_is_rebuilt(tmp_path):
+    source = tmp_path / "config.json"
+    source.write_text(json.dumps({"a": 1}))
+    snapshot = tmp_path / "snap.bin"
+    snapshot.write_bytes(b"garbage")
+    assert config_snapshot.load(str(source), snapshot=str(snapshot)) == {"a": 1}
+    assert snapshot.read_bytes().startswith(config_snapshot.MAGIC)
+
+
+def test_derived_value_cached_until_content_changes(tmp_path, monkeypatch):
+    source = tmp_path / "config.json"
+    snapshot = str(tmp_path / "snap.bin")
+    source.write_text(json.dumps({"n": 2}))
+    calls = []
+
+    def derive(parsed):
+        calls.append(parsed)
+        return {"double": parsed["n"] * 2}
+
+    def load(tag="v1"):
+        return config_snapshot.load_derived(str(source), "t", tag, derive, snapshot=snapshot)
+
+    assert load() == {"double": 4}
+    assert load() == {"double": 4}
+    st = source.stat()
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert load() == {"double": 4}  # touched, same content: no re-derive
+    assert len(calls) == 1
+
+    assert load(tag="v2") == {"double": 4}  # new derive() code
+    assert len(calls) == 2
+
+    source.write_text(json.dumps({"n": 5}))
+    assert load(tag="v2") == {"double": 10}
+    # parsed and derived entries share the one snapshot file
+    assert config_snapshot.load(str(source), snapshot=snapshot) == {"n": 5}
+    assert len(calls) == 3
+
+
+def test_model_router_without_snapshot_module_reads_settings(tmp_path):
+    hooks = tmp_path / "hooks"
+    hooks.mkdir()
+    shutil.copy(os.path.join(HOOKS_DIR, "model-router.py"), hooks)  # partial install
+    claude_dir = tmp_path / ".claude"
+    claude_dir.mkdir()
+    (claude_dir / "settings.json").write_text(json.dumps({"model": "haiku"}))
+    result = subprocess.run(
+        [sys.executable, str(hooks / "model-router.py")],
+        input=json.dumps({"tool_name": "Task", "tool_input": {}}),
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, HOME=str(tmp_path)),
+        timeout=10,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
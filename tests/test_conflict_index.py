@@ -0,0 +1,75 @@
+"""Tests for hooks/conflict_index.py."""
+
+import json
+import os
+import subprocess
+import sys
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import conflict_index  # noqa: E402
+import session_registry  # noqa: E402
+
+
+def test_update_session_is_incremental(tmp_path):
+    t = str(tmp_path)
+    conflict_index.update_session(t, "aaaa0001", ["/a", "/b"])
+    conflict_index.update_session(t, "bbbb0002", ["/b", "/c"])
+    assert conflict_index.sessions_for(t, "/b") == ["aaaa0001", "bbbb0002"]
+    assert conflict_index.sessions_for(t, "/b", exclude="aaaa0001") == ["bbbb0002"]
+    assert conflict_index.conflicts(t) == {"/b": ["aaaa0001", "bbbb0002"]}
+
+    conflict_index.update_session(t, "aaaa0001", ["/a"])
+    assert conflict_index.conflicts(t) == {}
+    conflict_index.update_session(t, "bbbb0002", None)
+    index = json.loads((tmp_path / conflict_index.INDEX_NAME).read_text())
+    assert index["paths"] == {"/a": ["aaaa0001"]}
+    assert list(index["sessions"]) == ["aaaa0001"]
+
+
+def test_registry_record_feeds_index_and_close_removes(tmp_path):
+    t = str(tmp_path)
+    session = {"session": "cccc0003", "status": "active", "files_touched": ["/x"]}
+    session_registry.record(t, session)
+    session_registry.record(t, {"session": "dddd0004", "status": "active", "files_touched": ["/x"]})
+    assert conflict_index.sessions_for(t, "/x", exclude="dddd0004") == ["cccc0003"]
+    session_registry.record(t, dict(session, status="closed"))
+    assert conflict_index.sessions_for(t, "/x") == ["dddd0004"]
+
+
+def test_archive_sweep_drops_deleted_sessions(tmp_path):
+    t = str(tmp_path)
+    session = {"session": "hhhh0008", "status": "stale", "files_touched": ["/y"]}
+    (tmp_path / "session-hhhh0008.json").write_text(json.dumps(session))
+    session_registry.record(t, session)
+    (tmp_path / "session-hhhh0008.json").unlink()
+    session_registry.archive_closed(t)
+    assert conflict_index.sessions_for(t, "/y") == []
+    assert "hhhh0008" not in session_registry.read_index(t)
+
+
+def test_rebuild_skips_closed_sessions(tmp_path):
+    for sid8, status in (("eeee0005", "active"), ("ffff0006", "stale"), ("gggg0007", "closed")):
+        (tmp_path / f"session-{sid8}.json").write_text(
+            json.dumps({"session": sid8, "status": status, "files_touched": ["/shared"]})
+        )
+    assert conflict_index.rebuild(str(tmp_path)) == 2
+    assert conflict_index.conflicts(str(tmp_path)) == {"/shared": ["eeee0005", "ffff0006"]}
+
+
+def test_cli_check_and_report(tmp_path):
+    terminals = tmp_path / ".claude" / "terminals"
+    conflict_index.update_session(str(terminals), "aaaa0001", ["/p"])
+    conflict_index.update_session(str(terminals), "bbbb0002", ["/p"])
+    env = dict(os.environ, HOME=str(tmp_path))
+    script = os.path.join(HOOKS_DIR, "conflict_index.py")
+    check = subprocess.run(
+        [sys.executable, script, "check", "/p", "aaaa0001"],
+        capture_output=True, text=True, env=env, timeout=15,
+    )
+    assert json.loads(check.stdout) == ["bbbb0002"]
+    report = subprocess.run(
+        [sys.executable, script, "report"], capture_output=True, text=True, env=env, timeout=15
+    )
+    assert json.loads(report.stdout) == {"/p": ["aaaa0001", "bbbb0002"]}
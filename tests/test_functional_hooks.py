@@ -286,6 +286,20 @@ class TestHookAudit:
         assert entry["decision"] == "error"
         assert "ValueError" in entry["reason"]
 
+    def test_hook_timer_records_histogram(self, isolated_env):
+        env, state_dir, _ = isolated_env
+        os.environ["TOKEN_GUARD_STATE_DIR"] = str(state_dir)
+        import importlib
+        import hook_audit
+
+        importlib.reload(hook_audit)
+        with hook_audit.HookTimer("timer-hook", "Write") as t:
+            t.decision = "block"
+        doc = json.loads((state_dir / "hook-metrics" / "timer-hook.json").read_text())
+        (day,) = doc["days"].values()
+        assert day["outcomes"] == {"fail_closed": 1}
+        assert sum(day["latency"].values()) == 1
+
     def test_log_decision_is_non_fatal_on_bad_path(self, tmp_path):
         """log_decision must never raise even if state dir is unwritable."""
         os.environ["TOKEN_GUARD_STATE_DIR"] = "/nonexistent/impossible/path"
@@ -437,6 +451,58 @@ class TestHookHealth:
         assert "credential-guard" in text
         assert "GREEN" in text or "WARN" in text or "RED" in text
 
+    def test_histograms_drive_percentiles(self, isolated_env):
+        env, state_dir, _ = isolated_env
+        import hook_utils
+
+        for ms in [10] * 90 + [300] * 9 + [1500]:
+            hook_utils.record_hook_outcome(
+                "hist-hook", "success", latency_ms=ms, state_dir=str(state_dir)
+            )
+        hook_utils.record_hook_outcome("hist-hook", "error", state_dir=str(state_dir))
+        os.environ["TOKEN_GUARD_STATE_DIR"] = str(state_dir)
+        import importlib
+        import hook_health
+
+        importlib.reload(hook_health)
+        h = hook_health.compute_health()["hooks"]["hist-hook"]
+        assert h["total_invocations"] == 101
+        assert h["errors"] == 1
+        lat = h["latency"]
+        assert lat["samples"] == 100
+        assert 10 <= lat["p50_ms"] < 11
+        assert 300 <= lat["p95_ms"] < 330
+        assert 300 <= lat["p99_ms"] < 330
+        assert lat["max_ms"] == 1500
+
+    def test_histogram_window_excludes_old_days(self, isolated_env):
+        env, state_dir, _ = isolated_env
+        metrics = state_dir / "hook-metrics"
+        metrics.mkdir()
+        (metrics / "old-hook.json").write_text(
+            json.dumps(
+                {
+                    "hook": "old-hook",
+                    "days": {
+                        "2000-01-01": {
+                            "outcomes": {"error": 50},
+                            "latency": {"80": 50},
+                            "max_ms": 1000,
+                        }
+                    },
+                }
+            )
+        )
+        os.environ["TOKEN_GUARD_STATE_DIR"] = str(state_dir)
+        import importlib
+        import hook_health
+
+        importlib.reload(hook_health)
+        assert hook_health.compute_health()["hooks"]["old-hook"]["grade"] == "RED"
+        windowed = hook_health.compute_health(window_days=7)
+        assert windowed["hooks"]["old-hook"]["total_invocations"] == 0
+        assert windowed["hooks"]["old-hook"]["grade"] == "GREEN"
+
     def test_cli_json_output(self, isolated_env):
         env, state_dir, _ = isolated_env
         script = os.path.join(HOOKS_DIR, "hook_health.py")
@@ -581,6 +647,46 @@ class TestResultCompressor:
         assert code == 0
 
 
+    def test_cumulative_warning_from_ledger(self, isolated_env):
+        """Cumulative pressure is tracked across invocations, not per result."""
+        env, state_dir, _ = isolated_env
+        payload = {
+            "hook_event_name": "PostToolUse",
+            "tool_name": "Read",
+            "tool_output": "r" * 300000,
+            "session_id": "sess_ledger",
+        }
+        for _ in range(2):
+            code, _, stderr = run_hook("result-compressor.py", payload, env)
+            assert code == 0
+            assert "CONTEXT WARNING" not in stderr
+        code, _, stderr = run_hook("result-compressor.py", payload, env)
+        assert "CONTEXT WARNING" in stderr
+        assert "3 results (3 large)" in stderr
+        ledger = json.loads((state_dir / "sess_ledger-context.json").read_text())
+        assert ledger["tools"]["Read"]["results"] == 3
+
+    def test_no_cumulative_warning_after_compaction(self, isolated_env):
+        """A compaction mark restarts pressure; totals keep accumulating."""
+        from hook_utils import mark_context_compacted
+
+        env, state_dir, _ = isolated_env
+        payload = {
+            "hook_event_name": "PostToolUse",
+            "tool_name": "Read",
+            "tool_output": "r" * 300000,
+            "session_id": "sess_compact",
+        }
+        for _ in range(3):
+            code, _, stderr = run_hook("result-compressor.py", payload, env)
+        assert "CONTEXT WARNING" in stderr
+        mark_context_compacted("sess_compact", state_dir=str(state_dir))
+        code, _, stderr = run_hook("result-compressor.py", payload, env)
+        assert code == 0
+        assert "CONTEXT WARNING" not in stderr
+        ledger = json.loads((state_dir / "sess_compact-context.json").read_text())
+        assert ledger["total_results"] == 4
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 5. teammate-idle.py
 # ─────────────────────────────────────────────────────────────────────────────
@@ -654,6 +760,52 @@ class TestTeammateIdle:
         assert code == 2
         assert "TODO" in stdout or "todo" in stdout.lower()
 
+    def test_binary_changed_file_is_skipped(self, isolated_env, tmp_path):
+        """Binary files are not scanned for markers."""
+        env, _, _ = isolated_env
+        blob = tmp_path / "blob.bin"
+        blob.write_bytes(b"\x00\x00 TODO FIXME \x00")
+        payload = {
+            "teammate_id": "erin",
+            "task": "update assets",
+            "output": "updated. all tests passed.",
+            "files_changed": [str(blob)],
+        }
+        code, _, _ = run_hook("teammate-idle.py", payload, env)
+        assert code == 0
+
+    def test_todo_count_is_capped(self, isolated_env, tmp_path):
+        """Marker counting stops at the report cap."""
+        env, _, _ = isolated_env
+        dirty_file = tmp_path / "dirty.py"
+        dirty_file.write_text("# TODO\n" * 500)
+        payload = {
+            "teammate_id": "eve",
+            "task": "implement foo",
+            "output": "done implementing. tests passed.",
+            "files_changed": [str(dirty_file)],
+        }
+        code, stdout, _ = run_hook("teammate-idle.py", payload, env)
+        assert code == 2
+        assert "has 20+ unresolved" in stdout
+
+    def test_scan_cache_reused_across_idles(self, isolated_env, tmp_path):
+        """Files scanned at the first idle are served from the session cache."""
+        env, _, home = isolated_env
+        clean = tmp_path / "clean.py"
+        clean.write_text("def foo():\n    return 1\n")
+        idle = {
+            "session_id": "sess-cache",
+            "teammate_id": "ivy",
+            "task": "implement foo",
+            "output": "implemented. tests passed.",
+            "files_changed": [str(clean)],
+        }
+        assert run_hook("teammate-idle.py", idle, env)[0] == 0
+        assert run_hook("teammate-idle.py", idle, env)[0] == 0
+        idle_log = (home / ".claude" / "logs" / "teammate-idle.log").read_text()
+        assert "scan_cache=0/1" in idle_log and "scan_cache=1/1" in idle_log
+
     def test_task_with_deliverable_no_files_no_output_holds(self, isolated_env):
         """Task says 'create X' but no files changed and no completion signal."""
         env, _, _ = isolated_env
@@ -781,6 +933,21 @@ class TestTaskCompleted:
         assert code == 2
         assert "vague" in stdout.lower()
 
+    def test_todo_in_changed_file_not_gated(self, isolated_env, tmp_path):
+        """Coordinator: markers in changed files are teammate-idle's check, not ours."""
+        env, _, _ = isolated_env
+        dirty = tmp_path / "dirty.py"
+        dirty.write_text("x = 1  # FIXME\n")
+        payload = {
+            "task": "implement feature",
+            "task_id": "T8",
+            "completion_message": "Implemented the feature and tested it",
+            "files_changed": [str(dirty)],
+            "teammate_id": "bob",
+        }
+        code, _, _ = run_hook("task-completed.py", payload, env)
+        assert code == 0
+
     def test_impl_task_no_files_blocked(self, isolated_env):
         """Coordinator: implement task with no files → exit 2."""
         env, _, _ = isolated_env
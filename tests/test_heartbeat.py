@@ -0,0 +1,250 @@
+"""Tests for hooks/heartbeat.py (the terminal-heartbeat.sh engine)."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import heartbeat  # noqa: E402
+
+SID = "hbtest01abcdef"
+
+
+def _payload(tool="Edit", path="/tmp/src/app.ts", session_id=SID, cwd="/tmp/proj"):
+    key = "command" if tool == "Bash" else "file_path"
+    return {"session_id": session_id, "tool_name": tool, "tool_input": {key: path}, "cwd": cwd}
+
+
+def _beat(home, lock_dir, payload, env=None, now=None):
+    return heartbeat.heartbeat(
+        payload, home=str(home), environ=env or {}, now=now, lock_dir=str(lock_dir)
+    )
+
+
+def _session(home, sid8="hbtest01"):
+    with open(home / ".claude" / "terminals" / f"session-{sid8}.json") as f:
+        return json.load(f)
+
+
+def _activity_lines(home, sid8="hbtest01"):
+    shard = home / ".claude" / "terminals" / "activity" / f"{sid8}.jsonl"
+    return shard.read_text().splitlines()
+
+
+def _write_session(home, sid8, **fields):
+    terminals = home / ".claude" / "terminals"
+    terminals.mkdir(parents=True, exist_ok=True)
+    data = {"session": sid8, "status": "active", "cwd": "/tmp"}
+    data.update(fields)
+    (terminals / f"session-{sid8}.json").write_text(json.dumps(data))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    home = tmp_path / "home"
+    locks = tmp_path / "locks"
+    home.mkdir()
+    locks.mkdir()
+    return home, locks
+
+
+def test_invalid_session_id_raises(dirs):
+    home, locks = dirs
+    with pytest.raises(ValueError):
+        _beat(home, locks, _payload(session_id="bad!"))
+
+
+def test_fallback_creates_session_and_compact_activity_line(dirs):
+    home, locks = dirs
+    _beat(home, locks, _payload(tool="Read", path="/tmp/file.ts"))
+    session = _session(home)
+    assert session["source"] == "heartbeat-fallback"
+    assert session["project"] == "proj"
+    assert session["branch"] == "none"
+    assert session["current_files"] == ["/tmp/file.ts"]
+    assert session["tool_counts"] == {"Read": 1}
+    lines = _activity_lines(home)
+    assert len(lines) == 1
+    assert json.loads(lines[0])["file"] == "file.ts"
+
+
+def test_update_applies_rings_counts_and_plan_file(dirs):
+    home, locks = dirs
+    touched = [f"/f{i}" for i in range(30)]
+    ops = [{"t": "x", "tool": "Read", "file": "a"}] * 10
+    _write_session(home, "hbtest01", files_touched=touched, recent_ops=ops, turn_count=4)
+    plan = str(home / ".claude" / "plans" / "p.md")
+    _beat(home, locks, _payload(tool="Write", path=plan))
+    session = _session(home)
+    assert session["turn_count"] == 5
+    assert session["tool_counts"] == {"Write": 1}
+    assert len(session["files_touched"]) == 30
+    assert session["files_touched"][-1] == plan
+    assert "/f0" not in session["files_touched"]
+    assert len(session["recent_ops"]) == 10
+    assert session["recent_ops"][-1]["file"] == "p.md"
+    assert session["plan_file"] == plan
+
+
+def test_cooldown_limits_full_beat_but_not_activity(dirs):
+    home, locks = dirs
+    _write_session(home, "hbtest01")
+    now = time.time()
+    _beat(home, locks, _payload(), now=now)
+    _beat(home, locks, _payload(), now=now + 1)
+    assert _session(home)["turn_count"] == 1
+    lines = _activity_lines(home)
+    assert len(lines) == 2
+    _beat(home, locks, _payload(), now=now + heartbeat.COOLDOWN_SECONDS + 1)
+    assert _session(home)["turn_count"] == 2
+
+
+def test_held_beat_lock_skips_full_beat(dirs):
+    home, locks = dirs
+    _write_session(home, "hbtest01")
+    held = heartbeat._try_lock(str(locks / "claude-heartbeat-hbtest01.lock"))
+    assert held is not None
+    try:
+        _beat(home, locks, _payload())
+    finally:
+        heartbeat._release(held)
+    assert "turn_count" not in _session(home)
+    assert len(_activity_lines(home)) == 1
+    _beat(home, locks, _payload(), now=time.time() + heartbeat.COOLDOWN_SECONDS + 1)
+    assert _session(home)["turn_count"] == 1
+
+
+def test_imports_without_fcntl():
+    # Windows (Git Bash + python3): no fcntl, hook_utils falls back to msvcrt.
+    code = (
+        "import sys, types\n"
+        "sys.modules['fcntl'] = None\n"
+        "sys.modules['msvcrt'] = types.ModuleType('msvcrt')\n"
+        "sys.platform = 'win32'\n"
+        f"sys.path.insert(0, {HOOKS_DIR!r})\n"
+        "import heartbeat\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_bash_command_first_line_is_the_path(dirs):
+    home, locks = dirs
+    _beat(home, locks, _payload(tool="Bash", path="ls -la /tmp/dir\necho done"))
+    line = json.loads(_activity_lines(home)[-1])
+    assert line["path"] == "ls -la /tmp/dir"
+    assert line["file"] == "dir"
+
+
+def test_max_turns_notifies_worker_and_lead(dirs):
+    home, locks = dirs
+    _write_session(home, "hbtest01", turn_count=2)
+    results = home / ".claude" / "terminals" / "results"
+    results.mkdir(parents=True)
+    (results / "W1.meta.json").write_text(json.dumps({"notify_session_id": "lead1234"}))
+    env = {"CLAUDE_WORKER_TASK_ID": "W1", "CLAUDE_WORKER_MAX_TURNS": "3"}
+    message = _beat(home, locks, _payload(), env=env)
+    assert message.startswith("[MAX_TURNS_REACHED] Task W1")
+    inbox = home / ".claude" / "terminals" / "inbox"
+    assert "hit 3 turns" in (inbox / "lead1234.jsonl").read_text()
+    # check-inbox's fast path only looks at the generation files
+    assert (inbox / "lead1234.gen").exists()
+    assert (inbox / "hbtest01.gen").exists()
+    assert _session(home)["current_task"] == "W1"
+
+
+def test_stale_sessions_marked_and_lead_notified_once(dirs):
+    home, locks = dirs
+    _write_session(home, "hbtest01")
+    _write_session(
+        home, "old00001", last_active="2020-01-01T00:00:00Z", current_task="T9"
+    )
+    results = home / ".claude" / "terminals" / "results"
+    results.mkdir(parents=True)
+    (results / "T9.meta.json").write_text(
+        json.dumps({"task_id": "T9", "notify_session_id": "lead5678", "mode": "interactive"})
+    )
+    _beat(home, locks, _payload())
+    assert _session(home, "old00001")["status"] == "stale"
+    assert _session(home)["status"] == "active"
+    assert (results / "T9.old00001.idle-notified").exists()
+    inbox = home / ".claude" / "terminals" / "inbox" / "lead5678.jsonl"
+    assert "[WORKER IDLE] Session old00001" in inbox.read_text()
+    assert inbox.with_suffix(".gen").exists()
+
+
+def test_full_beat_indexes_activity_shard(dirs):
+    home, locks = dirs
+    _beat(home, locks, _payload())
+    index = json.loads(
+        (home / ".claude" / "terminals" / "activity" / "index.json").read_text()
+    )
+    assert index["sessions"]["hbtest01"]["bytes"] > 0
+
+
+def test_full_beat_records_session_registry(dirs):
+    home, locks = dirs
+    _beat(home, locks, _payload())
+    index = json.loads(
+        (home / ".claude" / "terminals" / "sessions-index.json").read_text()
+    )
+    entry = index["sessions"]["hbtest01"]
+    assert entry["status"] == "active"
+    assert entry["project"] == "proj"
+
+
+def test_git_branch_reads_head(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".git" / "HEAD").write_text("ref: refs/heads/feature/x\n")
+    (repo / "sub").mkdir()
+    assert heartbeat.git_branch(str(repo / "sub")) == "feature/x"
+    (repo / ".git" / "HEAD").write_text("0123456789abcdef\n")
+    assert heartbeat.git_branch(str(repo)) == ""
+    assert heartbeat.git_branch(str(tmp_path / "missing")) == "none"
+
+
+@pytest.mark.skipif(shutil.which("jq") is None, reason="jq not installed")
+def test_session_update_matches_shell_engine(tmp_path):
+    """Both engines produce the same session file from the same input."""
+    results = {}
+    for engine in ("shell", "python"):
+        home = tmp_path / engine
+        (home / ".claude" / "terminals").mkdir(parents=True)
+        sid8 = "par" + engine[:5].ljust(5, "0")
+        _write_session(
+            home,
+            sid8,
+            last_active="2020-01-01T00:00:00Z",
+            tool_counts={"Read": 2},
+            files_touched=["/a", "/b"],
+            recent_ops=[],
+            turn_count=7,
+        )
+        lock = f"/tmp/claude-heartbeat-{sid8}.lock"
+        if os.path.exists(lock):
+            os.unlink(lock)
+        env = dict(os.environ, HOME=str(home), CLAUDE_HEARTBEAT_ENGINE=engine)
+        subprocess.run(
+            ["bash", os.path.join(HOOKS_DIR, "terminal-heartbeat.sh")],
+            input=json.dumps(_payload(tool="Edit", path="/a", session_id=sid8 + "xyz")),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=30,
+            check=True,
+        )
+        session = _session(home, sid8)
+        for key in ("last_active", "session", "claude_session_id", "recent_ops", "tty"):
+            session.pop(key, None)
+        results[engine] = session
+    assert results["python"] == results["shell"]
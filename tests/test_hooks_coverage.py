@@ -14,6 +14,7 @@ import importlib.util
 import io
 import json
 import os
+import subprocess
 import sys
 import time
 from pathlib import Path
@@ -262,6 +263,208 @@ class TestHookUtilsReadJsonlFaultTolerant:
         assert hook_utils.read_jsonl_fault_tolerant(str(p)) == []
 
 
+class TestHookUtilsReadTailLines:
+    """read_tail_lines(): last-N lines without reading the whole file."""
+
+    def test_returns_last_n_lines(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        p = tmp_path / "log.jsonl"
+        p.write_text("".join(f"{i}\n" for i in range(1000)))
+        assert hook_utils.read_tail_lines(str(p), 2, block_size=16) == ["998", "999"]
+
+    def test_missing_file_returns_empty(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        assert hook_utils.read_tail_lines(str(tmp_path / "nope"), 5) == []
+
+
+class TestHookUtilsHistogram:
+    """Log-bucketed latency histogram + record_hook_outcome()."""
+
+    def test_bucket_bounds_cover_latency(self):
+        _add_hooks_to_path()
+        import hook_utils
+
+        for ms in (0.2, 1, 1.5, 37, 499, 500, 12345):
+            idx = hook_utils.latency_bucket(ms)
+            assert hook_utils.bucket_upper_ms(idx) >= ms
+            if idx:
+                assert hook_utils.bucket_upper_ms(idx - 1) < ms
+
+    def test_percentile_from_buckets(self):
+        _add_hooks_to_path()
+        import hook_utils
+
+        b = {hook_utils.latency_bucket(5): 99, hook_utils.latency_bucket(900): 1}
+        assert hook_utils.histogram_percentile(b, 0.5) < 6
+        assert hook_utils.histogram_percentile(b, 1.0) >= 900
+        assert hook_utils.histogram_percentile({}, 0.5) is None
+
+    def test_record_outcome_accumulates(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        for _ in range(3):
+            assert hook_utils.record_hook_outcome(
+                "my/hook", "success", latency_ms=4, state_dir=str(tmp_path)
+            )
+        hook_utils.record_hook_outcome("my/hook", "bogus", state_dir=str(tmp_path))
+        doc = json.loads((tmp_path / "hook-metrics" / "my_hook.json").read_text())
+        (day,) = doc["days"].values()
+        assert day["outcomes"] == {"success": 3, "error": 1}
+        assert day["latency"] == {str(hook_utils.latency_bucket(4)): 3}
+
+    def test_record_outcome_prunes_old_days(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        metrics = tmp_path / "hook-metrics"
+        metrics.mkdir()
+        old_days = {
+            f"2000-01-{d:02d}": {"outcomes": {"success": 1}} for d in range(1, 21)
+        }
+        (metrics / "h.json").write_text(json.dumps({"hook": "h", "days": old_days}))
+        hook_utils.record_hook_outcome("h", "success", state_dir=str(tmp_path))
+        doc = json.loads((metrics / "h.json").read_text())
+        assert len(doc["days"]) == hook_utils.HOOK_METRICS_RETAIN_DAYS
+
+
+
+class TestHookUtilsContextLedger:
+    """track_context_growth() / read_context_ledger(): per-session totals."""
+
+    def test_accumulates_per_tool(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        sd = str(tmp_path)
+        hook_utils.track_context_growth("sess-1", "Bash", 6000, state_dir=sd)
+        hook_utils.track_context_growth("sess-1", "Read", 400, state_dir=sd)
+        ledger = hook_utils.track_context_growth("sess-1", "Bash", 10, state_dir=sd)
+        assert ledger["total_chars"] == 6410
+        assert ledger["total_results"] == 3
+        assert ledger["large_results"] == 1
+        assert ledger["total_tokens"] == 1500 + 100 + 3
+        assert ledger["tools"]["Bash"] == {
+            "chars": 6010,
+            "tokens": 1503,
+            "results": 2,
+            "large": 1,
+        }
+        assert (tmp_path / "sess-1-context.json").exists()
+
+    def test_window_decays_but_totals_do_not(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        sd = str(tmp_path)
+        hook_utils.track_context_growth("s", "Bash", 40000, state_dir=sd)
+        path = tmp_path / "s-context.json"
+        doc = json.loads(path.read_text())
+        doc["updated_at"] -= hook_utils.CONTEXT_WINDOW_HALF_LIFE_S
+        path.write_text(json.dumps(doc))
+        ledger = hook_utils.read_context_ledger("s", state_dir=sd)
+        assert ledger["window_tokens"] == pytest.approx(5000, rel=0.01)
+        assert ledger["total_tokens"] == 10000
+        assert ledger["pressure"] == 10000 / hook_utils.CONTEXT_PRESSURE_TOKENS
+
+    def test_compaction_restarts_pressure_but_keeps_totals(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        sd = str(tmp_path)
+        hook_utils.track_context_growth("s", "Read", 640000, state_dir=sd)
+        assert hook_utils.read_context_ledger("s", sd)["pressure"] == 0.8
+        hook_utils.mark_context_compacted("s", state_dir=sd)
+        ledger = hook_utils.read_context_ledger("s", sd)
+        assert ledger["pressure"] == 0
+        assert ledger["window_tokens"] == 0
+        assert ledger["total_tokens"] == 160000
+        assert ledger["compactions"] == 1
+        hook_utils.track_context_growth("s", "Read", 80000, state_dir=sd)
+        ledger = hook_utils.read_context_ledger("s", sd)
+        assert ledger["pressure"] == 20000 / hook_utils.CONTEXT_PRESSURE_TOKENS
+
+    def test_missing_or_corrupt_ledger_reads_empty(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        sd = str(tmp_path)
+        assert hook_utils.read_context_ledger("none", sd)["total_tokens"] == 0
+        (tmp_path / "bad-context.json").write_text("{corrupt")
+        ledger = hook_utils.track_context_growth("bad", "Grep", 8, state_dir=sd)
+        assert ledger["total_results"] == 1
+
+class TestHookUtilsPendingSpawns:
+    """Indexed pending_spawns shared by token-guard and agent lifecycle."""
+
+    def _spawn(self, decision_id, spawn_type, ts=None):
+        return {
+            "decision_id": decision_id,
+            "type": spawn_type,
+            "timestamp": time.time() if ts is None else ts,
+            "consumed": False,
+        }
+
+    def test_take_returns_newest_of_type(self):
+        _add_hooks_to_path()
+        import hook_utils
+
+        state = {"pending_spawns": []}
+        for did, t in (("a", "Explore"), ("b", "Plan"), ("c", "Explore")):
+            hook_utils.add_pending_spawn(state, self._spawn(did, t))
+        assert state["pending_index"]["by_type"] == {"Explore": [0, 2], "Plan": [1]}
+        taken = hook_utils.take_pending_spawn(state, "Explore", "agent-1")
+        assert taken["decision_id"] == "c" and taken["agent_id"] == "agent-1"
+        assert hook_utils.take_pending_spawn(state, "Explore")["decision_id"] == "a"
+        assert hook_utils.take_pending_spawn(state, "Explore") is None
+        assert "Explore" not in state["pending_index"]["by_type"]
+
+    def test_unindexed_or_stale_state_is_rebuilt(self):
+        _add_hooks_to_path()
+        import hook_utils
+
+        # State written by an older token-guard: no index at all.
+        state = {"pending_spawns": [self._spawn("x", "Plan"), self._spawn("y", "Plan")]}
+        assert hook_utils.take_pending_spawn(state, "Plan")["decision_id"] == "y"
+        # List edited without the index: "n" no longer matches.
+        state["pending_spawns"].append(self._spawn("z", "Plan"))
+        assert hook_utils.take_pending_spawn(state, "Plan")["decision_id"] == "z"
+
+    def test_prune_drops_old_and_reindexes(self):
+        _add_hooks_to_path()
+        import hook_utils
+
+        now = time.time()
+        state = {"pending_spawns": []}
+        hook_utils.add_pending_spawn(state, self._spawn("old", "Plan", ts=now - 1000))
+        for i in range(30):
+            hook_utils.add_pending_spawn(state, self._spawn(f"n{i}", "Explore", ts=now))
+        hook_utils.prune_pending_spawns(state, now, 300)
+        assert len(state["pending_spawns"]) == hook_utils.PENDING_SPAWNS_MAX
+        assert state["pending_index"]["n"] == hook_utils.PENDING_SPAWNS_MAX
+        assert "Plan" not in state["pending_index"]["by_type"]
+
+    def test_consume_pending_spawn_round_trips_file(self, tmp_path):
+        _add_hooks_to_path()
+        import hook_utils
+
+        state_file = tmp_path / "sess-abc.json"
+        state = {"agent_count": 1, "pending_spawns": []}
+        hook_utils.add_pending_spawn(state, self._spawn("d1", "Explore"))
+        state_file.write_text(json.dumps(state))
+        taken = hook_utils.consume_pending_spawn(str(state_file), "Explore", "ag")
+        assert taken["decision_id"] == "d1"
+        saved = json.loads(state_file.read_text())
+        assert saved["pending_spawns"][0]["consumed"] is True
+        assert saved["agent_count"] == 1
+        assert hook_utils.consume_pending_spawn(str(state_file), "Explore") is None
+        assert hook_utils.consume_pending_spawn(str(tmp_path / "none.json"), "X") is None
+
+
 # ─── auto-review-dispatch.py ─────────────────────────────────────────────────
 # Currently 0% (subprocess-only tests). Target: 70%+ via direct import.
 
@@ -620,16 +823,16 @@ class TestTokenGuardLoadConfig:
         cfg = mod.load_config()
         assert cfg["max_agents"] == 8
 
-    def test_one_per_session_is_a_set(self, tg):
+    def test_one_per_session_is_a_frozenset(self, tg):
         mod, _, _ = tg
         cfg = mod.load_config()
-        assert isinstance(cfg["one_per_session"], set)
+        assert isinstance(cfg["one_per_session"], frozenset)
         assert "Explore" in cfg["one_per_session"]
 
-    def test_always_allowed_is_a_set(self, tg):
+    def test_always_allowed_is_a_frozenset(self, tg):
         mod, _, _ = tg
         cfg = mod.load_config()
-        assert isinstance(cfg["always_allowed"], set)
+        assert isinstance(cfg["always_allowed"], frozenset)
         assert "claude-code-guide" in cfg["always_allowed"]
 
     def test_shadow_sample_pct_clamped_to_100(self, tmp_path):
@@ -682,6 +885,56 @@ class TestTokenGuardLoadConfig:
         assert "bad-mode" not in cfg["shadow_rules"]
 
 
+    def test_validated_config_cache_skips_parse_until_content_changes(self, tmp_path, monkeypatch):
+        state_dir = str(tmp_path / "state")
+        os.makedirs(state_dir)
+        config_path = tmp_path / "cfg.json"
+        config_path.write_text(json.dumps({"max_agents": 4}))
+        mod = _import_module(
+            "token-guard.py",
+            env_overrides={
+                "TOKEN_GUARD_STATE_DIR": state_dir,
+                "TOKEN_GUARD_CONFIG_PATH": str(config_path),
+            },
+        )
+        assert mod.load_config()["max_agents"] == 4
+        assert os.path.exists(mod.CONFIG_SNAPSHOT_PATH)
+
+        def no_validate(loaded):
+            raise AssertionError("config re-validated")
+
+        monkeypatch.setattr(mod, "validate_config", no_validate)
+        assert mod.load_config()["max_agents"] == 4
+        st = config_path.stat()
+        os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert mod.load_config()["max_agents"] == 4  # same content: hash hit
+        monkeypatch.undo()
+
+        config_path.write_text(json.dumps({"max_agents": 9}))
+        os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+        cfg = mod.load_config()
+        assert cfg["max_agents"] == 9
+        assert isinstance(cfg["always_allowed"], frozenset)
+
+    def test_rule_modes_table_precomputed(self, tmp_path):
+        state_dir = str(tmp_path / "state")
+        os.makedirs(state_dir)
+        config_path = str(tmp_path / "cfg.json")
+        with open(config_path, "w") as f:
+            json.dump({"shadow_default_mode": "off", "shadow_rules": {"Plan": " SHADOW "}}, f)
+        mod = _import_module(
+            "token-guard.py",
+            env_overrides={
+                "TOKEN_GUARD_STATE_DIR": state_dir,
+                "TOKEN_GUARD_CONFIG_PATH": config_path,
+            },
+        )
+        cfg = mod.load_config()
+        assert cfg["rule_modes"] == {"Plan": "shadow"}
+        assert mod.rule_mode(cfg, "Plan") == "shadow"
+        assert mod.rule_mode(cfg, "Explore") == "off"
+
+
 class TestTokenGuardRuleMode:
     """`rule_mode` — 3 paths."""
 
@@ -944,6 +1197,75 @@ def _run_tg_main(mod, stdin_json, monkeypatch):
         return e.code
 
 
+_TG_FS_PROBE = """
+import importlib.util, io, json, sys
+sys.path.insert(0, {hooks!r})
+spec = importlib.util.spec_from_file_location("tg_probe", {path!r})
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+events = []
+fs_events = {{"open", "os.mkdir", "os.listdir", "os.scandir", "os.remove", "os.rename"}}
+sys.addaudithook(
+    lambda ev, args: events.append([ev, str(args[0])]) if ev in fs_events else None
+)
+sys.stdin = io.StringIO({payload!r})
+code = None
+try:
+    mod.main()
+except SystemExit as e:
+    code = e.code
+sys.stdout.write(json.dumps({{"code": code, "events": events}}))
+"""
+
+
+def _tg_fs_events(state_dir, config_path, payload):
+    """Run token-guard main() in a child interpreter; report its file operations."""
+    code = _TG_FS_PROBE.format(
+        hooks=HOOKS_DIR,
+        path=os.path.join(HOOKS_DIR, "token-guard.py"),
+        payload=payload if isinstance(payload, str) else json.dumps(payload),
+    )
+    env = dict(
+        os.environ, TOKEN_GUARD_STATE_DIR=state_dir, TOKEN_GUARD_CONFIG_PATH=config_path
+    )
+    cp = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=30
+    )
+    assert cp.returncode == 0, cp.stderr
+    return json.loads(cp.stdout)
+
+
+class TestTokenGuardFastPath:
+    """Early exits in main() happen before any filesystem access."""
+
+    def test_non_task_tool_does_no_file_io(self, tmp_path):
+        result = _tg_fs_events(
+            *_make_tg_env(tmp_path),
+            {"tool_name": "Read", "session_id": "abcd1234", "tool_input": {}},
+        )
+        assert result == {"code": 0, "events": []}
+
+    def test_non_dict_payload_does_no_file_io(self, tmp_path):
+        result = _tg_fs_events(*_make_tg_env(tmp_path), "[1, 2, 3]")
+        assert result == {"code": 0, "events": []}
+
+    def test_always_allowed_only_reads_config(self, tmp_path):
+        payload = {
+            "tool_name": "Task",
+            "session_id": "abcd1234",
+            "tool_input": {"subagent_type": "claude-code-guide"},
+        }
+        state_dir, config_path = _make_tg_env(tmp_path)
+        _tg_fs_events(state_dir, config_path, payload)  # caches the validated config
+        result = _tg_fs_events(state_dir, config_path, payload)
+        assert result["code"] == 0
+        kinds = {ev for ev, _ in result["events"]}
+        assert kinds <= {"open"}
+        allowed = (config_path, os.path.join(state_dir, "config-snapshot.bin"))
+        for _, target in result["events"]:
+            assert target.startswith(allowed), target
+
+
 class TestTokenGuardMain:
     """main() — exercises the 450-stmt body via direct call with isolated env."""
 
@@ -1219,6 +1541,24 @@ class TestTokenGuardReport:
         assert "Allowed:" in out
         assert "Blocked:" in out
 
+    def test_report_without_audit_archive_module(self, tmp_path, capsys, monkeypatch):
+        state_dir = str(tmp_path / "state")
+        os.makedirs(state_dir)
+        mod = _import_module(
+            "token-guard.py",
+            env_overrides={
+                "TOKEN_GUARD_STATE_DIR": state_dir,
+                "TOKEN_GUARD_CONFIG_PATH": str(tmp_path / "cfg.json"),
+            },
+        )
+        with open(os.path.join(state_dir, "audit.jsonl"), "w") as f:
+            f.write(json.dumps({"event": "allow", "type": "Plan"}) + "\n")
+        monkeypatch.setitem(sys.modules, "audit_archive", None)  # partial install
+        mod.report()
+        out = capsys.readouterr().out
+        assert "TOKEN GUARD ANALYTICS" in out
+        assert "Archived history" not in out
+
     def test_report_with_block_necessity_pattern(self, tmp_path, capsys):
         state_dir = str(tmp_path / "state")
         os.makedirs(state_dir)
@@ -1258,6 +1598,35 @@ class TestTokenGuardReport:
         # JSON output should be parseable
         assert out.strip()
 
+    def test_report_json_uses_calibrated_agent_tokens(self, tmp_path, capsys):
+        state_dir = str(tmp_path / "state")
+        os.makedirs(state_dir)
+        mod = _import_module(
+            "token-guard.py",
+            env_overrides={
+                "TOKEN_GUARD_STATE_DIR": state_dir,
+                "TOKEN_GUARD_CONFIG_PATH": str(tmp_path / "cfg.json"),
+            },
+        )
+        with open(os.path.join(state_dir, "audit.jsonl"), "w") as f:
+            for event in ("allow", "allow", "block"):
+                f.write(json.dumps({"event": event, "type": "Explore"}) + "\n")
+        mod.report(json_output=True)
+        out = capsys.readouterr().out
+        data = json.loads(out[out.index("\n{\n") + 1 :])
+        assert data["estimated_tokens_used"] == 100000
+        assert data["token_estimate"] == "heuristic"
+
+        calib = {"agents": {"Explore": {"input": 8000, "output": 2000, "runs": 1}}}
+        with open(os.path.join(state_dir, "token-calibration.json"), "w") as f:
+            json.dump(calib, f)
+        mod.report(json_output=True)
+        out = capsys.readouterr().out
+        data = json.loads(out[out.index("\n{\n") + 1 :])
+        assert data["estimated_tokens_used"] == 20000
+        assert data["estimated_tokens_saved"] == 10000
+        assert data["token_estimate"] == "calibrated"
+
     def test_report_with_resume_and_team_entries(self, tmp_path, capsys):
         state_dir = str(tmp_path / "state")
         os.makedirs(state_dir)
@@ -1337,3 +1706,43 @@ class TestTokenGuardUsage:
         mod.usage()
         out = capsys.readouterr().out
         assert out.strip()  # Should produce some output
+
+
+# ─── result-compressor.py ────────────────────────────────────────────────────
+
+
+class TestResultCompressorMeasureOutputSize:
+    """measure_output_size(): JSON-equivalent size without serializing."""
+
+    def test_matches_json_length(self):
+        mod = _import_module("result-compressor.py")
+        payload = {
+            "stdout": 'line "one"\nline\ttwo\\',
+            "stderr": "",
+            "exit": 0,
+            "ratio": 0.5,
+            "ok": True,
+            "interrupted": False,
+            "extra": None,
+            "lines": ["a", "b", {"nested": [1, 2, 3]}],
+        }
+        expected = len(json.dumps(payload, ensure_ascii=False))
+        assert mod.measure_output_size(payload) == expected
+
+    def test_plain_string_is_its_length(self):
+        mod = _import_module("result-compressor.py")
+        assert mod.measure_output_size("héllo\n") == 6
+
+    def test_no_full_size_copy(self):
+        import tracemalloc
+
+        mod = _import_module("result-compressor.py")
+        payload = {"file": {"content": "x" * 5_000_000}}
+        tracemalloc.start()
+        try:
+            size = mod.measure_output_size(payload)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert size > 5_000_000
+        assert peak < 100_000
@@ -0,0 +1,92 @@
+"""Cold-import budgets for hook entry points (`python -X importtime`).
+
+Every hook runs in a fresh interpreter, so module imports are paid on every
+tool call, including the early-exit paths. Each hook gets a budget for the
+cumulative time of the imports its module triggers (interpreter startup
+excluded); a new eager import of something heavy fails here instead of
+silently slowing every call. Budgets are ~3x the best-of-three cost measured
+on a shared CI-class VM; scale them with HOOK_IMPORT_BUDGET_SCALE.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+SCALE = float(os.environ.get("HOOK_IMPORT_BUDGET_SCALE", "1"))
+
+# hook file -> budget in microseconds
+BUDGETS_US = {
+    "token-guard.py": 60000,
+    "read-efficiency-guard.py": 60000,
+    "heartbeat.py": 60000,
+    "agent_lifecycle.py": 70000,
+    "ops_aggregator.py": 90000,
+}
+
+# Modules that must stay deferred: each hook's common path never needs them.
+DEFERRED = {
+    "token-guard.py": ("difflib", "subprocess", "hashlib", "tempfile"),
+    "heartbeat.py": ("calendar", "hashlib", "subprocess"),
+    "ops_aggregator.py": ("ops_alerts", "ops_trends", "concurrent.futures"),
+}
+
+_PROBE = (
+    "import importlib.util as u, sys\n"
+    "sys.path.insert(0, {hooks!r})\n"
+    "spec = u.spec_from_file_location('hook_probe', {path!r})\n"
+    "spec.loader.exec_module(u.module_from_spec(spec))\n"
+    "print(','.join(sorted(sys.modules)))\n"
+)
+
+
+def _probe_once(hook):
+    code = _PROBE.format(hooks=HOOKS_DIR, path=os.path.join(HOOKS_DIR, hook))
+    cp = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert cp.returncode == 0, cp.stderr[-2000:]
+    total = 0
+    started = False
+    for line in cp.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  "):
+            continue  # nested: already counted in its top-level parent
+        if name.strip() == "importlib.util":
+            started = True  # everything before this is interpreter/probe setup
+            continue
+        if started:
+            total += int(cumulative)
+    return total, set(cp.stdout.strip().split(","))
+
+
+def _probe(hook):
+    """(cumulative import microseconds, loaded module names) for one hook.
+
+    The first run compiles any stale bytecode; the best of the next three is
+    what an installed hook pays per call (fresh interpreter, warm .pyc).
+    """
+    _probe_once(hook)
+    runs = [_probe_once(hook) for _ in range(3)]
+    return min(r[0] for r in runs), runs[0][1]
+
+
+@pytest.mark.parametrize("hook", sorted(BUDGETS_US))
+def test_cold_import_within_budget(hook):
+    total_us, _ = _probe(hook)
+    budget = BUDGETS_US[hook] * SCALE
+    assert total_us <= budget, f"{hook} imports took {total_us}us (budget {budget:.0f}us)"
+
+
+@pytest.mark.parametrize("hook", sorted(DEFERRED))
+def test_heavy_modules_stay_deferred(hook):
+    _, loaded = _probe(hook)
+    eager = [m for m in DEFERRED[hook] if m in loaded]
+    assert not eager, f"{hook} imports {eager} at module level"
@@ -0,0 +1,98 @@
+"""Tests for marker_scan.py — streamed, parallel TODO/FIXME scanning."""
+
+import os
+import sys
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import marker_scan as ms  # noqa: E402
+
+
+class TestCountMarkers:
+    def test_counts_marker_lines_like_findall(self, tmp_path):
+        f = tmp_path / "a.py"
+        f.write_text("x = 1  # TODO one FIXME same line\n# HACK\nok\n# XXX")
+        assert ms.count_markers(str(f)) == (3, "ok")
+
+    def test_marker_split_across_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ms, "CHUNK_BYTES", 8)
+        f = tmp_path / "a.py"
+        f.write_text("aaaaaaTODO\nbbbbbbbbbbbbbFIXME\n" * 3)
+        assert ms.count_markers(str(f)) == (6, "ok")
+
+    def test_max_count_short_circuits(self, tmp_path):
+        f = tmp_path / "a.py"
+        f.write_text("# TODO\n" * 100)
+        assert ms.count_markers(str(f), max_count=1) == (1, "truncated")
+
+    def test_skips_binary_large_and_missing(self, tmp_path):
+        binary = tmp_path / "b.bin"
+        binary.write_bytes(b"\x00\x01TODO")
+        big = tmp_path / "big.txt"
+        big.write_text("TODO\n" * 100)
+        assert ms.count_markers(str(binary)) == (None, "binary")
+        assert ms.count_markers(str(big), max_bytes=10) == (None, "too-large")
+        assert ms.count_markers(str(tmp_path / "nope")) == (None, "missing")
+
+
+class TestScanFiles:
+    def test_aggregates_in_input_order(self, tmp_path):
+        paths = []
+        for i in range(20):
+            f = tmp_path / f"f{i}.py"
+            f.write_text("# TODO\n" * (i % 3))
+            paths.append(str(f))
+        paths.append(str(tmp_path / "missing.py"))
+        scan = ms.scan_files(paths + paths[:2], workers=4)
+        assert list(scan["counts"]) == [p for i, p in enumerate(paths[:20]) if i % 3]
+        assert scan["counts"][paths[2]] == 2
+        assert scan["skipped"] == {paths[-1]: "missing"}
+        assert scan["scanned"] == 20
+        assert scan["unscanned"] == []
+
+    def test_exhausted_budget_reports_partial(self, tmp_path):
+        f = tmp_path / "a.py"
+        f.write_text("# TODO\n")
+        scan = ms.scan_files([str(f)], budget_seconds=0)
+        assert scan["unscanned"] == [str(f)]
+        assert scan["scanned"] == 0
+
+    def test_empty_and_non_string_paths(self):
+        scan = ms.scan_files([None, "", 3])
+        assert scan["counts"] == {} and scan["scanned"] == 0
+
+
+class TestScanCache:
+    def test_repeat_scan_hits_cache_until_file_changes(self, tmp_path):
+        cache = str(tmp_path / "state" / "s1-marker-scan.json")
+        f = tmp_path / "a.py"
+        f.write_text("# TODO\n")
+        first = ms.scan_files([str(f)], cache_path=cache)
+        assert (first["cache_hits"], first["cache_misses"]) == (0, 1)
+        second = ms.scan_files([str(f)], cache_path=cache)
+        assert (second["cache_hits"], second["cache_misses"]) == (1, 0)
+        assert second["counts"] == {str(f): 1}
+
+        f.write_text("# TODO\n# FIXME\n")
+        third = ms.scan_files([str(f)], cache_path=cache)
+        assert third["cache_misses"] == 1
+        assert third["counts"] == {str(f): 2}
+
+    def test_truncated_entry_not_reused_for_higher_cap(self, tmp_path):
+        cache = str(tmp_path / "c.json")
+        f = tmp_path / "a.py"
+        f.write_text("# TODO\n" * 10)
+        ms.scan_files([str(f)], max_count=2, cache_path=cache)
+        low = ms.scan_files([str(f)], max_count=2, cache_path=cache)
+        assert low["cache_hits"] == 1 and low["truncated"] == [str(f)]
+        full = ms.scan_files([str(f)], cache_path=cache)
+        assert full["cache_misses"] == 1 and full["counts"] == {str(f): 10}
+        capped = ms.scan_files([str(f)], max_count=3, cache_path=cache)
+        assert capped["cache_hits"] == 1 and capped["counts"] == {str(f): 3}
+
+    def test_cache_path_normalizes_session(self, tmp_path):
+        path = ms.scan_cache_path("../../evil", str(tmp_path))
+        assert os.path.dirname(path) == str(tmp_path)
+        assert path.endswith("-marker-scan.json")
+
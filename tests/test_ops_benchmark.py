@@ -0,0 +1,68 @@
+"""Tests for bench/ops-benchmark.py and its CI gate (tests/ops-perf-gate.py)."""
+
+import importlib.util
+import json
+import os
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = _load("ops_benchmark", os.path.join(REPO_ROOT, "bench", "ops-benchmark.py"))
+gate = _load("ops_perf_gate", os.path.join(REPO_ROOT, "tests", "ops-perf-gate.py"))
+
+
+def test_parse_scale():
+    assert bench.parse_scale("10k") == 10000
+    assert bench.parse_scale("1M") == 1000000
+    assert bench.parse_scale("2500") == 2500
+
+
+def test_generate_tree_counts_and_layout(tmp_path):
+    counts = bench.generate_tree(str(tmp_path), 2000)
+    state = tmp_path / ".claude" / "hooks" / "session-state"
+    audit = (state / "audit.jsonl").read_text().splitlines()
+    assert len(audit) == counts["audit"] == 1200
+    first, last = json.loads(audit[0]), json.loads(audit[-1])
+    assert first["record_type"] == "audit_decision"
+    assert first["ts"] < last["ts"]
+    assert counts["transcript_files"] == 1
+    assert (state / "hook-metrics" / "token-guard.json").exists()
+
+
+def test_run_reports_coordinator_shaped_scenarios():
+    result = bench.run(["1k"], runs=1)
+    assert set(result["scenarios"]) == set(bench.SCENARIOS)
+    stats = result["scenarios"]["ops_today"]["size_1k"]
+    assert set(stats) == {
+        "label",
+        "avg_ms",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "sample_size",
+    }
+    assert result["scales"] == {"size_1k": 1000}
+
+
+def test_gate_flags_ceiling_and_baseline_regression():
+    result = {
+        "scales": {"size_10k": 10000},
+        "scenarios": {
+            "ops_today": {"size_10k": {"p95_ms": 400.0}},
+            "hook_health": {"size_10k": {"p95_ms": 900.0}},
+        },
+    }
+    baseline = {"ops_today": {"size_10k": {"p95_ms": 100.0}}}
+    failures = gate.evaluate(result, baseline)
+    assert any(f.startswith("hook_health.size_10k") for f in failures)
+    assert any("baseline 100.0" in f for f in failures)
+    assert gate.evaluate(result, {"ops_today": {"size_10k": {"p95_ms": 300.0}}}) == [
+        f for f in failures if f.startswith("hook_health")
+    ]
@@ -89,6 +89,55 @@ class TestSequentialReadWarning:
         assert "sequential" in stderr.lower() or "TOKEN EFFICIENCY" in stderr
 
 
+class TestContextPressure:
+    """High pressure in the context ledger tightens the read thresholds."""
+
+    def _write_ledger(self, state_dir, session_key, total_tokens):
+        ledger = {
+            "schema_version": 1,
+            "total_chars": total_tokens * 4,
+            "total_tokens": total_tokens,
+            "total_results": 10,
+            "large_results": 5,
+            "tools": {"Read": {}},
+            "window_tokens": 0,
+            "updated_at": 0,
+        }
+        with open(os.path.join(state_dir, f"{session_key}-context.json"), "w") as f:
+            json.dump(ledger, f)
+
+    def test_duplicate_blocked_earlier_under_pressure(self, patched_hook):
+        self._write_ledger(patched_hook[1], "abcd1234efgh", 180000)
+        rc, _, _ = run_patched(patched_hook, make_input(file_path="/tmp/a.ts"))
+        assert rc == 0
+        rc, _, stderr = run_patched(patched_hook, make_input(file_path="/tmp/a.ts"))
+        assert rc == 2
+        assert "Context pressure is high" in stderr
+
+    @pytest.mark.skipif(shutil.which("jq") is None, reason="jq not installed")
+    def test_pressure_drops_after_compaction(self, patched_hook, tmp_path):
+        self._write_ledger(patched_hook[1], "abcd1234efgh", 180000)
+        env = dict(os.environ, HOME=str(tmp_path), TOKEN_GUARD_STATE_DIR=patched_hook[1])
+        subprocess.run(
+            ["bash", os.path.join(HOOKS_DIR, "pre-compact-save.sh")],
+            input=json.dumps({"session_id": "abcd1234efgh", "trigger": "auto"}),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        )
+        for _ in range(2):
+            rc, _, stderr = run_patched(patched_hook, make_input(file_path="/tmp/a.ts"))
+            assert rc == 0
+            assert "Context pressure is high" not in stderr
+
+    def test_normal_thresholds_without_pressure(self, patched_hook):
+        self._write_ledger(patched_hook[1], "abcd1234efgh", 1000)
+        for _ in range(2):
+            rc, _, _ = run_patched(patched_hook, make_input(file_path="/tmp/a.ts"))
+            assert rc == 0
+
 class TestSessionIdValidation:
     """Session ID handling — upstream uses 'unknown' default, no validation."""
 
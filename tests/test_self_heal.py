@@ -0,0 +1,420 @@
+"""Tests for self-heal.py SessionStart hook.
+
+Covers the phase scheduler (concurrency, budget, deferral) via direct import,
+and the end-to-end report written to self-heal.jsonl via subprocess.
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS_DIR = os.path.join(_REPO_ROOT, "hooks")
+HOOK_PATH = os.path.join(HOOKS_DIR, "self-heal.py")
+
+
+def _import_self_heal(env_overrides):
+    """Import self-heal.py as a fresh module with env-based paths."""
+    if HOOKS_DIR not in sys.path:
+        sys.path.insert(0, HOOKS_DIR)
+    saved = {k: os.environ.get(k) for k in env_overrides}
+    os.environ.update(env_overrides)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            f"_self_heal_{time.time_ns()}", HOOK_PATH
+        )
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        return mod
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+@pytest.fixture
+def heal_env(tmp_path):
+    """Isolated hooks/state/config dirs. Returns (env, state_dir)."""
+    state_dir = tmp_path / "session-state"
+    state_dir.mkdir()
+    config_path = tmp_path / "token-guard-config.json"
+    config_path.write_text(json.dumps({"max_agents": 5}))
+    env = {
+        "TOKEN_GUARD_HOOKS_DIR": HOOKS_DIR,
+        "TOKEN_GUARD_STATE_DIR": str(state_dir),
+        "TOKEN_GUARD_CONFIG_PATH": str(config_path),
+    }
+    return env, state_dir
+
+
+def _sleeper(seconds, result=(1, 0, [])):
+    def _phase():
+        time.sleep(seconds)
+        return result
+
+    return _phase
+
+
+class TestRunPhases:
+    def test_independent_phases_run_concurrently(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        plan = [(f"p{i}", _sleeper(0.2), ()) for i in range(3)]
+        t0 = time.monotonic()
+        results, timings, deferred = mod.run_phases(plan, budget_s=5)
+        assert time.monotonic() - t0 < 0.5
+        assert deferred == []
+        assert set(results) == {"p0", "p1", "p2"}
+        assert all(t["status"] == "ok" for t in timings.values())
+
+    def test_dependencies_run_in_order(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        order = []
+
+        def _rec(name):
+            def _phase():
+                order.append(name)
+                return (1, 0, [])
+
+            return _phase
+
+        plan = [("b", _rec("b"), ("a",)), ("a", _rec("a"), ())]
+        mod.run_phases(plan, budget_s=5)
+        assert order == ["a", "b"]
+
+    def test_budget_defers_slow_phases(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        plan = [
+            ("fast", _sleeper(0), ()),
+            ("slow", _sleeper(2), ()),
+            ("after_slow", _sleeper(0), ("slow",)),
+        ]
+        t0 = time.monotonic()
+        results, timings, deferred = mod.run_phases(plan, budget_s=0.2)
+        assert time.monotonic() - t0 < 1.0
+        assert "fast" in results
+        assert set(deferred) == {"slow", "after_slow"}
+        assert timings["slow"]["status"] == "deferred"
+
+    def test_phase_exception_is_contained(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+
+        def _boom():
+            raise RuntimeError("boom")
+
+        results, timings, _ = mod.run_phases([("boom", _boom, ())], budget_s=5)
+        assert timings["boom"]["status"] == "error"
+        assert "phase boom failed: RuntimeError" in results["boom"][2]
+
+    def test_priority_phases_start_first(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        mod.MAX_PARALLEL_PHASES = 1
+        order = []
+
+        def _rec(name):
+            def _phase():
+                order.append(name)
+                return (0, 0, [])
+
+            return _phase
+
+        plan = [(n, _rec(n), ()) for n in ("a", "b", "c")]
+        mod.run_phases(plan, budget_s=5, priority=["c"])
+        assert order[0] == "c"
+
+
+    def test_forced_phases_start_first_within_budget(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        mod.MAX_PARALLEL_PHASES = 1
+        plan = [
+            ("other", _sleeper(2), ()),
+            ("dep", _sleeper(0), ()),
+            ("starved", _sleeper(0), ("dep",)),
+        ]
+        t0 = time.monotonic()
+        results, _, deferred = mod.run_phases(plan, budget_s=0.2, force=["starved"])
+        assert time.monotonic() - t0 < 1.0
+        assert {"dep", "starved"} <= set(results)
+        assert deferred == ["other"]
+
+    def test_forced_phase_waited_for_at_most_budget_multiple(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        plan = [("ok", _sleeper(0.15), ()), ("hung", _sleeper(5), ())]
+        t0 = time.monotonic()
+        results, _, deferred = mod.run_phases(plan, budget_s=0.1, force=["ok", "hung"])
+        elapsed = time.monotonic() - t0
+        assert "ok" in results
+        assert deferred == ["hung"]
+        assert elapsed < 0.1 * mod.FORCED_BUDGET_MULTIPLE + 0.3
+
+    def test_started_mutating_phase_is_never_abandoned(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        plan = [
+            ("read_only", _sleeper(2), ()),
+            ("writer", _sleeper(0.4), ()),
+            ("after_writer", _sleeper(0), ("writer",)),
+        ]
+        results, timings, deferred = mod.run_phases(
+            plan, budget_s=0.1, wait=["writer"]
+        )
+        assert timings["writer"]["status"] == "ok"
+        # nothing new starts after the budget, even once the writer is done
+        assert set(deferred) == {"read_only", "after_writer"}
+
+    def test_mutating_phases_start_first(self, heal_env):
+        mod = _import_self_heal(heal_env[0])
+        mod.MAX_PARALLEL_PHASES = 1
+        order = []
+
+        def _rec(name):
+            def _phase():
+                order.append(name)
+                return (0, 0, [])
+
+            return _phase
+
+        plan = [(n, _rec(n), ()) for n in ("a", "b", "c")]
+        mod.run_phases(plan, budget_s=5, priority=["a"], wait=["c"])
+        assert order == ["c", "a", "b"]
+
+    def test_save_snapshots_state_under_lock(self, heal_env):
+        env, state_dir = heal_env
+        mod = _import_self_heal(env)
+        state = {"deferred": ["smoke_tests"]}
+        mod._HEAL_STATE_LOCK.acquire()
+        saver = threading.Thread(target=mod._save_heal_state, args=(state,))
+        saver.start()
+        saver.join(0.1)
+        assert saver.is_alive()  # waits for a phase thread holding the lock
+        state["smoke"] = {"verdict": "pass"}
+        mod._HEAL_STATE_LOCK.release()
+        saver.join(5)
+        saved = json.loads((state_dir / "self-heal-state.json").read_text())
+        assert saved == state
+
+
+class TestSmokeFingerprint:
+    def _count_runs(self, mod, monkeypatch):
+        calls = []
+        real = mod._run_smoke_tests
+
+        def _counting():
+            calls.append(1)
+            return real()
+
+        monkeypatch.setattr(mod, "_run_smoke_tests", _counting)
+        return calls
+
+    def test_warm_start_skips_smoke_tests(self, heal_env, monkeypatch):
+        mod = _import_self_heal(heal_env[0])
+        calls = self._count_runs(mod, monkeypatch)
+        _, repairs, _ = mod.phase_smoke_tests()
+        assert repairs == 0
+        assert mod._HEAL_STATE["smoke"]["verdict"] == "pass"
+        mod.phase_smoke_tests()
+        assert len(calls) == 1
+
+    def test_config_change_does_not_rerun_smoke_tests(self, heal_env, monkeypatch):
+        env, _ = heal_env
+        mod = _import_self_heal(env)
+        calls = self._count_runs(mod, monkeypatch)
+        mod.phase_smoke_tests()
+        with open(env["TOKEN_GUARD_CONFIG_PATH"], "w") as f:
+            json.dump({"max_agents": 3}, f)
+        mod.phase_smoke_tests()
+        assert len(calls) == 1
+
+    def test_shared_module_change_reruns_smoke_tests(
+        self, heal_env, monkeypatch, tmp_path
+    ):
+        env, _ = heal_env
+        hooks_copy = tmp_path / "hooks"
+        shutil.copytree(HOOKS_DIR, hooks_copy)
+        env = dict(env, TOKEN_GUARD_HOOKS_DIR=str(hooks_copy))
+        mod = _import_self_heal(env)
+        monkeypatch.setattr(mod, "_run_smoke_tests", lambda: (1, 0, []))
+        mod.phase_smoke_tests()
+        first = mod._HEAL_STATE["smoke"]["fingerprint"]
+        with open(hooks_copy / "token_calibration.py", "a") as f:
+            f.write("\n# changed\n")
+        mod.phase_smoke_tests()
+        assert mod._HEAL_STATE["smoke"]["fingerprint"] != first
+
+    def test_failed_verdict_is_not_reused(self, heal_env, monkeypatch):
+        mod = _import_self_heal(heal_env[0])
+        calls = []
+        monkeypatch.setattr(
+            mod, "_run_smoke_tests", lambda: calls.append(1) or (1, 1, ["failed"])
+        )
+        mod.phase_smoke_tests()
+        assert mod._HEAL_STATE["smoke"]["verdict"] == "fail"
+        mod.phase_smoke_tests()
+        assert len(calls) == 2
+
+
+class TestStreamingStateHealth:
+    def test_log_sampling_uses_shared_tail_reader(self, heal_env):
+        import hook_utils
+
+        mod = _import_self_heal(heal_env[0])
+        assert mod.read_tail_lines is hook_utils.read_tail_lines
+
+    def test_rotation_is_size_based(self, heal_env):
+        env, state_dir = heal_env
+        mod = _import_self_heal(env)
+        mod.AUDIT_MAX_BYTES = 100
+        (state_dir / "audit.jsonl").write_text("x" * 101)
+        _, repairs, actions = mod.phase_state_health()
+        assert repairs == 1
+        assert not (state_dir / "audit.jsonl").exists()
+        assert len(list((state_dir / "audit-archive").glob("audit-*.jsonl.gz"))) == 1
+        assert any("101 bytes" in a for a in actions)
+
+    def test_legacy_backup_folded_into_archive(self, heal_env):
+        env, state_dir = heal_env
+        mod = _import_self_heal(env)
+        (state_dir / "audit.jsonl.1").write_text('{"ts": "2026-01-01T00:00:00"}\n')
+        mod.phase_state_health()
+        assert not (state_dir / "audit.jsonl.1").exists()
+        assert len(list((state_dir / "audit-archive").glob("audit-*.jsonl.gz"))) == 1
+
+    def test_only_changed_state_files_are_parsed(self, heal_env):
+        env, state_dir = heal_env
+        mod = _import_self_heal(env)
+        old = state_dir / "old-session.json"
+        old.write_text("{}")
+        mod.phase_state_health()
+        hwm = mod._HEAL_STATE["state_mtime_hwm_ns"]
+        assert hwm >= old.stat().st_mtime_ns
+
+        # Corrupt the old file without bumping its mtime: not re-parsed.
+        st = old.stat()
+        old.write_text("{corrupt")
+        os.utime(old, ns=(st.st_atime_ns, st.st_mtime_ns))
+        new = state_dir / "new-session.json"
+        new.write_text("{corrupt")
+        os.utime(new, ns=(hwm + 10**9, hwm + 10**9))
+
+        _, _, actions = mod.phase_state_health()
+        assert "deleted corrupted new-session.json" in actions
+        assert old.exists()
+
+    def test_completed_mandatory_actions_compacted(self, heal_env):
+        env, state_dir = heal_env
+        mod = _import_self_heal(env)
+        import action_queue
+
+        queue = str(state_dir / "mandatory-actions.jsonl")
+        done = action_queue.enqueue("t", "a", queue_file=queue)
+        keep = action_queue.enqueue("t", "b", queue_file=queue)
+        action_queue.complete_action(done["id"], queue)
+        _, repairs, actions = mod.phase_state_health()
+        assert repairs == 1
+        assert "compacted mandatory-actions (2 records)" in actions
+        ids = [json.loads(l)["id"] for l in open(queue).read().splitlines()]
+        assert ids == [keep["id"]]
+
+
+class TestConfigRepairIsAtomic:
+    def _record_writes(self, mod, monkeypatch):
+        writes = []
+        real = mod.save_json_state
+
+        def _recording(path, state):
+            writes.append(path)
+            return real(path, state)
+
+        monkeypatch.setattr(mod, "save_json_state", _recording)
+        return writes
+
+    def test_structural_patch_goes_through_save_json_state(self, heal_env, monkeypatch):
+        env, _ = heal_env
+        mod = _import_self_heal(env)
+        writes = self._record_writes(mod, monkeypatch)
+        mod.phase_structural()
+        assert writes == [env["TOKEN_GUARD_CONFIG_PATH"]]
+        with open(env["TOKEN_GUARD_CONFIG_PATH"]) as f:
+            assert "fault_audit" in json.load(f)
+
+    def test_regenerated_config_goes_through_save_json_state(self, heal_env, monkeypatch):
+        env, _ = heal_env
+        with open(env["TOKEN_GUARD_CONFIG_PATH"], "w") as f:
+            f.write('{"max_agents": ')
+        mod = _import_self_heal(env)
+        writes = self._record_writes(mod, monkeypatch)
+        _, repairs, actions = mod.phase_auto_repair()
+        assert writes == [env["TOKEN_GUARD_CONFIG_PATH"]]
+        assert "regenerated config from defaults" in actions
+        with open(env["TOKEN_GUARD_CONFIG_PATH"]) as f:
+            assert json.load(f)["max_agents"] == mod.DEFAULT_CONFIG["max_agents"]
+        config_dir = os.path.dirname(env["TOKEN_GUARD_CONFIG_PATH"])
+        assert not [n for n in os.listdir(config_dir) if n.endswith(".tmp")]
+
+
+class TestMainReport:
+    def _run(self, env_overrides):
+        env = os.environ.copy()
+        env.update(env_overrides)
+        env.setdefault("PYTEST_CURRENT_TEST", "self-heal")  # no alert delivery
+        return subprocess.run(
+            [sys.executable, HOOK_PATH],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=30,
+        )
+
+    def test_records_per_phase_timings(self, heal_env):
+        env, state_dir = heal_env
+        proc = self._run(env)
+        assert proc.returncode == 0
+        assert proc.stdout.startswith("Self-heal:")
+        entry = json.loads((state_dir / "self-heal.jsonl").read_text().splitlines()[-1])
+        assert entry["budget_ms"] == 1500
+        assert "elapsed_ms" in entry
+        for phase in ("structural", "smoke_tests", "state_health", "runtime_drift"):
+            assert phase in entry["phases"]
+
+    def test_zero_budget_defers_and_persists(self, heal_env):
+        env, state_dir = heal_env
+        proc = self._run(dict(env, SELF_HEAL_BUDGET_MS="0"))
+        assert proc.returncode == 0
+        assert "deferred" in proc.stdout
+        entry = json.loads((state_dir / "self-heal.jsonl").read_text().splitlines()[-1])
+        assert entry["deferred"]
+        state = json.loads((state_dir / "self-heal-state.json").read_text())
+        assert state["deferred"] == entry["deferred"]
+
+    def test_repeatedly_deferred_phase_is_forced(self, heal_env):
+        env, state_dir = heal_env
+        streak = {"structural": 3, "smoke_tests": 3}
+        (state_dir / "self-heal-state.json").write_text(
+            json.dumps({"deferred": list(streak), "deferred_streak": streak})
+        )
+        proc = self._run(dict(env, SELF_HEAL_BUDGET_MS="200"))
+        assert proc.returncode == 0
+        entry = json.loads((state_dir / "self-heal.jsonl").read_text().splitlines()[-1])
+        assert entry["phases"]["smoke_tests"]["status"] == "ok"
+        assert entry["phases"]["structural"]["status"] == "ok"
+        state = json.loads((state_dir / "self-heal-state.json").read_text())
+        assert "smoke_tests" not in state["deferred_streak"]
+        assert all(n == 1 for n in state["deferred_streak"].values())
+
+    def test_smoke_verdict_persisted_across_sessions(self, heal_env):
+        env, state_dir = heal_env
+        self._run(env)
+        state = json.loads((state_dir / "self-heal-state.json").read_text())
+        assert state["smoke"]["verdict"] == "pass"
+        state["smoke"]["ts"] = "sentinel"
+        (state_dir / "self-heal-state.json").write_text(json.dumps(state))
+        self._run(env)
+        state = json.loads((state_dir / "self-heal-state.json").read_text())
+        assert state["smoke"]["ts"] == "sentinel"
@@ -0,0 +1,76 @@
+"""Tests for hooks/session_registry.py."""
+
+import json
+import os
+import sys
+import time
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import session_registry  # noqa: E402
+
+
+def _iso(epoch):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+def _write(terminals, sid8, **fields):
+    data = {"session": sid8, "status": "active", "project": "p"}
+    data.update(fields)
+    (terminals / f"session-{sid8}.json").write_text(json.dumps(data))
+    return data
+
+
+def test_record_summarizes_and_active_skips_closed(tmp_path):
+    session_registry.record(
+        str(tmp_path),
+        {"session": "aaaa0001", "status": "active", "files_touched": ["/a", "/b"]},
+    )
+    session_registry.record(str(tmp_path), {"session": "bbbb0002", "status": "closed"})
+    entry = session_registry.read_index(str(tmp_path))["aaaa0001"]
+    assert entry["files_count"] == 2
+    assert entry["files_digest"] == session_registry.files_digest(["/a", "/b"])
+    assert entry["files_digest"] != session_registry.files_digest(["/a"])
+    assert list(session_registry.active_sessions(str(tmp_path))) == ["aaaa0001"]
+
+
+def test_archive_closed_moves_old_sessions_only(tmp_path):
+    now = time.time()
+    old = _iso(now - session_registry.ARCHIVE_AFTER_SECONDS - 60)
+    _write(tmp_path, "live0001")
+    _write(tmp_path, "old00002", status="closed", ended=old)
+    _write(tmp_path, "new00003", status="closed", ended=_iso(now))
+
+    # No index yet: archive_closed builds it from the files on disk.
+    assert session_registry.archive_closed(str(tmp_path), now) == 1
+    assert not (tmp_path / "session-old00002.json").exists()
+    assert (tmp_path / "archive" / "session-old00002.json").exists()
+    assert (tmp_path / "session-new00003.json").exists()
+    index = session_registry.read_index(str(tmp_path))
+    assert index["old00002"]["archived"] is True
+    assert "archived" not in index["new00003"]
+
+    later = now + session_registry.RETAIN_SECONDS + 3600
+    session_registry.archive_closed(str(tmp_path), later)
+    assert not (tmp_path / "archive" / "session-old00002.json").exists()
+    assert "old00002" not in session_registry.read_index(str(tmp_path))
+
+
+def test_archive_skips_sessions_reopened_on_disk(tmp_path):
+    now = time.time()
+    ended = _iso(now - session_registry.ARCHIVE_AFTER_SECONDS - 60)
+    session = _write(tmp_path, "back0001", status="closed", ended=ended)
+    session_registry.record(str(tmp_path), session)
+    _write(tmp_path, "back0001", status="active")
+    assert session_registry.archive_closed(str(tmp_path), now) == 0
+    assert (tmp_path / "session-back0001.json").exists()
+
+
+def test_rebuild_includes_archived_sessions(tmp_path):
+    _write(tmp_path, "live0001")
+    (tmp_path / "archive").mkdir()
+    _write(tmp_path / "archive", "gone0002", status="closed")
+    found = session_registry.rebuild(str(tmp_path))
+    assert found["gone0002"]["archived"] is True
+    assert found["live0001"]["status"] == "active"
@@ -0,0 +1,170 @@
+"""Tests for token_calibration.py — content-class token estimation."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+import token_calibration as tc  # noqa: E402
+
+PROSE = (
+    "The quick brown fox jumps over the lazy dog while the committee "
+    "deliberates about the quarterly roadmap and its many dependencies. "
+) * 20
+CODE = (
+    "def handler(event):\n"
+    "    if event.get('x') == 1:\n"
+    "        return [i for i in range(3)]\n"
+) * 20
+LOGS = "".join(
+    f"2026-10-18T12:00:{i:02d} INFO worker-{i} processed batch ok\n" for i in range(40)
+)
+JSON_TEXT = json.dumps(
+    [{"id": i, "name": f"item-{i}", "tags": ["a", "b"]} for i in range(30)]
+)
+
+
+class TestClassify:
+    @pytest.mark.parametrize(
+        "text,expected",
+        [(PROSE, "prose"), (CODE, "code"), (LOGS, "logs"), (JSON_TEXT, "json")],
+    )
+    def test_classes(self, text, expected):
+        assert tc.classify(text) == expected
+
+    def test_empty_is_prose(self):
+        assert tc.classify("   \n") == "prose"
+
+
+class TestEstimate:
+    def test_defaults_without_calibration(self):
+        assert tc.estimate_tokens(3400, "code", calibration={}) == 1000
+        assert tc.estimate_tokens(4000, "prose", calibration={}) == 1000
+        assert tc.estimate_tokens(0, "json", calibration={}) == 0
+
+    def test_calibrated_ratio_used_once_trusted(self):
+        calib = {"classes": {"json": {"chars": 50000, "tokens": 20000}}}
+        assert tc.chars_per_token("json", calib) == 2.5
+        default = tc.DEFAULT_CHARS_PER_TOKEN["json"]
+        few = {"classes": {"json": {"chars": 500, "tokens": 200}}}
+        assert tc.chars_per_token("json", few) == default
+        absurd = {"classes": {"json": {"chars": 500000, "tokens": 2000}}}
+        assert tc.chars_per_token("json", absurd) == default
+
+
+def _assistant(msg_id, content, input_tokens, output_tokens, cache_read=0):
+    return {
+        "type": "assistant",
+        "message": {
+            "id": msg_id,
+            "role": "assistant",
+            "content": content,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_read_input_tokens": cache_read,
+            },
+        },
+    }
+
+
+def _tool_result(text):
+    return {
+        "type": "user",
+        "message": {
+            "role": "user",
+            "content": [{"type": "tool_result", "content": text}],
+        },
+    }
+
+
+class TestObserver:
+    def test_output_and_input_observations(self):
+        obs = tc.CalibrationObserver()
+        obs.feed(_assistant("m1", [{"type": "text", "text": PROSE}], 1000, 700))
+        obs.feed(_tool_result(CODE))
+        ok = [{"type": "text", "text": "ok"}]
+        obs.feed(_assistant("m2", ok, 200, 1, cache_read=2100))
+        observations = obs.close()
+        assert ("prose", len(PROSE), 700) in observations
+        # prompt grew 2300 - 1000 = 1300, minus m1's 700 output tokens
+        assert ("code", len(CODE), 600) in observations
+
+    def test_streamed_message_counted_once(self):
+        obs = tc.CalibrationObserver()
+        half = PROSE[: len(PROSE) // 2]
+        obs.feed(_assistant("m1", [{"type": "text", "text": half}], 10, 700))
+        obs.feed(_assistant("m1", [{"type": "text", "text": half}], 10, 700))
+        assert obs.close() == [("prose", 2 * len(half), 700)]
+
+    def test_mixed_content_is_skipped(self):
+        obs = tc.CalibrationObserver()
+        content = [{"type": "text", "text": PROSE}, {"type": "text", "text": CODE}]
+        obs.feed(_assistant("m1", content, 10, 900))
+        assert obs.close() == []
+
+
+class TestUpdateCalibration:
+    def test_accumulates_classes_and_agents(self, tmp_path):
+        path = str(tmp_path / "token-calibration.json")
+        totals = {"input_tokens": 40000, "output_tokens": 8000}
+        assert tc.update_calibration([("code", 6800, 2000)], "Explore", totals, path)
+        assert tc.update_calibration([("code", 6800, 2000)], "Plan", totals, path)
+        calib = tc.load_calibration(path)
+        assert calib["classes"]["code"] == {
+            "chars": 13600,
+            "tokens": 4000,
+            "samples": 2,
+        }
+        assert tc.chars_per_token("code", calib) == 3.4
+        assert calib["agents"]["*"]["runs"] == 2
+        assert tc.agent_token_estimate("Explore", calib) == (40000, 8000)
+        assert tc.agent_token_estimate("general", calib) == (40000, 8000)
+        assert tc.agent_token_estimate("x", {}) == tc.DEFAULT_AGENT_TOKENS
+
+    def test_old_observations_decay(self, tmp_path):
+        path = str(tmp_path / "token-calibration.json")
+        big = tc.MAX_CLASS_TOKENS
+        tc.update_calibration([("logs", 3 * big, big)], path=path)
+        tc.update_calibration([("logs", 300, 100)], path=path)
+        entry = tc.load_calibration(path)["classes"]["logs"]
+        assert entry["tokens"] == (big + 100) // 2
+
+
+class TestAgentMetricsLearning:
+    def test_subagent_stop_writes_calibration(self, tmp_path):
+        state_dir = tmp_path / "state"
+        transcript = tmp_path / "transcript.jsonl"
+        entries = [
+            _assistant("m1", [{"type": "text", "text": PROSE}], 1000, 700),
+            _tool_result(CODE),
+            _assistant("m2", [{"type": "text", "text": "ok"}], 2300, 1),
+        ]
+        transcript.write_text("".join(json.dumps(e) + "\n" for e in entries))
+        env = dict(os.environ, HOME=str(tmp_path))
+        env["TOKEN_GUARD_STATE_DIR"] = str(state_dir)
+        env["PYTHONPATH"] = HOOKS_DIR
+        payload = {
+            "hook_event_name": "SubagentStop",
+            "agent_type": "Explore",
+            "agent_id": "a1",
+            "session_id": "s1",
+            "agent_transcript_path": str(transcript),
+        }
+        proc = subprocess.run(
+            [sys.executable, os.path.join(HOOKS_DIR, "agent-metrics.py")],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=15,
+        )
+        assert proc.returncode == 0, proc.stderr
+        calib = json.loads((state_dir / "token-calibration.json").read_text())
+        assert calib["classes"]["code"]["tokens"] == 600
+        assert calib["agents"]["Explore"] == {"input": 3300, "output": 701, "runs": 1}
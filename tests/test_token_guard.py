@@ -25,6 +25,7 @@ def patched_hook(tmp_path, state_dir):
     """Copy token-guard.py and local helper modules to temp dir with env-based STATE_DIR."""
     for helper in (
         "hook_utils.py",
+        "config_snapshot.py",
         "guard_contracts.py",
         "guard_events.py",
         "guard_normalize.py",
@@ -0,0 +1,66 @@
+"""Tests for the in-process mode of `claude-token-guard benchmark`."""
+
+import json
+import os
+import subprocess
+import sys
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hooks")
+sys.path.insert(0, HOOKS_DIR)
+
+from claude_token_guard import cli  # noqa: E402
+
+PHASES = ("state_io_ms", "decision_ms", "total_ms")
+
+
+def test_cli_in_process_json_breakdown():
+    cp = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "claude_token_guard.cli",
+            "benchmark",
+            "--in-process",
+            "--iterations",
+            "25",
+            "--json",
+        ],
+        cwd=HOOKS_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert cp.returncode == 0, cp.stderr
+    doc = json.loads(cp.stdout)
+    assert doc["mode"] == "in-process"
+    assert doc["iterations"] == 25
+    assert doc["startup_ms"] > 0
+    (entry,) = doc["benchmarks"]
+    assert entry["import_ms"] > 0
+    for phase in PHASES:
+        assert set(entry[phase]) == {"min", "p50", "p95", "p99", "max"}
+    assert entry["exit_codes"] == {"0": 25}
+    assert entry["estimated_hook_ms"] >= doc["startup_ms"] + entry["import_ms"]
+
+
+def test_task_spawn_books_state_io_and_restores_guard(monkeypatch):
+    monkeypatch.setenv("TOKEN_GUARD_STATE_DIR", "/nonexistent-sentinel")
+    benches = [
+        {
+            "name": "task-allow",
+            "input": {
+                "tool_name": "Task",
+                "tool_input": {
+                    "subagent_type": "general-purpose",
+                    "description": "refactor the billing module across services",
+                },
+                "session_id": "bench-session-1",
+            },
+        }
+    ]
+    doc = cli._run_in_process_benchmark(benches, 10)
+    (entry,) = doc["benchmarks"]
+    # Every iteration starts from empty state, so each spawn is allowed.
+    assert entry["exit_codes"] == {"0": 10}
+    assert entry["state_io_ms"]["p50"] > 0
+    assert os.environ["TOKEN_GUARD_STATE_DIR"] == "/nonexistent-sentinel"